@@ -0,0 +1,354 @@
+"""Parsed document model of a Kosmos answer, cached next to the raw output.
+
+Each evaluator used to re-scan ``answer``/``formatted_answer`` with its own
+heuristics (``str(results).split(". ")``, ``raw_answer.find("Ranking ...")``,
+per-script section regexes). ``AnswerDocument`` parses an answer once into
+sections, list items, sentences with character offsets, the reference list
+and inline citation keys, and is persisted as ``answer_document.json`` beside
+``kosmos_raw_output.json``. Evaluators query the model instead of tokenizing
+the text again; the cache is invalidated when the answer text or the parser
+version changes.
+
+Usage:
+    from answer_document import load_document
+
+    doc = load_document("output/task5_results/kosmos_raw_output.json")
+    mechanisms = doc.items_in("Circuit-level mechanisms")
+    ranking = doc.items_in("Ranking potential interventions")
+    for sentence in doc.sentences_with(["vagus", "vagal"]):
+        print(sentence["text"])
+"""
+
+import ast
+import hashlib
+import json
+import re
+from pathlib import Path
+
+from artifacts import write_json
+from citations import extract_citations
+
+PARSER_VERSION = 1
+CACHE_NAME = "answer_document.json"
+
+HEADING_MD = re.compile(r"^\s{0,3}#{1,6}\s+(.+?)\s*#*\s*$")
+HEADING_BOLD = re.compile(r"^\s*\*\*(.+?)\*\*:?\s*$")
+LIST_ITEM = re.compile(r"^(\s*)(?:(\d+)[.)]|[-*•])\s+(.*)$")
+TABLE_ROW = re.compile(r"^\s*\|")
+RULE = re.compile(r"^\s*(?:-{3,}|\*{3,}|_{3,})\s*$")
+SENTENCE_END = re.compile(r"(?<=[.!?])[\"”’)\]]*\s+(?=[A-Z0-9(\"“‘\[α-ωΑ-Ω])")
+INLINE_CITATION_GROUP = re.compile(r"\(([^()]*?\bpages?\s+\d[^()]*)\)")
+INLINE_CITATION_KEY = re.compile(r"([^\s,;()]+)\s+pages?\s+(\d+(?:\s*[-–]\s*\d+)?)")
+REFERENCE_ENTRY = re.compile(r"^\s*(\d+)\.\s+\(([^)]*?)\):\s*(.*)$")
+
+
+def _normalize_title(title):
+    """Lowercase and fold unicode hyphens/quotes so titles match plain ASCII queries."""
+    title = re.sub(r"[‐-―−]", "-", title)
+    title = title.replace("’", "'").replace("“", '"').replace("”", '"')
+    return " ".join(title.lower().split())
+
+
+def _is_plain_heading(line, prev_blank, next_line):
+    """A short standalone line that introduces a paragraph or list."""
+    stripped = line.strip()
+    if not stripped or len(stripped) > 100 or not prev_blank:
+        return False
+    if stripped[-1] in ".,;!?)" or LIST_ITEM.match(line) or TABLE_ROW.match(line):
+        return False
+    return bool(next_line.strip()) or next_line == ""
+
+
+def answer_fields(raw):
+    """
+    Pull ``answer`` and ``formatted_answer`` out of any recorded raw-output layout.
+
+    Handles the task 2/3/4 layout (top-level fields), task 5 (``results``,
+    as a dict or any other object, which is read as ``str(results)``) and
+    task 1 (``task`` holding a repr of the task object).
+    """
+    if isinstance(raw, str):
+        return raw, ""
+    if not isinstance(raw, dict):
+        return str(raw), ""
+
+    for container in (raw, raw.get("results"), raw.get("result")):
+        if isinstance(container, dict) and container.get("answer"):
+            return container["answer"], container.get("formatted_answer") or ""
+
+    # Runners that saved a non-dict result object (answer string, list of sections)
+    for container in (raw.get("results"), raw.get("result")):
+        if container and not isinstance(container, dict):
+            return str(container), ""
+
+    task = raw.get("task")
+    if isinstance(task, str):
+        try:
+            task_dict = ast.literal_eval(task)
+            return task_dict.get("answer", ""), task_dict.get("formatted_answer", "") or ""
+        except (ValueError, SyntaxError):
+            match = re.search(r"answer='([^']+)", task)
+            return (match.group(1) if match else task), ""
+    return "", ""
+
+
+class AnswerDocument:
+    """Sections, list items, sentences and citations of one answer, with offsets."""
+
+    def __init__(self, text, formatted_text=""):
+        """
+        Parse an answer.
+
+        Args:
+            text: The answer body (``answer``)
+            formatted_text: The answer with its reference list
+                (``formatted_answer``); references are parsed from here
+        """
+        self.text = text
+        self.formatted_text = formatted_text
+        self.sections = []
+        self.list_items = []
+        self.sentences = []
+        self.inline_citations = []
+        self.references = []
+        self.citations = []
+        self._parse()
+
+    # ------------------------------------------------------------------
+    # Parsing
+    # ------------------------------------------------------------------
+
+    def _parse(self):
+        lines = self.text.split("\n")
+        offsets = []
+        pos = 0
+        for line in lines:
+            offsets.append(pos)
+            pos += len(line) + 1
+
+        current_section = None
+        paragraph_start = None
+        for i, line in enumerate(lines):
+            start = offsets[i]
+            end = start + len(line)
+            prev_blank = i == 0 or not lines[i - 1].strip() or bool(RULE.match(lines[i - 1]))
+            next_line = lines[i + 1] if i + 1 < len(lines) else ""
+
+            if RULE.match(line):
+                self._close_paragraph(paragraph_start, start)
+                paragraph_start = None
+                continue
+
+            title = None
+            for pattern in (HEADING_MD, HEADING_BOLD):
+                match = pattern.match(line)
+                if match:
+                    title = match.group(1).strip()
+                    break
+            if title is None and _is_plain_heading(line, prev_blank, next_line):
+                title = line.strip()
+
+            if title is not None:
+                self._close_paragraph(paragraph_start, start)
+                paragraph_start = None
+                if current_section is not None:
+                    current_section["end"] = start
+                current_section = {"title": title, "start": start, "body_start": end + 1,
+                                   "end": len(self.text)}
+                self.sections.append(current_section)
+                continue
+
+            if not line.strip() or TABLE_ROW.match(line):
+                self._close_paragraph(paragraph_start, start)
+                paragraph_start = None
+                continue
+
+            item = LIST_ITEM.match(line)
+            if item:
+                self._close_paragraph(paragraph_start, start)
+                paragraph_start = None
+                indent, number, body = item.groups()
+                self.list_items.append({
+                    "number": int(number) if number else None,
+                    "depth": len(indent.expandtabs(4)) // 2,
+                    "text": body.strip(),
+                    "start": end - len(body),
+                    "end": end,
+                    "section": current_section["title"] if current_section else None,
+                })
+                self._add_sentences(end - len(body), end)
+                continue
+
+            if paragraph_start is None:
+                paragraph_start = start
+
+        self._close_paragraph(paragraph_start, len(self.text))
+
+        for group in INLINE_CITATION_GROUP.finditer(self.text):
+            for key in INLINE_CITATION_KEY.finditer(group.group(1)):
+                self.inline_citations.append({
+                    "key": key.group(1),
+                    "pages": key.group(2),
+                    "start": group.start(1) + key.start(),
+                    "end": group.start(1) + key.end(),
+                })
+
+        for line in self.formatted_text.split("\n"):
+            entry = REFERENCE_ENTRY.match(line)
+            if entry:
+                number, label, body = entry.groups()
+                key = INLINE_CITATION_KEY.match(label)
+                self.references.append({
+                    "number": int(number),
+                    "key": key.group(1) if key else label,
+                    "pages": key.group(2) if key else None,
+                    "text": body.strip(),
+                    "ids": sorted({c.id for c in extract_citations(body)}),
+                })
+
+        source = self.formatted_text or self.text
+        self.citations = [c._asdict() for c in extract_citations(source)]
+
+    def _close_paragraph(self, start, end):
+        if start is not None:
+            self._add_sentences(start, end)
+
+    def _add_sentences(self, start, end):
+        block = self.text[start:end]
+        pos = 0
+        for boundary in SENTENCE_END.finditer(block):
+            self._add_sentence(start + pos, start + boundary.start())
+            pos = boundary.end()
+        self._add_sentence(start + pos, end)
+
+    def _add_sentence(self, start, end):
+        raw = self.text[start:end]
+        stripped = raw.strip()
+        if stripped:
+            lead = len(raw) - len(raw.lstrip())
+            self.sentences.append({"text": stripped, "start": start + lead,
+                                   "end": start + lead + len(stripped)})
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+
+    def find_section(self, title):
+        """First section whose title contains ``title`` (case/hyphen-insensitive)."""
+        wanted = _normalize_title(title)
+        for section in self.sections:
+            if wanted in _normalize_title(section["title"]):
+                return section
+        return None
+
+    def sections_matching(self, pattern, flags=re.IGNORECASE):
+        """All sections whose title matches a regex."""
+        regex = re.compile(pattern, flags)
+        return [s for s in self.sections if regex.search(s["title"])]
+
+    def section_text(self, title):
+        """Body text of the first section matching ``title`` ("" if absent)."""
+        section = self.find_section(title)
+        if section is None:
+            return ""
+        return self.text[min(section["body_start"], section["end"]):section["end"]]
+
+    def items_in(self, title, numbered_only=True):
+        """Top-level list items inside the section matching ``title``, as text."""
+        section = self.find_section(title)
+        if section is None:
+            return []
+        return [
+            item["text"] for item in self.list_items
+            if section["start"] <= item["start"] < section["end"]
+            and item["depth"] == 0
+            and (item["number"] is not None or not numbered_only)
+        ]
+
+    def sentences_with(self, keywords, min_length=0):
+        """Sentences containing any of ``keywords`` (case-insensitive)."""
+        keywords = [k.lower() for k in keywords]
+        return [
+            s for s in self.sentences
+            if len(s["text"]) > min_length and any(k in s["text"].lower() for k in keywords)
+        ]
+
+    def citation_ids(self, scheme):
+        """Unique identifiers of one scheme ("doi", "nct", ...) in order of appearance."""
+        return list(dict.fromkeys(c["id"] for c in self.citations if c["scheme"] == scheme))
+
+    # ------------------------------------------------------------------
+    # Persistence
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def fingerprint(text, formatted_text=""):
+        h = hashlib.sha256()
+        h.update(f"v{PARSER_VERSION}\0".encode())
+        h.update(text.encode("utf-8"))
+        h.update(b"\0")
+        h.update(formatted_text.encode("utf-8"))
+        return h.hexdigest()
+
+    def to_dict(self):
+        return {
+            "parser_version": PARSER_VERSION,
+            "fingerprint": self.fingerprint(self.text, self.formatted_text),
+            "text": self.text,
+            "formatted_text": self.formatted_text,
+            "sections": self.sections,
+            "list_items": self.list_items,
+            "sentences": self.sentences,
+            "inline_citations": self.inline_citations,
+            "references": self.references,
+            "citations": self.citations,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        doc = cls.__new__(cls)
+        doc.text = data["text"]
+        doc.formatted_text = data["formatted_text"]
+        for field in ("sections", "list_items", "sentences", "inline_citations",
+                      "references", "citations"):
+            setattr(doc, field, data[field])
+        return doc
+
+
+def load_document(raw_output, cache=True):
+    """
+    Load the parsed answer for a raw output file, parsing at most once.
+
+    Args:
+        raw_output: Path to ``kosmos_raw_output.json`` (or a raw dict/string,
+            in which case nothing is cached)
+        cache: Read/write ``answer_document.json`` beside the raw output
+
+    Returns:
+        AnswerDocument
+    """
+    if not isinstance(raw_output, (str, Path)):
+        return AnswerDocument(*answer_fields(raw_output))
+
+    raw_path = Path(raw_output)
+    with open(raw_path) as f:
+        text, formatted_text = answer_fields(json.load(f))
+
+    cache_path = raw_path.with_name(CACHE_NAME)
+    if raw_path.stem != "kosmos_raw_output":
+        cache_path = raw_path.with_name(f"{raw_path.stem}.{CACHE_NAME}")
+
+    expected = AnswerDocument.fingerprint(text, formatted_text)
+    if cache and cache_path.exists():
+        try:
+            with open(cache_path) as f:
+                data = json.load(f)
+            if data.get("fingerprint") == expected:
+                return AnswerDocument.from_dict(data)
+        except (ValueError, KeyError):
+            pass  # corrupt or old cache - reparse below
+
+    doc = AnswerDocument(text, formatted_text)
+    if cache:
+        write_json(cache_path, doc.to_dict(), manifest=False)
+    return doc
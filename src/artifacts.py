@@ -0,0 +1,214 @@
+"""Atomic, crash-consistent writes for result artifacts.
+
+A plain ``open(path, "w")`` truncates the file before writing, so a crash (or
+a reader running concurrently) can see empty or half-written JSON. Every
+writer here goes through a temp file in the same directory, fsyncs it and
+``os.replace``s it over the target, so readers only ever see the old or the
+new complete file. The file keeps the target's permissions (or gets the
+umask default for a new file), as with a plain ``open``.
+
+Each results directory can also carry a ``MANIFEST.json`` that maps artifact
+names to their SHA-256, size and write time, which downstream stages use to
+check they are reading a complete, current artifact.
+
+Usage:
+    from artifacts import write_json, write_text, verify_manifest
+
+    write_json("output/task1_results/metrics.json", metrics)
+    write_text("output/task1_results/task1_report.md", report)
+    problems = verify_manifest("output/task1_results")
+"""
+
+import hashlib
+import json
+import os
+import stat
+import tempfile
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:  # Windows: manifest updates are atomic but not serialised
+    fcntl = None
+
+MANIFEST_NAME = "MANIFEST.json"
+
+# os.umask can only be read by setting it; do it once, before any threads
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+
+def _fsync_dir(directory):
+    """Persist a rename by fsyncing the containing directory (POSIX only)."""
+    if os.name != "posix":
+        return
+    fd = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+@contextmanager
+def atomic_open(path, mode="w", encoding="utf-8"):
+    """
+    Open a temp file that replaces ``path`` only if the block succeeds.
+
+    Args:
+        path: Final artifact path
+        mode: "w" for text or "wb" for bytes
+        encoding: Text encoding (ignored for binary mode)
+
+    Example:
+        with atomic_open("output/task3_results/analysis_notebook.ipynb") as f:
+            nbformat.write(nb, f)
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        # mkstemp creates 0600 files; keep the target's mode, or what open() would give
+        if hasattr(os, "fchmod"):
+            try:
+                file_mode = stat.S_IMODE(os.stat(path).st_mode)
+            except FileNotFoundError:
+                file_mode = 0o666 & ~_UMASK
+            os.fchmod(fd, file_mode)
+        with os.fdopen(fd, mode, **({} if "b" in mode else {"encoding": encoding})) as f:
+            yield f
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+        _fsync_dir(path.parent)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except FileNotFoundError:
+            pass
+        raise
+
+
+def write_bytes(path, data, manifest=True):
+    """
+    Atomically write ``data`` to ``path``.
+
+    With ``manifest``, the rename and the manifest entry happen under the
+    directory's manifest lock, so ``verify_manifest`` never sees the new
+    file with the old hash.
+
+    Args:
+        path: Artifact path
+        data: Bytes to write
+        manifest: Record the artifact's hash in the directory's MANIFEST.json
+
+    Returns:
+        SHA-256 hex digest of ``data``
+    """
+    digest = hashlib.sha256(data).hexdigest()
+    if not manifest:
+        with atomic_open(path, "wb") as f:
+            f.write(data)
+        return digest
+
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with _locked(_lock_path(path.parent)):
+        with atomic_open(path, "wb") as f:
+            f.write(data)
+        _record(path, digest, len(data))
+    return digest
+
+
+def write_text(path, text, manifest=True):
+    """Atomically write a text artifact (reports, task IDs); returns its SHA-256."""
+    return write_bytes(path, text.encode("utf-8"), manifest=manifest)
+
+
+def write_json(path, obj, indent=2, default=None, manifest=True):
+    """Atomically write a JSON artifact; returns its SHA-256."""
+    text = json.dumps(obj, indent=indent, default=default)
+    return write_text(path, text, manifest=manifest)
+
+
+def _lock_path(directory):
+    return Path(directory) / f".{MANIFEST_NAME}.lock"
+
+
+@contextmanager
+def _locked(lock_path, shared=False):
+    """Hold the manifest lock; readers take it shared and never create it."""
+    if fcntl is None:
+        yield
+        return
+    try:
+        lock = open(lock_path, "r" if shared else "a")
+    except FileNotFoundError:  # nothing was ever written under the lock
+        yield
+        return
+    with lock:
+        fcntl.flock(lock, fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+def load_manifest(results_dir):
+    """Return the manifest dict for ``results_dir`` (empty if none yet)."""
+    manifest_path = Path(results_dir) / MANIFEST_NAME
+    if not manifest_path.exists():
+        return {}
+    with open(manifest_path) as f:
+        return json.load(f)
+
+
+def update_manifest(path, digest, size):
+    """Record ``path``'s hash in its directory's MANIFEST.json."""
+    path = Path(path)
+    with _locked(_lock_path(path.parent)):
+        _record(path, digest, size)
+
+
+def _record(path, digest, size):
+    """Manifest update proper; the caller holds the directory's lock."""
+    directory = path.parent
+    manifest = load_manifest(directory)
+    manifest[path.name] = {
+        "sha256": digest,
+        "size": size,
+        "written_at": datetime.now().isoformat(),
+    }
+    with atomic_open(directory / MANIFEST_NAME) as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+
+
+def file_sha256(path, chunk_size=1 << 20):
+    """SHA-256 of a file on disk, read in chunks."""
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def verify_manifest(results_dir):
+    """
+    Check every artifact listed in a results directory's manifest.
+
+    Returns:
+        Dict mapping artifact name to a problem ("missing" or "hash mismatch");
+        empty if everything matches
+    """
+    results_dir = Path(results_dir)
+    problems = {}
+    # Shared lock: writers rename an artifact and record its hash together
+    with _locked(_lock_path(results_dir), shared=True):
+        for name, entry in load_manifest(results_dir).items():
+            path = results_dir / name
+            if not path.exists():
+                problems[name] = "missing"
+            elif file_sha256(path) != entry["sha256"]:
+                problems[name] = "hash mismatch"
+    return problems
@@ -0,0 +1,229 @@
+"""Throughput and memory benchmark for the Kosmos answer parsers.
+
+Runs every parser over synthetic answers (``synthetic_answers``) of
+increasing size and reports the best-of-N wall time, throughput over the raw
+file size, peak traced memory and a scaling exponent between consecutive
+sizes (1.0 = linear; values well above 1 mean the parser will not survive
+much longer answers). Each parser reads the raw output file the way its
+evaluator does, so JSON decoding is included. Parsers whose module cannot be
+imported here (e.g. ``task5_monitor_and_process`` needs ``edison_client``)
+are reported as skipped, not failed. Caches are bypassed: the molecule cache
+is in-memory and ``answer_document.json`` is removed before each run.
+
+Run from the repository root (the task 4 evaluator loads its ground truth
+from ``input/`` on import):
+
+    python src/benchmark_parsers.py --sizes 15000 150000 1500000
+    python src/benchmark_parsers.py --parsers citations smiles_scanner -o cache/parser_benchmark.json
+"""
+
+import importlib
+import json
+import math
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections import namedtuple
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+from answer_document import CACHE_NAME, answer_fields, load_document
+from artifacts import write_json
+from synthetic_answers import generate_answer, raw_output, recorded_sentences
+
+Parser = namedtuple("Parser", ["name", "layout", "modules", "run"])
+
+
+def _read(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def _task1_parse(path, modules):
+    parse = modules["parse_task1_results_fixed"]
+    return parse.parse_answer(parse.extract_answer(_read(path)))
+
+
+def _task4_molecules(path, modules):
+    evaluate, cache = modules["task4_evaluate"], modules["molecule_cache"]
+    evaluate.molecule_cache = cache.MoleculeCache(None)  # cold, and nothing written to cache/
+    raw = _read(path)
+    doc = load_document(path, cache=False)
+    molecules = []
+    for section in evaluate.molecule_sections(doc, raw):
+        props = evaluate.extract_properties_from_text(section)
+        props["synthesis_steps"] = evaluate.count_synthesis_steps(section)
+        molecules.append(props)
+    return molecules
+
+
+def _task5_parse_results(path, modules):
+    return modules["task5_monitor_and_process"].parse_results(path)
+
+
+def _answer_document(path, modules):
+    return load_document(path, cache=False)
+
+
+def _citations(path, modules):
+    answer, formatted_answer = answer_fields(_read(path))
+    return modules["citations"].extract_citations(formatted_answer or answer)
+
+
+def _smiles_scanner(path, modules):
+    answer, _ = answer_fields(_read(path))
+    return modules["smiles_scanner"].find_smiles_candidates(answer)
+
+
+def _notebook_figures(path, modules):
+    return modules["notebook_figures"].extract_figures(path, store_dir=None)
+
+
+PARSERS = [
+    Parser("task1_parse", "task1", ["parse_task1_results_fixed"], _task1_parse),
+    Parser("task4_molecules", "task4", ["task4_evaluate", "molecule_cache"], _task4_molecules),
+    Parser("task5_parse_results", "task5", ["task5_monitor_and_process"], _task5_parse_results),
+    Parser("answer_document", "task5", [], _answer_document),
+    Parser("citations", "task5", ["citations"], _citations),
+    Parser("smiles_scanner", "task4", ["smiles_scanner"], _smiles_scanner),
+    Parser("notebook_figures", "task3", ["notebook_figures"], _notebook_figures),
+]
+
+
+def _import(names):
+    """Imported modules by name, or the ImportError message."""
+    modules = {}
+    for name in names:
+        try:
+            modules[name] = importlib.import_module(name)
+        except ImportError as e:
+            return None, f"{type(e).__name__}: {e}"
+    return modules, None
+
+
+def _measure(parser, path, modules, repeats):
+    """(best seconds, peak traced bytes) for one parser on one file."""
+    cache_file = path.with_name(CACHE_NAME)
+    best = math.inf
+    for _ in range(repeats):
+        cache_file.unlink(missing_ok=True)
+        start = time.perf_counter()
+        parser.run(path, modules)
+        best = min(best, time.perf_counter() - start)
+
+    # Separate run: tracemalloc slows allocation-heavy code several-fold
+    cache_file.unlink(missing_ok=True)
+    tracemalloc.start()
+    try:
+        parser.run(path, modules)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return best, peak
+
+
+def run_benchmark(sizes=(15_000, 150_000), parsers=None, repeats=3, seed=0, **params):
+    """
+    Benchmark parsers across answer sizes.
+
+    Args:
+        sizes: Answer sizes in characters (see ``generate_answer``)
+        parsers: Parser names to run (default: all)
+        repeats: Timed runs per parser and size (the best is reported)
+        seed: Corpus seed
+        params: Extra ``generate_answer`` parameters (citation_density,
+            smiles_count, ranking_length, notebook_cells, figures, ...)
+
+    Returns:
+        Report dict: ``corpus`` (per size: characters, file bytes per layout,
+        embedded counts) and ``results`` (per parser: per-size timings, or
+        ``skipped`` with the import error)
+    """
+    selected = [p for p in PARSERS if parsers is None or p.name in parsers]
+    params.setdefault("notebook_cells", 20)
+    params.setdefault("figures", 2)
+    sentences = recorded_sentences()
+    report = {"corpus": {}, "results": {}}
+
+    with tempfile.TemporaryDirectory(prefix="parser_benchmark_") as tmp:
+        files = {}
+        for size in sizes:
+            synthetic = generate_answer(size=size, sentences=sentences, seed=seed, **params)
+            corpus = {
+                "answer_chars": len(synthetic.answer),
+                "formatted_answer_chars": len(synthetic.formatted_answer),
+                "dois": len(synthetic.expected["dois"]),
+                "ncts": len(synthetic.expected["ncts"]),
+                "smiles": len(synthetic.expected["smiles"]),
+                "numbered_items": synthetic.expected["numbered_items"],
+                "file_bytes": {},
+            }
+            for layout in {p.layout for p in selected}:
+                path = Path(tmp) / f"{layout}_{size}" / "kosmos_raw_output.json"
+                path.parent.mkdir()
+                path.write_text(json.dumps(raw_output(synthetic, layout)))
+                files[layout, size] = path
+                corpus["file_bytes"][layout] = path.stat().st_size
+            report["corpus"][size] = corpus
+
+        for parser in selected:
+            modules, error = _import(parser.modules)
+            if error:
+                report["results"][parser.name] = {"skipped": error}
+                continue
+            rows = []
+            for size in sizes:
+                path = files[parser.layout, size]
+                seconds, peak = _measure(parser, path, modules, repeats)
+                rows.append({
+                    "size": size,
+                    "seconds": seconds,
+                    "mb_per_second": path.stat().st_size / 1e6 / max(seconds, 1e-9),
+                    "peak_memory_mb": peak / 1e6,
+                })
+            for previous, row in zip(rows, rows[1:]):
+                ratio = report["corpus"][row["size"]]["answer_chars"] / \
+                    report["corpus"][previous["size"]]["answer_chars"]
+                row["scaling_exponent"] = math.log(row["seconds"] / previous["seconds"]) / math.log(ratio)
+            report["results"][parser.name] = {"layout": parser.layout, "runs": rows}
+    return report
+
+
+def print_report(report):
+    print(f"{'parser':<22}{'size':>10}{'seconds':>10}{'MB/s':>9}{'peak MB':>9}{'scaling':>9}")
+    for name, result in report["results"].items():
+        if "skipped" in result:
+            print(f"{name:<22}  skipped ({result['skipped']})")
+            continue
+        for row in result["runs"]:
+            scaling = f"{row['scaling_exponent']:.2f}" if "scaling_exponent" in row else "-"
+            print(f"{name:<22}{row['size']:>10}{row['seconds']:>10.4f}{row['mb_per_second']:>9.1f}"
+                  f"{row['peak_memory_mb']:>9.1f}{scaling:>9}")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Benchmark Kosmos answer parsers on synthetic answers")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[15_000, 150_000],
+                        help="Answer sizes in characters (recorded answers are 3-30 KB)")
+    parser.add_argument("--parsers", nargs="+", choices=[p.name for p in PARSERS])
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--citation-density", type=float, default=0.6)
+    parser.add_argument("--smiles", type=int, default=3, help="Designed molecule blocks per answer")
+    parser.add_argument("--ranking", type=int, default=8, help="Ranked intervention items")
+    parser.add_argument("--cells", type=int, default=20, help="Notebook cells")
+    parser.add_argument("--figures", type=int, default=2, help="PNG figures in the notebook")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("-o", "--output", help="Write the report as JSON")
+    args = parser.parse_args()
+
+    report = run_benchmark(args.sizes, args.parsers, args.repeats, args.seed,
+                           citation_density=args.citation_density, smiles_count=args.smiles,
+                           ranking_length=args.ranking, notebook_cells=args.cells,
+                           figures=args.figures)
+    print_report(report)
+    if args.output:
+        write_json(args.output, report, manifest=False)
+        print(f"\nReport saved to {args.output}")
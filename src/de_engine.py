@@ -0,0 +1,523 @@
+"""Reference differential expression for Task 3 count matrices, in NumPy.
+
+``task3_evaluate`` could only check Kosmos's DEGs against the twelve
+``canonical_upregulated_genes``. ``Task3SystemBiology.calculate_metrics``
+had no DEG list at all. This module computes a reference DEG ranking from
+the count matrix Kosmos was given, so a run's DEGs can be scored against
+what the data actually supports:
+
+- size factors by median of ratios (DESeq2): each sample's median ratio to
+  the per-gene geometric mean, over genes with no zero counts;
+- log2 fold change of mean log2(normalized count + 1) between the two
+  groups;
+- Welch's t test per gene, and a moderated t test (limma's empirical Bayes
+  shrinkage of the gene variances towards a fitted prior);
+- Benjamini-Hochberg FDR over the genes that pass the low-count filter.
+
+Everything is vectorized over genes, and the t distribution is evaluated in
+NumPy (regularized incomplete beta), so scipy is not needed. Counts are
+read in blocks of ``chunk_genes`` genes. The median-of-ratios step finds
+exact medians from per-sample histograms plus one pass over the median
+bins, so memory is bounded by the block size rather than by the matrix.
+Blocks are kept between passes while they fit in ``memory_limit_mb``, and
+re-read otherwise. A 60,000 x 1,000 matrix therefore needs a few hundred MB
+at most, whatever its size on disk.
+
+Usage:
+    from de_engine import differential_expression, reference_degs
+
+    result = differential_expression("input/task3_ecoli_heatshock.csv")
+    reference_degs(result, fdr=0.05, min_log2_fold_change=1)[:20]
+
+    python src/de_engine.py input/task3_ecoli_heatshock.csv --top 20
+"""
+
+import math
+import re
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow.parquet as pq
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+PSEUDOCOUNT = 1.0
+CHUNK_GENES = 5000
+MEMORY_LIMIT_MB = 512
+HISTOGRAM_BINS = 4096
+LOG_RATIO_RANGE = (-30.0, 30.0)  # natural-log ratios outside this are clipped into the end bins
+
+REFERENCE_GROUP = re.compile(r"control|ctrl|untreated|mock|baseline|wild.?type|^wt$", re.IGNORECASE)
+REPLICATE_SUFFIX = re.compile(r"[_.\-\s]*(?:rep)?\d+$", re.IGNORECASE)
+
+
+# ----------------------------------------------------------------------
+# Special functions (scipy-free)
+# ----------------------------------------------------------------------
+
+def _digamma(x):
+    result = 0.0
+    while x < 6:
+        result -= 1 / x
+        x += 1
+    f = 1 / (x * x)
+    return result + math.log(x) - 0.5 / x - f * (1 / 12 - f * (1 / 120 - f * (1 / 252 - f * (1 / 240 - f / 132))))
+
+
+def _trigamma(x):
+    result = 0.0
+    while x < 6:
+        result += 1 / (x * x)
+        x += 1
+    f = 1 / (x * x)
+    return result + 1 / x + f / 2 + f / x * (1 / 6 - f * (1 / 30 - f * (1 / 42 - f / 30)))
+
+
+def _tetragamma(x):
+    result = 0.0
+    while x < 6:
+        result -= 2 / x ** 3
+        x += 1
+    f = 1 / (x * x)
+    return result - f - f / x - f * f / 2 + f ** 3 / 6 - f ** 4 / 6 + 3 * f ** 5 / 10
+
+
+def _trigamma_inverse(y):
+    """x with trigamma(x) = y (Newton iteration, as in limma)."""
+    if y > 1e7:
+        return 1 / math.sqrt(y)
+    if y < 1e-6:
+        return 1 / y
+    x = 0.5 + 1 / y
+    for _ in range(50):
+        tri = _trigamma(x)
+        step = tri * (1 - tri / y) / _tetragamma(x)
+        x += step
+        if -step / x < 1e-8:
+            break
+    return x
+
+
+_lgamma = np.frompyfunc(math.lgamma, 1, 1)
+_erfc = np.frompyfunc(math.erfc, 1, 1)
+
+
+def _betainc(a, b, x, iterations=300, eps=1e-14):
+    """Regularized incomplete beta I_x(a, b), vectorized (continued fraction, Lentz)."""
+    a, b, x = np.broadcast_arrays(np.asarray(a, float), np.asarray(b, float), np.asarray(x, float))
+    result = np.where(x <= 0, 0.0, 1.0)
+    inside = (x > 0) & (x < 1)
+    if not inside.any():
+        return result
+    a, b, x = a[inside], b[inside], x[inside]
+    # The continued fraction converges fast for x < (a+1)/(a+b+2); use symmetry otherwise
+    swap = x > (a + 1) / (a + b + 2)
+    a, b, x = np.where(swap, b, a), np.where(swap, a, b), np.where(swap, 1 - x, x)
+
+    log_front = (_lgamma(a + b) - _lgamma(a) - _lgamma(b)).astype(float) \
+        + a * np.log(x) + b * np.log1p(-x)
+    tiny = 1e-300
+    c = np.ones_like(x)
+    d = 1 - (a + b) * x / (a + 1)
+    d = 1 / np.where(np.abs(d) < tiny, tiny, d)
+    fraction = d.copy()
+    active = np.ones(x.shape, bool)
+    for m in range(1, iterations + 1):
+        for numerator in (m * (b - m) * x / ((a + 2 * m - 1) * (a + 2 * m)),
+                          -(a + m) * (a + b + m) * x / ((a + 2 * m) * (a + 2 * m + 1))):
+            d = 1 + numerator * d
+            d = 1 / np.where(np.abs(d) < tiny, tiny, d)
+            c = 1 + numerator / c
+            c = np.where(np.abs(c) < tiny, tiny, c)
+            delta = c * d
+            fraction = np.where(active, fraction * delta, fraction)
+        active &= np.abs(delta - 1) > eps
+        if not active.any():
+            break
+    value = np.exp(log_front) * fraction / a
+    result[inside] = np.where(swap, 1 - value, value)
+    return result
+
+
+def t_two_sided_p(t, df):
+    """Two-sided p-values of Student's t (df may be an array, inf means normal)."""
+    t, df = np.broadcast_arrays(np.abs(np.asarray(t, float)), np.asarray(df, float))
+    p = np.full(t.shape, np.nan)
+    normal = np.isfinite(t) & (np.isinf(df) | (df > 1e7))
+    student = np.isfinite(t) & np.isfinite(df) & (df > 0) & ~normal
+    p[normal] = _erfc(t[normal] / math.sqrt(2)).astype(float)
+    p[student] = _betainc(df[student] / 2, 0.5, df[student] / (df[student] + t[student] ** 2))
+    p[np.isinf(t)] = 0.0
+    return p
+
+
+def benjamini_hochberg(p_values):
+    """BH-adjusted p-values; NaN entries stay NaN and do not count towards m."""
+    p_values = np.asarray(p_values, float)
+    adjusted = np.full(p_values.shape, np.nan)
+    valid = np.flatnonzero(~np.isnan(p_values))
+    if len(valid) == 0:
+        return adjusted
+    order = valid[np.argsort(p_values[valid], kind="stable")]
+    m = len(order)
+    scaled = p_values[order] * m / np.arange(1, m + 1)
+    adjusted[order] = np.minimum(1.0, np.minimum.accumulate(scaled[::-1])[::-1])
+    return adjusted
+
+
+# ----------------------------------------------------------------------
+# Count sources
+# ----------------------------------------------------------------------
+
+class CountSource:
+    """A genes x samples count matrix, read in blocks of genes."""
+
+    def __init__(self, source, chunk_genes=CHUNK_GENES, memory_limit_mb=MEMORY_LIMIT_MB):
+        """
+        Args:
+            source: CSV/TSV path (optionally compressed), Parquet path, or a
+                genes x samples DataFrame
+            chunk_genes: Genes per block
+            memory_limit_mb: Keep blocks between passes up to this size
+        """
+        self.source = source
+        self.chunk_genes = chunk_genes
+        self._memory_limit = memory_limit_mb * 1e6
+        self._kept = None  # blocks from the first pass, when small enough
+        if isinstance(source, pd.DataFrame):
+            self.samples = [str(c) for c in source.columns]
+        elif self._is_parquet():
+            if not PYARROW_AVAILABLE:
+                raise ImportError("Reading Parquet counts needs pyarrow")
+            schema = pq.ParquetFile(source).schema_arrow
+            index_columns = self._parquet_index_columns(schema)
+            self.samples = [name for name in schema.names if name not in index_columns]
+        else:
+            self.samples = [str(c) for c in pd.read_csv(source, index_col=0, nrows=0,
+                                                        sep=self._separator()).columns]
+
+    def _is_parquet(self):
+        return str(self.source).endswith((".parquet", ".pq"))
+
+    def _separator(self):
+        suffixes = Path(str(self.source)).suffixes
+        return "\t" if any(s in (".tsv", ".tab", ".txt") for s in suffixes) else ","
+
+    @staticmethod
+    def _parquet_index_columns(schema):
+        metadata = schema.pandas_metadata or {}
+        columns = [c for c in metadata.get("index_columns", []) if isinstance(c, str)]
+        return columns or [schema.names[0]]
+
+    def _read(self):
+        if isinstance(self.source, pd.DataFrame):
+            for start in range(0, len(self.source), self.chunk_genes):
+                block = self.source.iloc[start:start + self.chunk_genes]
+                yield block.index.to_numpy(dtype=str), block.to_numpy(dtype=np.float64)
+        elif self._is_parquet():
+            parquet = pq.ParquetFile(self.source)
+            index_column = self._parquet_index_columns(parquet.schema_arrow)[0]
+            for batch in parquet.iter_batches(batch_size=self.chunk_genes):
+                frame = batch.to_pandas()
+                genes = frame.pop(index_column).to_numpy(dtype=str)
+                yield genes, frame[self.samples].to_numpy(dtype=np.float64)
+        else:
+            for block in pd.read_csv(self.source, index_col=0, chunksize=self.chunk_genes,
+                                     sep=self._separator()):
+                yield block.index.to_numpy(dtype=str), block.to_numpy(dtype=np.float64)
+
+    def __iter__(self):
+        """Yield (gene names, counts block of shape genes x samples)."""
+        if self._kept is not None:
+            yield from self._kept
+            return
+        kept, size = [], 0
+        for genes, counts in self._read():
+            if kept is not None:
+                size += counts.nbytes
+                if size <= self._memory_limit:
+                    kept.append((genes, counts))
+                else:
+                    kept = None
+            yield genes, counts
+        self._kept = kept
+
+
+def infer_groups(samples):
+    """Condition label per sample: the name without its replicate number (heat_2 -> heat)."""
+    return [REPLICATE_SUFFIX.sub("", sample) or sample for sample in samples]
+
+
+# ----------------------------------------------------------------------
+# Differential expression
+# ----------------------------------------------------------------------
+
+def size_factors(counts, bins=HISTOGRAM_BINS):
+    """
+    Median-of-ratios size factors (DESeq2) for a CountSource or genes x samples array.
+
+    The median is exact: per-sample histograms of log ratios locate the bin
+    holding the median, and a second pass sorts only the values in that bin.
+    """
+    source = counts if isinstance(counts, CountSource) else \
+        CountSource(pd.DataFrame(np.asarray(counts, float)))
+    n_samples = len(source.samples)
+    low, high = LOG_RATIO_RANGE
+    width = (high - low) / bins
+    histogram = np.zeros((n_samples, bins), dtype=np.int64)
+    columns = np.arange(n_samples)
+
+    def log_ratios(block):
+        usable = block[(block > 0).all(axis=1)]
+        logs = np.log(usable)
+        return logs - logs.mean(axis=1, keepdims=True)
+
+    def bin_index(ratios):
+        return np.clip(((ratios - low) / width).astype(np.int64), 0, bins - 1)
+
+    for _, block in source:
+        ratios = log_ratios(block)
+        if len(ratios):
+            np.add.at(histogram, (np.broadcast_to(columns, ratios.shape), bin_index(ratios)), 1)
+
+    total = histogram.sum(axis=1)
+    if (total == 0).any():
+        raise ValueError("Every gene has a zero count in some sample; size factors are undefined")
+    # Ranks (0-based) of the two middle values; equal when the count is odd
+    lower_rank, upper_rank = (total - 1) // 2, total // 2
+    cumulative = histogram.cumsum(axis=1)
+    first_bin = np.argmax(cumulative > lower_rank[:, None], axis=1)
+    last_bin = np.argmax(cumulative > upper_rank[:, None], axis=1)
+    before = np.where(first_bin > 0, cumulative[columns, first_bin - 1], 0)
+
+    candidates = [[] for _ in range(n_samples)]
+    for _, block in source:
+        ratios = log_ratios(block)
+        if not len(ratios):
+            continue
+        bins_hit = bin_index(ratios)
+        for sample in range(n_samples):
+            keep = (bins_hit[:, sample] >= first_bin[sample]) & (bins_hit[:, sample] <= last_bin[sample])
+            candidates[sample].append(ratios[keep, sample])
+
+    medians = np.empty(n_samples)
+    for sample in range(n_samples):
+        values = np.sort(np.concatenate(candidates[sample]))
+        lower = values[lower_rank[sample] - before[sample]]
+        upper = values[upper_rank[sample] - before[sample]]
+        medians[sample] = (lower + upper) / 2
+    return np.exp(medians)
+
+
+def _moderate(variances, df_residual):
+    """limma's eBayes prior (d0, s0^2) fitted to the gene variances."""
+    usable = variances[np.isfinite(variances) & (variances > 1e-12)]
+    if len(usable) < 3:
+        return math.inf, float(np.median(usable)) if len(usable) else 0.0
+    half = df_residual / 2
+    e = np.log(usable) - _digamma(half) + math.log(half)
+    e_mean = float(e.mean())
+    e_var = float(e.var(ddof=1)) - _trigamma(half)
+    if e_var <= 0:
+        return math.inf, math.exp(e_mean)
+    d0 = 2 * _trigamma_inverse(e_var)
+    return d0, math.exp(e_mean + _digamma(d0 / 2) - math.log(d0 / 2))
+
+
+def differential_expression(counts, groups=None, reference=None, treatment=None,
+                            min_mean_count=1.0, chunk_genes=CHUNK_GENES,
+                            memory_limit_mb=MEMORY_LIMIT_MB):
+    """
+    Two-group differential expression over a count matrix.
+
+    Args:
+        counts: CSV/TSV/Parquet path, genes x samples DataFrame, or CountSource
+        groups: Condition label per sample (default: ``infer_groups``)
+        reference: Baseline condition (default: the one named like
+            control/untreated/wt, else the first)
+        treatment: Compared condition (default: the other one)
+        min_mean_count: Genes with a lower mean normalized count are not
+            tested (NaN p-values, excluded from the FDR)
+        chunk_genes, memory_limit_mb: See CountSource
+
+    Returns:
+        DataFrame indexed by gene, ranked by moderated p-value (strongest
+        first): base_mean, log2_fold_change, t_welch, df_welch, p_welch,
+        padj_welch, t_moderated, p_moderated, padj. ``attrs`` holds the
+        size factors, the groups and the variance prior (d0, s0_squared).
+    """
+    source = counts if isinstance(counts, CountSource) else \
+        CountSource(counts, chunk_genes, memory_limit_mb)
+    groups = list(groups) if groups is not None else infer_groups(source.samples)
+    if len(groups) != len(source.samples):
+        raise ValueError(f"{len(groups)} group labels for {len(source.samples)} samples")
+    labels = list(dict.fromkeys(groups))
+    if reference is None:
+        named = [label for label in labels if REFERENCE_GROUP.search(label)]
+        reference = named[0] if named else labels[0]
+    if treatment is None:
+        others = [label for label in labels if label != reference]
+        if len(others) != 1:
+            raise ValueError(f"Expected two conditions, found {labels}; pass reference= and treatment=")
+        treatment = others[0]
+    groups = np.asarray(groups)
+    in_reference, in_treatment = groups == reference, groups == treatment
+    n0, n1 = int(in_reference.sum()), int(in_treatment.sum())
+    if n0 < 2 or n1 < 2:
+        raise ValueError(f"Need at least 2 replicates per condition ({reference}: {n0}, {treatment}: {n1})")
+
+    factors = size_factors(source)
+
+    genes, base_mean, mean0, mean1, var0, var1 = [], [], [], [], [], []
+    for block_genes, block in source:
+        normalized = block / factors
+        logs = np.log2(normalized + PSEUDOCOUNT)
+        genes.append(block_genes)
+        base_mean.append(normalized.mean(axis=1))
+        mean0.append(logs[:, in_reference].mean(axis=1))
+        mean1.append(logs[:, in_treatment].mean(axis=1))
+        var0.append(logs[:, in_reference].var(axis=1, ddof=1))
+        var1.append(logs[:, in_treatment].var(axis=1, ddof=1))
+    genes, base_mean, mean0, mean1, var0, var1 = (
+        np.concatenate(parts) for parts in (genes, base_mean, mean0, mean1, var0, var1))
+
+    tested = base_mean >= min_mean_count
+    log2_fold_change = mean1 - mean0
+
+    # Welch's t
+    se2 = var1 / n1 + var0 / n0
+    with np.errstate(divide="ignore", invalid="ignore"):
+        t_welch = log2_fold_change / np.sqrt(se2)
+        df_welch = se2 ** 2 / ((var1 / n1) ** 2 / (n1 - 1) + (var0 / n0) ** 2 / (n0 - 1))
+    constant = se2 == 0
+    t_welch[constant] = np.where(log2_fold_change[constant] == 0, 0.0, np.inf)
+    df_welch[constant] = n0 + n1 - 2
+    p_welch = np.where(tested, t_two_sided_p(t_welch, df_welch), np.nan)
+
+    # Moderated t: pooled variance shrunk towards the prior
+    df_residual = n0 + n1 - 2
+    pooled = ((n0 - 1) * var0 + (n1 - 1) * var1) / df_residual
+    d0, s0_squared = _moderate(pooled[tested], df_residual)
+    if math.isinf(d0):
+        posterior = np.full_like(pooled, s0_squared)
+    else:
+        posterior = (d0 * s0_squared + df_residual * pooled) / (d0 + df_residual)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        t_moderated = log2_fold_change / np.sqrt(posterior * (1 / n0 + 1 / n1))
+    t_moderated[posterior == 0] = np.where(log2_fold_change[posterior == 0] == 0, 0.0, np.inf)
+    p_moderated = np.where(tested, t_two_sided_p(t_moderated, df_residual + d0), np.nan)
+
+    result = pd.DataFrame({
+        "base_mean": base_mean,
+        "log2_fold_change": log2_fold_change,
+        "t_welch": t_welch,
+        "df_welch": df_welch,
+        "p_welch": p_welch,
+        "padj_welch": benjamini_hochberg(p_welch),
+        "t_moderated": t_moderated,
+        "p_moderated": p_moderated,
+        "padj": benjamini_hochberg(p_moderated),
+    }, index=pd.Index(genes, name="gene"))
+    order = np.lexsort((-np.abs(log2_fold_change), np.nan_to_num(p_moderated, nan=2.0)))
+    result = result.iloc[order]
+    result.attrs.update({
+        "size_factors": dict(zip(source.samples, factors.tolist())),
+        "reference": reference,
+        "treatment": treatment,
+        "prior_df": d0,
+        "prior_variance": s0_squared,
+    })
+    return result
+
+
+def reference_degs(result, fdr=0.05, min_log2_fold_change=1.0, direction="up", statistic="moderated"):
+    """
+    Genes called differentially expressed, strongest first.
+
+    Args:
+        result: ``differential_expression`` output
+        fdr: Adjusted p-value cut-off
+        min_log2_fold_change: Minimum absolute log2 fold change
+        direction: "up", "down" or "both"
+        statistic: "moderated" or "welch"
+    """
+    padj = result["padj"] if statistic == "moderated" else result["padj_welch"]
+    lfc = result["log2_fold_change"]
+    selected = (padj <= fdr) & (lfc.abs() >= min_log2_fold_change)
+    if direction == "up":
+        selected &= lfc > 0
+    elif direction == "down":
+        selected &= lfc < 0
+    return result.index[selected.to_numpy()].tolist()
+
+
+def compare_degs(identified_degs, result, fdr=0.05, min_log2_fold_change=1.0, direction="up", top_k=50):
+    """
+    Score a DEG list against the reference analysis (gene names compared case-insensitively).
+
+    Small designs can leave nothing significant after FDR correction, so the
+    list is also compared to the top ``top_k`` genes of the reference ranking,
+    and each identified gene's rank is reported.
+
+    Returns:
+        Dict with the reference DEGs, recall/precision against them (None
+        when there are none), overlap with the reference top ``top_k``, and
+        the median reference rank (1 = strongest) of the identified genes
+    """
+    significant = reference_degs(result, fdr, min_log2_fold_change, direction)
+    top = result.index[:top_k].tolist()
+    rank = {gene.lower(): position + 1 for position, gene in enumerate(result.index)}
+    identified = list(dict.fromkeys(g.lower() for g in identified_degs))
+    significant_overlap = [g for g in significant if g.lower() in identified]
+    top_overlap = [g for g in top if g.lower() in identified]
+    ranks = [rank[g] for g in identified if g in rank]
+    return {
+        "reference_degs": significant,
+        "reference_top": top,
+        "recall": len(significant_overlap) / len(significant) * 100 if significant else None,
+        "precision": len(significant_overlap) / len(identified) * 100 if significant and identified else None,
+        "top_overlap": top_overlap,
+        "top_recall": len(top_overlap) / len(top) * 100 if top else 0,
+        "median_rank": float(np.median(ranks)) if ranks else None,
+        "unknown_genes": [g for g in identified if g not in rank],
+    }
+
+
+def canonical_in_top(reference_top, canonical_genes):
+    """Canonical genes found in the reference top genes, in reference order (case-insensitive)."""
+    canonical = {g.lower() for g in canonical_genes}
+    return [g for g in reference_top if g.lower() in canonical]
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description="Reference differential expression for a count matrix")
+    parser.add_argument("counts", help="genes x samples CSV/TSV/Parquet (first column: gene)")
+    parser.add_argument("--reference", help="Baseline condition (default: inferred)")
+    parser.add_argument("--treatment", help="Compared condition (default: inferred)")
+    parser.add_argument("--fdr", type=float, default=0.05)
+    parser.add_argument("--min-lfc", type=float, default=1.0)
+    parser.add_argument("--direction", choices=["up", "down", "both"], default="up")
+    parser.add_argument("--top", type=int, default=20)
+    parser.add_argument("--chunk-genes", type=int, default=CHUNK_GENES)
+    parser.add_argument("-o", "--output", help="Write the full result table as CSV")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    table = differential_expression(args.counts, reference=args.reference, treatment=args.treatment,
+                                    chunk_genes=args.chunk_genes)
+    degs = reference_degs(table, args.fdr, args.min_lfc, args.direction)
+    print(f"{len(table)} genes, {table.attrs['treatment']} vs {table.attrs['reference']} "
+          f"in {time.perf_counter() - start:.2f}s (prior df {table.attrs['prior_df']:.1f})")
+    print(f"{len(degs)} DEGs at FDR {args.fdr}, |log2FC| >= {args.min_lfc} ({args.direction})\n")
+    print(table.loc[degs[:args.top], ["base_mean", "log2_fold_change", "t_moderated", "padj"]]
+          .to_string(float_format=lambda v: f"{v:.3g}"))
+    if args.output:
+        table.to_csv(args.output)
+        print(f"\nFull table saved to {args.output}")
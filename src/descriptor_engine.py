@@ -0,0 +1,243 @@
+"""Batch descriptor computation for large molecule sets.
+
+The MOLECULES evaluator scores a handful of designs one at a time. To score
+hundreds of Kosmos-designed candidates across runs, or whole reference
+libraries, ``compute_descriptor_table`` takes any iterable of SMILES, splits
+it into chunks and computes descriptors in a process pool (RDKit releases
+little of the GIL, so threads do not scale). The result is columnar: one
+NumPy array per descriptor, with NaN and an error message for molecules that
+fail to parse, so a bad SMILES never aborts the batch. Duplicate SMILES are
+computed once, and a ``MoleculeCache`` can be passed in to skip molecules
+seen in earlier runs.
+
+Usage:
+    from descriptor_engine import compute_descriptor_table
+
+    table = compute_descriptor_table(smiles_list, processes=8)
+    table.columns["qed"].mean()
+    table.errors            # {row index: "unparseable SMILES", ...}
+    table.save("output/task4_results/descriptors.npz")
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+import numpy as np
+
+from molecule_cache import RDKIT_AVAILABLE, compute_descriptors
+
+if RDKIT_AVAILABLE:
+    from rdkit import Chem
+
+PARSE_ERROR = "unparseable SMILES"
+
+DESCRIPTOR_COLUMNS = (
+    "molecular_weight",
+    "logp",
+    "hbd",
+    "hba",
+    "qed",
+    "tpsa",
+    "rotatable_bonds",
+    "heavy_atoms",
+    "lipinski_violations",
+)
+
+
+def _chunks(items, size):
+    iterator = iter(items)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def map_chunks(func, items, processes=None, chunk_size=256):
+    """
+    Apply ``func`` to chunks of ``items`` in a process pool, preserving order.
+
+    At most a few chunks per worker are in flight, so arbitrarily long
+    iterables (e.g. a 1M-line SMILES file) are streamed, not materialized.
+
+    Args:
+        func: Picklable top-level function taking a list and returning a list
+        items: Iterable of inputs
+        processes: Worker processes (default: os.cpu_count()); 1 runs inline
+        chunk_size: Items per task
+
+    Yields:
+        Results of ``func`` per chunk, in input order
+    """
+    processes = processes or os.cpu_count() or 1
+    if processes == 1:
+        for chunk in _chunks(items, chunk_size):
+            yield func(chunk)
+        return
+
+    with ProcessPoolExecutor(max_workers=processes) as pool:
+        pending = []
+        for chunk in _chunks(items, chunk_size):
+            pending.append(pool.submit(func, chunk))
+            if len(pending) >= processes * 4:
+                yield pending.pop(0).result()
+        for future in pending:
+            yield future.result()
+
+
+def _describe_chunk(smiles_chunk):
+    """Worker: (descriptors or None, error or None) for each SMILES."""
+    results = []
+    for smiles in smiles_chunk:
+        try:
+            mol = Chem.MolFromSmiles(smiles) if smiles else None
+            if mol is None:
+                results.append((None, PARSE_ERROR))
+            else:
+                results.append((compute_descriptors(mol), None))
+        except Exception as e:  # one bad molecule must not abort the batch
+            results.append((None, f"{type(e).__name__}: {e}"))
+    return results
+
+
+class DescriptorTable:
+    """Columnar descriptor results: one NumPy array per descriptor."""
+
+    def __init__(self, smiles, canonical_smiles, valid, columns, errors):
+        self.smiles = smiles
+        self.canonical_smiles = canonical_smiles
+        self.valid = valid
+        self.columns = columns
+        self.errors = errors
+
+    def __len__(self):
+        return len(self.smiles)
+
+    def __getitem__(self, column):
+        return self.columns[column]
+
+    def row(self, index):
+        """Descriptors of one molecule as a dict (NaN for failed molecules)."""
+        row = {"smiles": self.smiles[index], "canonical_smiles": self.canonical_smiles[index],
+               "valid": bool(self.valid[index])}
+        row.update({name: values[index].item() for name, values in self.columns.items()})
+        if index in self.errors:
+            row["error"] = self.errors[index]
+        return row
+
+    def summary(self):
+        """Mean/min/max per descriptor over valid molecules."""
+        summary = {"total": len(self), "valid": int(self.valid.sum()), "failed": len(self.errors)}
+        for name, values in self.columns.items():
+            valid_values = values[self.valid]
+            if valid_values.size:
+                summary[name] = {"mean": float(valid_values.mean()),
+                                 "min": float(valid_values.min()),
+                                 "max": float(valid_values.max())}
+        return summary
+
+    def save(self, path):
+        """Write the table as a compressed .npz archive."""
+        np.savez_compressed(
+            path,
+            smiles=np.array(self.smiles, dtype=object),
+            canonical_smiles=np.array(self.canonical_smiles, dtype=object),
+            valid=self.valid,
+            error_rows=np.array(list(self.errors), dtype=np.int64),
+            error_messages=np.array(list(self.errors.values()), dtype=object),
+            **self.columns,
+        )
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=True) as data:
+            columns = {name: data[name] for name in DESCRIPTOR_COLUMNS if name in data}
+            errors = dict(zip(data["error_rows"].tolist(), data["error_messages"].tolist()))
+            return cls(data["smiles"].tolist(), data["canonical_smiles"].tolist(),
+                       data["valid"], columns, errors)
+
+
+def compute_descriptor_table(smiles, processes=None, chunk_size=256, cache=None):
+    """
+    Compute descriptors for many molecules in parallel.
+
+    Args:
+        smiles: Iterable of SMILES strings
+        processes: Worker processes (default: all cores; 1 runs inline)
+        chunk_size: SMILES per worker task
+        cache: Optional MoleculeCache; hits skip the pool and new results
+            are added to it (call ``cache.save()`` to persist)
+
+    Returns:
+        DescriptorTable with one row per input SMILES, in input order
+    """
+    if not RDKIT_AVAILABLE:
+        raise ImportError("RDKit is required for descriptor computation (pip install rdkit)")
+
+    smiles = list(smiles)
+    n = len(smiles)
+    columns = {name: np.full(n, np.nan) for name in DESCRIPTOR_COLUMNS}
+    canonical = [None] * n
+    valid = np.zeros(n, dtype=bool)
+    errors = {}
+
+    # Duplicates and cache hits are resolved without a worker round trip
+    rows_by_smiles = {}
+    for i, s in enumerate(smiles):
+        rows_by_smiles.setdefault(s, []).append(i)
+
+    known = {}
+    if cache is not None:
+        for s in rows_by_smiles:
+            if s in cache:
+                known[s] = (cache.descriptors(s), None)
+    todo = [s for s in rows_by_smiles if s not in known]
+
+    results = known
+    for chunk_input, chunk_results in zip(_chunks(todo, chunk_size),
+                                          map_chunks(_describe_chunk, todo, processes, chunk_size)):
+        for s, (props, error) in zip(chunk_input, chunk_results):
+            results[s] = (props, error)
+            if cache is not None and (props is not None or error == PARSE_ERROR):
+                cache.store(s, props)
+
+    for s, rows in rows_by_smiles.items():
+        props, error = results[s]
+        if props is None or not props.get("valid"):
+            for i in rows:
+                errors[i] = error or PARSE_ERROR
+            continue
+        for i in rows:
+            valid[i] = True
+            canonical[i] = props["canonical_smiles"]
+            for name in DESCRIPTOR_COLUMNS:
+                columns[name][i] = props[name]
+
+    return DescriptorTable(smiles, canonical, valid, columns, errors)
+
+
+if __name__ == "__main__":
+    import argparse
+    import json
+    import time
+
+    parser = argparse.ArgumentParser(description="Compute descriptors for a SMILES file")
+    parser.add_argument("input", help="File with one SMILES per line (extra columns ignored)")
+    parser.add_argument("-o", "--output", help="Write the table to this .npz file")
+    parser.add_argument("-p", "--processes", type=int, default=None)
+    parser.add_argument("--chunk-size", type=int, default=256)
+    args = parser.parse_args()
+
+    with open(args.input) as f:
+        smiles_list = [line.split()[0] for line in f if line.strip() and not line.startswith("#")]
+
+    start = time.time()
+    table = compute_descriptor_table(smiles_list, args.processes, args.chunk_size)
+    elapsed = time.time() - start
+
+    print(json.dumps(table.summary(), indent=2))
+    print(f"{len(table)} molecules in {elapsed:.2f}s ({len(table) / max(elapsed, 1e-9):.0f}/s)")
+    if args.output:
+        table.save(args.output)
+        print(f"Saved to {args.output}")
@@ -0,0 +1,340 @@
+"""Batched, cached DOI verification against CrossRef or a local snapshot.
+
+``verify_doi_exists`` (task1_run.py, task1_evaluate.py,
+parse_task1_results_fixed.py) made one blocking ``requests.get`` per DOI with
+no timeout and no cache. That was slow enough that only a random sample of 5
+DOIs was checked, so ``citation_validity`` changed from run to run.
+``DoiVerifier`` checks every DOI in a batch:
+
+- Cached results are used first. ``cache/doi_verification.json`` keeps
+  resolved DOIs for ``ttl`` and unresolved ones for the shorter
+  ``negative_ttl``, since new DOIs get registered.
+- A local metadata snapshot is consulted next. It can be a CrossRef JSON/JSONL
+  dump or a plain list of DOIs.
+- Everything else is looked up concurrently over one pooled HTTP session.
+  Each request has a timeout, and 429/5xx responses are retried with
+  backoff.
+
+With ``offline=True`` the network is never used, and DOIs missing from the
+snapshot count as unresolved. ``base_url`` can point at a stand-in server
+instead of CrossRef, for example ``python src/doi_verifier.py serve SNAPSHOT``.
+Transport failures are reported as errors. They are never cached and are
+left out of the validity fraction, which is None if nothing was resolved.
+
+Defaults can be overridden with the environment variables DOI_SNAPSHOT,
+DOI_VERIFIER_OFFLINE=1 and CROSSREF_API_URL.
+
+Usage:
+    from doi_verifier import DoiVerifier
+
+    verifier = DoiVerifier()
+    results = verifier.verify(dois)        # {doi: DoiResult(doi, status, source)}
+    summary = verifier.summarize(results)  # checked / valid / invalid / errors / validity
+"""
+
+import json
+import os
+import re
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from urllib.parse import quote
+
+from artifacts import write_json
+from citations import normalize
+
+# requests is only needed for online verification
+try:
+    import requests
+    from requests.adapters import HTTPAdapter
+    REQUESTS_AVAILABLE = True
+except ImportError:
+    REQUESTS_AVAILABLE = False
+
+DoiResult = namedtuple("DoiResult", ["doi", "status", "source"])
+
+VALID = "valid"
+INVALID = "invalid"
+ERROR = "error"
+
+CROSSREF_API = os.environ.get("CROSSREF_API_URL", "https://api.crossref.org/works")
+DEFAULT_CACHE_PATH = Path("cache/doi_verification.json")
+DEFAULT_SNAPSHOT = os.environ.get("DOI_SNAPSHOT")
+CACHE_VERSION = 1
+DAY = 24 * 3600
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+DOI_PREFIX = re.compile(r"^\s*(?:https?://(?:dx\.)?doi\.org/|doi:\s*)", re.IGNORECASE)
+
+
+def normalize_doi(doi):
+    """Bare, lowercased DOI from any written form (URL, ``doi:`` prefix, trailing punctuation)."""
+    return normalize("doi", DOI_PREFIX.sub("", doi.strip()))
+
+
+def load_snapshot(path):
+    """
+    Set of normalized DOIs in a local metadata snapshot.
+
+    Accepts CrossRef records as JSONL (one record per line) or JSON (a list
+    of records or ``{"items": [...]}``), where each record has a ``DOI`` key,
+    or a text file with one DOI per line.
+    """
+    path = Path(path)
+    dois = set()
+    with open(path) as f:
+        if path.suffix == ".json":
+            data = json.load(f)
+            records = data.get("items", []) if isinstance(data, dict) else data
+            lines = [r.get("DOI") if isinstance(r, dict) else r for r in records]
+        elif path.suffix == ".jsonl":
+            lines = [json.loads(line).get("DOI") for line in f if line.strip()]
+        else:
+            lines = [line.split()[0] for line in f if line.strip() and not line.startswith("#")]
+    for doi in lines:
+        if doi:
+            dois.add(normalize_doi(doi))
+    return dois
+
+
+class DoiVerifier:
+    """Resolve many DOIs at once through a TTL cache, a snapshot and pooled HTTP."""
+
+    def __init__(self, cache_path=DEFAULT_CACHE_PATH, snapshot=DEFAULT_SNAPSHOT, offline=None,
+                 base_url=CROSSREF_API, max_workers=16, timeout=(3.05, 10), retries=2,
+                 ttl=30 * DAY, negative_ttl=DAY, mailto=None):
+        """
+        Args:
+            cache_path: JSON result cache; None for no persistence
+            snapshot: Snapshot path (see ``load_snapshot``) or a set of DOIs
+            offline: Never touch the network (default: DOI_VERIFIER_OFFLINE)
+            base_url: Works endpoint, CrossRef or a stand-in server
+            max_workers: Concurrent lookups (also the connection pool size)
+            timeout: requests (connect, read) timeout in seconds
+            retries: Extra attempts on 429/5xx/transport errors
+            ttl, negative_ttl: Cache lifetime in seconds of valid/invalid results
+            mailto: Contact address for CrossRef's polite pool
+        """
+        if offline is None:
+            offline = os.environ.get("DOI_VERIFIER_OFFLINE", "") not in ("", "0")
+        self.cache_path = Path(cache_path) if cache_path is not None else None
+        if snapshot is None or isinstance(snapshot, (set, frozenset)):
+            self.snapshot = snapshot
+        else:
+            self.snapshot = load_snapshot(snapshot)
+        self.offline = offline
+        self.base_url = base_url.rstrip("/")
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.retries = retries
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.mailto = mailto
+        self._entries = {}  # doi -> {"status", "checked_at", "source"}
+        self._dirty = False
+        self._session = None
+        self._load()
+
+    def _load(self):
+        if self.cache_path is None or not self.cache_path.exists():
+            return
+        try:
+            with open(self.cache_path) as f:
+                data = json.load(f)
+        except ValueError:
+            return  # corrupt cache - rebuild
+        if data.get("version") == CACHE_VERSION:
+            self._entries = data.get("dois", {})
+
+    def save(self):
+        """Persist new results (no-op if nothing changed or no cache path)."""
+        if self.cache_path is None or not self._dirty:
+            return
+        write_json(self.cache_path, {"version": CACHE_VERSION, "dois": self._entries}, manifest=False)
+        self._dirty = False
+
+    def _cached(self, doi, now):
+        entry = self._entries.get(doi)
+        if entry is None:
+            return None
+        ttl = self.ttl if entry["status"] == VALID else self.negative_ttl
+        if now - entry["checked_at"] > ttl:
+            return None
+        return DoiResult(doi, entry["status"], "cache")
+
+    def _get_session(self):
+        if self._session is None:
+            if not REQUESTS_AVAILABLE:
+                raise ImportError("requests is required for online DOI verification "
+                                  "(pip install requests, or use offline=True with a snapshot)")
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=self.max_workers, pool_maxsize=self.max_workers)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            agent = "kosmos-evaluation/1.0"
+            if self.mailto:
+                agent += f" (mailto:{self.mailto})"
+            session.headers["User-Agent"] = agent
+            self._session = session
+        return self._session
+
+    def _lookup(self, doi):
+        """One HTTP lookup with retries; returns a status."""
+        session = self._get_session()
+        url = f"{self.base_url}/{quote(doi, safe='/')}"
+        for attempt in range(self.retries + 1):
+            try:
+                response = session.get(url, timeout=self.timeout, stream=True)
+                response.close()  # only the status matters; skip the metadata body
+            except requests.RequestException:
+                status_code = None
+            else:
+                status_code = response.status_code
+                if status_code == 200:
+                    return VALID
+                if status_code not in RETRY_STATUSES:
+                    return INVALID
+            if attempt < self.retries:
+                delay = 2 ** attempt
+                if status_code == 429:
+                    delay = max(delay, float(response.headers.get("Retry-After") or 0))
+                time.sleep(delay)
+        return ERROR
+
+    def verify(self, dois):
+        """
+        Verify DOIs, using the cache and snapshot first.
+
+        Args:
+            dois: Iterable of DOIs (bare, ``doi:`` or doi.org URL form)
+
+        Returns:
+            Dict of normalized DOI -> DoiResult(doi, status, source), where
+            status is "valid", "invalid" or "error" and source is "cache",
+            "snapshot", "crossref" (any HTTP lookup) or "offline"
+        """
+        now = time.time()
+        results = {}
+        pending = []
+        for doi in dict.fromkeys(normalize_doi(d) for d in dois):
+            cached = self._cached(doi, now)
+            if cached is not None:
+                results[doi] = cached
+            elif self.snapshot is not None and doi in self.snapshot:
+                results[doi] = DoiResult(doi, VALID, "snapshot")
+            elif self.offline:
+                if self.snapshot is not None:
+                    results[doi] = DoiResult(doi, INVALID, "snapshot")
+                else:
+                    results[doi] = DoiResult(doi, ERROR, "offline")
+            else:
+                pending.append(doi)
+
+        if pending:
+            with ThreadPoolExecutor(max_workers=min(self.max_workers, len(pending))) as pool:
+                for doi, status in zip(pending, pool.map(self._lookup, pending)):
+                    results[doi] = DoiResult(doi, status, "crossref")
+                    if status != ERROR:
+                        self._entries[doi] = {"status": status, "checked_at": now, "source": "crossref"}
+                        self._dirty = True
+            self.save()
+        return results
+
+    def verify_one(self, doi):
+        """True if ``doi`` resolves."""
+        return next(iter(self.verify([doi]).values())).status == VALID
+
+    @staticmethod
+    def summarize(results):
+        """
+        Counts plus ``validity`` = valid / (valid + invalid); errors are excluded.
+
+        ``validity`` is None when no DOI could be resolved either way (none
+        given, or every lookup failed): citations were not assessed, which
+        is not the same as all of them being fabricated.
+        """
+        statuses = [r.status for r in results.values()]
+        valid, invalid, errors = (statuses.count(s) for s in (VALID, INVALID, ERROR))
+        return {
+            "checked": valid + invalid,
+            "valid": valid,
+            "invalid": invalid,
+            "errors": errors,
+            "validity": valid / (valid + invalid) if valid + invalid else None,
+        }
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.save()
+        if self._session is not None:
+            self._session.close()
+
+
+def serve_snapshot(snapshot, host="127.0.0.1", port=8765):
+    """Stand-in for the CrossRef works endpoint: 200 for snapshot DOIs, 404 otherwise."""
+    from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+    from urllib.parse import unquote
+
+    dois = load_snapshot(snapshot) if not isinstance(snapshot, set) else snapshot
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            path = unquote(self.path.split("?")[0])
+            doi = normalize_doi(path.split("/works/", 1)[-1])
+            found = doi in dois
+            body = json.dumps({"status": "ok", "message": {"DOI": doi}} if found
+                              else {"status": "error", "message": "Resource not found."}).encode()
+            self.send_response(200 if found else 404)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    print(f"Serving {len(dois)} DOIs at http://{host}:{server.server_port}/works")
+    return server
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Verify DOIs against CrossRef or a local snapshot")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    check = sub.add_parser("check", help="Verify DOIs (arguments or a file with one per line)")
+    check.add_argument("dois", nargs="+", help="DOIs, or @file")
+    check.add_argument("--snapshot", default=DEFAULT_SNAPSHOT)
+    check.add_argument("--offline", action="store_true", default=None)
+    check.add_argument("--base-url", default=CROSSREF_API)
+    check.add_argument("-j", "--workers", type=int, default=16)
+
+    serve = sub.add_parser("serve", help="Run a stand-in works endpoint backed by a snapshot")
+    serve.add_argument("snapshot")
+    serve.add_argument("--port", type=int, default=8765)
+
+    args = parser.parse_args()
+    if args.command == "serve":
+        serve_snapshot(args.snapshot, port=args.port).serve_forever()
+    else:
+        dois = []
+        for arg in args.dois:
+            if arg.startswith("@"):
+                with open(arg[1:]) as f:
+                    dois.extend(line.strip() for line in f if line.strip())
+            else:
+                dois.append(arg)
+        start = time.time()
+        with DoiVerifier(snapshot=args.snapshot, offline=args.offline, base_url=args.base_url,
+                         max_workers=args.workers) as verifier:
+            results = verifier.verify(dois)
+        for result in results.values():
+            mark = {VALID: "✓", INVALID: "✗", ERROR: "?"}[result.status]
+            print(f"  {mark} {result.doi} ({result.source})")
+        summary = DoiVerifier.summarize(results)
+        print(f"\n{summary['valid']}/{summary['checked']} valid, {summary['errors']} errors "
+              f"in {time.time() - start:.2f}s")
@@ -0,0 +1,201 @@
+"""Notebook execution results cached by notebook content and input data.
+
+``evaluate_task3`` re-executed the same notebook on every run, even when
+neither the notebook nor its data had changed. ``ExecutionCache`` keys each
+execution by a SHA-256 over:
+
+- the kernel name,
+- every code cell's source,
+- the content hash of each input file the notebook reads. These are the
+  existing paths passed to read calls (``read_csv``, ``open(..., "r")``,
+  ``load``, ...), or passed explicitly. Files the notebook writes itself are
+  outputs, not inputs: hashing them would change the key on the next run.
+
+It stores the outcome under ``cache/notebook_runs/<key>.json``: success,
+error, failing cell, per-cell timings, wall time and the outputs of every
+cell. A hit rebuilds the executed notebook without starting a kernel. Only
+notebooks with an edited cell or a changed input file run again. File hashes
+are memoized by (size, mtime), so large inputs are not re-read on every
+lookup. Timeouts and dead kernels are not cached, because they say nothing
+about the notebook itself.
+
+Usage:
+    from execution_cache import ExecutionCache
+
+    cache = ExecutionCache()
+    with KernelPool(4) as pool:
+        run = cache.run(notebook_path, pool)     # executes on a miss only
+    print(cache.hits, cache.misses)
+"""
+
+import copy
+import hashlib
+import json
+from pathlib import Path
+
+import nbformat
+
+from artifacts import write_json
+from kernel_pool import DEFAULT_KERNEL, KernelPool, NotebookRun, as_notebook
+from notebook_preflight import read_files, written_files
+
+CACHE_VERSION = 1
+DEFAULT_CACHE_DIR = Path("cache/notebook_runs")
+
+# Outcomes caused by the environment, not the notebook
+TRANSIENT_ERRORS = ("CellTimeoutError", "DeadKernelError", "_ResetError", "TimeoutError")
+
+
+def referenced_files(nb, base_dir):
+    """Existing files the notebook's code cells read before (or without) writing them."""
+    base_dir = Path(base_dir)
+    found = {}
+    produced = set()
+    for cell in nb.cells:
+        if cell.cell_type != "code":
+            continue
+        produced |= written_files(cell.source)
+        for literal in read_files(cell.source) - produced:
+            path = Path(literal)
+            path = path if path.is_absolute() else base_dir / path
+            if path.is_file():
+                found[str(path.resolve())] = None
+    return sorted(found)
+
+
+class ExecutionCache:
+    """Content-addressed store of notebook execution results."""
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR):
+        self.cache_dir = Path(cache_dir)
+        self._file_hashes_path = self.cache_dir / "file_hashes.json"
+        self._file_hashes = {}  # path -> [size, mtime_ns, sha256]
+        self._file_hashes_dirty = False
+        self.hits = 0
+        self.misses = 0
+        if self._file_hashes_path.exists():
+            try:
+                with open(self._file_hashes_path) as f:
+                    self._file_hashes = json.load(f)
+            except ValueError:
+                pass  # corrupt - rehash
+
+    def file_hash(self, path):
+        """SHA-256 of a file, recomputed only when its size or mtime changes."""
+        path = Path(path).resolve()
+        stat = path.stat()
+        entry = self._file_hashes.get(str(path))
+        if entry and entry[0] == stat.st_size and entry[1] == stat.st_mtime_ns:
+            return entry[2]
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+        self._file_hashes[str(path)] = [stat.st_size, stat.st_mtime_ns, digest.hexdigest()]
+        self._file_hashes_dirty = True
+        return digest.hexdigest()
+
+    def key(self, notebook, inputs=None, kernel_name=DEFAULT_KERNEL, base_dir=None):
+        """
+        Cache key for executing ``notebook``.
+
+        Args:
+            notebook: Path, nbformat dict or NotebookNode
+            inputs: Data files the notebook reads (default: ``referenced_files``)
+            kernel_name: Kernel the notebook runs on
+            base_dir: Directory relative paths resolve against (default: the
+                notebook's directory, or the current directory)
+        """
+        nb, path = as_notebook(notebook)
+        if base_dir is None:
+            base_dir = path.parent if path else Path.cwd()
+        if inputs is None:
+            inputs = referenced_files(nb, base_dir)
+
+        digest = hashlib.sha256(f"v{CACHE_VERSION}\0{kernel_name}\0".encode())
+        for cell in nb.cells:
+            if cell.cell_type == "code":
+                digest.update(cell.source.strip().encode("utf-8"))
+                digest.update(b"\0cell\0")
+        for input_path in sorted(str(Path(p).resolve()) for p in inputs):
+            digest.update(f"{input_path}\0{self.file_hash(input_path)}\0".encode())
+        return digest.hexdigest()
+
+    def _entry_path(self, key):
+        return self.cache_dir / f"{key}.json"
+
+    def get(self, key, notebook):
+        """The cached NotebookRun for ``key`` with outputs restored into ``notebook``, or None."""
+        entry_path = self._entry_path(key)
+        if not entry_path.exists():
+            self.misses += 1
+            return None
+        try:
+            with open(entry_path) as f:
+                entry = json.load(f)
+        except ValueError:
+            self.misses += 1
+            return None
+
+        nb, path = as_notebook(notebook)
+        nb = copy.deepcopy(nb)
+        code_cells = [cell for cell in nb.cells if cell.cell_type == "code"]
+        for cell, (outputs, execution_count) in zip(code_cells, entry["cells"]):
+            cell.outputs = [nbformat.from_dict(o) for o in outputs]
+            cell.execution_count = execution_count
+        self.hits += 1
+        return NotebookRun(str(path) if path else None, entry["success"], entry["error"],
+                           entry["error_cell"], entry["cell_times"], entry["seconds"], nb)
+
+    def put(self, key, run):
+        """Store a run (transient failures such as timeouts are skipped)."""
+        if run.error and run.error.startswith(TRANSIENT_ERRORS):
+            return False
+        cells = [[cell.get("outputs", []), cell.get("execution_count")]
+                 for cell in run.notebook.cells if cell.cell_type == "code"]
+        write_json(self._entry_path(key), {
+            "version": CACHE_VERSION,
+            "success": run.success,
+            "error": run.error,
+            "error_cell": run.error_cell,
+            "cell_times": run.cell_times,
+            "seconds": run.seconds,
+            "cells": cells,
+        }, manifest=False)
+        self.save()
+        return True
+
+    def run(self, notebook, pool=None, inputs=None, kernel_name=None, **run_kwargs):
+        """
+        Execute ``notebook`` unless an identical execution is cached.
+
+        Args:
+            notebook: Path, nbformat dict or NotebookNode
+            pool: KernelPool to execute on (a one-kernel pool is started only
+                on a miss if None)
+            inputs: Data files that affect the result (default: detected)
+            kernel_name: Kernel (default: the pool's, or python3)
+            run_kwargs: Passed to ``KernelPool.run`` (timeout, cell_timeout, cwd)
+
+        Returns:
+            NotebookRun
+        """
+        kernel_name = kernel_name or (pool.default_kernel if pool else DEFAULT_KERNEL)
+        key = self.key(notebook, inputs, kernel_name, run_kwargs.get("cwd"))
+        cached = self.get(key, notebook)
+        if cached is not None:
+            return cached
+
+        if pool is None:
+            with KernelPool(size=1, kernel_name=kernel_name) as own_pool:
+                run = own_pool.run(notebook, kernel_name=kernel_name, **run_kwargs)
+        else:
+            run = pool.run(notebook, kernel_name=kernel_name, **run_kwargs)
+        self.put(key, run)
+        return run
+
+    def save(self):
+        """Persist memoized file hashes."""
+        if self._file_hashes_dirty:
+            write_json(self._file_hashes_path, self._file_hashes, manifest=False)
+            self._file_hashes_dirty = False
@@ -0,0 +1,229 @@
+"""Buffered, structured execution logging for Kosmos task runners.
+
+Runners used to open ``logs/<task>_execution.log``, append one line and close
+the file on every call. With a watcher polling hundreds of tasks that turns
+into thousands of open/close syscalls per minute. This module queues records
+in memory and a single background thread writes them as JSON lines in
+batches, rotating files by size and flushing everything at interpreter exit.
+
+Each record is one JSON object per line:
+
+    {"timestamp": "...", "task": "task1_cancer_genomics", "task_id": "...",
+     "stage": "monitor", "level": "INFO", "elapsed": 12.345,
+     "message": "Status: in progress"}
+
+Usage:
+    from execution_log import ExecutionLogger
+
+    logger = ExecutionLogger("task1_cancer_genomics")
+    logger.log("Task submitted", stage="submit")
+    logger.task_id = task_id
+    with logger.stage_scope("monitor"):
+        logger.log("Status: in progress")
+"""
+
+import atexit
+import json
+import os
+import queue
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+
+_STOP = object()
+
+
+class _BatchWriter(threading.Thread):
+    """Background thread that drains queued lines to one rotating file."""
+
+    def __init__(self, path, batch_size=256, flush_interval=1.0,
+                 max_bytes=10 * 1024 * 1024, backup_count=5):
+        super().__init__(name=f"execution-log:{path.name}", daemon=True)
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.queue = queue.SimpleQueue()
+        self._flushed = threading.Condition()
+        self._written = 0
+        self._submitted = 0
+        self._lock = threading.Lock()
+        self._stream = None
+
+    def submit(self, line):
+        with self._lock:
+            self._submitted += 1
+            ticket = self._submitted
+        self.queue.put(line)
+        return ticket
+
+    def run(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._stream = open(self.path, "a", encoding="utf-8")
+        stopping = False
+        while not stopping:
+            try:
+                first = self.queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                continue
+
+            batch = []
+            item = first
+            while True:
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+                if len(batch) >= self.batch_size:
+                    break
+                try:
+                    item = self.queue.get_nowait()
+                except queue.Empty:
+                    break
+
+            if batch:
+                self._write(batch)
+
+        self._stream.close()
+        self._stream = None
+
+    def _write(self, lines):
+        data = "".join(lines)
+        size = self._stream.tell()
+        if self.max_bytes and size and size + len(data.encode("utf-8")) > self.max_bytes:
+            self._rotate()
+        self._stream.write(data)
+        self._stream.flush()
+        with self._flushed:
+            self._written += len(lines)
+            self._flushed.notify_all()
+
+    def _rotate(self):
+        self._stream.close()
+        if self.backup_count > 0:
+            for i in range(self.backup_count - 1, 0, -1):
+                src = self.path.with_name(f"{self.path.name}.{i}")
+                if src.exists():
+                    os.replace(src, self.path.with_name(f"{self.path.name}.{i + 1}"))
+            os.replace(self.path, self.path.with_name(f"{self.path.name}.1"))
+        else:
+            self.path.unlink()
+        self._stream = open(self.path, "a", encoding="utf-8")
+
+    def wait_for(self, ticket, timeout=None):
+        """Block until the line with ``ticket`` has been written and flushed."""
+        with self._flushed:
+            return self._flushed.wait_for(
+                lambda: self._written >= ticket or not self.is_alive(), timeout
+            )
+
+    def stop(self, timeout=5.0):
+        if self.is_alive():
+            self.queue.put(_STOP)
+            self.join(timeout)
+
+
+_writers = {}
+_writers_lock = threading.Lock()
+
+
+def _get_writer(path, **options):
+    """Return the shared writer for ``path``, starting it on first use."""
+    path = Path(path).resolve()
+    with _writers_lock:
+        writer = _writers.get(path)
+        if writer is None or not writer.is_alive():
+            writer = _BatchWriter(path, **options)
+            writer.start()
+            _writers[path] = writer
+        return writer
+
+
+@atexit.register
+def shutdown():
+    """Flush and close every open execution log (runs automatically at exit)."""
+    with _writers_lock:
+        writers = list(_writers.values())
+        _writers.clear()
+    for writer in writers:
+        writer.stop()
+
+
+class ExecutionLogger:
+    """Non-blocking JSONL logger for a single task runner."""
+
+    def __init__(self, task_name, log_dir="logs", task_id=None, stage=None,
+                 batch_size=256, flush_interval=1.0,
+                 max_bytes=10 * 1024 * 1024, backup_count=5):
+        """
+        Initialize execution logger.
+
+        Args:
+            task_name: Runner name, used for the log file name
+            log_dir: Directory holding ``<task_name>_execution.jsonl``
+            task_id: Kosmos task ID to stamp on records (can be set later)
+            stage: Default pipeline stage to stamp on records
+            batch_size: Maximum records written per flush
+            flush_interval: Seconds the writer waits for new records
+            max_bytes: Rotate the file once it would exceed this size (0 disables)
+            backup_count: Number of rotated files to keep
+        """
+        self.task_name = task_name
+        self.task_id = task_id
+        self.stage = stage
+        self.path = Path(log_dir) / f"{task_name}_execution.jsonl"
+        self._start = time.monotonic()
+        self._last_ticket = 0
+        self._writer_options = {
+            "batch_size": batch_size,
+            "flush_interval": flush_interval,
+            "max_bytes": max_bytes,
+            "backup_count": backup_count,
+        }
+        self._writer = _get_writer(self.path, **self._writer_options)
+
+    @contextmanager
+    def stage_scope(self, stage):
+        """Stamp ``stage`` on records logged inside the ``with`` block."""
+        previous = self.stage
+        self.stage = stage
+        try:
+            yield self
+        finally:
+            self.stage = previous
+
+    def log(self, message, level="INFO", stage=None, **fields):
+        """
+        Queue a structured record; returns immediately.
+
+        Args:
+            message: Human-readable log message
+            level: Log level (INFO, WARNING, ERROR, ...)
+            stage: Pipeline stage; defaults to ``self.stage``
+            **fields: Extra JSON-serialisable fields to include
+
+        Returns:
+            The record dict that was queued
+        """
+        record = {
+            "timestamp": datetime.now().isoformat(),
+            "task": self.task_name,
+            "task_id": self.task_id,
+            "stage": stage or self.stage,
+            "level": level,
+            "elapsed": round(time.monotonic() - self._start, 3),
+            "message": str(message),
+        }
+        record.update(fields)
+        line = json.dumps(record, default=str) + "\n"
+        if not self._writer.is_alive():
+            self._writer = _get_writer(self.path, **self._writer_options)
+        self._last_ticket = self._writer.submit(line)
+        return record
+
+    def flush(self, timeout=5.0):
+        """Block until everything this logger queued is on disk."""
+        return self._writer.wait_for(self._last_ticket, timeout)
@@ -0,0 +1,666 @@
+"""Re-execute only the notebook cells affected by an edit.
+
+Repairing a Kosmos notebook is a loop: patch the failing cell, re-validate,
+repeat. ``KernelPool.run`` re-executes a 40-cell notebook from the top on
+every iteration, including the slow loading and normalization cells the
+patch never touched. ``IncrementalRunner`` keeps one kernel per notebook and
+re-executes only what an edit invalidates:
+
+- Every code cell is analysed statically for the names it defines and uses.
+  Python cells use ``ast``, which also treats subscript/attribute stores,
+  ``inplace=True`` and list/dict/set mutators as definitions. R cells use
+  ``<-``/``=`` assignments and identifiers. File paths named in string
+  literals count as both. From these, each cell depends on the most recent
+  earlier definer of every name it uses. Cells the analysis cannot follow
+  (magics, shell escapes, ``exec``, star imports, RNG seeding,
+  ``library()``, unparseable code) are barriers: every later cell depends
+  on them.
+- Cells are matched to the previous run by source (``difflib`` alignment,
+  so inserted and deleted cells do not shift everything after them). The
+  changed cells, the cells that failed or were not reached last time, and
+  the cells using names a removed cell defined are dirty, together with
+  everything downstream of them.
+- While executing, the runner snapshots the kernel namespace to disk every
+  ``checkpoint_every`` cells and after slow cells. Python uses pickle, or
+  cloudpickle when installed; R uses ``save()`` plus its attached packages.
+  A checkpoint is keyed by the sources of the cells before it, so it stays
+  valid until one of those cells changes, even across kernel restarts.
+- A re-run restores the latest valid checkpoint before the first dirty
+  cell. It then executes the dirty cells and the clean cells they depend
+  on, in notebook order. Other cells keep their previous outputs. Objects
+  that could not be pickled (open files, connections, ...) are recorded at
+  snapshot time. If a planned cell needs one, the checkpoint is used only
+  when the lost names come from import/def/class-only cells, which are
+  re-run first. Otherwise an earlier checkpoint is used.
+
+In-place mutation the analysis cannot see (a function that mutates its
+argument, a method call outside ``MUTATING_METHODS``) is not tracked. For such a
+notebook, ``run(full=True)`` re-executes everything.
+
+Usage:
+    from incremental_notebook import IncrementalRunner
+
+    with IncrementalRunner("output/task3/analysis.ipynb") as runner:
+        run = runner.run()          # first run: every cell
+        ...                         # edit cell 31 on disk
+        run = runner.run()          # restores a checkpoint, re-runs 31 and what it needs
+        print(runner.last_plan)
+
+    python src/incremental_notebook.py output/task3/analysis.ipynb --watch
+"""
+
+import ast
+import copy
+import difflib
+import hashlib
+import json
+import re
+import shutil
+import tempfile
+import time
+from collections import namedtuple
+from pathlib import Path
+
+from jupyter_core.utils import run_sync
+from nbclient import NotebookClient
+from nbclient.exceptions import CellExecutionError
+
+from kernel_pool import (CELL_TIMEOUT, DEFAULT_KERNEL, RESET_CODE, WARMUP_CODE, NotebookRun,
+                         _Kernel, _language, as_notebook)
+from notebook_preflight import MAGIC_LINE, PATH_LITERAL, preflight
+
+CellInfo = namedtuple("CellInfo", [
+    "defs",          # names (and "file:<path>" literals) the cell binds or mutates
+    "uses",          # names read before the cell binds them
+    "defines_all",   # later cells may depend on it in ways names do not show
+    "uses_all",      # it may depend on any earlier cell
+    "pure",          # only imports and def/class statements: safe to re-run anywhere
+])
+
+Plan = namedtuple("Plan", [
+    "checkpoint",  # notebook cell index execution resumed before, or None (from the top)
+    "executed",    # notebook cell indices executed, in order
+    "skipped",     # clean cells whose previous outputs were kept
+    "dirty",       # cells invalidated by the edit (a subset of executed)
+])
+
+BARRIER = CellInfo(frozenset(), frozenset(), True, True, False)
+
+# Method calls treated as mutating the object they are called on
+MUTATING_METHODS = {"append", "extend", "insert", "remove", "pop", "popitem", "clear", "update",
+                    "setdefault", "add", "discard", "sort", "reverse", "fill", "resize",
+                    "put", "itemset", "setflags"}
+DYNAMIC_CALLS = {"exec", "eval", "globals", "vars", "setattr", "delattr", "__import__"}
+
+R_ASSIGN = re.compile(r"^\s*([A-Za-z.][\w.]*)\s*(?:\[[^\]\n]*\]|\$[\w.]+|@[\w.]+)*\s*(?:<<?-|=(?!=))",
+                      re.MULTILINE)
+R_RIGHT_ASSIGN = re.compile(r"->>?\s*([A-Za-z.][\w.]*)")
+R_IDENTIFIER = re.compile(r"(?<![\w.$@])([A-Za-z.][\w.]*)")
+R_STRING = re.compile(r"\"(?:[^\"\\]|\\.)*\"|'(?:[^'\\]|\\.)*'")
+R_COMMENT = re.compile(r"#[^\n]*")
+R_GLOBAL_EFFECT = re.compile(r"\b(?:library|require|source|attach|load|set\.seed|sys\.source)\s*\(")
+R_KEYWORDS = {"if", "else", "for", "while", "repeat", "function", "return", "next", "break",
+              "TRUE", "FALSE", "NULL", "NA", "Inf", "NaN", "in"}
+
+# Executed in the kernel: {path} is the checkpoint file. Each prints a JSON
+# list of names that could not be saved or restored.
+SNAPSHOT_CODE = {
+    "python": (
+        "def _snapshot(path):\n"
+        "    import json, pickle, types\n"
+        "    try:\n"
+        "        import cloudpickle as dumper\n"
+        "    except ImportError:\n"
+        "        dumper = pickle\n"
+        "    state, modules, lost = {{}}, {{}}, []\n"
+        "    hidden = get_ipython().user_ns_hidden  # In, Out, exit, open, ...\n"
+        "    for name, value in list(globals().items()):\n"
+        "        if name.startswith('_') or name in hidden:\n"
+        "            continue\n"
+        "        if dumper is pickle and '__main__' in (getattr(value, '__module__', None),\n"
+        "                                               type(value).__module__):\n"
+        "            lost.append(name)  # pickled by reference to a namespace about to be cleared\n"
+        "            continue\n"
+        "        if isinstance(value, types.ModuleType):\n"
+        "            modules[name] = value.__name__\n"
+        "            continue\n"
+        "        try:\n"
+        "            state[name] = dumper.dumps(value)\n"
+        "        except Exception:\n"
+        "            lost.append(name)\n"
+        "    with open(path, 'wb') as f:\n"
+        "        pickle.dump({{'state': state, 'modules': modules, 'lost': lost}}, f)\n"
+        "    print(json.dumps(lost))\n"
+        "_snapshot({path!r})\n"
+        "del _snapshot\n"
+    ),
+    "R": (
+        "local({{ pkgs <- .packages(); "
+        "save(list = ls(all.names = TRUE, envir = .GlobalEnv), envir = .GlobalEnv, file = {path!r}); "
+        "saveRDS(pkgs, paste0({path!r}, '.packages')); cat('[]') }})\n"
+    ),
+}
+
+RESTORE_CODE = {
+    "python": (
+        "def _restore(path):\n"
+        "    import importlib, json, pickle\n"
+        "    with open(path, 'rb') as f:\n"
+        "        snapshot = pickle.load(f)\n"
+        "    namespace = globals()\n"
+        "    for name, module in snapshot['modules'].items():\n"
+        "        namespace[name] = importlib.import_module(module)\n"
+        "    pending = dict(snapshot['state'])\n"
+        "    for _ in range(2):  # a second pass for objects that reference restored ones\n"
+        "        for name, blob in list(pending.items()):\n"
+        "            try:\n"
+        "                namespace[name] = pickle.loads(blob)\n"
+        "                del pending[name]\n"
+        "            except Exception:\n"
+        "                pass\n"
+        "    print(json.dumps(snapshot['lost'] + sorted(pending)))\n"
+        "_restore({path!r})\n"
+        "del _restore\n"
+    ),
+    "R": (
+        "local({{ load({path!r}, envir = .GlobalEnv); "
+        "for (p in rev(readRDS(paste0({path!r}, '.packages')))) "
+        "suppressMessages(library(p, character.only = TRUE)); cat('[]') }})\n"
+    ),
+}
+
+
+class _CheckpointError(Exception):
+    """A kernel snapshot could not be written or restored."""
+
+
+def _root_name(node):
+    while isinstance(node, (ast.Attribute, ast.Subscript, ast.Starred)):
+        node = node.value
+    return node.id if isinstance(node, ast.Name) else None
+
+
+def _scope_arguments(node):
+    args = node.args
+    return {a.arg for a in args.posonlyargs + args.args + args.kwonlyargs} | \
+        {a.arg for a in (args.vararg, args.kwarg) if a is not None}
+
+
+class _NameScanner(ast.NodeVisitor):
+    """Module-level loads and stores of one statement; nested scopes contribute free names only."""
+
+    def __init__(self):
+        self.loads, self.stores = set(), set()
+        self.dynamic = False       # exec/eval/globals(): may read or bind anything
+        self.global_state = False  # star imports, RNG seeding: later cells may depend on it
+
+    def visit_Name(self, node):
+        (self.loads if isinstance(node.ctx, ast.Load) else self.stores).add(node.id)
+
+    def _store_root(self, node):
+        root = _root_name(node)
+        if root:
+            self.stores.add(root)
+            self.loads.add(root)
+
+    def visit_Attribute(self, node):
+        if isinstance(node.ctx, (ast.Store, ast.Del)):
+            self._store_root(node)
+        self.generic_visit(node)
+
+    visit_Subscript = visit_Attribute
+
+    def visit_AugAssign(self, node):
+        if isinstance(node.target, ast.Name):
+            self.loads.add(node.target.id)
+        self.generic_visit(node)
+
+    def visit_Call(self, node):
+        func = node.func
+        if isinstance(func, ast.Name) and func.id in DYNAMIC_CALLS:
+            self.dynamic = True
+        if isinstance(func, ast.Attribute) and func.attr in ("seed", "manual_seed"):
+            self.global_state = True
+        elif isinstance(func, ast.Attribute) and (
+                func.attr in MUTATING_METHODS or any(k.arg == "inplace" for k in node.keywords)):
+            self._store_root(func.value)
+        self.generic_visit(node)
+
+    def visit_Import(self, node):
+        for alias in node.names:
+            if alias.name == "*":
+                self.global_state = True
+            else:
+                self.stores.add(alias.asname or alias.name.split(".")[0])
+
+    visit_ImportFrom = visit_Import
+
+    def visit_Global(self, node):
+        self.stores.update(node.names)
+
+    def _nested(self, body, bound):
+        """Free names of a nested scope count as loads; its own bindings do not leak."""
+        inner = _NameScanner()
+        for child in body:
+            inner.visit(child)
+        self.loads |= inner.loads - inner.stores - bound
+        self.dynamic |= inner.dynamic
+        self.global_state |= inner.global_state
+
+    def visit_FunctionDef(self, node):
+        self.stores.add(node.name)
+        for child in node.decorator_list + node.args.defaults + \
+                [d for d in node.args.kw_defaults if d is not None]:
+            self.visit(child)
+        self._nested(node.body, _scope_arguments(node))
+
+    visit_AsyncFunctionDef = visit_FunctionDef
+
+    def visit_ClassDef(self, node):
+        self.stores.add(node.name)
+        for child in node.decorator_list + node.bases + [k.value for k in node.keywords]:
+            self.visit(child)
+        self._nested(node.body, set())
+
+    def visit_Lambda(self, node):
+        for child in node.args.defaults:
+            self.visit(child)
+        self._nested([node.body], _scope_arguments(node))
+
+    def _comprehension(self, node, elements):
+        bound = set()
+        for generator in node.generators:
+            scanner = _NameScanner()
+            scanner.visit(generator.target)
+            bound |= scanner.stores
+        self.visit(node.generators[0].iter)  # evaluated in the enclosing scope
+        rest = [g.iter for g in node.generators[1:]] + [c for g in node.generators for c in g.ifs]
+        self._nested(rest + elements, bound)
+
+    def visit_ListComp(self, node):
+        self._comprehension(node, [node.elt])
+
+    visit_SetComp = visit_GeneratorExp = visit_ListComp
+
+    def visit_DictComp(self, node):
+        self._comprehension(node, [node.key, node.value])
+
+
+def _python_cell(source):
+    if MAGIC_LINE.search(source):
+        return BARRIER
+    try:
+        tree = ast.parse(source)
+    except SyntaxError:
+        return BARRIER
+    defs, uses, dynamic, global_state = set(), set(), False, False
+    for statement in tree.body:
+        scanner = _NameScanner()
+        scanner.visit(statement)
+        uses |= scanner.loads - defs  # names bound earlier in the cell are not inputs
+        defs |= scanner.stores
+        dynamic |= scanner.dynamic
+        global_state |= scanner.global_state
+    pure = all(isinstance(s, (ast.Import, ast.ImportFrom, ast.FunctionDef, ast.AsyncFunctionDef,
+                              ast.ClassDef))
+               or isinstance(s, ast.Expr) and isinstance(s.value, ast.Constant)
+               for s in tree.body)
+    return CellInfo(frozenset(defs), frozenset(uses), dynamic or global_state, dynamic,
+                    pure and not (dynamic or global_state))
+
+
+def _r_cell(source):
+    code = R_COMMENT.sub("", source)
+    defs = set(R_ASSIGN.findall(code)) | set(R_RIGHT_ASSIGN.findall(code))
+    identifiers = set(R_IDENTIFIER.findall(R_STRING.sub('""', code))) - R_KEYWORDS
+    return CellInfo(frozenset(defs), frozenset(identifiers), bool(R_GLOBAL_EFFECT.search(code)),
+                    False, False)
+
+
+def analyze_cell(source, language="python"):
+    """CellInfo for one code cell's source."""
+    info = _r_cell(source) if language == "R" else _python_cell(source)
+    files = {f"file:{literal}" for literal in PATH_LITERAL.findall(source)}
+    return info._replace(defs=info.defs | files, uses=info.uses | files)
+
+
+def dependency_graph(infos):
+    """For each code cell (by position), the set of earlier cells it depends on directly."""
+    last_definer = {}
+    last_barrier = None
+    parents = []
+    for position, info in enumerate(infos):
+        if info.uses_all:
+            depends = set(range(position))
+        else:
+            depends = {last_definer[name] for name in info.uses if name in last_definer}
+            if last_barrier is not None:
+                depends.add(last_barrier)
+        parents.append(depends)
+        for name in info.defs:
+            last_definer[name] = position
+        if info.defines_all:
+            last_barrier = position
+    return parents
+
+
+def _closure(seeds, edges):
+    """Every node reachable from ``seeds`` through ``edges`` (node -> neighbours), seeds included."""
+    seen, stack = set(seeds), list(seeds)
+    while stack:
+        for neighbour in edges[stack.pop()]:
+            if neighbour not in seen:
+                seen.add(neighbour)
+                stack.append(neighbour)
+    return seen
+
+
+def _digest(text):
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class IncrementalRunner:
+    """One notebook, one kernel, re-executing only what edits invalidate."""
+
+    def __init__(self, notebook, kernel_name=None, cell_timeout=CELL_TIMEOUT, checkpoint_every=5,
+                 checkpoint_seconds=5.0, checkpoint_dir=None, cwd=None):
+        """
+        Args:
+            notebook: Path (re-read on every run), nbformat dict or NotebookNode
+            kernel_name: Kernel (default: the one preflight picks for the notebook)
+            cell_timeout: Per-cell timeout in seconds
+            checkpoint_every: Snapshot the kernel before every N-th code cell
+            checkpoint_seconds: Also snapshot after any cell slower than this
+            checkpoint_dir: Where snapshots are written (default: a temporary
+                directory removed by ``close``)
+            cwd: Working directory (default: the notebook's directory)
+        """
+        self.notebook = notebook
+        nb, path = as_notebook(notebook)
+        self.kernel_name = kernel_name or preflight(nb).kernel_name or DEFAULT_KERNEL
+        self.language = _language(self.kernel_name)
+        self.cell_timeout = cell_timeout
+        self.checkpoint_every = checkpoint_every
+        self.checkpoint_seconds = checkpoint_seconds
+        self.cwd = Path(cwd) if cwd else (path.parent.resolve() if path else Path.cwd())
+        self._own_dir = checkpoint_dir is None
+        self.checkpoint_dir = Path(checkpoint_dir or tempfile.mkdtemp(prefix="nb_checkpoints_"))
+        self.checkpoint_dir.mkdir(parents=True, exist_ok=True)
+        self._checkpoints = {}  # prefix digest -> (path, names that could not be saved)
+        self._history = []      # per code cell of the last run: dict(hash, info, ok, outputs, ...)
+        self._kernel = None
+        self.last_plan = None
+
+    # -- planning ----------------------------------------------------------
+
+    def _prefixes(self, hashes):
+        """prefix[i]: digest of the sources of code cells before position i."""
+        prefixes, digest = [], hashlib.sha256(f"{self.kernel_name}\0".encode())
+        for cell_hash in hashes:
+            prefixes.append(digest.hexdigest())
+            digest.update(cell_hash.encode())
+        prefixes.append(digest.hexdigest())
+        return prefixes
+
+    def _dirty(self, hashes, infos, children, full):
+        """(dirty positions, new position -> previous position of the same cell)."""
+        if full or not self._history:
+            return set(range(len(hashes))), {}
+        previous = [entry["hash"] for entry in self._history]
+        matched, seeds, removed = {}, set(), set()
+        matcher = difflib.SequenceMatcher(None, previous, hashes, autojunk=False)
+        for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+            if tag == "equal":
+                matched.update(zip(range(j1, j2), range(i1, i2)))
+                continue
+            seeds.update(range(j1, j2))
+            for entry in self._history[i1:i2]:
+                removed |= entry["info"].defs
+                if entry["info"].defines_all:
+                    seeds.update(range(j1, len(hashes)))
+        for position, info in enumerate(infos):
+            if position not in matched or not self._history[matched[position]]["ok"] \
+                    or info.uses & removed:
+                seeds.add(position)
+        return _closure(seeds, children), matched
+
+    def _plan(self, infos, parents, prefixes, dirty):
+        """(checkpoint position, positions to execute) resuming as late as possible."""
+        first = min(dirty)
+        needed = _closure(dirty, parents)
+        for start in range(first, -1, -1):
+            checkpoint = self._checkpoints.get(prefixes[start]) if start else (None, [])
+            if checkpoint is None:
+                continue
+            execute = {p for p in needed if p >= start}
+            lost = set(checkpoint[1]) & set().union(*(infos[p].uses for p in execute))
+            if lost:
+                definers = {max(p for p in range(start) if name in infos[p].defs)
+                            for name in lost if any(name in infos[p].defs for p in range(start))}
+                if not all(infos[p].pure for p in definers):
+                    continue  # an earlier checkpoint may have been saved whole
+                execute |= definers
+            return start, execute
+        return 0, set(needed)
+
+    # -- kernel ------------------------------------------------------------
+
+    def _ensure_kernel(self):
+        if self._kernel is None:
+            self._kernel = _Kernel(self.kernel_name, self.cwd)
+            self._kernel.run_code(WARMUP_CODE[self.language], timeout=120)
+        return self._kernel
+
+    def _interactive(self, client, code):
+        """Run setup code outside the notebook; returns its stdout."""
+        chunks = []
+
+        def collect(msg):
+            if msg["msg_type"] == "stream":
+                chunks.append(msg["content"]["text"])
+
+        try:
+            reply = run_sync(client.kc.execute_interactive)(
+                code, store_history=False, timeout=self.cell_timeout, output_hook=collect)
+        except Exception as e:
+            raise _CheckpointError(str(e)) from e
+        if reply["content"]["status"] != "ok":
+            raise _CheckpointError(reply["content"].get("evalue", "setup code failed"))
+        return "".join(chunks)
+
+    def _snapshot(self, client, prefix):
+        path = self.checkpoint_dir / f"{prefix[:20]}.ckpt"
+        try:
+            printed = self._interactive(client, SNAPSHOT_CODE[self.language].format(path=str(path)))
+            lost = json.loads(printed.strip().splitlines()[-1]) if printed.strip() else []
+        except (_CheckpointError, ValueError):
+            return  # not worth failing the notebook over
+        self._checkpoints[prefix] = (path, lost)
+
+    def _restore(self, client, prefix):
+        path, _ = self._checkpoints[prefix]
+        printed = self._interactive(client, RESTORE_CODE[self.language].format(path=str(path)))
+        return set(json.loads(printed.strip().splitlines()[-1])) if printed.strip() else set()
+
+    # -- running -----------------------------------------------------------
+
+    def run(self, notebook=None, full=False):
+        """
+        Execute the notebook, re-running only what changed since the last run.
+
+        Args:
+            notebook: New version of the notebook (default: re-read the one
+                given to the constructor)
+            full: Execute every cell from the top, whatever changed
+
+        Returns:
+            NotebookRun; ``self.last_plan`` says what was executed
+        """
+        if notebook is not None:
+            self.notebook = notebook
+        nb, path = as_notebook(self.notebook)
+        nb = copy.deepcopy(nb)
+        positions = [i for i, cell in enumerate(nb.cells) if cell.cell_type == "code"]
+        sources = [nb.cells[i].source for i in positions]
+        hashes = [_digest(source.strip()) for source in sources]
+        infos = [analyze_cell(source, self.language) for source in sources]
+        parents = dependency_graph(infos)
+        children = [set() for _ in infos]
+        for position, depends in enumerate(parents):
+            for parent in depends:
+                children[parent].add(position)
+        prefixes = self._prefixes(hashes)
+
+        dirty, matched = self._dirty(hashes, infos, children, full)
+        start_time = time.perf_counter()
+        if not dirty:
+            self._copy_previous(nb, positions, range(len(positions)), matched)
+            self.last_plan = Plan(None, [], positions, [])
+            times = [self._history[matched[p]]["seconds"] for p in range(len(positions))]
+            return NotebookRun(str(path) if path else None, True, None, None, times,
+                               time.perf_counter() - start_time, nb)
+
+        start, execute = (0, set(range(len(positions)))) if full else \
+            self._plan(infos, parents, prefixes, dirty)
+        try:
+            return self._execute(nb, path, positions, hashes, infos, prefixes, matched,
+                                 dirty, start, execute, start_time)
+        except _CheckpointError:
+            # Unusable checkpoint: forget it and start from the top
+            self._checkpoints.pop(prefixes[start], None)
+            return self._execute(nb, path, positions, hashes, infos, prefixes, matched, dirty,
+                                 0, _closure(dirty, parents), start_time)
+
+    def _execute(self, nb, path, positions, hashes, infos, prefixes, matched, dirty, start,
+                 execute, start_time):
+        kernel = self._ensure_kernel()
+        history = [None] * len(positions)
+        cell_times = []
+        executed, skipped = [], []
+        error = error_cell = None  # error_cell tracks the cell being executed
+        client = NotebookClient(nb, km=kernel.km, timeout=self.cell_timeout,
+                                kernel_name=self.kernel_name, record_timing=True)
+        try:
+            with client.setup_kernel():
+                self._interactive(client, RESET_CODE[self.language].format(path=str(self.cwd)))
+                if start:
+                    lost = self._restore(client, prefixes[start]) - set(self._checkpoints[prefixes[start]][1])
+                    if lost & set().union(*(infos[p].uses for p in execute)):
+                        raise _CheckpointError(f"could not restore {sorted(lost)}")
+                # Whether the namespace is exactly "every cell before this one ran"
+                complete = True
+                previous_seconds = 0.0
+                order = sorted(p for p in execute if p < start) + list(range(start, len(positions)))
+                for position in order:
+                    index = positions[position]
+                    if position >= start and complete and position and \
+                            prefixes[position] not in self._checkpoints and \
+                            (position % self.checkpoint_every == 0
+                             or previous_seconds >= self.checkpoint_seconds):
+                        self._snapshot(client, prefixes[position])
+                    if position not in execute:
+                        if position >= start:
+                            self._copy_previous(nb, positions, [position], matched)
+                            history[position] = self._history[matched[position]]
+                            skipped.append(index)
+                            cell_times.append(0.0)
+                            complete = False
+                        continue
+
+                    error_cell = index
+                    cell_start = time.perf_counter()
+                    ok = True
+                    try:
+                        client.execute_cell(nb.cells[index], index)
+                    except CellExecutionError as e:
+                        ok, error = False, str(e)
+                    previous_seconds = time.perf_counter() - cell_start
+                    executed.append(index)
+                    if position >= start:
+                        cell_times.append(previous_seconds)
+                    history[position] = {
+                        "hash": hashes[position], "info": infos[position], "ok": ok,
+                        "outputs": copy.deepcopy(nb.cells[index].get("outputs", [])),
+                        "execution_count": nb.cells[index].get("execution_count"),
+                        "seconds": previous_seconds,
+                    }
+                    if not ok:
+                        break
+        except _CheckpointError:
+            raise
+        except Exception as e:  # timeouts, dead kernels
+            error = f"{type(e).__name__}: {e}"
+            kernel.restart()
+        finally:
+            if client.kc is not None:
+                client.kc.stop_channels()
+
+        for position in range(len(positions)):
+            if history[position] is None:
+                if position < start and position in matched:
+                    # Restored from the checkpoint: not re-executed, so keep its previous outputs
+                    self._copy_previous(nb, positions, [position], matched)
+                    history[position] = self._history[matched[position]]
+                else:
+                    history[position] = {"hash": hashes[position], "info": infos[position],
+                                         "ok": False, "outputs": [], "execution_count": None,
+                                         "seconds": 0.0}
+        if error is None:
+            error_cell = None
+        self._history = history
+        self.last_plan = Plan(positions[start] if start else None, executed, skipped,
+                              [positions[p] for p in sorted(dirty)])
+        return NotebookRun(str(path) if path else None, error is None, error, error_cell,
+                           cell_times, time.perf_counter() - start_time, nb)
+
+    def _copy_previous(self, nb, positions, cells, matched):
+        """Give clean cells their outputs from the previous run."""
+        for position in cells:
+            entry = self._history[matched[position]]
+            cell = nb.cells[positions[position]]
+            cell.outputs = copy.deepcopy(entry["outputs"])
+            cell.execution_count = entry["execution_count"]
+
+    def close(self):
+        """Shut the kernel down and remove temporary checkpoints."""
+        if self._kernel is not None:
+            self._kernel.shutdown()
+            self._kernel = None
+        if self._own_dir:
+            shutil.rmtree(self.checkpoint_dir, ignore_errors=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Re-run only the notebook cells an edit affects")
+    parser.add_argument("notebook")
+    parser.add_argument("--kernel", default=None)
+    parser.add_argument("--cell-timeout", type=int, default=CELL_TIMEOUT)
+    parser.add_argument("--checkpoint-every", type=int, default=5)
+    parser.add_argument("--watch", action="store_true", help="Re-run whenever the file changes")
+    args = parser.parse_args()
+
+    def report(run, plan):
+        status = "✓" if run.success else f"✗ cell {run.error_cell}: {run.error.splitlines()[0] if run.error else ''}"
+        resumed = f"checkpoint before cell {plan.checkpoint}" if plan.checkpoint is not None else "the top"
+        print(f"{run.seconds:.2f}s from {resumed}: executed {plan.executed}, "
+              f"kept {len(plan.skipped)} cells  {status}")
+
+    with IncrementalRunner(args.notebook, args.kernel, args.cell_timeout, args.checkpoint_every) as runner:
+        report(runner.run(), runner.last_plan)
+        mtime = Path(args.notebook).stat().st_mtime_ns
+        while args.watch:
+            try:
+                time.sleep(1)
+            except KeyboardInterrupt:
+                break
+            if Path(args.notebook).stat().st_mtime_ns != mtime:
+                mtime = Path(args.notebook).stat().st_mtime_ns
+                report(runner.run(), runner.last_plan)
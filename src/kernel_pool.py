@@ -0,0 +1,330 @@
+"""Pool of warm Jupyter kernels for re-executing Kosmos notebooks.
+
+``test_notebook_execution`` (task3_evaluate.py) built a fresh
+``ExecutePreprocessor(timeout=600, kernel_name='python3')`` per notebook, so
+every run paid for kernel startup plus the pandas/numpy/matplotlib imports,
+which is most of the wall time for short analysis notebooks. A
+``KernelPool`` starts ``size`` kernels per kernel name up front and runs a
+warm-up cell in each. Notebooks are checked out to an idle kernel, run cell by
+cell through nbclient (the engine behind ExecutePreprocessor), and the
+kernel is reset before it returns to the pool:
+
+- The reset clears the user namespace (``%reset -f`` / ``rm(list = ls())``),
+  closes figures and changes to the next notebook's directory. Imported
+  modules stay loaded, so re-importing them costs nothing.
+- A kernel is restarted instead of reset when it timed out, died or failed
+  to reset, and also every ``max_uses`` notebooks. Monkeypatching or
+  leaked threads cannot accumulate.
+- Every notebook has a per-cell timeout and an overall deadline.
+
+``run_many`` executes notebooks in parallel, one per idle kernel.
+
+Usage:
+    from kernel_pool import KernelPool
+
+    with KernelPool(size=4) as pool:
+        for run in pool.run_many(notebook_paths, timeout=600):
+            print(run.path, run.success, run.seconds, run.error)
+
+    python src/kernel_pool.py sweep/*.ipynb -j 8 --timeout 600
+"""
+
+import os
+import queue
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import nbformat
+from jupyter_client.manager import AsyncKernelManager
+from jupyter_core.utils import run_sync
+from nbclient import NotebookClient
+from nbclient.exceptions import CellExecutionError, CellTimeoutError
+
+NotebookRun = namedtuple("NotebookRun", [
+    "path",        # notebook path (None for in-memory notebooks)
+    "success",     # every cell ran without error
+    "error",       # error message, or None
+    "error_cell",  # index of the failing cell, or None
+    "cell_times",  # seconds per code cell, in order (cells not reached are absent)
+    "seconds",     # wall time including reset/chdir
+    "notebook",    # executed NotebookNode with outputs
+])
+
+DEFAULT_KERNEL = "python3"
+CELL_TIMEOUT = 600
+
+WARMUP_CODE = {
+    "python": (
+        "import os, sys, json, math, re\n"
+        "try:\n"
+        "    import numpy, pandas\n"
+        "    import matplotlib\n"
+        "    matplotlib.use('Agg')\n"
+        "    import matplotlib.pyplot\n"
+        "except ImportError:\n"
+        "    pass\n"
+    ),
+    "R": "suppressMessages({library(stats); library(utils); library(graphics)})\n",
+}
+
+# Executed (outside history) before every notebook; {path} is the notebook directory
+RESET_CODE = {
+    "python": (
+        "get_ipython().run_line_magic('reset', '-f')\n"
+        "import os as _os\n"
+        "_os.chdir({path!r})\n"
+        "try:\n"
+        "    import matplotlib.pyplot as _plt\n"
+        "    _plt.close('all')\n"
+        "except ImportError:\n"
+        "    pass\n"
+        "del _os\n"
+    ),
+    "R": "rm(list = ls(all.names = TRUE)); graphics.off(); setwd({path!r})\n",
+}
+
+
+class _ResetError(Exception):
+    """The kernel could not be reset for the next notebook."""
+
+
+def _language(kernel_name):
+    return "R" if kernel_name in ("ir", "R", "r") else "python"
+
+
+def as_notebook(notebook):
+    """(NotebookNode, path or None) from a path, a dict or a NotebookNode."""
+    if isinstance(notebook, (str, Path)):
+        with open(notebook) as f:
+            return nbformat.read(f, as_version=4), Path(notebook)
+    if isinstance(notebook, nbformat.NotebookNode):
+        return notebook, None
+    return nbformat.from_dict(notebook), None
+
+
+class _Kernel:
+    """One pooled kernel process."""
+
+    def __init__(self, kernel_name, cwd):
+        self.kernel_name = kernel_name
+        self.language = _language(kernel_name)
+        self.km = AsyncKernelManager(kernel_name=kernel_name)
+        self.uses = 0
+        self.dirty = False
+        run_sync(self.km.start_kernel)(cwd=str(cwd))
+
+    def run_code(self, code, timeout=60):
+        """Execute setup code outside the notebook's history; raises on error."""
+        cell = nbformat.v4.new_code_cell(code)
+        client = NotebookClient(nbformat.v4.new_notebook(cells=[cell]), km=self.km, timeout=timeout)
+        try:
+            with client.setup_kernel():
+                client.execute_cell(cell, 0, store_history=False)
+        finally:
+            if client.kc is not None:
+                client.kc.stop_channels()
+
+    def restart(self):
+        run_sync(self.km.restart_kernel)(now=True)
+        self.uses = 0
+        self.dirty = False
+
+    def shutdown(self):
+        try:
+            run_sync(self.km.shutdown_kernel)(now=True)
+        except Exception:
+            pass  # already dead
+
+
+class KernelPool:
+    """Pre-started, pre-imported kernels shared by many notebook executions."""
+
+    def __init__(self, size=None, kernel_name=DEFAULT_KERNEL, warmup=True, max_uses=25,
+                 cwd=None):
+        """
+        Args:
+            size: Kernels per kernel name (default: CPU count, at most 8)
+            kernel_name: Kernel started eagerly; others start on first use
+            warmup: Run WARMUP_CODE in new and restarted kernels
+            max_uses: Restart a kernel after this many notebooks
+            cwd: Working directory for new kernels
+        """
+        self.size = size or min(os.cpu_count() or 1, 8)
+        self.default_kernel = kernel_name
+        self.warmup = warmup
+        self.max_uses = max_uses
+        self.cwd = Path(cwd or os.getcwd())
+        self._idle = {}  # kernel name -> Queue of idle _Kernel
+        self._all = []
+        self._lock = threading.Lock()
+        self._idle_queue(kernel_name)
+
+    def _start_kernel(self, kernel_name):
+        kernel = _Kernel(kernel_name, self.cwd)
+        if self.warmup:
+            kernel.run_code(WARMUP_CODE[kernel.language], timeout=120)
+        return kernel
+
+    def _idle_queue(self, kernel_name):
+        """The idle queue for ``kernel_name``, starting its kernels in parallel on first use."""
+        with self._lock:
+            if kernel_name not in self._idle:
+                idle = queue.Queue()
+                with ThreadPoolExecutor(max_workers=self.size) as pool:
+                    for kernel in pool.map(lambda _: self._start_kernel(kernel_name), range(self.size)):
+                        idle.put(kernel)
+                        self._all.append(kernel)
+                self._idle[kernel_name] = idle
+            return self._idle[kernel_name]
+
+    def _recycle(self, kernel):
+        try:
+            if kernel.dirty or kernel.uses >= self.max_uses or \
+                    not run_sync(kernel.km.is_alive)():
+                kernel.restart()
+                if self.warmup:
+                    kernel.run_code(WARMUP_CODE[kernel.language], timeout=120)
+        except Exception:
+            # Unrecoverable: replace the process entirely
+            kernel.shutdown()
+            try:
+                replacement = self._start_kernel(kernel.kernel_name)
+            except Exception:
+                # Keep the slot: the next run fails fast on the dead kernel
+                # and its recycle tries to start a replacement again
+                kernel.dirty = True
+            else:
+                with self._lock:
+                    self._all.remove(kernel)
+                    self._all.append(replacement)
+                kernel = replacement
+        self._idle[kernel.kernel_name].put(kernel)
+
+    def run(self, notebook, timeout=None, cell_timeout=CELL_TIMEOUT, kernel_name=None, cwd=None):
+        """
+        Execute one notebook on a warm kernel.
+
+        Args:
+            notebook: Path, nbformat dict or NotebookNode
+            timeout: Overall deadline in seconds (default: no limit beyond cells)
+            cell_timeout: Per-cell timeout in seconds
+            kernel_name: Kernel to use (default: the pool's kernel)
+            cwd: Working directory (default: the notebook's directory)
+
+        Returns:
+            NotebookRun
+        """
+        nb, path = as_notebook(notebook)
+        kernel_name = kernel_name or self.default_kernel
+        cwd = Path(cwd) if cwd else (path.parent.resolve() if path else self.cwd)
+
+        idle = self._idle_queue(kernel_name)
+        kernel = idle.get()
+        start = time.perf_counter()
+        deadline = start + timeout if timeout else None
+        cell_times = []
+        progress = {"cell": None}
+        error = None
+        try:
+            try:
+                self._execute(kernel, nb, cwd, deadline, timeout, cell_timeout, cell_times, progress)
+            except _ResetError:
+                kernel.restart()  # a broken kernel must not fail this notebook
+                self._execute(kernel, nb, cwd, deadline, timeout, cell_timeout, cell_times, progress)
+        except CellExecutionError as e:
+            error = str(e)
+        except Exception as e:  # timeouts, dead kernels, failed resets
+            error = f"{type(e).__name__}: {e}"
+            kernel.dirty = True
+        finally:
+            self._recycle(kernel)
+
+        return NotebookRun(str(path) if path else None, error is None, error,
+                           progress["cell"] if error else None, cell_times,
+                           time.perf_counter() - start, nb)
+
+    @staticmethod
+    def _execute(kernel, nb, cwd, deadline, timeout, cell_timeout, cell_times, progress):
+        """Reset the kernel and run the notebook's code cells over one client connection."""
+        client = NotebookClient(nb, km=kernel.km, timeout=cell_timeout,
+                                kernel_name=kernel.kernel_name, record_timing=True)
+        try:
+            with client.setup_kernel():
+                # Not execute_cell: nbclient writes executed cells back into nb.cells
+                try:
+                    reply = run_sync(client.kc.execute_interactive)(
+                        RESET_CODE[kernel.language].format(path=str(cwd)),
+                        store_history=False, timeout=60, output_hook=lambda msg: None)
+                except Exception as e:
+                    raise _ResetError(str(e)) from e
+                if reply["content"]["status"] != "ok":
+                    raise _ResetError(reply["content"].get("evalue", "reset failed"))
+                kernel.uses += 1
+
+                for index, cell in enumerate(nb.cells):
+                    if cell.cell_type != "code":
+                        continue
+                    if deadline is not None:
+                        remaining = deadline - time.perf_counter()
+                        if remaining <= 0:
+                            raise CellTimeoutError(f"Notebook exceeded its {timeout}s deadline")
+                        client.timeout = max(1, min(cell_timeout, int(remaining)))
+                    progress["cell"] = index
+                    cell_start = time.perf_counter()
+                    client.execute_cell(cell, index)
+                    cell_times.append(time.perf_counter() - cell_start)
+        finally:
+            if client.kc is not None:
+                client.kc.stop_channels()
+
+    def run_many(self, notebooks, timeout=None, cell_timeout=CELL_TIMEOUT, kernel_name=None):
+        """
+        Execute notebooks in parallel, one per idle kernel.
+
+        Yields:
+            NotebookRun per notebook, in input order
+        """
+        workers = self.size * max(1, len(self._idle))
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(self.run, nb, timeout, cell_timeout, kernel_name)
+                       for nb in notebooks]
+            for future in futures:
+                yield future.result()
+
+    def close(self):
+        """Shut down every kernel."""
+        with self._lock:
+            kernels, self._all, self._idle = self._all, [], {}
+        for kernel in kernels:
+            kernel.shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Execute notebooks on a pool of warm kernels")
+    parser.add_argument("notebooks", nargs="+")
+    parser.add_argument("-j", "--kernels", type=int, default=None, help="Kernels in the pool")
+    parser.add_argument("--kernel", default=DEFAULT_KERNEL)
+    parser.add_argument("--timeout", type=int, default=None, help="Per-notebook deadline (s)")
+    parser.add_argument("--cell-timeout", type=int, default=CELL_TIMEOUT)
+    args = parser.parse_args()
+
+    start = time.time()
+    with KernelPool(args.kernels, args.kernel) as kernel_pool:
+        print(f"Started {kernel_pool.size} {args.kernel} kernels in {time.time() - start:.1f}s")
+        passed = 0
+        for run in kernel_pool.run_many(args.notebooks, args.timeout, args.cell_timeout):
+            passed += run.success
+            status = "✓" if run.success else f"✗ cell {run.error_cell}: {run.error.splitlines()[0] if run.error else ''}"
+            print(f"  {run.seconds:7.2f}s  {run.path}  {status}")
+    print(f"\n{passed}/{len(args.notebooks)} notebooks executed in {time.time() - start:.1f}s")
@@ -0,0 +1,310 @@
+#!/usr/bin/env python3
+"""
+Indexed query tool over task execution logs.
+
+Ingests both the legacy text logs (``logs/<task>_execution.log``) and the
+structured JSONL logs written by execution_log.py into a local SQLite store,
+then answers diagnostic queries without re-reading the raw files:
+
+- status-transition timeline for a task (collapses repeated poll lines)
+- poll counts per task
+- error bursts grouped into fixed millisecond windows
+
+Ingestion is incremental: each file is tracked by inode and byte offset, so
+re-running ``ingest`` only reads lines appended since the last run, and a
+rotated ``.jsonl.1`` file is recognised as already indexed.
+
+Usage:
+    python src/log_index.py ingest                      # logs/*_execution.*
+    python src/log_index.py timeline 561fb2fd-06c8-...
+    python src/log_index.py polls
+    python src/log_index.py errors --window-ms 60000 --min-count 3
+"""
+
+import argparse
+import json
+import re
+import sqlite3
+import sys
+from datetime import datetime
+from pathlib import Path
+
+DEFAULT_DB = "logs/log_index.sqlite"
+DEFAULT_PATTERNS = ["logs/*_execution.log*", "logs/*_execution.jsonl*"]
+
+ISO_LINE = re.compile(r"^(\d{4}-\d{2}-\d{2}T[\d:.]+) \[(\w+)\] (.*)$")
+BRACKET_LINE = re.compile(r"^\[(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2})\] (.*)$")
+STATUS = re.compile(r"\b(?:Job )?[Ss]tatus: (.+?)\s*$")
+TASK_ID = re.compile(r"\b([0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12})\b")
+ERROR_TEXT = re.compile(r"^✗|\b(?:error|failed|timed out)\b", re.IGNORECASE)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sources (
+    device INTEGER NOT NULL,
+    inode INTEGER NOT NULL,
+    path TEXT NOT NULL,
+    offset INTEGER NOT NULL,
+    task_id TEXT,
+    PRIMARY KEY (device, inode)
+);
+CREATE TABLE IF NOT EXISTS events (
+    id INTEGER PRIMARY KEY,
+    ts_ms INTEGER NOT NULL,
+    task TEXT NOT NULL,
+    task_id TEXT,
+    stage TEXT,
+    level TEXT NOT NULL,
+    status TEXT,
+    message TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS events_task_id_ts ON events (task_id, ts_ms);
+CREATE INDEX IF NOT EXISTS events_status ON events (task_id, status) WHERE status IS NOT NULL;
+CREATE INDEX IF NOT EXISTS events_level_ts ON events (level, ts_ms);
+"""
+
+
+def to_ms(timestamp):
+    """Convert an ISO or ``YYYY-mm-dd HH:MM:SS`` timestamp to epoch milliseconds."""
+    return int(datetime.fromisoformat(timestamp).timestamp() * 1000)
+
+
+def task_name_for(path):
+    """``logs/task1_cancer_genomics_execution.jsonl.1`` -> ``task1_cancer_genomics``"""
+    name = Path(path).name
+    return name.split("_execution.")[0] if "_execution." in name else name.split(".")[0]
+
+
+def parse_line(line, current_task_id=None):
+    """
+    Parse one log line in any supported format.
+
+    Args:
+        line: Raw log line (without trailing newline)
+        current_task_id: Task ID seen earlier in the same file, used for
+            legacy lines that don't carry one
+
+    Returns:
+        Dict with ts_ms, task_id, stage, level, status, message, or None if
+        the line is not a log record (banners, blank lines, ...)
+
+    Raises:
+        ValueError: for a malformed record (invalid JSON, no timestamp, a
+            timestamp that is not a date)
+    """
+    if line.startswith("{"):
+        record = json.loads(line)
+        if not isinstance(record, dict) or not isinstance(record.get("timestamp"), str):
+            raise ValueError("JSON record without a timestamp")
+        message = str(record.get("message", ""))
+        status = STATUS.search(message)
+        return {
+            "ts_ms": to_ms(record["timestamp"]),
+            "task_id": record.get("task_id") or current_task_id,
+            "stage": record.get("stage"),
+            "level": record.get("level", "INFO"),
+            "status": status.group(1).lower() if status else None,
+            "message": message,
+        }
+
+    match = ISO_LINE.match(line)
+    if match:
+        timestamp, level, message = match.groups()
+    else:
+        match = BRACKET_LINE.match(line)
+        if not match:
+            return None
+        timestamp, message = match.groups()
+        level = "ERROR" if ERROR_TEXT.search(message) else "INFO"
+
+    found_id = TASK_ID.search(message)
+    status = STATUS.search(message)
+    return {
+        "ts_ms": to_ms(timestamp),
+        "task_id": found_id.group(1) if found_id else current_task_id,
+        "stage": "monitor" if status else None,
+        "level": level,
+        "status": status.group(1).lower() if status else None,
+        "message": message,
+    }
+
+
+class LogIndex:
+    """SQLite-backed index of execution log events."""
+
+    def __init__(self, db_path=DEFAULT_DB):
+        Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(db_path)
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def ingest_file(self, path):
+        """Index lines appended to ``path`` since the last ingest; returns count."""
+        path = Path(path)
+        stat = path.stat()
+        key = (stat.st_dev, stat.st_ino)
+        row = self.conn.execute(
+            "SELECT offset, task_id FROM sources WHERE device = ? AND inode = ?", key
+        ).fetchone()
+        offset, current_task_id = row if row else (0, None)
+        if offset > stat.st_size:  # truncated in place
+            offset, current_task_id = 0, None
+
+        task = task_name_for(path)
+        rows = []
+        with open(path, "rb") as f:
+            f.seek(offset)
+            for raw in f:
+                if not raw.endswith(b"\n"):
+                    break  # partial line still being written
+                try:
+                    event = parse_line(raw.decode("utf-8", "replace").rstrip("\r\n"), current_task_id)
+                except ValueError as e:
+                    print(f"{path}: skipping malformed line at byte {offset}: {e}", file=sys.stderr)
+                    event = None
+                offset += len(raw)
+                if event is None:
+                    continue
+                current_task_id = event["task_id"]
+                rows.append((event["ts_ms"], task, event["task_id"], event["stage"],
+                             event["level"], event["status"], event["message"]))
+
+        with self.conn:
+            self.conn.executemany(
+                "INSERT INTO events (ts_ms, task, task_id, stage, level, status, message) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+            self.conn.execute(
+                "INSERT OR REPLACE INTO sources (device, inode, path, offset, task_id) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (*key, str(path), offset, current_task_id),
+            )
+        return len(rows)
+
+    def ingest(self, patterns=DEFAULT_PATTERNS, root="."):
+        """Ingest every file matching ``patterns``; returns {path: new_events}."""
+        counts = {}
+        for pattern in patterns:
+            # Oldest rotated files first so task IDs carry forward correctly
+            for path in sorted(Path(root).glob(pattern), key=lambda p: p.stat().st_mtime_ns):
+                counts[str(path)] = self.ingest_file(path)
+        return counts
+
+    def timeline(self, task_id):
+        """
+        Status transitions for one task.
+
+        Returns:
+            List of dicts (status, first_ms, last_ms, polls), one per run of
+            identical consecutive statuses
+        """
+        transitions = []
+        for ts_ms, status in self.conn.execute(
+            "SELECT ts_ms, status FROM events WHERE task_id = ? AND status IS NOT NULL "
+            "ORDER BY ts_ms",
+            (task_id,),
+        ):
+            if transitions and transitions[-1]["status"] == status:
+                transitions[-1]["last_ms"] = ts_ms
+                transitions[-1]["polls"] += 1
+            else:
+                transitions.append({"status": status, "first_ms": ts_ms, "last_ms": ts_ms, "polls": 1})
+        return transitions
+
+    def poll_counts(self):
+        """Number of status polls, first and last poll time per task."""
+        return [
+            {"task": task, "task_id": task_id, "polls": polls, "first_ms": first, "last_ms": last}
+            for task, task_id, polls, first, last in self.conn.execute(
+                "SELECT task, task_id, COUNT(*), MIN(ts_ms), MAX(ts_ms) FROM events "
+                "WHERE status IS NOT NULL GROUP BY task, task_id ORDER BY COUNT(*) DESC"
+            )
+        ]
+
+    def error_bursts(self, window_ms=60000, min_count=2, since_ms=None, until_ms=None):
+        """
+        Error counts bucketed into fixed windows of ``window_ms`` milliseconds.
+
+        Returns:
+            List of dicts (window_start_ms, errors, tasks) for windows with at
+            least ``min_count`` errors, oldest first
+        """
+        query = ("SELECT (ts_ms / ?) * ?, COUNT(*), GROUP_CONCAT(DISTINCT task) FROM events "
+                 "WHERE level IN ('ERROR', 'CRITICAL')")
+        params = [window_ms, window_ms]
+        if since_ms is not None:
+            query += " AND ts_ms >= ?"
+            params.append(since_ms)
+        if until_ms is not None:
+            query += " AND ts_ms < ?"
+            params.append(until_ms)
+        query += " GROUP BY ts_ms / ? HAVING COUNT(*) >= ? ORDER BY 1"
+        params += [window_ms, min_count]
+        return [
+            {"window_start_ms": start, "errors": errors, "tasks": tasks.split(",")}
+            for start, errors, tasks in self.conn.execute(query, params)
+        ]
+
+
+def fmt_ms(ts_ms):
+    return datetime.fromtimestamp(ts_ms / 1000).isoformat(timespec="milliseconds")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Index and query task execution logs")
+    parser.add_argument("--db", default=DEFAULT_DB, help=f"Index database (default: {DEFAULT_DB})")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    ingest = sub.add_parser("ingest", help="Index new log lines")
+    ingest.add_argument("paths", nargs="*", help="Log files (default: logs/*_execution.*)")
+
+    timeline = sub.add_parser("timeline", help="Status transitions for a task")
+    timeline.add_argument("task_id")
+
+    sub.add_parser("polls", help="Poll counts per task")
+
+    errors = sub.add_parser("errors", help="Error bursts by time window")
+    errors.add_argument("--window-ms", type=int, default=60000)
+    errors.add_argument("--min-count", type=int, default=2)
+
+    args = parser.parse_args(argv)
+    index = LogIndex(args.db)
+
+    try:
+        if args.command == "ingest":
+            counts = ({p: index.ingest_file(p) for p in args.paths} if args.paths
+                      else index.ingest())
+            for path, count in counts.items():
+                print(f"{path}: {count} new events")
+
+        elif args.command == "timeline":
+            transitions = index.timeline(args.task_id)
+            if not transitions:
+                print(f"No status lines for task {args.task_id}")
+            for t in transitions:
+                duration = (t["last_ms"] - t["first_ms"]) / 1000
+                print(f"{fmt_ms(t['first_ms'])}  {t['status']:<15} "
+                      f"{t['polls']:>4} polls  {duration:>8.1f}s")
+
+        elif args.command == "polls":
+            for row in index.poll_counts():
+                print(f"{row['task']:<32} {row['task_id'] or '-':<36} {row['polls']:>5} polls  "
+                      f"{fmt_ms(row['first_ms'])} → {fmt_ms(row['last_ms'])}")
+
+        elif args.command == "errors":
+            bursts = index.error_bursts(args.window_ms, args.min_count)
+            if not bursts:
+                print("No error bursts found")
+            for burst in bursts:
+                print(f"{fmt_ms(burst['window_start_ms'])}  {burst['errors']:>4} errors  "
+                      f"{', '.join(burst['tasks'])}")
+    finally:
+        index.close()
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,192 @@
+"""Memoized RDKit molecules and descriptors, keyed by canonical SMILES.
+
+``validate_smiles``, ``calculate_qed`` and ``count_lipinski_violations`` in
+task4_evaluate.py each parsed the same string with ``Chem.MolFromSmiles``,
+and ``main()`` re-validated every molecule several times while printing.
+``MoleculeCache`` parses a SMILES string once, computes every descriptor the
+evaluators use in the same pass (MW, LogP, HBD/HBA, QED, TPSA, rotatable
+bonds, Lipinski violations) and persists them to disk, so re-evaluations and
+cross-run comparisons look descriptors up without touching RDKit. Input
+strings are mapped to their canonical SMILES, so differently written
+versions of the same molecule share one entry. The cache is invalidated when
+the RDKit version changes.
+
+Usage:
+    from molecule_cache import MoleculeCache
+
+    cache = MoleculeCache("cache/molecule_descriptors.json")
+    props = cache.descriptors("CC(=O)Oc1ccccc1C(=O)O")
+    if props["valid"]:
+        print(props["qed"], props["tpsa"])
+    cache.save()
+"""
+
+import json
+from pathlib import Path
+
+from artifacts import write_json
+
+# RDKit is optional - without it every lookup reports RDKit as unavailable
+try:
+    import rdkit
+    from rdkit import Chem, rdBase
+    from rdkit.Chem import QED, Crippen, Descriptors, Lipinski, rdMolDescriptors
+    RDKIT_AVAILABLE = True
+except ImportError:
+    RDKIT_AVAILABLE = False
+
+CACHE_VERSION = 1
+DEFAULT_CACHE_PATH = Path("cache/molecule_descriptors.json")
+
+
+def _rdkit_version():
+    return rdkit.__version__ if RDKIT_AVAILABLE else None
+
+
+def compute_descriptors(mol):
+    """All descriptors used by the MOLECULES evaluation, from one parsed Mol."""
+    mw = Descriptors.MolWt(mol)
+    logp = Crippen.MolLogP(mol)
+    hbd = Lipinski.NumHDonors(mol)
+    hba = Lipinski.NumHAcceptors(mol)
+    return {
+        "valid": True,
+        "canonical_smiles": Chem.MolToSmiles(mol),
+        "molecular_weight": mw,
+        "logp": logp,
+        "hbd": hbd,
+        "hba": hba,
+        "qed": QED.qed(mol),
+        "tpsa": rdMolDescriptors.CalcTPSA(mol),
+        "rotatable_bonds": rdMolDescriptors.CalcNumRotatableBonds(mol),
+        "heavy_atoms": mol.GetNumHeavyAtoms(),
+        "lipinski_violations": sum([mw > 500, logp > 5, hbd > 5, hba > 10]),
+    }
+
+
+class MoleculeCache:
+    """Canonical-SMILES keyed store of parsed molecules and their descriptors."""
+
+    def __init__(self, path=DEFAULT_CACHE_PATH):
+        """
+        Load the on-disk cache if present.
+
+        Args:
+            path: JSON file holding descriptors; None for an in-memory cache
+        """
+        self.path = Path(path) if path is not None else None
+        self._aliases = {}      # input SMILES -> canonical SMILES (None if invalid)
+        self._descriptors = {}  # canonical SMILES -> descriptor dict
+        self._mols = {}         # canonical SMILES -> Mol (this process only)
+        self._dirty = False
+        self.hits = 0
+        self.misses = 0
+        self._load()
+
+    def _load(self):
+        if self.path is None or not self.path.exists():
+            return
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+        except ValueError:
+            return  # corrupt cache - rebuild
+        if data.get("version") != CACHE_VERSION or data.get("rdkit_version") != _rdkit_version():
+            return  # descriptor values may differ between RDKit releases
+        self._aliases = data.get("aliases", {})
+        self._descriptors = data.get("molecules", {})
+
+    def __len__(self):
+        return len(self._descriptors)
+
+    def __contains__(self, smiles):
+        return smiles in self._aliases
+
+    def _parse(self, smiles):
+        """Parse ``smiles`` once; returns its canonical SMILES or None if invalid."""
+        if smiles in self._aliases:
+            self.hits += 1
+            return self._aliases[smiles]
+
+        self.misses += 1
+        # Invalid candidates are expected; keep their parse errors off stderr.
+        # BlockLogs restores the previous log state when released.
+        blocker = rdBase.BlockLogs()
+        try:
+            mol = Chem.MolFromSmiles(smiles) if smiles else None
+        except Exception:
+            mol = None
+        finally:
+            del blocker
+
+        canonical = None
+        if mol is not None:
+            canonical = Chem.MolToSmiles(mol)
+            self._mols[canonical] = mol
+            if canonical not in self._descriptors:
+                self._descriptors[canonical] = compute_descriptors(mol)
+        self._aliases[smiles] = canonical
+        self._dirty = True
+        return canonical
+
+    def descriptors(self, smiles):
+        """
+        Descriptors for a SMILES string, parsing it at most once ever.
+
+        Returns:
+            Dict with ``valid`` plus (if valid) canonical_smiles,
+            molecular_weight, logp, hbd, hba, qed, tpsa, rotatable_bonds,
+            heavy_atoms and lipinski_violations; None if RDKit is unavailable
+        """
+        if not RDKIT_AVAILABLE:
+            return None
+        canonical = self._parse(smiles)
+        if canonical is None:
+            return {"valid": False}
+        return self._descriptors[canonical]
+
+    def mol(self, smiles):
+        """The parsed RDKit Mol for ``smiles`` (None if invalid or no RDKit)."""
+        if not RDKIT_AVAILABLE:
+            return None
+        canonical = self._parse(smiles)
+        if canonical is None:
+            return None
+        if canonical not in self._mols:  # descriptors came from disk
+            self._mols[canonical] = Chem.MolFromSmiles(canonical)
+        return self._mols[canonical]
+
+    def is_valid(self, smiles):
+        """True if RDKit can parse ``smiles`` (None if RDKit is unavailable)."""
+        props = self.descriptors(smiles)
+        return None if props is None else props["valid"]
+
+    def canonical(self, smiles):
+        """Canonical SMILES, or None if invalid or RDKit is unavailable."""
+        return self._parse(smiles) if RDKIT_AVAILABLE else None
+
+    def store(self, smiles, props):
+        """Record descriptors computed elsewhere (e.g. descriptor_engine workers)."""
+        canonical = props["canonical_smiles"] if props and props.get("valid") else None
+        self._aliases[smiles] = canonical
+        if canonical is not None:
+            self._descriptors.setdefault(canonical, props)
+        self._dirty = True
+
+    def save(self):
+        """Persist new entries (no-op if nothing changed or in-memory)."""
+        if self.path is None or not self._dirty:
+            return
+        write_json(self.path, {
+            "version": CACHE_VERSION,
+            "rdkit_version": _rdkit_version(),
+            "aliases": self._aliases,
+            "molecules": self._descriptors,
+        }, manifest=False)
+        self._dirty = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.save()
@@ -4,6 +4,7 @@ Monitor Task 3 until completion and process results
 """
 
 from edison_wrapper import KosmosClient
+from scoring_engine import load_spec
 import json
 import os
 import time
@@ -90,10 +91,9 @@ metrics = evaluate_task3(
 print("\n" + "="*50)
 print("EVALUATION RESULTS")
 print("="*50)
-print(f"Gene Recall: {metrics.get('gene_recall', 0):.1f}% (Target: ≥66%)")
-print(f"Code Execution: {metrics.get('code_execution', False)} (Target: True)")
-print(f"Figure Count: {metrics.get('figure_count', 0)} (Target: ≥2)")
-print(f"Hypothesis Quality: {metrics.get('hypothesis_quality', 0):.1f}% (Target: ≥50%)")
+spec = load_spec("task3")
+for name in ("gene_recall", "code_execution", "figure_count", "hypothesis_quality"):
+    print(f"{spec.metrics[name].label}: {spec.format(name, metrics.get(name))} (Target: {spec.target(name)})")
 print(f"\nOverall: {'PASS' if metrics.get('overall_pass', False) else 'FAIL'}")
 
 # Generate final report
@@ -123,10 +123,7 @@ Successfully submitted ANALYSIS job without file uploads, using inline data repr
 
 | Metric | Target | Actual | Pass/Fail |
 |--------|--------|--------|-----------|
-| Gene recall | ≥66% | {metrics.get('gene_recall', 0):.1f}% | {'PASS' if metrics.get('gene_recall', 0) >= 66 else 'FAIL'} |
-| Code execution | True | {metrics.get('code_execution', False)} | {'PASS' if metrics.get('code_execution', False) else 'FAIL'} |
-| Figure count | ≥2 | {metrics.get('figure_count', 0)} | {'PASS' if metrics.get('figure_count', 0) >= 2 else 'FAIL'} |
-| Hypothesis quality | ≥50% | {metrics.get('hypothesis_quality', 0):.1f}% | {'PASS' if metrics.get('hypothesis_quality', 0) >= 50 else 'FAIL'} |
+{spec.metrics_table(metrics)}
 
 ## Overall Assessment
 **{'PASS' if metrics.get('overall_pass', False) else 'FAIL'}**
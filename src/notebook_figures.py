@@ -0,0 +1,223 @@
+"""Extract figures embedded in Kosmos notebook outputs.
+
+Kosmos ANALYSIS notebooks carry their plots as base64 ``image/png`` (or
+``image/jpeg`` / ``image/svg+xml``) entries in cell outputs, not as files on
+disk, so counting files under ``output_dir/figures`` reports 0. This module
+scans a notebook's outputs in one pass, decodes the images in parallel into a
+content-addressed store (``<store>/<sha256>.<ext>``, plus thumbnails when
+Pillow is installed) and reports counts, types and sizes. Nothing is executed.
+
+Usage:
+    from notebook_figures import extract_figures
+
+    report = extract_figures("output/task3_results/kosmos_raw_output_fixed.json",
+                             "output/task3_results/figures")
+    print(report["figure_count"], report["by_type"])
+"""
+
+import ast
+import base64
+import binascii
+import hashlib
+import io
+import json
+import struct
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+# Pillow is optional - only needed for thumbnails and non-PNG dimensions
+try:
+    from PIL import Image, UnidentifiedImageError
+    PIL_AVAILABLE = True
+except ImportError:
+    PIL_AVAILABLE = False
+
+IMAGE_MIME_TYPES = {
+    "image/png": "png",
+    "image/jpeg": "jpg",
+    "image/gif": "gif",
+    "image/svg+xml": "svg",
+}
+THUMBNAIL_SIZE = (256, 256)
+
+
+def load_notebook(source):
+    """
+    Load a notebook from a dict, an .ipynb file, a Kosmos raw output JSON
+    (with a ``notebook`` key) or a ``str(task.notebook)`` text dump.
+
+    Returns:
+        Notebook dict, or None if no notebook could be found
+    """
+    if isinstance(source, dict):
+        return source if "cells" in source else source.get("notebook")
+
+    path = Path(source)
+    if not path.exists():
+        return None
+    text = path.read_text()
+    try:
+        data = json.loads(text)
+    except ValueError:
+        try:
+            data = ast.literal_eval(text)
+        except (ValueError, SyntaxError):
+            return None
+
+    if isinstance(data, dict) and "cells" not in data:
+        data = data.get("notebook")
+    return data if isinstance(data, dict) and "cells" in data else None
+
+
+def iter_image_outputs(notebook):
+    """Yield (cell_index, output_index, mime_type, payload) for every embedded image."""
+    for cell_index, cell in enumerate(notebook.get("cells", [])):
+        for output_index, output in enumerate(cell.get("outputs", []) or []):
+            data = output.get("data") or {}
+            for mime_type in IMAGE_MIME_TYPES:
+                if mime_type in data:
+                    yield cell_index, output_index, mime_type, data[mime_type]
+
+
+def _png_dimensions(raw):
+    if raw[:8] == b"\x89PNG\r\n\x1a\n" and raw[12:16] == b"IHDR":
+        return struct.unpack(">II", raw[16:24])
+    return None, None
+
+
+def _decode(mime_type, payload):
+    if isinstance(payload, list):  # nbformat allows multiline strings as lists
+        payload = "".join(payload)
+    if mime_type == "image/svg+xml":
+        return payload.encode("utf-8")
+    return base64.b64decode(payload)
+
+
+def _image_info(raw, thumb_path):
+    """Read dimensions with Pillow and write a thumbnail if ``thumb_path`` is set."""
+    with Image.open(io.BytesIO(raw)) as img:
+        size = img.size
+        if thumb_path is not None and not thumb_path.exists():
+            thumb_path.parent.mkdir(exist_ok=True)
+            img.thumbnail(THUMBNAIL_SIZE)
+            img.save(thumb_path, "PNG")
+    return size
+
+
+def _store_figure(item, store_dir, thumbnails):
+    cell_index, output_index, mime_type, payload = item
+    figure = {
+        "cell": cell_index,
+        "output": output_index,
+        "mime_type": mime_type,
+        "sha256": None,
+        "bytes": 0,
+        "width": None,
+        "height": None,
+    }
+    try:
+        raw = _decode(mime_type, payload)
+    except (binascii.Error, ValueError, TypeError) as e:
+        figure["error"] = f"Undecodable {mime_type} payload: {e}"
+        return figure
+
+    digest = hashlib.sha256(raw).hexdigest()
+    ext = IMAGE_MIME_TYPES[mime_type]
+    figure["sha256"] = digest
+    figure["bytes"] = len(raw)
+    if mime_type == "image/png":
+        figure["width"], figure["height"] = _png_dimensions(raw)
+
+    if store_dir is not None:
+        path = store_dir / f"{digest}.{ext}"
+        if not path.exists():  # content-addressed: identical plots are stored once
+            tmp = path.with_name(f".{path.name}.{cell_index}-{output_index}.tmp")
+            tmp.write_bytes(raw)
+            tmp.replace(path)
+        figure["path"] = str(path)
+
+    if PIL_AVAILABLE and mime_type != "image/svg+xml":
+        thumb_path = None
+        if store_dir is not None and thumbnails:
+            thumb_path = store_dir / "thumbnails" / f"{digest}.png"
+        try:
+            figure["width"], figure["height"] = _image_info(raw, thumb_path)
+        except (UnidentifiedImageError, OSError, ValueError) as e:
+            figure["error"] = f"Unreadable {mime_type} image: {e}"
+        else:
+            if thumb_path is not None:
+                figure["thumbnail"] = str(thumb_path)
+
+    return figure
+
+
+def extract_figures(source, store_dir=None, thumbnails=True, max_workers=None):
+    """
+    Decode every image embedded in a notebook's outputs.
+
+    Args:
+        source: Notebook dict or path (see ``load_notebook``)
+        store_dir: Directory for the content-addressed image store; if None,
+            images are only measured, not written
+        thumbnails: Also write thumbnails (requires Pillow)
+        max_workers: Decoder threads (default: ThreadPoolExecutor default)
+
+    Returns:
+        Dict with figure_count (unique images), output_count (all image
+        outputs), by_type, total_bytes, a per-figure list and errors for
+        images that could not be decoded (those are not counted as figures)
+    """
+    notebook = load_notebook(source)
+    if notebook is None:
+        return {"figure_count": 0, "output_count": 0, "by_type": {},
+                "total_bytes": 0, "figures": [], "errors": [],
+                "error": "No notebook found"}
+
+    items = list(iter_image_outputs(notebook))
+    if store_dir is not None:
+        store_dir = Path(store_dir)
+        if items:
+            store_dir.mkdir(parents=True, exist_ok=True)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        figures = list(pool.map(lambda item: _store_figure(item, store_dir, thumbnails), items))
+
+    unique = {}
+    for figure in figures:
+        if "error" not in figure:
+            unique.setdefault(figure["sha256"], figure)
+
+    by_type = {}
+    for figure in unique.values():
+        by_type[figure["mime_type"]] = by_type.get(figure["mime_type"], 0) + 1
+
+    return {
+        "figure_count": len(unique),
+        "output_count": len(figures),
+        "by_type": by_type,
+        "total_bytes": sum(f["bytes"] for f in unique.values()),
+        "figures": figures,
+        "errors": [f"cell {f['cell']} output {f['output']}: {f['error']}"
+                   for f in figures if "error" in f],
+    }
+
+
+if __name__ == "__main__":
+    import sys
+
+    if len(sys.argv) < 2:
+        print("Usage: python notebook_figures.py NOTEBOOK [STORE_DIR]")
+        sys.exit(1)
+
+    report = extract_figures(sys.argv[1], sys.argv[2] if len(sys.argv) > 2 else None)
+    print(f"Figures: {report['figure_count']} unique ({report['output_count']} image outputs)")
+    for mime_type, count in report["by_type"].items():
+        print(f"  {mime_type}: {count}")
+    for error in report["errors"]:
+        print(f"  Skipped {error}")
+    for figure in report["figures"]:
+        if "error" in figure:
+            continue
+        size = f"{figure['width']}x{figure['height']}" if figure["width"] else "?"
+        print(f"  cell {figure['cell']:>3}  {figure['mime_type']:<14} {size:>10}  "
+              f"{figure['bytes']:>8} bytes  {figure['sha256'][:12]}")
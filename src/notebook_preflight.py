@@ -0,0 +1,445 @@
+"""Static pre-flight checks for Kosmos notebooks before they are executed.
+
+Kosmos analysis notebooks are not always Python. The recorded task 3
+notebook is R (``library(DESeq2)``, ``<-``, ``%>%``), and some notebooks mix
+both languages. Running an R notebook on a ``python3`` kernel fails, and a
+cell waiting on ``input()`` or spinning in ``while True`` burns the whole
+600 s timeout before the evaluator learns anything. ``preflight`` reads the
+notebook without executing it and reports:
+
+- the notebook language, from the code itself with the kernelspec metadata
+  as a tie-breaker, and the installed kernel to run it on. Mixed R/Python
+  notebooks (outside ``%%R`` cells) are flagged, because no single kernel
+  runs them;
+- syntax errors in Python cells;
+- imported Python modules and ``library()``/``require()``/``pkg::`` R
+  packages that are not installed (R packages are only checked when
+  ``Rscript`` is on the PATH);
+- input files read from absolute paths or relative paths that do not exist
+  (files an earlier cell writes are not inputs), plus remote URLs, which
+  need network access. These are warnings: the notebook may create or
+  fetch them in ways a static scan cannot see;
+- cells that cannot finish: ``while True``/``repeat`` loops with no
+  ``break``, reads from stdin, and sleeps longer than the cell timeout.
+
+Issues with severity ``error`` make the notebook not runnable, and the
+evaluator fails it at once instead of executing it. Warnings are reported
+only.
+
+Usage:
+    from notebook_preflight import preflight
+
+    report = preflight("output/task3/analysis.ipynb")
+    if not report.runnable:
+        print(report.summary())
+    else:
+        pool.run(notebook, kernel_name=report.kernel_name)
+
+    python src/notebook_preflight.py output/task3/*.ipynb
+"""
+
+import ast
+import importlib.util
+import re
+import shutil
+import subprocess
+import sys
+from collections import namedtuple
+from functools import lru_cache
+from pathlib import Path
+
+from kernel_pool import CELL_TIMEOUT, DEFAULT_KERNEL, _language, as_notebook
+
+try:
+    from jupyter_client.kernelspec import KernelSpecManager
+    KERNELSPECS_AVAILABLE = True
+except ImportError:
+    KERNELSPECS_AVAILABLE = False
+
+Issue = namedtuple("Issue", [
+    "severity",  # "error" (notebook will not run) or "warning"
+    "cell",      # notebook cell index, or None for notebook-level issues
+    "check",     # language, kernel, syntax, import, file, remote, termination
+    "message",
+])
+
+
+class PreflightReport(namedtuple("PreflightReport", [
+        "language",        # "python", "R" or None (no code cells)
+        "kernel_name",     # installed kernel to run the notebook on, or None
+        "cell_languages",  # per code cell: "python", "R" or None (undecided)
+        "issues",          # list of Issue
+        ])):
+    """Outcome of ``preflight``."""
+
+    @property
+    def runnable(self):
+        return not any(issue.severity == "error" for issue in self.issues)
+
+    def summary(self):
+        """The errors as one line, or "ok"."""
+        return "; ".join(f"cell {i.cell}: {i.message}" if i.cell is not None else i.message
+                         for i in self.issues if i.severity == "error") or "ok"
+
+
+# Installed kernels tried for each language, in order
+KERNELS = {
+    "python": ["python3", "python"],
+    "R": ["ir", "r", "R"],
+}
+
+R_SIGNALS = re.compile(
+    r"<-|%>%|%in%|\b(?:library|require|suppressPackageStartupMessages)\s*\("
+    r"|\bfunction\s*\(|\bc\(|\bdata\.frame\s*\(|\w\$\w|\b(?:TRUE|FALSE|NULL)\b"
+    r"|\b(?:read|write|is|as)\.[a-z]+\s*\(", re.MULTILINE)
+# R statements that also parse as Python but that Python code does not write
+R_STATEMENTS = re.compile(
+    r"^\s*[\w.]+(?:\[[^\]\n]*\])?\s*<-|^\s*(?:library|require|suppressPackageStartupMessages)\s*\(",
+    re.MULTILINE)
+PYTHON_SIGNALS = re.compile(
+    r"^\s*(?:import\s+\w|from\s+[\w.]+\s+import\b|def\s+\w+\s*\(|class\s+\w+|"
+    r"(?:if|for|while|with|try|elif|else|except)\b[^\n]*:\s*$)"
+    r"|\b(?:True|False|None|self)\b|\bf[\"']", re.MULTILINE)
+
+R_PACKAGE = re.compile(
+    r"\b(?:library|require|requireNamespace)\s*\(\s*[\"']?([A-Za-z][\w.]*)"
+    r"|\b([A-Za-z][\w.]*)::")
+R_BASE_PACKAGES = {"base", "stats", "utils", "graphics", "grDevices", "methods",
+                   "datasets", "tools", "parallel", "grid", "splines", "stats4", "tcltk"}
+
+URL = re.compile(r"""\b(?:https?|ftp|s3|gs)://[^\s"')]+""")
+# String literals passed to a reader, e.g. pd.read_csv("x.csv"), read.csv('x'), open("x"),
+# with open()'s mode, if given, in the second group
+READ_CALL = re.compile(
+    r"""\b(?:read[\w.]*|load\w*|open|fread|readRDS|source|np\.load\w*|pd\.read_\w+)"""
+    r"""\s*\(\s*(?:file\s*=\s*)?["']([^"'\n]+)["']"""
+    r"""(?:\s*,\s*(?:mode\s*=\s*)?["']([rwaxbt+]+)["'])?""")
+# String literals a cell writes: df.to_csv("x.csv"), plt.savefig('x.png'), write.csv(df, "x.csv")
+WRITE_CALL = re.compile(
+    r"""\b(?:to_\w+|savefig|save\w*|np\.save\w*|dump)\s*\("""
+    r"""\s*(?:path_or_buf\s*=\s*|fname\s*=\s*)?["']([^"'\n]+)["']"""
+    r"""|\b(?:write[\w.]*|saveRDS|ggsave|fwrite)\s*\([^"'()\n]*?["']([^"'\n]+)["']""")
+# Any quoted string that looks like a relative or absolute file path
+PATH_LITERAL = re.compile(r"""["']([^"'\n]{1,260}\.[A-Za-z0-9]{1,8})["']""")
+ABSOLUTE_PATH = re.compile(r"""["']((?:/|~/|[A-Za-z]:\\)[^"'\n]*)["']""")
+SYSTEM_PREFIXES = ("/dev/", "/proc/", "/tmp", "/usr/", "/etc/")
+
+R_ENDLESS = re.compile(r"\brepeat\s*\{|\bwhile\s*\(\s*(?:TRUE|T|1)\s*\)")
+R_STDIN = re.compile(r"\breadline\s*\(|\breadLines\s*\(\s*[\"']stdin|\bscan\s*\(\s*\)")
+SLEEP = re.compile(r"\b(?:time\.sleep|sleep|Sys\.sleep)\s*\(\s*([\d.]+)")
+MAGIC_LINE = re.compile(r"^\s*[%!]", re.MULTILINE)
+
+
+def _source(cell):
+    """Cell source as one string (embedded notebooks may keep it as a list of lines)."""
+    source = cell.get("source", "")
+    return "".join(source) if isinstance(source, list) else source
+
+
+def _strip_magics(source):
+    """Source with IPython magics and shell escapes commented out."""
+    return MAGIC_LINE.sub("#", source)
+
+
+def _strip_comments(source):
+    return "\n".join(line.split("#", 1)[0] if "'" not in line and '"' not in line else line
+                     for line in source.splitlines())
+
+
+def cell_language(source):
+    """
+    "python", "R" or None (empty, or equally plausible as both) for one cell.
+
+    A cell that parses as Python is Python unless it contains R statements
+    that happen to parse (``library(x)``, ``x <- 1``); one that parses but
+    shows no Python-specific syntax either (``print("done")``) is undecided.
+    Cells that do not parse are weighed by their R and Python signals.
+    """
+    if source.lstrip().startswith("%%R"):
+        return "python"  # rpy2 cell magic inside a Python notebook
+    code = _strip_comments(_strip_magics(source))
+    if not code.strip():
+        return None
+    r_hits = len(R_SIGNALS.findall(code))
+    python_hits = len(PYTHON_SIGNALS.findall(code))
+    try:
+        ast.parse(code)
+        parses = True
+    except SyntaxError:
+        parses = False
+    if not parses:
+        return "R" if r_hits >= python_hits else "python"
+    if R_STATEMENTS.search(code):
+        return "R"
+    return "python" if python_hits else None
+
+
+def _metadata_language(nb):
+    kernelspec = nb.metadata.get("kernelspec", {})
+    language = (kernelspec.get("language") or nb.metadata.get("language_info", {}).get("name") or "")
+    if language.lower() == "r" or kernelspec.get("name") in KERNELS["R"]:
+        return "R"
+    if language.lower() == "python" or str(kernelspec.get("name", "")).startswith("python"):
+        return "python"
+    return None
+
+
+@lru_cache(maxsize=1)
+def installed_kernels():
+    """Names of the Jupyter kernels installed here."""
+    if not KERNELSPECS_AVAILABLE:
+        return frozenset()
+    return frozenset(KernelSpecManager().find_kernel_specs())
+
+
+def select_kernel(language, preferred=None):
+    """Installed kernel for ``language``, preferring the notebook's own kernelspec."""
+    available = installed_kernels()
+    candidates = ([preferred] if preferred else []) + KERNELS.get(language, [])
+    for name in candidates:
+        if name in available and (name in KERNELS.get(language, []) or name == preferred):
+            return name
+    return None
+
+
+@lru_cache(maxsize=1)
+def installed_r_packages():
+    """Installed R packages, or None when R is not available to ask."""
+    rscript = shutil.which("Rscript")
+    if rscript is None:
+        return None
+    try:
+        result = subprocess.run(
+            [rscript, "-e", "cat(rownames(installed.packages()), sep='\\n')"],
+            capture_output=True, text=True, timeout=60)
+    except (OSError, subprocess.TimeoutExpired):
+        return None
+    return frozenset(result.stdout.split()) if result.returncode == 0 else None
+
+
+def _guarded_imports(tree):
+    """Line numbers of imports inside ``try: ... except ImportError``-style blocks."""
+    guarded = set()
+    for node in ast.walk(tree):
+        if not isinstance(node, ast.Try):
+            continue
+        catches = any(
+            handler.type is None
+            or any(isinstance(n, ast.Name) and n.id in ("ImportError", "ModuleNotFoundError", "Exception")
+                   for n in ast.walk(handler.type))
+            for handler in node.handlers)
+        if catches:
+            for stmt in node.body:
+                for child in ast.walk(stmt):
+                    if isinstance(child, (ast.Import, ast.ImportFrom)):
+                        guarded.add(child.lineno)
+    return guarded
+
+
+def _has_exit(loop):
+    """Does a loop body contain a break, return or raise (ignoring nested functions and loops)?"""
+    stack = list(loop.body)
+    while stack:
+        node = stack.pop()
+        if isinstance(node, (ast.Break, ast.Return, ast.Raise)):
+            return True
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.Lambda, ast.ClassDef,
+                             ast.For, ast.While)):
+            continue
+        if isinstance(node, ast.Call) and \
+                (getattr(node.func, "id", None) or getattr(node.func, "attr", None)) in ("exit", "quit"):
+            return True
+        stack.extend(ast.iter_child_nodes(node))
+    return False
+
+
+def _check_python(index, source, issues, cell_timeout):
+    code = _strip_magics(source)
+    if source.lstrip().startswith("%%"):
+        return  # cell magic: the body is not Python
+    try:
+        tree = ast.parse(code)
+    except SyntaxError as e:
+        issues.append(Issue("error", index, "syntax", f"SyntaxError line {e.lineno}: {e.msg}"))
+        return
+
+    guarded = _guarded_imports(tree)
+    local_modules = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            names = [alias.name for alias in node.names]
+        elif isinstance(node, ast.ImportFrom) and node.level == 0 and node.module:
+            names = [node.module]
+        else:
+            names = []
+        for name in names:
+            top = name.split(".")[0]
+            if top in sys.stdlib_module_names or top in local_modules or top == "__future__":
+                continue
+            local_modules.add(top)
+            try:
+                found = importlib.util.find_spec(top) is not None
+            except (ImportError, ValueError):
+                found = False
+            if not found:
+                severity = "warning" if node.lineno in guarded else "error"
+                issues.append(Issue(severity, index, "import", f"Python module not installed: {top}"))
+
+        if isinstance(node, ast.While) and isinstance(node.test, ast.Constant) and node.test.value \
+                and not _has_exit(node):
+            issues.append(Issue("error", index, "termination",
+                                f"line {node.lineno}: `while True` loop with no break"))
+        if isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and node.func.id == "input":
+            issues.append(Issue("error", index, "termination",
+                                f"line {node.lineno}: input() waits on stdin, which an executed notebook lacks"))
+        if isinstance(node, ast.Call) and getattr(node.func, "attr", None) == "serve_forever":
+            issues.append(Issue("error", index, "termination",
+                                f"line {node.lineno}: serve_forever() never returns"))
+    _check_sleep(index, code, issues, cell_timeout)
+
+
+def _check_r(index, source, issues, cell_timeout):
+    code = _strip_comments(source)
+    installed = installed_r_packages()
+    if installed is not None:
+        packages = {a or b for a, b in R_PACKAGE.findall(code)} - R_BASE_PACKAGES
+        for package in sorted(packages - installed):
+            issues.append(Issue("error", index, "import", f"R package not installed: {package}"))
+    if R_ENDLESS.search(code) and not re.search(r"\b(?:break|stop|quit|q)\b", code):
+        issues.append(Issue("error", index, "termination", "`repeat`/`while (TRUE)` loop with no break"))
+    if R_STDIN.search(code):
+        issues.append(Issue("error", index, "termination",
+                            "reads from stdin, which an executed notebook lacks"))
+    _check_sleep(index, code, issues, cell_timeout)
+
+
+def _check_sleep(index, code, issues, cell_timeout):
+    for seconds in SLEEP.findall(code):
+        try:
+            if float(seconds) >= cell_timeout:
+                issues.append(Issue("error", index, "termination",
+                                    f"sleeps {seconds}s, past the {cell_timeout}s cell timeout"))
+        except ValueError:
+            pass
+
+
+def read_files(source):
+    """Path literals a cell passes to a reader (write-mode ``open`` excluded)."""
+    return {literal for literal, mode in READ_CALL.findall(source) if not set(mode) & set("wax")}
+
+
+def written_files(source):
+    """Path literals a cell writes (``open(..., "w")`` included)."""
+    written = {a or b for a, b in WRITE_CALL.findall(source)}
+    written.update(literal for literal, mode in READ_CALL.findall(source) if set(mode) & set("wax"))
+    return written
+
+
+def _check_files(index, source, base_dir, issues, produced=()):
+    """Remote URLs and missing input files, skipping files in ``produced`` (written by this or earlier cells)."""
+    for url in sorted(set(URL.findall(source))):
+        issues.append(Issue("warning", index, "remote", f"fetches {url} (needs network access)"))
+
+    for literal in sorted(set(ABSOLUTE_PATH.findall(source))):
+        if literal.startswith(SYSTEM_PREFIXES):
+            continue
+        if literal in produced:
+            continue
+        path = Path(literal).expanduser()
+        issues.append(Issue("warning", index, "file", f"absolute path {literal}"
+                            + ("" if path.exists() else " does not exist here")))
+
+    for literal in sorted(read_files(source) - set(produced)):
+        if URL.match(literal) or Path(literal).expanduser().is_absolute():
+            continue  # reported above
+        if not (base_dir / literal).exists():
+            issues.append(Issue("warning", index, "file",
+                                f"reads {literal}, which does not exist in {base_dir}"))
+
+
+def preflight(notebook, base_dir=None, cell_timeout=CELL_TIMEOUT):
+    """
+    Check a notebook without executing it.
+
+    Args:
+        notebook: Path, nbformat dict or NotebookNode
+        base_dir: Directory relative input paths resolve against (default: the
+            notebook's directory, or the current directory)
+        cell_timeout: Per-cell timeout the notebook will run under
+
+    Returns:
+        PreflightReport
+    """
+    nb, path = as_notebook(notebook)
+    if base_dir is None:
+        base_dir = path.parent if path else Path.cwd()
+    base_dir = Path(base_dir)
+
+    code_cells = [(i, _source(cell)) for i, cell in enumerate(nb.cells)
+                  if cell.cell_type == "code" and _source(cell).strip()]
+    languages = [cell_language(source) for _, source in code_cells]
+    issues = []
+
+    counts = {lang: languages.count(lang) for lang in KERNELS}
+    declared = _metadata_language(nb)
+    if counts["python"] and counts["R"]:
+        minority = min(counts, key=counts.get)
+        cells = [i for (i, _), lang in zip(code_cells, languages) if lang == minority]
+        issues.append(Issue("error", None, "language",
+                            f"mixes Python and R: {minority} in cells {cells}; no single kernel runs it"))
+    detected = max(counts, key=counts.get) if any(counts.values()) else None
+    if counts["python"] == counts["R"]:
+        detected = declared or detected
+    language = detected or declared or (_language(DEFAULT_KERNEL) if code_cells else None)
+    if declared and detected and declared != detected and not (counts["python"] and counts["R"]):
+        issues.append(Issue("warning", None, "language",
+                            f"kernelspec says {declared} but the code is {detected}; routing to {detected}"))
+
+    kernel_name = None
+    if language:
+        preferred = nb.metadata.get("kernelspec", {}).get("name") if declared == language else None
+        kernel_name = select_kernel(language, preferred)
+        if kernel_name is None:
+            installed = ", ".join(sorted(installed_kernels())) or "none"
+            issues.append(Issue("error", None, "kernel",
+                                f"no {language} kernel installed (tried {', '.join(KERNELS[language])}; "
+                                f"installed: {installed})"))
+
+    produced = set()
+    for (index, source), cell_lang in zip(code_cells, languages):
+        if (cell_lang or language) == "R":
+            _check_r(index, source, issues, cell_timeout)
+        else:
+            _check_python(index, source, issues, cell_timeout)
+        produced |= written_files(source)
+        _check_files(index, source, base_dir, issues, produced)
+
+    return PreflightReport(language, kernel_name, languages, issues)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from notebook_figures import load_notebook
+
+    parser = argparse.ArgumentParser(description="Check notebooks for problems before executing them")
+    parser.add_argument("notebooks", nargs="+", help=".ipynb files or Kosmos raw output JSON")
+    parser.add_argument("--cell-timeout", type=int, default=CELL_TIMEOUT)
+    args = parser.parse_args()
+
+    failed = 0
+    for notebook_path in args.notebooks:
+        nb = load_notebook(notebook_path)
+        if nb is None:
+            print(f"{notebook_path}: no notebook found")
+            failed += 1
+            continue
+        report = preflight(nb, base_dir=Path(notebook_path).parent, cell_timeout=args.cell_timeout)
+        status = "runnable" if report.runnable else "NOT runnable"
+        print(f"{notebook_path}: {report.language or 'unknown'} -> kernel "
+              f"{report.kernel_name or '-'} ({status})")
+        for issue in report.issues:
+            where = f"cell {issue.cell}" if issue.cell is not None else "notebook"
+            print(f"  {issue.severity:<8}{where:<10}{issue.check:<12}{issue.message}")
+        failed += not report.runnable
+    sys.exit(1 if failed else 0)
@@ -9,6 +9,8 @@ import requests
 import random
 from datetime import datetime
 
+from scoring_engine import load_spec
+
 # Load ground truth
 with open("input/task1_ground_truth.json", "r") as f:
     ground_truth = json.load(f)
@@ -188,18 +190,13 @@ with open("output/task1_results/metrics.json", "w") as f:
 
 print(f"\nMetrics saved to output/task1_results/metrics.json")
 
-# Determine pass/fail
-target_recall_pass = target_recall >= 0.75
-citation_count_pass = citation_count >= 20
-citation_validity_pass = citation_validity == 1.0
-key_paper_coverage_pass = key_paper_coverage >= 0.66
-
-passed_metrics = sum([target_recall_pass, citation_count_pass, citation_validity_pass, key_paper_coverage_pass])
-overall_assessment = "PASS" if passed_metrics >= 3 else "FAIL"
+# Determine pass/fail (thresholds in input/task1_scoring.json)
+spec = load_spec("task1")
+assessment = spec.assess(metrics)
+overall_assessment = "PASS" if assessment["overall_pass"] else "FAIL"
 
 print(f"\n=== FINAL ASSESSMENT ===")
-print(f"Target recall (≥75%): {'PASS' if target_recall_pass else 'FAIL'} - {target_recall:.1%}")
-print(f"Citation count (≥20): {'PASS' if citation_count_pass else 'FAIL'} - {citation_count}")
-print(f"Citation validity (100%): {'PASS' if citation_validity_pass else 'FAIL'} - {citation_validity:.1%}")
-print(f"Key paper coverage (≥66%): {'PASS' if key_paper_coverage_pass else 'FAIL'} - {key_paper_coverage:.1%}")
-print(f"\nOverall: {overall_assessment} ({passed_metrics}/4 metrics passing)")
\ No newline at end of file
+for name, passed in assessment["passes"].items():
+    print(f"{spec.metrics[name].label} ({spec.target(name)}): {'PASS' if passed else 'FAIL'} - "
+          f"{spec.format(name, metrics[name])}")
+print(f"\nOverall: {overall_assessment} ({assessment['passed']}/{assessment['required']} metrics passing)")
\ No newline at end of file
@@ -0,0 +1,162 @@
+"""BM25 inverted index over answer passages for concept recall.
+
+``calculate_mechanism_recall`` (task5_evaluate.py, task5_improved_evaluate.py)
+compared every ground-truth mechanism with every identified sentence using
+substring and term-count checks, and ``evaluate_hypotheses``
+(task3_evaluate.py) ran ``word in hyp_lower`` per mechanism word, so "and"
+matched almost anything. ``PassageIndex`` tokenizes and stems the passages
+once into an inverted index. Each concept is then a lookup of its few terms'
+posting lists. Candidates are ranked with BM25 and accepted only if they
+contain enough of the concept's distinct terms. Cost depends on the postings
+touched, not on the number of passages times concepts.
+
+Usage:
+    from passage_index import PassageIndex, concept_recall
+
+    index = PassageIndex(sentences)
+    match = index.best_match("LPS-induced neuroinflammation", min_terms=2)
+    recall, matched, details = concept_recall(mechanism_names, sentences)
+"""
+
+import math
+import re
+from collections import Counter, namedtuple
+
+PassageMatch = namedtuple("PassageMatch", ["passage", "score", "matched_terms", "query_terms"])
+
+STOPWORDS = frozenset("""
+    a an and are as at be by for from in into is it its of on or over that the
+    their this to via vs was were which with within
+""".split())
+
+# Greek letters are written both ways in answers ("α-syn", "alpha-synuclein")
+GREEK = {"α": "alpha", "β": "beta", "γ": "gamma", "δ": "delta", "κ": "kappa", "σ": "sigma"}
+GREEK_PATTERN = re.compile("|".join(GREEK))
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+VOWEL = re.compile(r"[aeiouy]")
+
+
+def stem(word):
+    """Light suffix stripping (Porter steps 1a/1b) so plurals and -ed/-ing forms match."""
+    if len(word) <= 3 or word.isdigit():
+        return word
+    if word.endswith("sses"):
+        word = word[:-2]
+    elif word.endswith("ies"):
+        word = word[:-3] + "y"
+    elif word.endswith("s") and not word.endswith(("ss", "us", "is")):
+        word = word[:-1]
+    for suffix in ("ing", "ed"):
+        if word.endswith(suffix) and len(word) - len(suffix) >= 3 \
+                and VOWEL.search(word[:-len(suffix)]):
+            word = word[:-len(suffix)]
+            break
+    return word
+
+
+def tokenize(text):
+    """Lowercased, stemmed content terms of ``text`` (hyphenated words are split)."""
+    text = GREEK_PATTERN.sub(lambda m: GREEK[m.group()], text.lower())
+    return [stem(t) for t in TOKEN_PATTERN.findall(text) if t not in STOPWORDS]
+
+
+class PassageIndex:
+    """Inverted index with BM25 scoring over a list of passages."""
+
+    def __init__(self, passages, k1=1.5, b=0.75):
+        """
+        Index passages (sentences, list items, hypotheses).
+
+        Args:
+            passages: List of strings
+            k1, b: BM25 parameters
+        """
+        self.passages = list(passages)
+        self.k1 = k1
+        self.b = b
+        self.postings = {}  # term -> [(passage id, term frequency), ...]
+        self.lengths = []
+        for pid, passage in enumerate(self.passages):
+            terms = tokenize(passage)
+            self.lengths.append(len(terms))
+            for term, tf in Counter(terms).items():
+                self.postings.setdefault(term, []).append((pid, tf))
+        self.avg_length = (sum(self.lengths) / len(self.lengths)) if self.lengths else 0.0
+
+    def __len__(self):
+        return len(self.passages)
+
+    def idf(self, term):
+        df = len(self.postings.get(term, ()))
+        return math.log(1 + (len(self.passages) - df + 0.5) / (df + 0.5))
+
+    def _candidates(self, query_terms):
+        """BM25 score and matched-term count per passage, from postings only."""
+        scores = {}
+        matched = {}
+        for term in query_terms:
+            idf = self.idf(term)
+            for pid, tf in self.postings.get(term, ()):
+                norm = self.k1 * (1 - self.b + self.b * self.lengths[pid] / (self.avg_length or 1))
+                scores[pid] = scores.get(pid, 0.0) + idf * tf * (self.k1 + 1) / (tf + norm)
+                matched[pid] = matched.get(pid, 0) + 1
+        return scores, matched
+
+    def search(self, query, k=5):
+        """Top-k passages by BM25 as PassageMatch tuples."""
+        query_terms = list(dict.fromkeys(tokenize(query)))
+        scores, matched = self._candidates(query_terms)
+        top = sorted(scores, key=lambda pid: -scores[pid])[:k]
+        return [PassageMatch(pid, scores[pid], matched[pid], len(query_terms)) for pid in top]
+
+    def best_match(self, query, min_terms=2, min_coverage=0.0):
+        """
+        Best passage containing enough of the query's distinct terms.
+
+        Args:
+            query: Concept text, e.g. a ground-truth mechanism name
+            min_terms: Required distinct query terms in the passage (capped
+                at the number of terms the query has)
+            min_coverage: Required fraction of the query's distinct terms
+
+        Returns:
+            PassageMatch, or None if no passage qualifies
+        """
+        query_terms = list(dict.fromkeys(tokenize(query)))
+        if not query_terms:
+            return None
+        required = max(min(min_terms, len(query_terms)),
+                       math.ceil(min_coverage * len(query_terms)))
+        scores, matched = self._candidates(query_terms)
+        qualifying = [pid for pid in scores if matched[pid] >= required]
+        if not qualifying:
+            return None
+        pid = max(qualifying, key=lambda p: (matched[p], scores[p]))
+        return PassageMatch(pid, scores[pid], matched[pid], len(query_terms))
+
+
+def concept_recall(concepts, passages, min_terms=2, min_coverage=0.0):
+    """
+    Fraction of concepts found in the passages.
+
+    Returns:
+        (recall, matched concepts, details) where details maps each concept
+        to its best passage text and score (None if unmatched)
+    """
+    index = passages if isinstance(passages, PassageIndex) else PassageIndex(passages)
+    matched = []
+    details = {}
+    for concept in concepts:
+        match = index.best_match(concept, min_terms, min_coverage)
+        if match is None:
+            details[concept] = None
+            continue
+        matched.append(concept)
+        details[concept] = {
+            "passage": index.passages[match.passage],
+            "score": round(match.score, 3),
+            "matched_terms": match.matched_terms,
+            "query_terms": match.query_terms,
+        }
+    recall = len(matched) / len(concepts) if concepts else 0
+    return recall, matched, details
@@ -0,0 +1,501 @@
+"""Pathway enrichment over local gene set files, for checking Kosmos's claims.
+
+Kosmos reports pathway enrichment ("100% of upregulated genes belong to
+chaperone pathways"), but ``expected_pathways`` in the ground truth is four
+strings, and nothing checked either against the data. This module runs the
+enrichment itself:
+
+- ``GeneSetIndex`` loads GMT files (MSigDB/Enrichr style), GAF files (GO
+  annotations) and two- or three-column gene/term tables from local disk.
+  They are stored as one CSR structure: gene ids per set, plus offsets. The
+  index is cached as ``.npz`` under ``cache/gene_sets``, keyed by the files'
+  paths, sizes and mtimes, so later loads skip parsing.
+- ``over_representation`` runs a hypergeometric test of a DEG list against
+  every set at once. Overlaps come from one ``np.add.reduceat`` over the CSR
+  members. Upper tails are summed in log space from a log-factorial table.
+- ``rank_enrichment`` runs a Mann-Whitney test of every set's scores (e.g.
+  moderated t from de_engine) against the rest. It needs no DEG cut-off, so
+  it also works for small designs where nothing passes the FDR.
+- ``verify_claims`` finds the gene sets named in a Kosmos answer and in the
+  ground-truth ``expected_pathways`` (EntityMatcher over the cleaned set
+  names), then reports which are supported by the enrichment results.
+
+10,000 gene sets over a 20,000-gene universe take well under a second per
+test. Benjamini-Hochberg FDR comes from de_engine.
+
+Usage:
+    from pathway_enrichment import GeneSetIndex, rank_enrichment, verify_claims
+
+    index = GeneSetIndex.load("input/gene_sets")
+    enrichment = rank_enrichment(index, de_result["t_moderated"])
+    verify_claims(index, answer, enrichment, ground_truth["expected_pathways"])
+
+    python src/pathway_enrichment.py input/gene_sets --counts input/task3_ecoli_heatshock.csv
+"""
+
+import gzip
+import hashlib
+import math
+import os
+import re
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from de_engine import benjamini_hochberg
+from entity_matcher import EntityMatcher
+
+DEFAULT_GENE_SETS = Path(os.environ.get("GENE_SETS_DIR", "input/gene_sets"))
+DEFAULT_CACHE_DIR = Path("cache/gene_sets")
+INDEX_VERSION = 1
+SUFFIXES = (".gmt", ".gaf", ".tsv", ".txt", ".csv")
+
+# Collection prefixes stripped from set names before matching them in text
+NAME_PREFIX = re.compile(r"^(?:GO(?:BP|CC|MF)?|KEGG(?:_MEDICUS)?|REACTOME|WP|BIOCARTA|PID|HALLMARK|"
+                         r"ECO|ECOCYC)_", re.IGNORECASE)
+MIN_LABEL_LENGTH = 6  # shorter labels ("SOS", "Lon") match too much prose
+PAIR_BLOCK = 4_000_000  # sets x tail terms per vectorized block in the hypergeometric test
+
+
+def _open(path):
+    return gzip.open(path, "rt") if str(path).endswith(".gz") else open(path)
+
+
+def _suffix(path):
+    name = str(path)[:-3] if str(path).endswith(".gz") else str(path)
+    return Path(name).suffix.lower()
+
+
+def _parse_gmt(handle):
+    for line in handle:
+        fields = line.rstrip("\n\r").split("\t")
+        if len(fields) >= 3 and fields[0]:
+            yield fields[0], fields[1], [g for g in fields[2:] if g]
+
+
+def _parse_gaf(handle):
+    """GO annotation file: symbol (column 3) -> GO id (column 5), NOT qualifiers skipped."""
+    sets = {}
+    for line in handle:
+        if line.startswith("!"):
+            continue
+        fields = line.rstrip("\n\r").split("\t")
+        if len(fields) < 5 or "NOT" in fields[3].split("|"):
+            continue
+        sets.setdefault(fields[4], []).append(fields[2])
+    for term, genes in sets.items():
+        yield term, "", genes
+
+
+def _parse_table(handle, separator):
+    """Rows of gene, term[, term description]; a header row is skipped."""
+    sets, descriptions = {}, {}
+    for number, line in enumerate(handle):
+        fields = [f.strip() for f in line.rstrip("\n\r").split(separator)]
+        if len(fields) < 2 or line.startswith("#"):
+            continue
+        if number == 0 and fields[0].lower() in ("gene", "genes", "symbol", "gene_symbol", "gene_name"):
+            continue
+        gene, term = fields[0], fields[1]
+        sets.setdefault(term, []).append(gene)
+        if len(fields) > 2 and fields[2]:
+            descriptions[term] = fields[2]
+    for term, genes in sets.items():
+        yield term, descriptions.get(term, ""), genes
+
+
+def read_gene_sets(path):
+    """Yield (name, description, genes) from one gene set file."""
+    suffix = _suffix(path)
+    with _open(path) as handle:
+        if suffix == ".gmt":
+            yield from _parse_gmt(handle)
+        elif suffix == ".gaf":
+            yield from _parse_gaf(handle)
+        else:
+            yield from _parse_table(handle, "," if suffix == ".csv" else "\t")
+
+
+def _gene_set_files(paths):
+    files = []
+    for path in [paths] if isinstance(paths, (str, Path)) else paths:
+        path = Path(path)
+        if path.is_dir():
+            files.extend(sorted(p for p in path.rglob("*") if p.is_file()
+                                and _suffix(p) in SUFFIXES))
+        else:
+            files.append(path)
+    return files
+
+
+def clean_name(name):
+    """Readable form of a set name for matching in text: KEGG_RNA_DEGRADATION -> rna degradation."""
+    return re.sub(r"\s+", " ", NAME_PREFIX.sub("", name).replace("_", " ")).strip().lower()
+
+
+class GeneSetIndex:
+    """Gene sets as CSR arrays over one gene vocabulary."""
+
+    def __init__(self, names, descriptions, genes, indptr, indices):
+        self.names = list(names)
+        self.descriptions = list(descriptions)
+        self.genes = np.asarray(genes, dtype=str)   # display symbols, by gene id
+        self.indptr = np.asarray(indptr, dtype=np.int64)
+        self.indices = np.asarray(indices, dtype=np.int32)
+        self._gene_ids = {g.lower(): i for i, g in enumerate(self.genes)}
+        self._matcher = None
+        self._label_sets = {}  # matched label -> set indices
+
+    def __len__(self):
+        return len(self.names)
+
+    @property
+    def sizes(self):
+        return np.diff(self.indptr)
+
+    @classmethod
+    def from_sets(cls, sets):
+        """Build from (name, description, genes) tuples; repeated names are merged."""
+        merged, descriptions, gene_ids, symbols = {}, {}, {}, []
+        for name, description, genes in sets:
+            members = merged.setdefault(name, set())
+            if description and not descriptions.get(name):
+                descriptions[name] = description
+            for gene in genes:
+                key = gene.lower()  # gene symbols differ in case across sources (dnaK, DNAK)
+                if key not in gene_ids:
+                    gene_ids[key] = len(symbols)
+                    symbols.append(gene)
+                members.add(gene_ids[key])
+        names = list(merged)
+        sizes = np.fromiter((len(merged[n]) for n in names), dtype=np.int64, count=len(names))
+        indptr = np.concatenate([[0], np.cumsum(sizes)])
+        indices = np.fromiter((i for n in names for i in sorted(merged[n])), dtype=np.int32,
+                              count=int(indptr[-1]))
+        return cls(names, [descriptions.get(n, "") for n in names], symbols, indptr, indices)
+
+    @classmethod
+    def load(cls, paths=DEFAULT_GENE_SETS, cache_dir=DEFAULT_CACHE_DIR):
+        """
+        Load gene set files (a file, a directory, or a list of them).
+
+        The parsed index is cached as ``.npz``; set ``cache_dir=None`` to skip.
+        """
+        files = _gene_set_files(paths)
+        if not files:
+            raise FileNotFoundError(f"No gene set files ({', '.join(SUFFIXES)}) in {paths}")
+        digest = hashlib.sha256(f"v{INDEX_VERSION}".encode())
+        for path in files:
+            stat = path.stat()
+            digest.update(f"\0{path.resolve()}\0{stat.st_size}\0{stat.st_mtime_ns}".encode())
+        cache_path = Path(cache_dir) / f"{digest.hexdigest()[:24]}.npz" if cache_dir else None
+
+        if cache_path is not None and cache_path.exists():
+            data = np.load(cache_path, allow_pickle=False)
+            return cls(data["names"], data["descriptions"], data["genes"], data["indptr"], data["indices"])
+
+        index = cls.from_sets(gene_set for path in files for gene_set in read_gene_sets(path))
+        if cache_path is not None:
+            cache_path.parent.mkdir(parents=True, exist_ok=True)
+            np.savez(cache_path, names=np.asarray(index.names, dtype=str),
+                     descriptions=np.asarray(index.descriptions, dtype=str), genes=index.genes,
+                     indptr=index.indptr, indices=index.indices)
+        return index
+
+    def gene_mask(self, genes):
+        """Boolean mask over the vocabulary for the given gene symbols (unknown ones ignored)."""
+        mask = np.zeros(len(self.genes), dtype=bool)
+        ids = [self._gene_ids[g.lower()] for g in genes if g.lower() in self._gene_ids]
+        mask[ids] = True
+        return mask
+
+    def counts(self, mask):
+        """Members of every set inside ``mask``."""
+        weights = np.concatenate([mask[self.indices].astype(np.int64), [0]])
+        return np.add.reduceat(weights, self.indptr[:-1])[:len(self)] * (self.sizes > 0)
+
+    def members(self, set_index, mask=None):
+        ids = self.indices[self.indptr[set_index]:self.indptr[set_index + 1]]
+        if mask is not None:
+            ids = ids[mask[ids]]
+        return self.genes[ids].tolist()
+
+    def matcher(self):
+        """EntityMatcher over cleaned set names and descriptions (built once)."""
+        if self._matcher is None:
+            labels = {}
+            for i, (name, description) in enumerate(zip(self.names, self.descriptions)):
+                for label in {name.lower(), clean_name(name), description.strip().lower()}:
+                    if MIN_LABEL_LENGTH <= len(label) <= 120 and "://" not in label:
+                        labels.setdefault(label, []).append(i)
+            self._label_sets = labels
+            self._matcher = EntityMatcher(list(labels))
+        return self._matcher
+
+    def sets_named_in(self, text):
+        """Indices of the sets whose name or description appears in ``text``."""
+        matcher = self.matcher()
+        found = {}
+        for label in matcher.entities_in(text):
+            for i in self._label_sets[label]:
+                found[i] = None
+        return list(found)
+
+
+def _log_factorials(n):
+    return np.concatenate([[0.0], np.cumsum(np.log(np.arange(1, n + 1)))])
+
+
+def _log_choose(log_factorial, n, k):
+    return log_factorial[n] - log_factorial[k] - log_factorial[n - k]
+
+
+def hypergeometric_sf(k, population, successes, draws):
+    """
+    P(X >= k) for X ~ Hypergeometric(population, successes, draws), vectorized.
+
+    ``k`` and ``successes`` are arrays (one per set); the tail is summed in
+    log space over blocks of sets.
+    """
+    k = np.asarray(k, dtype=np.int64)
+    successes = np.asarray(successes, dtype=np.int64)
+    log_factorial = _log_factorials(population)
+    upper = np.minimum(successes, draws)
+    p = np.ones(len(k))
+    todo = np.flatnonzero((k > 0) & (k <= upper))
+    p[k > upper] = 0.0
+    if not len(todo):
+        return p
+    log_total = _log_choose(log_factorial, population, draws)
+    terms = upper[todo] - k[todo] + 1
+    order = todo[np.argsort(terms)]
+    start = 0
+    while start < len(order):
+        width = int(upper[order[start]] - k[order[start]] + 1)
+        stop = start + max(1, PAIR_BLOCK // max(width, 1))
+        block = order[start:stop]
+        width = int((upper[block] - k[block]).max() + 1)
+        i = k[block, None] + np.arange(width)[None, :]
+        valid = i <= upper[block, None]
+        i = np.where(valid, i, k[block, None])
+        K = successes[block, None]
+        log_pmf = (_log_choose(log_factorial, K, i)
+                   + _log_choose(log_factorial, population - K, draws - i) - log_total)
+        log_pmf = np.where(valid, log_pmf, -np.inf)
+        peak = log_pmf.max(axis=1, keepdims=True)
+        p[block] = np.minimum(1.0, np.exp(peak[:, 0]) * np.exp(log_pmf - peak).sum(axis=1))
+        start = stop
+    return p
+
+
+def _size_filter(sizes, min_size, max_size):
+    keep = sizes >= min_size
+    if max_size:
+        keep &= sizes <= max_size
+    return keep
+
+
+def over_representation(index, query_genes, universe=None, min_size=5, max_size=500):
+    """
+    Hypergeometric over-representation of ``query_genes`` in every gene set.
+
+    Args:
+        index: GeneSetIndex
+        query_genes: DEGs
+        universe: Background genes, e.g. every gene measured (default: every
+            annotated gene). Only annotated universe genes count.
+        min_size, max_size: Sets with fewer/more universe members are not tested
+
+    Returns:
+        DataFrame (most significant first): name, description, size, overlap,
+        expected, fold_enrichment, p_value, fdr, genes (the overlapping DEGs)
+    """
+    universe_mask = index.gene_mask(universe) if universe is not None else np.ones(len(index.genes), bool)
+    query_mask = index.gene_mask(query_genes) & universe_mask
+    population, draws = int(universe_mask.sum()), int(query_mask.sum())
+    sizes = index.counts(universe_mask)
+    overlap = index.counts(query_mask)
+    tested = _size_filter(sizes, min_size, max_size) & (draws > 0)
+
+    p_values = np.full(len(index), np.nan)
+    p_values[tested] = hypergeometric_sf(overlap[tested], population, sizes[tested], draws)
+    expected = sizes * draws / population if population else np.zeros(len(index))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        fold = np.where(expected > 0, overlap / expected, np.nan)
+
+    result = pd.DataFrame({
+        "name": index.names,
+        "description": index.descriptions,
+        "size": sizes,
+        "overlap": overlap,
+        "expected": expected,
+        "fold_enrichment": fold,
+        "p_value": p_values,
+        "fdr": benjamini_hochberg(p_values),
+    })[tested]
+    result = result.sort_values(["p_value", "overlap"], ascending=[True, False], kind="stable")
+    result["genes"] = [index.members(i, query_mask) for i in result.index]
+    return result
+
+
+def _average_ranks(values):
+    """1-based ranks with ties averaged, and the tie-size term sum(t^3 - t)."""
+    order = np.argsort(values, kind="stable")
+    sorted_values = values[order]
+    boundaries = np.flatnonzero(np.diff(sorted_values)) + 1
+    starts = np.concatenate([[0], boundaries])
+    lengths = np.diff(np.concatenate([starts, [len(values)]]))
+    average = starts + (lengths + 1) / 2
+    ranks = np.empty(len(values))
+    ranks[order] = np.repeat(average, lengths)
+    return ranks, float(np.sum(lengths.astype(float) ** 3 - lengths))
+
+
+def rank_enrichment(index, scores, min_size=5, max_size=500):
+    """
+    Mann-Whitney test of every gene set's scores against all other scored genes.
+
+    Args:
+        index: GeneSetIndex
+        scores: Series of gene -> score (e.g. moderated t; higher = more up)
+        min_size, max_size: Sets with fewer/more scored members are not tested
+
+    Returns:
+        DataFrame (most significant first): name, description, size, auc
+        (probability a member outranks a non-member), z, direction (up/down),
+        p_value (two-sided, normal approximation with tie correction), fdr
+    """
+    scores = pd.Series(scores).dropna()
+    gene_ids = np.array([index._gene_ids.get(str(g).lower(), -1) for g in scores.index])
+    annotated = gene_ids >= 0
+    gene_ids, values = gene_ids[annotated], scores.to_numpy(float)[annotated]
+    # A gene scored twice (case variants) keeps its first score
+    gene_ids, first = np.unique(gene_ids, return_index=True)
+    values = values[first]
+
+    n = len(values)
+    ranks, ties = _average_ranks(values)
+    rank_of = np.zeros(len(index.genes))
+    scored = np.zeros(len(index.genes), bool)
+    rank_of[gene_ids], scored[gene_ids] = ranks, True
+
+    sizes = index.counts(scored)
+    rank_sums = np.add.reduceat(np.concatenate([rank_of[index.indices], [0]]), index.indptr[:-1])[:len(index)]
+    rank_sums = rank_sums * (index.sizes > 0)
+    n1, n2 = sizes.astype(float), n - sizes.astype(float)
+    tested = _size_filter(sizes, min_size, max_size) & (n2 > 0)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        u = rank_sums - n1 * (n1 + 1) / 2
+        variance = n1 * n2 / 12 * ((n + 1) - ties / (n * (n - 1)))
+        z = (u - n1 * n2 / 2) / np.sqrt(variance)
+        auc = u / (n1 * n2)
+    p_values = np.full(len(index), np.nan)
+    p_values[tested] = np.array([math.erfc(abs(v) / math.sqrt(2)) for v in z[tested]])
+
+    result = pd.DataFrame({
+        "name": index.names,
+        "description": index.descriptions,
+        "size": sizes,
+        "auc": auc,
+        "z": z,
+        "direction": np.where(z >= 0, "up", "down"),
+        "p_value": p_values,
+        "fdr": benjamini_hochberg(p_values),
+    })[tested]
+    return result.sort_values("p_value", kind="stable")
+
+
+def verify_claims(index, answer, enrichment, expected_pathways=None, fdr=0.05):
+    """
+    Check the pathways a Kosmos answer names against enrichment results.
+
+    Args:
+        index: GeneSetIndex the enrichment was computed on
+        answer: Answer text
+        enrichment: ``over_representation`` or ``rank_enrichment`` output
+        expected_pathways: Ground-truth pathway names (optional)
+        fdr: Significance cut-off
+
+    Returns:
+        Dict: ``claimed`` (set names found in the answer), ``supported`` /
+        ``unsupported`` (claimed sets that are / are not enriched),
+        ``claim_precision`` (%), the ``enriched`` set names, and per
+        expected pathway the matching sets and whether any is enriched and
+        whether the answer names it (``expected``, ``expected_recall`` %)
+    """
+    significant = set(enrichment.index[enrichment["fdr"] <= fdr])
+    claimed = index.sets_named_in(answer)
+    supported = [index.names[i] for i in claimed if i in significant]
+    unsupported = [index.names[i] for i in claimed if i not in significant]
+    report = {
+        "claimed": [index.names[i] for i in claimed],
+        "supported": supported,
+        "unsupported": unsupported,
+        "claim_precision": len(supported) / len(claimed) * 100 if claimed else None,
+        "enriched": [index.names[i] for i in enrichment.index if i in significant],
+    }
+    if expected_pathways:
+        claimed_set = set(claimed)
+        expected = {}
+        for pathway in expected_pathways:
+            sets = index.sets_named_in(pathway)
+            expected[pathway] = {
+                "sets": [index.names[i] for i in sets],
+                "enriched": any(i in significant for i in sets),
+                "claimed": any(i in claimed_set for i in sets),
+            }
+        report["expected"] = expected
+        matched = [p for p in expected.values() if p["sets"]]
+        report["expected_recall"] = (sum(p["enriched"] for p in matched) / len(matched) * 100
+                                     if matched else None)
+    return report
+
+
+if __name__ == "__main__":
+    import argparse
+    import json
+    import time
+
+    from answer_document import answer_fields
+    from de_engine import differential_expression
+
+    parser = argparse.ArgumentParser(description="Gene set enrichment over local gene set files")
+    parser.add_argument("gene_sets", nargs="+", help="GMT/GAF/TSV files or directories")
+    parser.add_argument("--counts", help="Count matrix: rank genes by moderated t (de_engine)")
+    parser.add_argument("--genes", help="File with one DEG per line: over-representation test")
+    parser.add_argument("--answer", help="Kosmos raw output JSON whose pathway claims to check")
+    parser.add_argument("--ground-truth", default="input/task3_ground_truth.json")
+    parser.add_argument("--fdr", type=float, default=0.05)
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    gene_set_index = GeneSetIndex.load(args.gene_sets)
+    print(f"{len(gene_set_index)} gene sets over {len(gene_set_index.genes)} genes "
+          f"loaded in {time.perf_counter() - start:.2f}s")
+
+    start = time.perf_counter()
+    if args.genes:
+        degs = [line.strip() for line in open(args.genes) if line.strip()]
+        universe = differential_expression(args.counts).index if args.counts else None
+        table = over_representation(gene_set_index, degs, universe)
+    elif args.counts:
+        table = rank_enrichment(gene_set_index, differential_expression(args.counts)["t_moderated"])
+    else:
+        parser.error("give --counts and/or --genes")
+    print(f"Tested {len(table)} sets in {time.perf_counter() - start:.3f}s\n")
+    columns = [c for c in ("name", "size", "overlap", "fold_enrichment", "auc", "direction", "fdr")
+               if c in table.columns]
+    print(table[columns].head(args.top).to_string(index=False, float_format=lambda v: f"{v:.3g}"))
+
+    if args.answer:
+        with open(args.answer) as f:
+            answer, formatted = answer_fields(json.load(f))
+        expected = None
+        if Path(args.ground_truth).exists():
+            with open(args.ground_truth) as f:
+                expected = json.load(f).get("expected_pathways")
+        print("\n" + json.dumps(verify_claims(gene_set_index, formatted or answer, table, expected,
+                                              args.fdr), indent=2))
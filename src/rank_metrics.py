@@ -0,0 +1,408 @@
+"""Rank-agreement metrics in NumPy: Kendall tau-b, Spearman, rank-biased overlap.
+
+``evaluate_intervention_ranking`` used ``scipy.stats.kendalltau`` and silently
+scored 0 when scipy was missing, one ranking at a time. This module has no
+scipy dependency:
+
+* ``kendall_tau_b`` is Knight's O(n log n) algorithm (sort, then count
+  discordant pairs as inversions with a vectorized bottom-up merge), with the
+  same p-values as scipy (exact for small untied inputs, tie-corrected normal
+  approximation otherwise).
+* ``spearman_rho`` and ``rank_biased_overlap`` (extrapolated RBO, Webber et
+  al. 2010) complete the set; RBO is top-weighted and needs no common items.
+* ``score_rankings`` scores a whole matrix of runs' rankings against one
+  reference in a single vectorized call, for sweeps over many trials.
+
+Partial rankings are supported everywhere: items a run did not rank are
+either dropped (``missing="drop"``, compare on common items only) or tied at
+the bottom (``missing="bottom"``).
+
+Usage:
+    from rank_metrics import compare_rankings, score_rankings
+
+    result = compare_rankings(extracted, ground_truth["expected_ranking_order"])
+    sweep = score_rankings(all_runs, ground_truth["expected_ranking_order"])
+    sweep["kendall_tau"].mean()
+"""
+
+import math
+
+import numpy as np
+
+EXACT_MAX_N = 33  # exact p-values below this size (same cut-off as scipy)
+PAIRWISE_MAX_N = 64  # score_rankings uses O(n^2) pair signs up to this size
+RUN_BLOCK = 4096  # runs per vectorized block in score_rankings
+
+
+# ----------------------------------------------------------------------
+# Kendall tau-b
+# ----------------------------------------------------------------------
+
+def _dense_ranks(values):
+    """Map values to 0..m-1 preserving order and ties."""
+    _, inverse = np.unique(np.asarray(values), return_inverse=True)
+    return inverse.astype(np.int64).ravel()
+
+
+def _count_inversions(a):
+    """
+    Number of pairs i < j with a[i] > a[j] (ties are not inversions).
+
+    Bottom-up merge sort, one vectorized pass per level: at width w every
+    block of 2w holds two sorted halves; a stable sort merges all blocks at
+    once (already-sorted runs make it linear) and each right-half element's
+    merged position tells how many left-half elements exceed it.
+    """
+    a = np.asarray(a, dtype=np.int64)
+    n = len(a)
+    if n < 2:
+        return 0
+    span = int(a.max()) + 1
+    idx = np.arange(n)
+    inversions = 0
+    width = 1
+    while width < n:
+        block_start = (idx // (2 * width)) * (2 * width)
+        order = np.argsort(a + block_start // (2 * width) * span, kind="stable")
+        position = np.empty(n, dtype=np.int64)
+        position[order] = idx
+
+        in_right = idx - block_start >= width
+        left_len = np.minimum(width, n - block_start)
+        j = idx - block_start - width  # index within the right half
+        p = position - block_start     # merged index within the block
+        inversions += int(np.sum((left_len - (p - j))[in_right]))
+
+        a = a[order]
+        width *= 2
+    return inversions
+
+
+def _tie_sums(ranks):
+    """(sum t(t-1)/2, sum t(t-1)(2t+5), sum t(t-1)(t-2)) over tie groups."""
+    counts = np.bincount(ranks).astype(np.float64)
+    counts = counts[counts > 1]
+    return (float(np.sum(counts * (counts - 1) / 2)),
+            float(np.sum(counts * (counts - 1) * (2 * counts + 5))),
+            float(np.sum(counts * (counts - 1) * (counts - 2))))
+
+
+def _mahonian_cdf(n, k):
+    """P(inversions <= k) for a uniformly random permutation of n items."""
+    counts = [1]
+    for m in range(2, n + 1):
+        # Inserting the m-th item adds 0..m-1 inversions
+        new = [0] * (len(counts) + m - 1)
+        window = 0
+        for i in range(len(new)):
+            if i < len(counts):
+                window += counts[i]
+            if i - m >= 0:
+                window -= counts[i - m]
+            new[i] = window
+        counts = new
+    return sum(counts[:k + 1]) / math.factorial(n)
+
+
+def kendall_tau_b(x, y):
+    """
+    Kendall's tau-b between two paired samples in O(n log n).
+
+    Returns:
+        (tau, p_value); (nan, nan) if fewer than 2 pairs or a constant input
+    """
+    x = _dense_ranks(x)
+    y = _dense_ranks(y)
+    n = len(x)
+    if n != len(y):
+        raise ValueError("x and y must have the same length")
+    if n < 2:
+        return float("nan"), float("nan")
+
+    order = np.lexsort((y, x))
+    x, y = x[order], y[order]
+    n0 = n * (n - 1) / 2
+    x_ties, x_var, x_var2 = _tie_sums(x)
+    y_ties, y_var, y_var2 = _tie_sums(y)
+    joint = _tie_sums(_dense_ranks(x * (int(y.max()) + 1) + y))[0]
+    discordant = _count_inversions(y)
+
+    denominator = math.sqrt((n0 - x_ties) * (n0 - y_ties))
+    if denominator == 0:
+        return float("nan"), float("nan")
+    score = n0 - x_ties - y_ties + joint - 2 * discordant  # concordant - discordant
+    tau = min(1.0, max(-1.0, score / denominator))
+
+    if x_ties == 0 and y_ties == 0 and (n <= EXACT_MAX_N or min(discordant, n0 - discordant) <= 1):
+        c = int(min(discordant, n0 - discordant))
+        if 2 * c == n0:
+            p_value = 1.0
+        else:
+            p_value = min(1.0, 2 * _mahonian_cdf(n, c))
+    else:
+        m = n * (n - 1)
+        variance = (m * (2 * n + 5) - x_var - y_var) / 18 + 2 * x_ties * y_ties / m
+        if n > 2:
+            variance += x_var2 * y_var2 / (9 * m * (n - 2))
+        p_value = math.erfc(abs(score) / math.sqrt(variance) / math.sqrt(2)) if variance > 0 else 1.0
+    return tau, p_value
+
+
+# ----------------------------------------------------------------------
+# Spearman and rank-biased overlap
+# ----------------------------------------------------------------------
+
+def _rank_rows(values):
+    """Average ranks (1-based) along each row; NaN entries stay NaN and are skipped."""
+    values = np.atleast_2d(np.asarray(values, dtype=np.float64))
+    rows, n = values.shape
+    order = np.argsort(values, axis=1, kind="stable")  # NaN sorts last
+    sorted_values = np.take_along_axis(values, order, axis=1)
+
+    new_group = np.ones((rows, n), dtype=bool)
+    new_group[:, 1:] = sorted_values[:, 1:] != sorted_values[:, :-1]
+    group = np.cumsum(new_group.ravel()) - 1
+    positions = np.broadcast_to(np.arange(1, n + 1, dtype=np.float64), (rows, n)).ravel()
+    average = np.bincount(group, weights=positions) / np.bincount(group)
+
+    ranks = np.empty_like(values)
+    np.put_along_axis(ranks, order, average[group].reshape(rows, n), axis=1)
+    ranks[np.isnan(values)] = np.nan
+    return ranks
+
+
+def _spearman_rows(x, y):
+    """Row-wise Spearman rho over entries present in both x and y."""
+    valid = ~(np.isnan(x) | np.isnan(y))
+    x_ranks = _rank_rows(np.where(valid, x, np.nan))
+    y_ranks = _rank_rows(np.where(valid, y, np.nan))
+    count = valid.sum(axis=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        x_mean = np.nansum(x_ranks, axis=1, keepdims=True) / count[:, None]
+        y_mean = np.nansum(y_ranks, axis=1, keepdims=True) / count[:, None]
+        x_centered = np.where(valid, x_ranks - x_mean, 0)
+        y_centered = np.where(valid, y_ranks - y_mean, 0)
+        rho = (x_centered * y_centered).sum(axis=1) / np.sqrt(
+            (x_centered ** 2).sum(axis=1) * (y_centered ** 2).sum(axis=1))
+    rho[count < 2] = np.nan
+    return rho
+
+
+def spearman_rho(x, y):
+    """Spearman rank correlation of two paired samples (ties get average ranks)."""
+    x = np.asarray(x, dtype=np.float64)[None, :]
+    y = np.asarray(y, dtype=np.float64)[None, :]
+    return float(_spearman_rows(x, y)[0])
+
+
+def rank_biased_overlap(ranking, reference, p=0.9):
+    """
+    Extrapolated rank-biased overlap (RBO_ext) of two ranked lists.
+
+    Lists may have different lengths and need not contain the same items.
+    1.0 means identical order; ``p`` sets how top-weighted the measure is
+    (the top 1/(1-p) ranks carry most of the weight).
+    """
+    ranking = list(dict.fromkeys(ranking))
+    reference = list(dict.fromkeys(reference))
+    if not ranking or not reference:
+        return 0.0
+    short, long_ = sorted((ranking, reference), key=len)
+    s, l = len(short), len(long_)
+
+    seen_short, seen_long = set(), set()
+    overlap = 0
+    overlap_at_s = 0
+    total = 0.0
+    for d in range(1, l + 1):
+        item_long = long_[d - 1]
+        if d <= s:
+            item_short = short[d - 1]
+            if item_short == item_long:
+                overlap += 1
+            else:
+                overlap += (item_short in seen_long) + (item_long in seen_short)
+            seen_short.add(item_short)
+        else:
+            overlap += item_long in seen_short
+        seen_long.add(item_long)
+
+        if d == s:
+            overlap_at_s = overlap
+        total += (overlap / d) * p ** d
+        if d > s:
+            total += (overlap_at_s * (d - s) / (s * d)) * p ** d
+
+    extrapolated = (overlap - overlap_at_s) / l + overlap_at_s / s
+    return float((1 - p) / p * total + extrapolated * p ** l)
+
+
+# ----------------------------------------------------------------------
+# Partial rankings and many-run scoring
+# ----------------------------------------------------------------------
+
+def _key(item):
+    return item.lower() if isinstance(item, str) else item
+
+
+def _positions_and_lengths(rankings, reference):
+    """Raw positions of reference items (NaN if unranked) and deduplicated run lengths."""
+    columns = {_key(item): i for i, item in enumerate(reference)}
+    positions = np.full((len(rankings), len(reference)), np.nan)
+    lengths = np.zeros(len(rankings), dtype=np.int64)
+    for row, ranking in enumerate(rankings):
+        seen = set()
+        for item in ranking:
+            key = _key(item)
+            if key in seen:
+                continue
+            column = columns.get(key)
+            if column is not None:
+                positions[row, column] = len(seen)
+            seen.add(key)
+        lengths[row] = len(seen)
+    return positions, lengths
+
+
+def rank_positions(rankings, reference, missing="drop"):
+    """
+    Position of each reference item in each ranking.
+
+    Args:
+        rankings: List of ranked lists (one per run)
+        reference: The expected order
+        missing: "drop" leaves unranked reference items as NaN; "bottom"
+            ties them after the run's last ranked item
+
+    Returns:
+        (runs, len(reference)) float array of 0-based positions
+    """
+    if missing not in ("drop", "bottom"):
+        raise ValueError("missing must be 'drop' or 'bottom'")
+    positions, lengths = _positions_and_lengths(rankings, reference)
+    if missing == "bottom":
+        positions = np.where(np.isnan(positions), lengths[:, None], positions)
+    return positions
+
+
+def _rbo_rows(positions, lengths, p):
+    """
+    Row-wise RBO_ext against the reference order from positions alone.
+
+    The overlap at depth d is the number of reference items among the top d
+    of both lists (each list counts as fully seen past its own length),
+    computed for all runs at once, one depth at a time.
+    """
+    runs, m = positions.shape
+    shorter = np.minimum(lengths, m)
+    longer = np.maximum(lengths, m)
+    ranked = np.where(np.isnan(positions), np.inf, positions)
+    reference_rank = np.arange(m)
+
+    total = np.zeros(runs)
+    overlap_at_s = np.zeros(runs)
+    overlap = np.zeros(runs)
+    for d in range(1, int(longer.max(initial=0)) + 1):
+        in_run = ranked < np.minimum(d, lengths)[:, None]
+        in_reference = reference_rank < min(d, m)
+        overlap = (in_run & in_reference).sum(axis=1)
+        active = d <= longer
+        total += np.where(active, overlap / d * p ** d, 0)
+        beyond = active & (d > shorter)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            total += np.where(beyond, overlap_at_s * (d - shorter) / (shorter * d) * p ** d, 0)
+        overlap_at_s = np.where(d == shorter, overlap, overlap_at_s)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        extrapolated = (overlap - overlap_at_s) / longer + overlap_at_s / shorter
+        rbo = (1 - p) / p * total + extrapolated * p ** longer
+    rbo[shorter == 0] = 0.0
+    return rbo
+
+
+def _tau_rows_pairwise(x, y):
+    """Row-wise tau-b from pair signs; O(runs * n^2), vectorized."""
+    n = x.shape[1]
+    upper = np.triu(np.ones((n, n), dtype=bool), k=1)
+    valid = ~(np.isnan(x) | np.isnan(y))
+    pair_valid = valid[:, :, None] & valid[:, None, :] & upper
+    with np.errstate(invalid="ignore"):
+        sx = np.nan_to_num(np.sign(x[:, :, None] - x[:, None, :])) * pair_valid
+        sy = np.nan_to_num(np.sign(y[:, :, None] - y[:, None, :])) * pair_valid
+        score = (sx * sy).sum(axis=(1, 2))
+        tau = score / np.sqrt(np.abs(sx).sum(axis=(1, 2)) * np.abs(sy).sum(axis=(1, 2)))
+    return tau
+
+
+def score_rankings(rankings, reference, missing="drop", p=0.9, min_common=2):
+    """
+    Score many runs' rankings against one reference ranking at once.
+
+    Args:
+        rankings: List of ranked lists (one per run); items are matched
+            case-insensitively
+        reference: Expected order (e.g. ``expected_ranking_order``)
+        missing: "drop" or "bottom" (see ``rank_positions``)
+        p: RBO persistence
+        min_common: Runs with fewer ranked reference items score NaN
+
+    Returns:
+        Dict of per-run arrays: kendall_tau, spearman, rbo, n_common
+    """
+    if missing not in ("drop", "bottom"):
+        raise ValueError("missing must be 'drop' or 'bottom'")
+    raw_positions, lengths = _positions_and_lengths(rankings, reference)
+    n_common = (~np.isnan(raw_positions)).sum(axis=1)
+    positions = raw_positions
+    if missing == "bottom":
+        positions = np.where(np.isnan(raw_positions), lengths[:, None], raw_positions)
+    expected = np.broadcast_to(np.arange(len(reference), dtype=np.float64), positions.shape)
+
+    if len(reference) <= PAIRWISE_MAX_N:
+        tau = np.concatenate([
+            _tau_rows_pairwise(positions[i:i + RUN_BLOCK], expected[i:i + RUN_BLOCK])
+            for i in range(0, len(positions), RUN_BLOCK)
+        ]) if len(positions) else np.empty(0)
+    else:
+        tau = np.full(len(positions), np.nan)
+        for row in range(len(positions)):
+            valid = ~np.isnan(positions[row])
+            if valid.sum() >= 2:
+                tau[row] = kendall_tau_b(positions[row, valid], expected[row, valid])[0]
+
+    spearman = _spearman_rows(positions, expected)
+    tau[n_common < min_common] = np.nan
+    spearman[n_common < min_common] = np.nan
+
+    rbo = _rbo_rows(raw_positions, lengths, p)
+    return {"kendall_tau": tau, "spearman": spearman, "rbo": rbo, "n_common": n_common}
+
+
+def compare_rankings(ranking, reference, missing="drop", p=0.9):
+    """
+    All rank-agreement metrics for a single ranking.
+
+    Returns:
+        Dict with kendall_tau, p_value, spearman, rbo, n_common and common
+        (reference items the ranking contains, in reference order);
+        correlations are None with fewer than 2 common items
+    """
+    positions = rank_positions([ranking], reference, missing)[0]
+    valid = ~np.isnan(positions)
+    # Overlap from the raw positions, before "bottom" fills in the missing items
+    ranked = ~np.isnan(_positions_and_lengths([ranking], reference)[0][0])
+    result = {
+        "kendall_tau": None,
+        "p_value": None,
+        "spearman": None,
+        "rbo": rank_biased_overlap([_key(i) for i in ranking], [_key(i) for i in reference], p),
+        "n_common": int(ranked.sum()),
+        "common": [item for item, ok in zip(reference, ranked) if ok],
+    }
+    if ranked.sum() >= 2:
+        tau, p_value = kendall_tau_b(positions[valid], np.flatnonzero(valid))
+        result["kendall_tau"] = None if math.isnan(tau) else tau
+        result["p_value"] = None if math.isnan(p_value) else p_value
+        rho = spearman_rho(positions[valid], np.flatnonzero(valid))
+        result["spearman"] = None if math.isnan(rho) else rho
+    return result
@@ -0,0 +1,283 @@
+"""Synthetic RNA-seq count matrices from a negative-binomial model, streamed to disk.
+
+``Task3SystemBiology.generate_test_data`` built its 500 x 5 matrix gene by
+gene, with uniform ``randint`` counts, and could not produce anything larger
+or more realistic. ``CountSimulator`` draws whole blocks of genes at once
+from the model used by DESeq2/edgeR:
+
+- baseline expression per gene: log-normal (``mean_log``, ``sd_log``);
+- dispersion per gene: ``dispersion + dispersion_trend / mean``, with
+  log-normal scatter (``dispersion_sd``), so low counts are noisier;
+- library size per sample: log-normal size factors (``library_size_sd``)
+  around ``depth``;
+- planted differential expression: named genes with given log2 fold changes
+  (``de_genes``) plus ``n_de`` random genes, applied to every group except
+  the first;
+- batch effects: samples spread over ``batches`` batches, each shifting
+  every gene by a log-normal factor (``batch_sd``);
+- counts: Poisson(mean x Gamma(1/dispersion, dispersion)), i.e. NB.
+
+``chunks()`` yields DataFrames of ``chunk_genes`` genes, and ``write()``
+streams them to CSV/TSV (optionally .gz/.bz2/.xz) or Parquet (needs
+pyarrow), so memory stays bounded by the chunk. A 50,000 x 500 matrix is
+written in a few seconds. Results are deterministic for a given ``seed`` and
+``chunk_genes``. ``truth()`` lists the planted genes for scoring.
+
+Usage:
+    from rnaseq_simulator import CountSimulator
+
+    sim = CountSimulator(n_genes=50000, groups={"control": 250, "heat": 250},
+                         de_genes={"dnaK": 3.3}, n_de=500, batches=4, seed=1)
+    sim.write("input/bench_50k.csv.gz", truth_path="input/bench_50k_truth.json")
+
+    python src/rnaseq_simulator.py input/bench.csv.gz --genes 50000 --replicates 250 --n-de 500
+"""
+
+import bz2
+import gzip
+import io
+import lzma
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from artifacts import atomic_open, write_json
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+CHUNK_GENES = 5000
+# Text-mode compressors layered over an open binary file (the atomic temp file)
+COMPRESSORS = {".gz": lambda f, name: io.TextIOWrapper(gzip.GzipFile(name, "wb", 1, f)),
+               ".bz2": lambda f, name: bz2.open(f, "wt"),
+               ".xz": lambda f, name: lzma.open(f, "wt")}
+
+
+class CountSimulator:
+    """Negative-binomial count matrix, generated in blocks of genes."""
+
+    def __init__(self, n_genes=20000, groups=None, de_genes=None, n_de=0, de_log2_fold_change=2.0,
+                 de_up_fraction=0.5, mean_log=4.0, sd_log=1.8, dispersion=0.05, dispersion_trend=1.0,
+                 dispersion_sd=0.5, depth=1.0, library_size_sd=0.25, batches=1, batch_sd=0.2,
+                 baseline=None, gene_prefix="gene_", seed=42, chunk_genes=CHUNK_GENES):
+        """
+        Args:
+            n_genes: Total genes, named genes included
+            groups: Dict of group -> replicate count; the first group is the
+                reference (default: control and treatment, 3 each)
+            de_genes: Dict of named gene -> planted log2 fold change. These
+                genes come first in the matrix.
+            n_de: Additional randomly chosen genes to make differentially
+                expressed, with |log2 fold change| around ``de_log2_fold_change``
+            de_up_fraction: Share of the random DE genes that go up
+            mean_log, sd_log: Log-normal baseline expression (mean counts at
+                size factor 1)
+            dispersion: Asymptotic NB dispersion of highly expressed genes
+            dispersion_trend: Extra dispersion at low expression (over mean)
+            dispersion_sd: Log-normal scatter of gene dispersions
+            depth: Sequencing depth multiplier
+            library_size_sd: Log-normal spread of sample size factors
+            batches: Number of batches (replicates of each group are spread
+                over them round-robin)
+            batch_sd: Log-normal spread of per-gene batch effects
+            baseline: Dict of named gene -> baseline mean, e.g. for
+                housekeeping genes (other named genes draw at random)
+            gene_prefix: Name prefix for unnamed genes
+            seed: Random seed
+            chunk_genes: Genes per generated block
+        """
+        self.groups = dict(groups or {"control": 3, "treatment": 3})
+        self.de_genes = dict(de_genes or {})
+        self.baseline = dict(baseline or {})
+        named = list(dict.fromkeys([*self.de_genes, *self.baseline]))
+        if len(named) > n_genes:
+            raise ValueError(f"{len(named)} named genes do not fit in n_genes={n_genes}")
+        self.named_genes = named
+        self.n_genes = n_genes
+        self.gene_prefix = gene_prefix
+        self.mean_log, self.sd_log = mean_log, sd_log
+        self.dispersion, self.dispersion_trend, self.dispersion_sd = dispersion, dispersion_trend, dispersion_sd
+        self.batch_sd = batch_sd
+        self.seed = seed
+        self.chunk_genes = chunk_genes
+
+        rng = np.random.default_rng([seed, 0])
+        self.samples, self.sample_groups, self.sample_batches = [], {}, {}
+        position = 0
+        for group, replicates in self.groups.items():
+            for replicate in range(1, replicates + 1):
+                sample = f"{group}_{replicate}"
+                self.samples.append(sample)
+                self.sample_groups[sample] = group
+                self.sample_batches[sample] = position % batches + 1
+                position += 1
+        self.n_batches = batches
+        self.size_factors = depth * np.exp(rng.normal(0, library_size_sd, len(self.samples)))
+        reference = next(iter(self.groups))
+        self._treated = np.array([self.sample_groups[s] != reference for s in self.samples])
+        self._batch = np.array([self.sample_batches[s] - 1 for s in self.samples])
+
+        # Random DE genes, by position among the unnamed genes
+        n_unnamed = n_genes - len(named)
+        n_de = min(n_de, n_unnamed)
+        self._de_positions = np.sort(rng.choice(n_unnamed, n_de, replace=False)) + len(named)
+        magnitude = de_log2_fold_change * np.exp(rng.normal(0, 0.3, n_de))
+        self._de_log2fc = np.where(rng.random(n_de) < de_up_fraction, magnitude, -magnitude)
+
+    @property
+    def shape(self):
+        return self.n_genes, len(self.samples)
+
+    def gene_names(self, start, stop):
+        named = len(self.named_genes)
+        return (self.named_genes[start:min(stop, named)]
+                + [f"{self.gene_prefix}{i - named}" for i in range(max(start, named), stop)])
+
+    def _log2_fold_changes(self, start, stop):
+        log2fc = np.zeros(stop - start)
+        for i, gene in enumerate(self.named_genes[start:stop]):
+            log2fc[i] = self.de_genes.get(gene, 0.0)
+        lo, hi = np.searchsorted(self._de_positions, [start, stop])
+        log2fc[self._de_positions[lo:hi] - start] = self._de_log2fc[lo:hi]
+        return log2fc
+
+    def block(self, start, stop):
+        """Counts for genes ``start:stop`` as an int64 array (genes x samples)."""
+        rng = np.random.default_rng([self.seed, 1, start])
+        n = stop - start
+        means = np.exp(rng.normal(self.mean_log, self.sd_log, n))
+        for i, gene in enumerate(self.named_genes[start:stop]):
+            if gene in self.baseline:
+                means[i] = self.baseline[gene]
+        dispersions = ((self.dispersion + self.dispersion_trend / means)
+                       * np.exp(rng.normal(0, self.dispersion_sd, n)))
+        batch_effects = np.exp(rng.normal(0, self.batch_sd, (n, self.n_batches))) if self.n_batches > 1 else None
+
+        mu = means[:, None] * self.size_factors[None, :]
+        mu = np.where(self._treated[None, :], mu * np.exp2(self._log2_fold_changes(start, stop))[:, None], mu)
+        if batch_effects is not None:
+            mu *= batch_effects[:, self._batch]
+        shape = (1 / dispersions)[:, None]
+        return rng.poisson(rng.gamma(shape, mu / shape))
+
+    def chunks(self):
+        """Yield the matrix as DataFrames of ``chunk_genes`` genes."""
+        for start in range(0, self.n_genes, self.chunk_genes):
+            stop = min(start + self.chunk_genes, self.n_genes)
+            yield pd.DataFrame(self.block(start, stop), index=self.gene_names(start, stop), columns=self.samples)
+
+    def to_frame(self):
+        """The whole matrix in memory (small simulations only)."""
+        return pd.concat(self.chunks())
+
+    def truth(self):
+        """Design and planted DE genes (gene -> log2 fold change), as a JSON-ready dict."""
+        named = {gene: float(fc) for gene, fc in self.de_genes.items() if fc}
+        random_genes = {f"{self.gene_prefix}{p - len(self.named_genes)}": float(fc)
+                        for p, fc in zip(self._de_positions, self._de_log2fc)}
+        return {
+            "shape": list(self.shape),
+            "reference_group": next(iter(self.groups)),
+            "sample_groups": self.sample_groups,
+            "sample_batches": self.sample_batches,
+            "size_factors": dict(zip(self.samples, self.size_factors.round(4).tolist())),
+            "de_genes": {**named, **random_genes},
+            "seed": self.seed,
+        }
+
+    def write(self, path, truth_path=None):
+        """
+        Stream the matrix to ``path``; the format follows the suffix.
+
+        ``.csv``/``.tsv``/``.txt``, optionally ``.gz``/``.bz2``/``.xz``, or
+        ``.parquet`` (gene names in a ``gene`` column). Returns ``path``.
+        """
+        write_counts(self.chunks(), path)
+        if truth_path:
+            write_json(truth_path, self.truth(), manifest=False)
+        return path
+
+
+def _write_delimited(chunks, handle, separator):
+    header_written = False
+    for chunk in chunks:
+        if not header_written:
+            handle.write(separator.join(["", *chunk.columns]) + "\n")
+            header_written = True
+        # One %-format per row is several times faster than DataFrame.to_csv
+        row_format = separator.join(["%s", *["%d"] * chunk.shape[1]]) + "\n"
+        handle.write("".join(row_format % (gene, *row)
+                             for gene, row in zip(chunk.index, chunk.to_numpy().tolist())))
+
+
+def write_counts(chunks, path):
+    """
+    Stream an iterable of count DataFrames (same columns) to one file.
+
+    The file is written through ``artifacts.atomic_open``, so an interrupted
+    run never leaves a truncated matrix at ``path``.
+    """
+    path = Path(path)
+    suffixes = [s.lower() for s in path.suffixes]
+    opener = COMPRESSORS.get(suffixes[-1] if suffixes else "")
+    data_suffix = suffixes[-2] if opener and len(suffixes) > 1 else (suffixes[-1] if suffixes else "")
+
+    if data_suffix == ".parquet":
+        if not PYARROW_AVAILABLE:
+            raise ImportError("Writing Parquet counts needs pyarrow")
+        with atomic_open(path, "wb") as f:
+            writer = None
+            try:
+                for chunk in chunks:
+                    table = pa.Table.from_pandas(chunk.rename_axis("gene").reset_index(), preserve_index=False)
+                    if writer is None:
+                        writer = pq.ParquetWriter(f, table.schema, compression="zstd")
+                    writer.write_table(table)
+            finally:
+                if writer is not None:
+                    writer.close()
+        return path
+
+    separator = "," if data_suffix == ".csv" else "\t"
+    if opener is None:
+        with atomic_open(path) as handle:
+            _write_delimited(chunks, handle, separator)
+        return path
+    with atomic_open(path, "wb") as f:
+        with opener(f, path.name) as handle:
+            _write_delimited(chunks, handle, separator)
+    return path
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description="Simulate a negative-binomial RNA-seq count matrix")
+    parser.add_argument("output", help="Output file (.csv/.tsv[.gz|.bz2|.xz] or .parquet)")
+    parser.add_argument("--genes", type=int, default=20000)
+    parser.add_argument("--groups", nargs="+", default=["control", "treatment"])
+    parser.add_argument("--replicates", type=int, default=3, help="Replicates per group")
+    parser.add_argument("--n-de", type=int, default=1000, help="Random DE genes")
+    parser.add_argument("--log2fc", type=float, default=2.0, help="Typical |log2 fold change| of DE genes")
+    parser.add_argument("--dispersion", type=float, default=0.05)
+    parser.add_argument("--batches", type=int, default=1)
+    parser.add_argument("--batch-sd", type=float, default=0.2)
+    parser.add_argument("--library-size-sd", type=float, default=0.25)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--truth", help="Write the planted DE genes and design here (JSON)")
+    args = parser.parse_args()
+
+    simulator = CountSimulator(
+        n_genes=args.genes, groups={g: args.replicates for g in args.groups}, n_de=args.n_de,
+        de_log2_fold_change=args.log2fc, dispersion=args.dispersion, batches=args.batches,
+        batch_sd=args.batch_sd, library_size_sd=args.library_size_sd, seed=args.seed)
+    start = time.perf_counter()
+    simulator.write(args.output, truth_path=args.truth)
+    print(f"Wrote {simulator.shape[0]} genes x {simulator.shape[1]} samples to {args.output} "
+          f"in {time.perf_counter() - start:.1f}s")
@@ -0,0 +1,593 @@
+"""Declarative scoring of Kosmos results against the task ground truths.
+
+Every task had its own evaluator, and the pass thresholds were typed out
+again in each report script (``>= 0.75`` and ``>= 20`` in both
+``task1_run.generate_report`` and ``parse_task1_results_fixed.py``, ``>= 66``
+in three task 3 and task 4 files). ``input/taskN_scoring.json`` now sits
+beside each ``taskN_ground_truth.json`` and declares, per metric:
+
+- ``matcher``: how the value is computed from a Kosmos answer (below), with
+  ground-truth values referenced by path (``known_trials[].nct_id``);
+- ``pass_if``: the threshold (``">= 0.75"``, ``"== 1.0"``, ``"is true"``);
+- ``unit``: fraction, percent, count, bool or score (for display);
+- ``informational``: reported but not part of the pass rule;
+
+plus a ``pass_rule`` (``{"min_passing": 3}`` or ``{"min_passing": "all"}``)
+and the Kosmos ``job`` that produces the answers (type, query, input files),
+which trial_runner.py submits.
+
+Matcher types:
+
+- ``entity_recall``: share of ground-truth entities named in the answer
+  (EntityMatcher, optional synonyms)
+- ``keyword_recall``: share of concepts with any matching regex
+- ``keyword_any``: whether any of the terms occurs
+- ``concept_recall``: share of concepts found in an answer sentence
+  (BM25, ``min_terms`` key terms, see passage_index.py)
+- ``citation_count``: unique cited identifiers of the given schemes
+- ``citation_coverage``: share of ground-truth identifiers cited
+- ``yes_no``: whether the answer's yes/no matches a ground-truth boolean
+- ``ranking``: Kendall's tau of a section's numbered list against an
+  expected order (vectorized over runs in ``score_batch``)
+- ``external``: computed by the evaluator (DOI resolution, notebook
+  execution, RDKit); only the threshold applies
+
+A spec is compiled once into matcher objects (automata, regexes, id sets),
+so ``score_batch`` applies it to thousands of result files at the cost of
+parsing them (answer_document.json caches make that cheap on re-runs).
+Evaluators that compute their own values use ``assess`` and
+``metrics_table`` for pass/fail and report rows, so thresholds live in one
+place.
+
+Scoring with ``incremental=True`` records, per metric, the hashes of its
+inputs in ``scores.json`` beside each raw output: the raw output file, the
+ground truth, and the evaluator (matcher type and parameters, the matcher
+class's source and the helper modules it uses). A rerun recomputes only the
+metrics whose inputs changed and does not parse answers whose metrics are
+all current, so editing one matcher or keyword list rescores a 1,000-run
+archive in seconds. Thresholds are not inputs: pass/fail is always
+re-derived from the values. Bump ``SCORING_VERSION`` when a change the
+hashes cannot see should invalidate every score.
+
+Usage:
+    from scoring_engine import load_spec
+
+    spec = load_spec("task1")
+    scores = spec.score("output/task1_results/kosmos_raw_output.json",
+                        external={"citation_validity": 1.0})
+    spec.assess({"target_recall": 0.8, "citation_count": 25})["overall_pass"]
+    table = spec.score_batch(Path("archive").glob("*/kosmos_raw_output.json"), incremental=True)
+    table.attrs["recomputed"]   # metric -> number of results rescored
+
+    python src/scoring_engine.py task5 output/task5_results/kosmos_raw_output.json
+    python src/scoring_engine.py task1 archive/*/kosmos_raw_output.json --incremental
+"""
+
+import hashlib
+import importlib
+import inspect
+import json
+import math
+import operator
+import re
+from collections import namedtuple
+from functools import lru_cache
+from pathlib import Path
+
+import pandas as pd
+
+from answer_document import PARSER_VERSION, load_document
+from artifacts import file_sha256, write_json
+from citations import normalize
+from entity_matcher import EntityMatcher
+from passage_index import concept_recall
+from rank_metrics import score_rankings
+
+INPUT_DIR = Path("input")
+SCORING_VERSION = 1
+SCORES_NAME = "scores.json"
+# Every matcher reads a parsed AnswerDocument
+DOCUMENT_MODULES = ("answer_document", "citations")
+
+Metric = namedtuple("Metric", ["name", "label", "matcher", "condition", "unit", "informational"])
+
+OPERATORS = {">=": operator.ge, ">": operator.gt, "<=": operator.le, "<": operator.lt, "==": operator.eq}
+SYMBOLS = {">=": "≥", ">": ">", "<=": "≤", "<": "<", "==": ""}
+CONDITION = re.compile(r"^\s*(?:(>=|<=|==|>|<)\s*(-?\d+(?:\.\d+)?)|is\s+(true|false))\s*$", re.IGNORECASE)
+
+
+def resolve(ground_truth, path):
+    """
+    Values at a ground-truth path; ``[]`` maps over (and flattens) lists.
+
+    ``"known_targets"`` -> the list, ``"known_trials[].nct_id"`` -> the IDs,
+    ``"established_mechanisms[].key_papers[]"`` -> every key paper.
+    """
+    values = [ground_truth]
+    for part in path.split("."):
+        each = part.endswith("[]")
+        key = part[:-2] if each else part
+        values = [v[key] for v in values if isinstance(v, dict) and key in v]
+        if each:
+            values = [item for v in values for item in v]
+    return values[0] if len(values) == 1 and not path.endswith("[]") else values
+
+
+def parse_condition(text):
+    """``">= 0.75"`` -> (">=", 0.75); ``"is true"`` -> ("is", True)."""
+    match = CONDITION.match(text)
+    if not match:
+        raise ValueError(f"Unrecognized pass_if condition: {text!r}")
+    if match.group(3):
+        return "is", match.group(3).lower() == "true"
+    number = match.group(2)
+    return match.group(1), float(number) if "." in number else int(number)
+
+
+@lru_cache(maxsize=None)
+def _module_hash(name):
+    """SHA-256 of a module's source file."""
+    return file_sha256(importlib.import_module(name).__file__)
+
+
+def _digest(*parts):
+    return hashlib.sha256("\0".join(parts).encode("utf-8")).hexdigest()
+
+
+def scores_path(raw_output):
+    """The ``scores.json`` sidecar of a raw output file (named like answer_document.json)."""
+    raw_output = Path(raw_output)
+    if raw_output.stem == "kosmos_raw_output":
+        return raw_output.with_name(SCORES_NAME)
+    return raw_output.with_name(f"{raw_output.stem}.{SCORES_NAME}")
+
+
+def _trim(number):
+    """75.0 -> "75", 66.666 -> "66.7"."""
+    return f"{number:.1f}".rstrip("0").rstrip(".")
+
+
+class _Matcher:
+    """Computes one metric from a parsed answer (AnswerDocument)."""
+
+    external = False
+    modules = ()  # helper modules whose source is part of the evaluator hash
+
+    def score(self, doc):
+        """(value, details) for one document."""
+        raise NotImplementedError
+
+    def score_many(self, docs):
+        return [self.score(doc) for doc in docs]
+
+
+class _External(_Matcher):
+    external = True
+
+    def __init__(self, ground_truth):
+        pass
+
+    def score(self, doc):
+        return None, None
+
+
+class _EntityRecall(_Matcher):
+    modules = ("entity_matcher",)
+
+    def __init__(self, ground_truth, entities, synonyms=None, case_sensitive=False, word_boundaries=True):
+        self.entities = list(resolve(ground_truth, entities))
+        synonyms = synonyms or {}
+        self.matcher = EntityMatcher({e: synonyms.get(e, []) for e in self.entities},
+                                     case_sensitive=case_sensitive, word_boundaries=word_boundaries)
+
+    def score(self, doc):
+        found = set(self.matcher.entities_in(f"{doc.text}\n{doc.formatted_text}"))
+        hits = [e for e in self.entities if e in found]
+        value = len(hits) / len(self.entities) if self.entities else 0.0
+        return value, {"found": hits, "missed": [e for e in self.entities if e not in found]}
+
+
+class _KeywordRecall(_Matcher):
+    def __init__(self, ground_truth, concepts):
+        self.patterns = {concept: re.compile("|".join(f"(?:{p})" for p in patterns), re.IGNORECASE)
+                         for concept, patterns in concepts.items()}
+
+    def score(self, doc):
+        found = [c for c, pattern in self.patterns.items() if pattern.search(doc.text)]
+        return (len(found) / len(self.patterns) if self.patterns else 0.0), {"found": found}
+
+
+class _KeywordAny(_Matcher):
+    def __init__(self, ground_truth, terms):
+        self.pattern = re.compile("|".join(re.escape(t) for t in terms), re.IGNORECASE)
+
+    def score(self, doc):
+        match = self.pattern.search(doc.text)
+        return bool(match), {"match": match.group(0) if match else None}
+
+
+class _ConceptRecall(_Matcher):
+    modules = ("passage_index",)
+
+    def __init__(self, ground_truth, concepts, min_terms=2, min_coverage=0.0):
+        self.concepts = list(resolve(ground_truth, concepts))
+        self.min_terms, self.min_coverage = min_terms, min_coverage
+
+    def score(self, doc):
+        passages = [s["text"] for s in doc.sentences]
+        recall, matched, _ = concept_recall(self.concepts, passages, self.min_terms, self.min_coverage)
+        return recall, {"found": matched}
+
+
+class _CitationCount(_Matcher):
+    def __init__(self, ground_truth, schemes=("doi",)):
+        self.schemes = list(schemes)
+
+    def score(self, doc):
+        counts = {scheme: len(doc.citation_ids(scheme)) for scheme in self.schemes}
+        return sum(counts.values()), counts
+
+
+class _CitationCoverage(_Matcher):
+    def __init__(self, ground_truth, ids, scheme="doi"):
+        self.scheme = scheme
+        self.ids = list(dict.fromkeys(normalize(scheme, i) or i for i in resolve(ground_truth, ids)))
+
+    def score(self, doc):
+        cited = set(doc.citation_ids(self.scheme))
+        found = [i for i in self.ids if i in cited]
+        return (len(found) / len(self.ids) if self.ids else 0.0), {"found": found}
+
+
+class _YesNo(_Matcher):
+    YES = re.compile(r"\byes\b", re.IGNORECASE)
+    YES_OR_NO = re.compile(r"\b(?:yes|no)\b", re.IGNORECASE)
+
+    def __init__(self, ground_truth, expected, fallback_scheme=None):
+        self.expected = bool(resolve(ground_truth, expected))
+        self.fallback_scheme = fallback_scheme
+
+    def score(self, doc):
+        if self.YES_OR_NO.search(doc.text):
+            says = bool(self.YES.search(doc.text))
+        else:
+            # No explicit answer: citing e.g. trials counts as a yes
+            says = bool(self.fallback_scheme and doc.citation_ids(self.fallback_scheme))
+        return says == self.expected, {"answer": says, "expected": self.expected}
+
+
+class _Ranking(_Matcher):
+    modules = ("entity_matcher", "rank_metrics")
+
+    def __init__(self, ground_truth, section, expected, synonyms=None, min_common=2):
+        self.section = section
+        self.expected = list(resolve(ground_truth, expected))
+        synonyms = synonyms or {}
+        self.matcher = EntityMatcher({e: synonyms.get(e, []) for e in self.expected}, word_boundaries=False)
+        self.min_common = min_common
+
+    def ranking(self, doc):
+        """Expected items in the order the answer ranks them (unmatched items kept by name)."""
+        ranked = []
+        for item in doc.items_in(self.section):
+            ranked.append(self.matcher.first(item) or " ".join(item.split()[:3]))
+        return ranked
+
+    def score(self, doc):
+        return self.score_many([doc])[0]
+
+    def score_many(self, docs):
+        rankings = [self.ranking(doc) for doc in docs]
+        scores = score_rankings(rankings, self.expected, min_common=self.min_common)
+        results = []
+        for ranking, tau, rbo, common in zip(rankings, scores["kendall_tau"], scores["rbo"], scores["n_common"]):
+            # Fewer than two common items scores 0, as the task 5 evaluators did
+            value = 0.0 if math.isnan(tau) else float(tau)
+            results.append((value, {"ranking": ranking, "n_common": int(common), "rbo": float(rbo)}))
+        return results
+
+
+MATCHERS = {
+    "external": _External,
+    "entity_recall": _EntityRecall,
+    "keyword_recall": _KeywordRecall,
+    "keyword_any": _KeywordAny,
+    "concept_recall": _ConceptRecall,
+    "citation_count": _CitationCount,
+    "citation_coverage": _CitationCoverage,
+    "yes_no": _YesNo,
+    "ranking": _Ranking,
+}
+
+
+class ScoringSpec:
+    """A task's metrics, matchers and pass rule, compiled from its scoring spec."""
+
+    def __init__(self, spec, ground_truth):
+        self.task = spec.get("task", "")
+        self.job = spec.get("job")
+        self.ground_truth_hash = _digest(json.dumps(ground_truth, sort_keys=True))
+        self.metrics = {}
+        self.evaluator_hashes = {}
+        for name, entry in spec["metrics"].items():
+            params = dict(entry.get("matcher", {"type": "external"}))
+            kind = params.pop("type")
+            if kind not in MATCHERS:
+                raise ValueError(f"{name}: unknown matcher type {kind!r}")
+            self.evaluator_hashes[name] = self._evaluator_hash(kind, params)
+            condition = parse_condition(entry["pass_if"]) if "pass_if" in entry else None
+            self.metrics[name] = Metric(name, entry.get("label", name), MATCHERS[kind](ground_truth, **params),
+                                        condition, entry.get("unit", "score"),
+                                        entry.get("informational", condition is None))
+        self.required = [m for m in self.metrics.values() if not m.informational]
+        min_passing = spec.get("pass_rule", {}).get("min_passing", "all")
+        self.min_passing = len(self.required) if min_passing == "all" else int(min_passing)
+
+    @staticmethod
+    def _evaluator_hash(kind, params):
+        matcher = MATCHERS[kind]
+        modules = DOCUMENT_MODULES + matcher.modules
+        return _digest(f"v{SCORING_VERSION}", f"v{PARSER_VERSION}", kind, json.dumps(params, sort_keys=True),
+                       inspect.getsource(matcher), *(_module_hash(m) for m in modules))
+
+    @classmethod
+    def from_file(cls, path):
+        """Load a spec file; its ``ground_truth`` path is relative to the spec."""
+        path = Path(path)
+        with open(path) as f:
+            spec = json.load(f)
+        with open(path.parent / spec["ground_truth"]) as f:
+            ground_truth = json.load(f)
+        return cls(spec, ground_truth)
+
+    # ------------------------------------------------------------------
+    # Thresholds
+    # ------------------------------------------------------------------
+
+    def passes(self, name, value):
+        """Whether ``value`` meets metric ``name``'s threshold (missing values fail)."""
+        condition = self.metrics[name].condition
+        if condition is None:
+            return None
+        if value is None or (isinstance(value, float) and math.isnan(value)):
+            return False
+        op, threshold = condition
+        if op == "is":
+            return bool(value) is threshold
+        return OPERATORS[op](value, threshold)
+
+    def target(self, name):
+        """Human-readable threshold, e.g. "≥75%", "≥20", "100%", "True"."""
+        metric = self.metrics[name]
+        if metric.condition is None:
+            return "-"
+        op, threshold = metric.condition
+        if op == "is":
+            return str(threshold)
+        return f"{SYMBOLS[op]}{self.format(name, threshold)}"
+
+    def format(self, name, value):
+        """Display a value in its metric's unit."""
+        unit = self.metrics[name].unit
+        if value is None:
+            return "N/A"
+        if unit == "bool":
+            return str(bool(value))
+        if unit == "count":
+            return f"{value:g}" if isinstance(value, float) else str(value)
+        if unit == "fraction":
+            return f"{_trim(value * 100)}%"
+        if unit == "percent":
+            return f"{_trim(value)}%"
+        return f"{value:.2f}"
+
+    def assess(self, values):
+        """
+        Pass/fail for each thresholded metric and overall.
+
+        Args:
+            values: Dict of metric name -> value (missing metrics fail)
+
+        Returns:
+            Dict: passes (name -> bool), passed, required, min_passing, overall_pass
+        """
+        passes = {m.name: self.passes(m.name, values.get(m.name)) for m in self.metrics.values()
+                  if m.condition is not None}
+        passed = sum(1 for m in self.required if passes.get(m.name))
+        return {"passes": passes, "passed": passed, "required": len(self.required),
+                "min_passing": self.min_passing, "overall_pass": passed >= self.min_passing}
+
+    def metrics_table(self, values, actual=None):
+        """
+        Markdown rows "| Label | Target | Actual | PASS/FAIL |" for the report tables.
+
+        ``actual`` optionally overrides the displayed value (e.g. "3/3 (100%)").
+        """
+        rows = []
+        for metric in self.metrics.values():
+            if metric.condition is None:
+                continue
+            value = values.get(metric.name)
+            shown = (actual or {}).get(metric.name, self.format(metric.name, value))
+            verdict = "PASS" if self.passes(metric.name, value) else "FAIL"
+            rows.append(f"| {metric.label} | {self.target(metric.name)} | {shown} | {verdict} |")
+        return "\n".join(rows)
+
+    # ------------------------------------------------------------------
+    # Scoring answers
+    # ------------------------------------------------------------------
+
+    def _documents(self, raw_outputs):
+        return [load_document(raw) for raw in raw_outputs]
+
+    def _inputs(self, name, raw_hash):
+        return {"raw_output": raw_hash, "ground_truth": self.ground_truth_hash,
+                "evaluator": self.evaluator_hashes[name]}
+
+    def _incremental(self, paths):
+        """
+        (value, details) per internal metric for each path, reusing ``scores.json`` entries.
+
+        Returns:
+            (results, recomputed): one dict metric -> (value, details) per
+            path, and metric -> number of paths rescored
+        """
+        internal = [m for m in self.metrics.values() if not m.matcher.external]
+        records, stale = [], {m.name: [] for m in internal}
+        for i, path in enumerate(paths):
+            record = {}
+            if scores_path(path).exists():
+                try:
+                    with open(scores_path(path)) as f:
+                        record = json.load(f)
+                except ValueError:
+                    pass  # corrupt - rescore
+            if record.get("version") != SCORING_VERSION:
+                record = {"version": SCORING_VERSION, "specs": {}}
+
+            # The raw output is rehashed only when its size or mtime changed
+            stat, cached = path.stat(), record.get("raw_output", {})
+            if cached.get("size") != stat.st_size or cached.get("mtime_ns") != stat.st_mtime_ns:
+                record["raw_output"] = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns,
+                                        "sha256": file_sha256(path)}
+                record["dirty"] = True
+            entries = record["specs"].setdefault(self.task, {})
+            for metric in internal:
+                entry = entries.get(metric.name)
+                if not entry or entry["inputs"] != self._inputs(metric.name, record["raw_output"]["sha256"]):
+                    stale[metric.name].append(i)
+            records.append(record)
+
+        # Parse only the answers that have a stale metric
+        docs = {i: load_document(paths[i]) for i in sorted({i for indices in stale.values() for i in indices})}
+        for metric in internal:
+            indices = stale[metric.name]
+            for i, (value, details) in zip(indices, metric.matcher.score_many([docs[i] for i in indices])):
+                records[i]["specs"][self.task][metric.name] = {
+                    "inputs": self._inputs(metric.name, records[i]["raw_output"]["sha256"]),
+                    "value": value, "details": details}
+                records[i]["dirty"] = True
+
+        results = []
+        for path, record in zip(paths, records):
+            if record.pop("dirty", False):
+                write_json(scores_path(path), record, default=str, manifest=False)
+            entries = record["specs"][self.task]
+            results.append({m.name: (entries[m.name]["value"], entries[m.name]["details"]) for m in internal})
+        return results, {name: len(indices) for name, indices in stale.items()}
+
+    def score(self, raw_output, external=None, incremental=False):
+        """
+        Score one result.
+
+        Args:
+            raw_output: Path to a raw output file, a raw dict, or an AnswerDocument
+            external: Values of ``external`` metrics
+            incremental: Reuse the scores recorded in ``scores.json`` whose
+                inputs are unchanged (paths only)
+
+        Returns:
+            Dict: ``values``, ``details`` and the ``assess`` fields
+        """
+        if incremental and isinstance(raw_output, (str, Path)):
+            scored = self._incremental([Path(raw_output)])[0][0]
+        else:
+            doc = raw_output if hasattr(raw_output, "citation_ids") else load_document(raw_output)
+            scored = {m.name: m.matcher.score(doc) for m in self.metrics.values() if not m.matcher.external}
+        values, details = {}, {}
+        for metric in self.metrics.values():
+            if metric.matcher.external:
+                values[metric.name] = (external or {}).get(metric.name)
+            else:
+                values[metric.name], details[metric.name] = scored[metric.name]
+        return {"values": values, "details": details, **self.assess(values)}
+
+    def score_batch(self, raw_outputs, external=None, incremental=False):
+        """
+        Score many results with the compiled matchers.
+
+        Args:
+            raw_outputs: Paths (or raw dicts)
+            external: Optional dict of metric name -> list of values, one per
+                result
+            incremental: Reuse the scores recorded in ``scores.json`` whose
+                inputs are unchanged (requires paths)
+
+        Returns:
+            DataFrame with one row per result: the metric values, a
+            ``<metric>_pass`` column per threshold, ``passed`` and
+            ``overall_pass``. ``attrs["recomputed"]`` maps each metric to
+            the number of results actually scored.
+        """
+        raw_outputs = list(raw_outputs)
+        internal = [m for m in self.metrics.values() if not m.matcher.external]
+        if incremental:
+            scored, recomputed = self._incremental([Path(raw) for raw in raw_outputs])
+            internal_values = {m.name: [values[m.name][0] for values in scored] for m in internal}
+        else:
+            docs = self._documents(raw_outputs)
+            internal_values = {m.name: [value for value, _ in m.matcher.score_many(docs)] for m in internal}
+            recomputed = {m.name: len(docs) for m in internal}
+        columns = {}
+        for metric in self.metrics.values():
+            if metric.matcher.external:
+                columns[metric.name] = list((external or {}).get(metric.name, [None] * len(raw_outputs)))
+            else:
+                columns[metric.name] = internal_values[metric.name]
+        table = pd.DataFrame(columns, index=[str(r) if isinstance(r, (str, Path)) else i
+                                             for i, r in enumerate(raw_outputs)])
+        for metric in self.metrics.values():
+            if metric.condition is not None:
+                table[f"{metric.name}_pass"] = [self.passes(metric.name, v) for v in table[metric.name]]
+        required = [f"{m.name}_pass" for m in self.required]
+        table["passed"] = table[required].sum(axis=1) if required else 0
+        table["overall_pass"] = table["passed"] >= self.min_passing
+        table.attrs["recomputed"] = recomputed
+        return table
+
+
+@lru_cache(maxsize=None)
+def load_spec(task, input_dir=INPUT_DIR):
+    """The compiled spec for ``task`` ("task1".."task5", or a spec file path)."""
+    path = Path(task)
+    if not path.suffix:
+        path = Path(input_dir) / f"{task}_scoring.json"
+    return ScoringSpec.from_file(path)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Score Kosmos raw outputs with a task's scoring spec")
+    parser.add_argument("task", help="task1..task5, or a scoring spec file")
+    parser.add_argument("raw_outputs", nargs="+", help="kosmos_raw_output.json files")
+    parser.add_argument("--external", nargs="*", default=[], metavar="METRIC=VALUE",
+                        help="Values for external metrics, applied to every result")
+    parser.add_argument("--csv", help="Write the batch table here")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Rescore only metrics whose inputs changed since the last run (scores.json)")
+    args = parser.parse_args()
+
+    spec = load_spec(args.task)
+    external = {}
+    for item in args.external:
+        name, _, value = item.partition("=")
+        external[name] = json.loads(value.lower() if value.lower() in ("true", "false") else value)
+
+    if len(args.raw_outputs) == 1:
+        result = spec.score(args.raw_outputs[0], external, incremental=args.incremental)
+        print("| Metric | Target | Actual | Pass/Fail |\n|--------|--------|--------|-----------|")
+        print(spec.metrics_table(result["values"]))
+        print(f"\nOverall: {'PASS' if result['overall_pass'] else 'FAIL'} "
+              f"({result['passed']}/{result['required']} metrics passing)")
+        print(json.dumps(result["details"], indent=2, default=str))
+    else:
+        table = spec.score_batch(args.raw_outputs,
+                                 {name: [value] * len(args.raw_outputs) for name, value in external.items()},
+                                 incremental=args.incremental)
+        print(table.to_string())
+        print(f"\n{int(table['overall_pass'].sum())}/{len(table)} results pass")
+        if args.incremental:
+            print("Rescored: " + ", ".join(f"{name} {count}" for name, count in table.attrs["recomputed"].items()))
+        if args.csv:
+            table.to_csv(args.csv)
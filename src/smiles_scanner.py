@@ -0,0 +1,192 @@
+"""Cheap lexical SMILES candidate detection for Kosmos MOLECULES answers.
+
+``task4_evaluate.extract_properties_from_text`` used to run a catch-all
+regex over the answer and hand every match to ``Chem.MolFromSmiles``; on long
+answers almost all of those were ordinary words. This scanner finds tokens
+over the SMILES alphabet in one pass and rejects anything that cannot be
+SMILES with a lexical grammar check (atom alphabet, bracket atoms, balanced
+branches, paired ring-closure digits, aromatic atoms only in rings) before
+any RDKit call. Candidates are ranked by where they were found:
+``<smiles>`` tags, ``SMILES:`` labels, markdown code spans, table cells,
+then bare text.
+
+Usage:
+    from smiles_scanner import find_smiles_candidates
+
+    for candidate in find_smiles_candidates(answer):
+        if validate_smiles(candidate.smiles):
+            break
+"""
+
+import re
+from collections import namedtuple
+
+SmilesCandidate = namedtuple("SmilesCandidate", ["smiles", "start", "end", "context"])
+
+# Lower rank = more explicit marker that this is a SMILES string
+CONTEXT_RANK = {"tag": 0, "label": 1, "code": 2, "table": 3, "text": 4}
+
+# Runs of characters that may appear in a SMILES string; whitespace, "|",
+# backticks and "<"/">" (tags, reaction arrows) all end a token
+TOKEN = re.compile(r"[A-Za-z0-9@+\-\[\]()\\/%=#$.:*]+")
+
+# One SMILES lexeme: organic-subset atom, bracket atom, ring closure, bond,
+# branch or dot (disconnected components)
+LEXEME = re.compile(
+    r"Cl|Br|[BCNOPSFI]|[bcnops]|\*"
+    r"|(?P<bracket>\[[^\[\]]+\])"
+    r"|(?P<ring>%\d\d|\d)"
+    r"|[-=#$:/\\.]"
+    r"|(?P<open>\()|(?P<close>\))"
+)
+BRACKET_ATOM = re.compile(
+    r"\[\d*(?:[A-Z][a-z]?|[bcnops]|se|as|te|\*)(?:@{1,2}|@[A-Z]{2}\d{1,2})?"
+    r"(?:H\d?)?(?:[+-]{1,2}\d?)?(?::\d+)?\]"
+)
+BONDS = set("-=#$:/\\.")
+AROMATIC = set("bcnops")
+
+LABEL = re.compile(r"smiles\s*(?:string)?\s*[:=]\s*`?$", re.IGNORECASE)
+TRAILING = ".:"
+
+
+def is_plausible_smiles(token, min_atoms=3, explicit=False):
+    """
+    Lexical check that ``token`` could be a SMILES string.
+
+    Accepts valid SMILES and rejects nearly all prose (words, numbers,
+    citations). It is a prefilter, not a validator: RDKit still has the
+    final say on valence and aromaticity.
+
+    Args:
+        token: Candidate string
+        min_atoms: Minimum number of atoms
+        explicit: The token was marked as SMILES (``<smiles>`` tag or
+            ``SMILES:`` label), so short or unbranched molecules such as
+            ``CCO`` are accepted: only the grammar is checked
+    """
+    if not token or token[0] in BONDS or token[0] in "()" or token[0].isdigit() or token[0] == "%":
+        return False
+    if token[-1] in BONDS or token[-1] == "(":
+        return False
+
+    atoms = 0
+    depth = 0
+    rings = {}
+    aromatic = False
+    structure = False  # a branch, ring, bond or bracket atom: more than a bare word
+    previous = None
+    pos = 0
+    for lexeme in LEXEME.finditer(token):
+        if lexeme.start() != pos:
+            return False
+        pos = lexeme.end()
+        text = lexeme.group()
+
+        if lexeme.group("bracket"):
+            if not BRACKET_ATOM.fullmatch(text):
+                return False
+            atoms += 1
+            structure = True
+        elif lexeme.group("ring"):
+            if previous is None or previous in "(":
+                return False
+            rings[text] = rings.get(text, 0) + 1
+            structure = True
+        elif lexeme.group("open"):
+            if previous is None or previous in "(" or previous in BONDS:
+                return False
+            depth += 1
+            structure = True
+        elif lexeme.group("close"):
+            if previous in "(" or previous in BONDS:
+                return False
+            depth -= 1
+            if depth < 0:
+                return False
+        elif text in BONDS:
+            if previous in BONDS or previous in "(" and text == ".":
+                return False
+            structure = True
+        else:
+            atoms += 1
+            aromatic = aromatic or text in AROMATIC
+        previous = text
+
+    if pos != len(token) or depth != 0 or atoms < (1 if explicit else min_atoms):
+        return False
+    if any(count % 2 for count in rings.values()):
+        return False
+    if aromatic and not rings:
+        return False  # lowercase atoms outside rings are prose ("No", "Once")
+    if explicit:
+        return True
+    # An all-uppercase run of plain atoms ("CO", "SOS", "NOS") is usually an
+    # acronym unless it is long enough to be an aliphatic chain
+    return structure or atoms >= 6
+
+
+def _context(text, start, end):
+    """Classify where a token sits: tag, label, code span, table cell or text."""
+    tag_open = text.rfind("<smiles>", 0, start)
+    if tag_open != -1 and text.find("</smiles>", tag_open) >= end:
+        return "tag"
+    line_start = text.rfind("\n", 0, start) + 1
+    if LABEL.search(text, line_start, start):
+        return "label"
+    if start > 0 and text[start - 1] == "`" and text.startswith("`", end):
+        return "code"
+    if text[line_start:start].lstrip().startswith("|"):
+        return "table"
+    return "text"
+
+
+def find_smiles_candidates(text, min_atoms=3):
+    """
+    Find plausible SMILES strings in free text.
+
+    Reaction SMILES inside ``<smiles>`` tags (``A.B>>C``) are split at the
+    arrow, so each side is its own candidate. Tokens in a tag or after a
+    ``SMILES:`` label skip the length and acronym filters.
+
+    Args:
+        text: Answer text
+        min_atoms: Minimum atoms for an unmarked candidate
+
+    Returns:
+        List of SmilesCandidate(smiles, start, end, context), most explicit
+        context first, then in text order
+    """
+    candidates = []
+    for match in TOKEN.finditer(text):
+        token = match.group()
+        start, end = match.start(), match.end()
+        # Sentence punctuation is not part of the molecule
+        while token and token[-1] in TRAILING:
+            token = token[:-1]
+            end -= 1
+        if is_plausible_smiles(token, min_atoms):
+            context = _context(text, start, end)
+        elif token and is_plausible_smiles(token, explicit=True):
+            context = _context(text, start, end)
+            if context not in ("tag", "label"):
+                continue
+        else:
+            continue
+        candidates.append(SmilesCandidate(token, start, end, context))
+
+    candidates.sort(key=lambda c: (CONTEXT_RANK[c.context], c.start))
+    return candidates
+
+
+if __name__ == "__main__":
+    import sys
+
+    if len(sys.argv) < 2:
+        print("Usage: python smiles_scanner.py FILE")
+        sys.exit(1)
+
+    with open(sys.argv[1], encoding="utf-8", errors="replace") as f:
+        content = f.read()
+    for candidate in find_smiles_candidates(content):
+        print(f"{candidate.context:<6} {candidate.start:>8}  {candidate.smiles}")
@@ -0,0 +1,405 @@
+"""Synthetic Kosmos answers for parser benchmarks.
+
+Only five real answers are recorded under ``output/``, all 3-30 KB, which
+says nothing about how the parsers behave on answers ten or a hundred times
+longer. ``generate_answer`` builds answers with the same structure as the
+recordings: introduction paragraph, plain-line section headings, numbered
+items (``1) ...``) with nested bullets, inline citation groups
+(``(key2024title pages 3-5, ...)``), NCT trial IDs, a markdown table, a
+ranked intervention list, ``**Designed Molecule N**`` blocks with
+``<smiles>`` tags and ``- Property: value`` bullets, and a numbered reference
+list with DOIs in ``formatted_answer``. Size, citation density, SMILES count,
+ranking length and table size are parameters. Sentences are drawn from the
+recorded answers when they are present, so the vocabulary and sentence
+lengths are realistic. ``generate_notebook`` builds nbformat-4 notebooks
+with stream outputs and base64 PNG figures, and ``raw_output`` wraps an
+answer in the raw-output layout of any task. Everything is seeded and
+deterministic.
+
+Usage:
+    from synthetic_answers import generate_answer, raw_output
+
+    synthetic = generate_answer(size=150_000, citation_density=0.8, smiles_count=30, seed=1)
+    raw = raw_output(synthetic, layout="task5")
+    synthetic.expected["dois"]      # what a parser should find
+
+    python src/synthetic_answers.py -o cache/synthetic --sizes 15000 150000
+"""
+
+import base64
+import json
+import random
+import re
+import struct
+import zlib
+from collections import namedtuple
+from pathlib import Path
+
+from answer_document import INLINE_CITATION_GROUP, AnswerDocument, answer_fields
+from artifacts import write_json
+
+SyntheticAnswer = namedtuple("SyntheticAnswer", ["answer", "formatted_answer", "notebook", "expected"])
+
+LAYOUTS = ("task1", "task3", "task4", "task5")
+
+RECORDED_OUTPUTS = [
+    Path("output/task1_results/kosmos_raw_output.json"),
+    Path("output/task2_results/kosmos_raw_output.json"),
+    Path("output/task3_results/kosmos_raw_output_fixed.json"),
+    Path("output/task4_results/kosmos_raw_output.json"),
+    Path("output/task5_results/kosmos_raw_output.json"),
+]
+
+# Used when no recordings are available (e.g. a fresh checkout)
+FALLBACK_SENTENCES = [
+    "Experimental systems demonstrate that alpha-synuclein pathology in the gut wall can spread to the nodose ganglia and dorsal motor nucleus.",
+    "SHP2 and SOS1 inhibitors blunt RTK-driven restoration of RAS-GTP and delay ERK reactivation in preclinical models.",
+    "PD cohorts show increased intestinal permeability with elevated serum LPS-binding protein and mucosal oxidative stress markers.",
+    "Combination strategies with pan-ERBB or PI3K inhibitors are supported to counter adaptive feedback after KRAS blockade.",
+    "Dysbiosis typically features reduced butyrate-producing taxa and lower colonic short-chain fatty acid concentrations.",
+    "Adaptive metabolic rewiring through autophagy and macropinocytosis sustains tumor growth under MAPK suppression.",
+    "Heat shock induced strong upregulation of chaperone genes, with dnaK and groEL among the most significant changes.",
+    "Early clinical development has begun, although durable responses remain limited to a subset of patients.",
+    "Systematic animal data show gut-targeted interventions frequently downregulate TLR4 and normalize barrier proteins.",
+    "Resistance frequently emerges through secondary RAS alterations, RTK-mediated escape and MEK reactivation.",
+]
+
+# Drug-like molecules written the way Kosmos MOLECULES answers write them
+SMILES_POOL = [
+    "C(#N)[C@H](C[C@H]1C(NCC1)=O)NC(=O)[C@@H]1[C@H]2C([C@H]2CN1C([C@H](C(C)(C)C)NC(C(F)(F)F)=O)=O)(C)C",
+    "CC(C)(C)[C@H](NC(=O)CCO)C(=O)N1C[C@H]2[C@@H]([C@H]1C(=O)N[C@H](C#N)C[C@@H]1CCNC1=O)C2(C)C",
+    "CC(=O)Oc1ccccc1C(=O)O",
+    "CN1CCN(CC1)c1ccc(cc1)C(=O)Nc1ccc(C)c(Nc2nccc(n2)-c2cccnc2)c1",
+    "COc1cc2ncnc(Nc3ccc(F)c(Cl)c3)c2cc1OCCCN1CCOCC1",
+    "CC(C)Cc1ccc(cc1)[C@@H](C)C(=O)O",
+    "O=C(O)c1ccccc1O",
+    "CN1C(=O)CN=C(c2ccccc2)c2cc(Cl)ccc21",
+    "Cc1ccc(cc1Nc1nccc(n1)-c1cccnc1)NC(=O)c1ccc(CN2CCN(C)CC2)cc1",
+    "CC1=C(C(=O)Nc2ccccc2)C(c2ccccc2[N+](=O)[O-])C(C(=O)OC)=C(C)N1",
+    "OC[C@H]1O[C@@H](n2cnc3c(N)ncnc32)[C@H](O)[C@@H]1O",
+    "CCN(CC)CCNC(=O)c1cc(Cl)c(N)cc1OC",
+]
+
+INTERVENTIONS = [
+    "Dietary fiber supplementation", "Fecal microbiota transplantation", "Probiotic consortia",
+    "Butyrate prodrugs", "TLR4 antagonism", "Vagal nerve modulation", "Levodopa decarboxylase inhibition",
+    "SHP2 inhibition", "SOS1 inhibition", "Pan-RAS(ON) inhibition", "MEK plus KRAS blockade",
+    "Autophagy inhibition", "Anti-inflammatory therapy", "Bile acid modulation", "Prebiotic oligosaccharides",
+]
+
+SECTION_TITLES = [
+    "Circuit-level mechanisms", "Most promising targetable dependencies", "Resistance mechanisms",
+    "Barrier and immune signaling", "Metabolite-mediated modulation", "Pharmacomicrobiomic effects",
+    "Evidence from human cohorts", "Preclinical models", "Open questions and limitations",
+]
+
+JOURNALS = ["Nature Communications", "Cancer Discovery", "Movement Disorders", "Gut Microbes",
+            "Scientific Reports", "Frontiers in Pharmacology", "Cell Reports", "npj Parkinson's Disease"]
+MONTHS = ["Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"]
+SURNAMES = ["wang", "chandra", "menozzi", "wei", "khan", "dutta", "kujawska", "panaitescu", "shenoy",
+            "adamopoulos", "chui", "li", "garcia", "müller", "okafor", "tanaka"]
+TITLE_WORDS = ["gut", "brain", "axis", "kras", "inhibition", "resistance", "microbiota", "parkinson",
+               "therapeutic", "targets", "mechanisms", "adaptive", "signaling", "barrier", "review"]
+
+
+def recorded_sentences(paths=RECORDED_OUTPUTS, min_length=40):
+    """Sentences of the recorded answers, with their inline citation groups removed."""
+    sentences = []
+    for path in paths:
+        if not Path(path).exists():
+            continue
+        with open(path) as f:
+            text, formatted_text = answer_fields(json.load(f))
+        doc = AnswerDocument(text.replace("\\n", "\n"), formatted_text)
+        for sentence in doc.sentences:
+            cleaned = " ".join(INLINE_CITATION_GROUP.sub("", sentence["text"]).split())
+            cleaned = cleaned.replace(" .", ".").replace("'", "’")  # keep reprs single-quoted
+            # Drop headings, table rows and anything carrying its own identifiers
+            if len(cleaned) >= min_length and "|" not in cleaned and "10." not in cleaned \
+                    and "NCT" not in cleaned and "<smiles>" not in cleaned:
+                sentences.append(cleaned)
+    return sentences or list(FALLBACK_SENTENCES)
+
+
+class _Builder:
+    """Accumulates answer lines and the ground truth of what was embedded."""
+
+    def __init__(self, rng, sentences, citation_density, nct_density):
+        self.rng = rng
+        self.sentences = sentences
+        self.citation_density = citation_density
+        self.nct_density = nct_density
+        self.lines = []
+        self.length = 0
+        self.keys = {}  # citation key -> reference number
+        self.key_list = []
+        self.ncts = []
+        self.expected = {"sections": [], "numbered_items": 0, "inline_citations": 0,
+                         "smiles": [], "ranking": []}
+
+    def add(self, line=""):
+        self.lines.append(line)
+        self.length += len(line) + 1
+
+    def _citation_key(self):
+        # Reuse existing keys about half the time, as real answers do
+        if self.keys and self.rng.random() < 0.5:
+            return self.rng.choice(self.key_list)
+        key = "{}{}{}{}".format(self.rng.choice(SURNAMES), self.rng.randint(2018, 2025),
+                                *self.rng.sample(TITLE_WORDS, 2))
+        while key in self.keys:
+            key += self.rng.choice("abcdefgh")
+        self.keys[key] = len(self.keys) + 1
+        self.key_list.append(key)
+        return key
+
+    def sentence(self):
+        text = self.rng.choice(self.sentences)
+        if self.rng.random() < self.nct_density:
+            nct = f"NCT{self.rng.randint(1000000, 7999999):08d}"
+            self.ncts.append(nct)
+            text = text.rstrip(".") + f" ({nct})."
+        if self.rng.random() < self.citation_density:
+            group = []
+            for _ in range(self.rng.randint(1, 3)):
+                page = self.rng.randint(1, 30)
+                group.append(f"{self._citation_key()} pages {page}-{page + self.rng.randint(1, 3)}")
+            self.expected["inline_citations"] += len(group)
+            text = text.rstrip(".") + f" ({', '.join(group)})."
+        return text
+
+    def paragraph(self, sentences):
+        return " ".join(self.sentence() for _ in range(sentences))
+
+
+def _reference_entry(rng, number, key):
+    year = re.search(r"\d{4}", key).group()
+    doi = f"10.{rng.randint(1000, 9999)}/{rng.choice(['s', 'j.', 'fphar.', 'mds.'])}{year}.{rng.randint(10000, 99999)}"
+    authors = ", ".join(f"{rng.choice('ABCDEFGHJKLMNPRSTW')}. {rng.choice(SURNAMES).title()}"
+                        for _ in range(rng.randint(1, 4)))
+    title = " ".join(rng.sample(TITLE_WORDS, 6)).capitalize()
+    entry = (f"{number}. ({key} pages 1-2): {authors}. {title}. {rng.choice(JOURNALS)}, "
+             f"{rng.choice(MONTHS)} {year}. URL: https://doi.org/{doi}, doi:{doi}. "
+             f"This article has {rng.randint(0, 300)} citations and is from a peer-reviewed journal.")
+    return entry, doi
+
+
+def generate_answer(size=15_000, citation_density=0.6, nct_density=0.05, smiles_count=3,
+                    ranking_length=8, items_per_section=4, sentences_per_item=2,
+                    table_rows=5, notebook_cells=0, figures=0, sentences=None, seed=0):
+    """
+    Build one synthetic answer with the structure of the recorded Kosmos answers.
+
+    Args:
+        size: Approximate answer length in characters (sections are added
+            until it is reached; the recorded answers are 3-30 KB)
+        citation_density: Probability that a sentence ends with an inline
+            citation group (1-3 keys); each distinct key gets a reference
+            with a DOI
+        nct_density: Probability that a sentence mentions an NCT trial ID
+        smiles_count: ``**Designed Molecule N**`` blocks with ``<smiles>`` tags
+        ranking_length: Items in the ranked intervention list
+        items_per_section, sentences_per_item: Shape of numbered sections
+        table_rows: Rows of the markdown summary table (0 for none)
+        notebook_cells, figures: Notebook payload (see ``generate_notebook``);
+            no notebook if ``notebook_cells`` is 0
+        sentences: Sentence pool (default: ``recorded_sentences()``)
+        seed: Random seed
+
+    Returns:
+        SyntheticAnswer(answer, formatted_answer, notebook, expected) where
+        ``expected`` lists what was embedded (sections, numbered_items,
+        inline_citations, smiles, ranking, dois, ncts)
+    """
+    rng = random.Random(seed)
+    b = _Builder(rng, sentences or recorded_sentences(), citation_density, nct_density)
+
+    b.add("Introduction. " + b.paragraph(4))
+    b.add()
+
+    # Numbered sections until the requested size (leaving room for the tail)
+    tail_estimate = 400 * smiles_count + 250 * ranking_length + 200 * table_rows
+    section_index = 0
+    while b.length < size - tail_estimate or section_index == 0:
+        title = SECTION_TITLES[section_index % len(SECTION_TITLES)]
+        if section_index >= len(SECTION_TITLES):
+            title += f" ({section_index // len(SECTION_TITLES) + 1})"
+        b.expected["sections"].append(title)
+        b.add(title)
+        for number in range(1, items_per_section + 1):
+            b.add(f"{number}) {b.paragraph(sentences_per_item)}")
+            b.expected["numbered_items"] += 1
+            if rng.random() < 0.3:
+                b.add(f"  - {b.sentence()}")
+        b.add()
+        section_index += 1
+
+    if ranking_length:
+        title = "Ranked interventions by current evidence and feasibility"
+        b.expected["sections"].append(title)
+        b.add(title)
+        for number, name in enumerate(_names(rng, INTERVENTIONS, ranking_length), 1):
+            b.expected["ranking"].append(name)
+            b.expected["numbered_items"] += 1
+            b.add(f"{number}) {name} — {b.sentence()}")
+        b.add()
+
+    if table_rows:
+        b.add("| Target | Representative agents | Evidence | Resistance |")
+        b.add("|---|---|---|---|")
+        for _ in range(table_rows):
+            b.add(f"| {rng.choice(INTERVENTIONS)} | {rng.choice(INTERVENTIONS)} | {b.sentence()} | {b.sentence()} |")
+        b.add()
+
+    for number in range(1, smiles_count + 1):
+        smiles = rng.choice(SMILES_POOL)
+        b.expected["smiles"].append(smiles)
+        b.add("---")
+        b.add(f"**Designed Molecule {number}**")
+        b.add(f"<smiles>{smiles}</smiles>")
+        b.add(f"- Solubility: {rng.uniform(-7, -3):.2f}")
+        b.add(f"- HIA: {rng.uniform(0.5, 1):.2f}")
+        b.add(f"- Oral Bioavailability: {rng.uniform(0.2, 0.8):.2f}")
+        b.add(f"- CYP Clearance: {rng.uniform(20, 80):.2f}")
+        b.add(f"- QED: {rng.uniform(0.3, 0.8):.3f}")
+        b.add(f"- Lipinski: {rng.randint(3, 5)}/5")
+        b.add(f"- SASCore: {rng.uniform(2, 6):.2f}")
+        b.add(f"- Rationale: {b.sentence()}")
+        b.add()
+
+    b.add("Conclusion. " + b.paragraph(3))
+    answer = "\n".join(b.lines)
+
+    references = ["References", ""]
+    dois = []
+    for key, number in b.keys.items():
+        entry, doi = _reference_entry(rng, number, key)
+        references.extend([entry, ""])
+        dois.append(doi)
+    formatted_answer = answer + "\n\n" + "\n".join(references)
+
+    b.expected["dois"] = dois
+    b.expected["ncts"] = list(dict.fromkeys(b.ncts))
+    notebook = generate_notebook(notebook_cells, figures, seed=seed) if notebook_cells else None
+    return SyntheticAnswer(answer, formatted_answer, notebook, b.expected)
+
+
+def _names(rng, pool, count):
+    names = rng.sample(pool, min(count, len(pool)))
+    while len(names) < count:
+        names.append(f"{rng.choice(pool)} variant {len(names) + 1}")
+    return names
+
+
+def _png(width, height, rng):
+    """A valid greyscale PNG of random noise (incompressible, like real plots' worst case)."""
+    def chunk(kind, data):
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+    rows = b"".join(b"\x00" + rng.randbytes(width) for _ in range(height))
+    return (b"\x89PNG\r\n\x1a\n"
+            + chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 0, 0, 0, 0))
+            + chunk(b"IDAT", zlib.compress(rows, 1))
+            + chunk(b"IEND", b""))
+
+
+def generate_notebook(cells=20, figures=2, figure_size=(400, 300), seed=0):
+    """
+    An nbformat-4 notebook shaped like the recorded ANALYSIS notebooks.
+
+    Args:
+        cells: Code cells, each with a stream output
+        figures: Cells (spread evenly) that also carry a base64 PNG
+            ``display_data`` output
+        figure_size: (width, height) of each PNG in pixels
+        seed: Random seed
+    """
+    rng = random.Random(seed)
+    figure_cells = set(range(0, cells, max(1, cells // figures))[:figures]) if figures else set()
+    notebook_cells = []
+    for i in range(cells):
+        outputs = [{"name": "stdout", "output_type": "stream",
+                    "text": f'[1] "Step {i + 1} complete: {rng.randint(10, 500)} genes processed"\n'}]
+        if i in figure_cells:
+            png = base64.b64encode(_png(*figure_size, rng)).decode("ascii")
+            outputs.append({"data": {"image/png": png, "text/plain": ["plot without title"]},
+                            "metadata": {}, "output_type": "display_data"})
+        notebook_cells.append({
+            "cell_type": "code",
+            "execution_count": None,
+            "id": f"{rng.getrandbits(32):08x}",
+            "metadata": {},
+            "outputs": outputs,
+            "source": f"\n# Step {i + 1}\nresult_{i} <- analyse(counts, step = {i + 1})\nprint(result_{i})\n",
+        })
+    return {
+        "cells": notebook_cells,
+        "metadata": {"kernelspec": {"display_name": "R", "language": "r", "name": "ir"}},
+        "nbformat": 4,
+        "nbformat_minor": 5,
+    }
+
+
+def raw_output(synthetic, layout="task5", query="Synthetic benchmark query"):
+    """
+    Wrap a SyntheticAnswer in the raw-output layout of one task.
+
+    Layouts:
+        task1: ``{"task": "<repr of the task object>"}``
+        task3: top-level ``answer`` plus ``notebook``
+        task4: top-level ``answer`` (MOLECULES)
+        task5: ``{"results": {"answer", "formatted_answer", ...}}``
+    """
+    if layout == "task1":
+        return {"task": f"status='success' query={query!r} user=None "
+                        f"answer={synthetic.answer!r} formatted_answer={synthetic.formatted_answer!r} "
+                        f"has_successful_answer=True"}
+    if layout == "task3":
+        return {"task_id": "synthetic", "status": "success", "query": query,
+                "answer": synthetic.answer, "notebook": synthetic.notebook or generate_notebook(0, 0)}
+    if layout == "task4":
+        return {"status": "success", "task_id": "synthetic", "answer": synthetic.answer}
+    if layout == "task5":
+        return {"task_id": "synthetic", "status": "success", "results": {
+            "status": "success", "query": query, "answer": synthetic.answer,
+            "formatted_answer": synthetic.formatted_answer, "has_successful_answer": True}}
+    raise ValueError(f"Unknown layout {layout!r} (expected one of {', '.join(LAYOUTS)})")
+
+
+def write_corpus(output_dir, sizes=(15_000, 150_000), layouts=LAYOUTS, seed=0, **params):
+    """
+    Write ``<output_dir>/<layout>_<size>/kosmos_raw_output.json`` for each size and layout.
+
+    Returns:
+        List of written paths
+    """
+    sentences = recorded_sentences()
+    paths = []
+    for size in sizes:
+        synthetic = generate_answer(size=size, sentences=sentences, seed=seed, **params)
+        for layout in layouts:
+            path = Path(output_dir) / f"{layout}_{size}" / "kosmos_raw_output.json"
+            write_json(path, raw_output(synthetic, layout), manifest=False)
+            paths.append(path)
+    return paths
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Write a synthetic Kosmos answer corpus")
+    parser.add_argument("-o", "--output-dir", default="cache/synthetic_answers")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[15_000, 150_000])
+    parser.add_argument("--layouts", nargs="+", default=list(LAYOUTS), choices=LAYOUTS)
+    parser.add_argument("--citation-density", type=float, default=0.6)
+    parser.add_argument("--smiles", type=int, default=3, help="Designed molecule blocks")
+    parser.add_argument("--ranking", type=int, default=8, help="Ranked intervention items")
+    parser.add_argument("--cells", type=int, default=20, help="Notebook cells (task3 layout)")
+    parser.add_argument("--figures", type=int, default=2, help="PNG figures in the notebook")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    for path in write_corpus(args.output_dir, args.sizes, args.layouts, args.seed,
+                             citation_density=args.citation_density, smiles_count=args.smiles,
+                             ranking_length=args.ranking, notebook_cells=args.cells,
+                             figures=args.figures):
+        print(f"{path}  ({path.stat().st_size / 1024:.0f} KB)")
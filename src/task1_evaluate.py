@@ -5,10 +5,12 @@ Calculate metrics for Task 1 results
 """
 
 import json
-import requests
-import random
 from pathlib import Path
 
+from artifacts import write_json
+from doi_verifier import DoiVerifier
+from scoring_engine import load_spec
+
 
 def calculate_target_recall(identified, ground_truth):
     """% of known targets found by Kosmos"""
@@ -16,23 +18,11 @@ def calculate_target_recall(identified, ground_truth):
     return len(overlap) / len(ground_truth["known_targets"])
 
 
-def validate_citations(citations, sample_size=5):
-    """Spot-check random citations exist"""
-    sample = random.sample(citations, min(sample_size, len(citations)))
-    valid_count = 0
-    for citation in sample:
-        if verify_doi_exists(citation):
-            valid_count += 1
-    return valid_count / len(sample)
-
-
-def verify_doi_exists(doi):
-    """Check if DOI resolves via CrossRef API"""
-    try:
-        response = requests.get(f"https://api.crossref.org/works/{doi}")
-        return response.status_code == 200
-    except:
-        return False
+def validate_citations(citations):
+    """Fraction of cited DOIs that resolve (all of them, batched and cached); None if none could be checked"""
+    with DoiVerifier() as verifier:
+        results = verifier.verify(citations)
+    return DoiVerifier.summarize(results)["validity"]
 
 
 def main():
@@ -78,25 +68,23 @@ def main():
         }
 
         # Save metrics
-        with open("output/task1_results/metrics.json", "w") as f:
-            json.dump(metrics, f, indent=2)
+        write_json("output/task1_results/metrics.json", metrics)
 
         print(f"Metrics calculated:")
         print(f"  Target recall: {target_recall:.1%}")
         print(f"  Citation count: {citation_count}")
-        print(f"  Citation validity: {citation_validity:.1%}")
+        if citation_validity is None:
+            print("  Citation validity: not assessed (no DOI could be resolved)")
+        else:
+            print(f"  Citation validity: {citation_validity:.1%}")
         print(f"  Key paper coverage: {key_paper_coverage:.1%}")
 
-        # Determine pass/fail
-        target_recall_pass = target_recall >= 0.75
-        citation_count_pass = citation_count >= 20
-        citation_validity_pass = citation_validity == 1.0
-        key_paper_coverage_pass = key_paper_coverage >= 0.66
-
-        passed_metrics = sum([target_recall_pass, citation_count_pass, citation_validity_pass, key_paper_coverage_pass])
-        overall_assessment = "PASS" if passed_metrics >= 3 else "FAIL"
+        # Determine pass/fail (thresholds in input/task1_scoring.json)
+        assessment = load_spec("task1").assess(metrics)
+        overall_assessment = "PASS" if assessment["overall_pass"] else "FAIL"
 
-        print(f"\nOverall Assessment: {overall_assessment} ({passed_metrics}/4 metrics passing)")
+        print(f"\nOverall Assessment: {overall_assessment} "
+              f"({assessment['passed']}/{assessment['required']} metrics passing)")
 
     else:
         print(f"Kosmos results not found at {kosmos_file}")
@@ -10,11 +10,13 @@ import time
 from datetime import datetime
 from pathlib import Path
 import sys
-import requests
-import random
 
 # Import working components from Phase 1
 from edison_wrapper import KosmosClient
+from execution_log import ExecutionLogger
+from artifacts import write_json, write_text
+from doi_verifier import DoiVerifier
+from scoring_engine import load_spec
 
 
 class Task1CancerGenomics:
@@ -22,6 +24,7 @@ class Task1CancerGenomics:
 
     def __init__(self):
         self.task_name = "task1_cancer_genomics"
+        self.logger = ExecutionLogger(self.task_name)
         self.client = KosmosClient()
         self.setup_directories()
         self.results_dir = Path("output/task1_results")
@@ -32,14 +35,9 @@ class Task1CancerGenomics:
         for dir_name in ["output", "logs", "input", "output/task1_results"]:
             Path(dir_name).mkdir(exist_ok=True)
 
-    def log_execution(self, message, level="INFO"):
-        """Log execution events"""
-        timestamp = datetime.now().isoformat()
-        log_entry = f"{timestamp} [{level}] {message}\n"
-
-        with open(f"logs/{self.task_name}_execution.log", "a") as f:
-            f.write(log_entry)
-
+    def log_execution(self, message, level="INFO", stage=None):
+        """Log execution events (buffered JSONL, see execution_log.py)"""
+        self.logger.log(message, level, stage=stage)
         print(message)
 
     def run_kosmos_query(self):
@@ -52,11 +50,11 @@ class Task1CancerGenomics:
         try:
             # Submit job
             task_id = self.client.submit_literature(query)
+            self.logger.task_id = task_id
             self.log_execution(f"Task submitted: {task_id}")
 
             # Save task ID
-            with open("output/task1_results/task_id.txt", "w") as f:
-                f.write(task_id)
+            write_text("output/task1_results/task_id.txt", task_id)
 
             return task_id
 
@@ -66,31 +64,33 @@ class Task1CancerGenomics:
 
     def monitor_task(self, task_id, timeout_minutes=20):
         """Monitor task completion"""
-        self.log_execution(f"Monitoring task {task_id}")
+        self.logger.task_id = task_id
+        with self.logger.stage_scope("monitor"):
+            self.log_execution(f"Monitoring task {task_id}")
 
-        start_time = time.time()
-        timeout_seconds = timeout_minutes * 60
+            start_time = time.time()
+            timeout_seconds = timeout_minutes * 60
 
-        while time.time() - start_time < timeout_seconds:
-            try:
-                task = self.client.get_task(task_id)
-                self.log_execution(f"Status: {task.status}")
+            while time.time() - start_time < timeout_seconds:
+                try:
+                    task = self.client.get_task(task_id)
+                    self.log_execution(f"Status: {task.status}")
 
-                if task.status == "completed":
-                    self.log_execution("Task completed successfully")
-                    return task
-                elif task.status in ["failed", "cancelled"]:
-                    self.log_execution(f"Task {task.status}", "ERROR")
-                    return task
+                    if task.status == "completed":
+                        self.log_execution("Task completed successfully")
+                        return task
+                    elif task.status in ["failed", "cancelled"]:
+                        self.log_execution(f"Task {task.status}", "ERROR")
+                        return task
 
-                time.sleep(30)  # Wait 30 seconds between checks
+                    time.sleep(30)  # Wait 30 seconds between checks
 
-            except Exception as e:
-                self.log_execution(f"Error checking task status: {e}", "ERROR")
-                time.sleep(30)
+                except Exception as e:
+                    self.log_execution(f"Error checking task status: {e}", "ERROR")
+                    time.sleep(30)
 
-        self.log_execution("Task monitoring timeout", "ERROR")
-        return None
+            self.log_execution("Task monitoring timeout", "ERROR")
+            return None
 
     def parse_kosmos_results(self, task):
         """Parse results from Kosmos output"""
@@ -107,8 +107,7 @@ class Task1CancerGenomics:
 
         # Save raw output
         output_file = self.results_dir / "kosmos_raw_output.json"
-        with open(output_file, "w") as f:
-            json.dump(result_content, f, indent=2)
+        write_json(output_file, result_content)
 
         self.log_execution(f"Raw output saved to {output_file}")
 
@@ -141,20 +140,11 @@ class Task1CancerGenomics:
         }
 
         ground_truth_file = Path("input/task1_ground_truth.json")
-        with open(ground_truth_file, "w") as f:
-            json.dump(ground_truth, f, indent=2)
+        write_json(ground_truth_file, ground_truth, manifest=False)
 
         self.log_execution(f"Ground truth saved to {ground_truth_file}")
         return ground_truth
 
-    def verify_doi_exists(self, doi):
-        """Check if DOI resolves via CrossRef API"""
-        try:
-            response = requests.get(f"https://api.crossref.org/works/{doi}")
-            return response.status_code == 200
-        except:
-            return False
-
     def calculate_metrics(self, parsed_results, ground_truth):
         """Calculate evaluation metrics"""
         metrics = {}
@@ -172,12 +162,14 @@ class Task1CancerGenomics:
         else:
             metrics["citation_count"] = 0
 
-        # Citation validity (spot check)
+        # Citation validity: every DOI is checked (NCT IDs are not DOIs)
         if "citations" in parsed_results and parsed_results["citations"]:
-            sample_size = min(5, len(parsed_results["citations"]))
-            sample = random.sample(parsed_results["citations"], sample_size)
-            valid_count = sum(1 for citation in sample if self.verify_doi_exists(citation))
-            metrics["citation_validity"] = valid_count / sample_size
+            dois = [c for c in parsed_results["citations"] if c.startswith("10.")]
+            with DoiVerifier() as verifier:
+                verification = DoiVerifier.summarize(verifier.verify(dois))
+            metrics["citation_verification"] = verification
+            # None (not assessed) when every DOI lookup failed
+            metrics["citation_validity"] = verification["validity"] if dois else 1.0
         else:
             metrics["citation_validity"] = 0.0
 
@@ -190,8 +182,7 @@ class Task1CancerGenomics:
 
         # Save metrics
         metrics_file = self.results_dir / "metrics.json"
-        with open(metrics_file, "w") as f:
-            json.dump(metrics, f, indent=2)
+        write_json(metrics_file, metrics)
 
         self.log_execution(f"Metrics saved to {metrics_file}")
         return metrics
@@ -202,14 +193,15 @@ class Task1CancerGenomics:
         with open("input/task1_ground_truth.json", "r") as f:
             ground_truth = json.load(f)
 
-        # Calculate pass/fail for each metric
-        target_recall_pass = metrics["target_recall"] >= 0.75
-        citation_count_pass = metrics["citation_count"] >= 20
-        citation_validity_pass = metrics["citation_validity"] == 1.0
-        key_paper_coverage_pass = metrics["key_paper_coverage"] >= 0.66
+        verification = metrics.get("citation_verification") or {}
+        actual = {}
+        if "citation_validity" in metrics and metrics["citation_validity"] is None:
+            actual["citation_validity"] = "not assessed (no DOI resolved)"
 
-        passed_metrics = sum([target_recall_pass, citation_count_pass, citation_validity_pass, key_paper_coverage_pass])
-        overall_assessment = "PASS" if passed_metrics >= 3 else "FAIL"
+        # Pass/fail per metric, from input/task1_scoring.json
+        spec = load_spec("task1")
+        assessment = spec.assess(metrics)
+        overall_assessment = "PASS" if assessment["overall_pass"] else "FAIL"
 
         report = f"""# Task 1: Cancer Genomics - Results
 
@@ -248,9 +240,9 @@ What are the most promising targetable dependencies in KRAS-mutant pancreatic ca
         report += f"""
 ### Citations
 - **Total citations:** {metrics['citation_count']}
-- **Spot-check sample:** 5 random citations
-- **Valid citations:** {metrics['citation_validity']*5:.0f}/5 (100% target)
-- **Fabricated citations:** {5 - metrics['citation_validity']*5 if metrics['citation_validity'] < 1 else 0}
+- **DOIs checked:** {verification.get('checked', 0)} (all cited DOIs, {verification.get('errors', 0)} unreachable)
+- **Valid citations:** {verification.get('valid', 0)}/{verification.get('checked', 0)} ({spec.target('citation_validity')} target)
+- **Fabricated citations:** {verification.get('invalid', 0)}
 
 ### Key Paper Coverage
 | DOI | Cited by Kosmos |
@@ -266,18 +258,15 @@ What are the most promising targetable dependencies in KRAS-mutant pancreatic ca
 
 | Metric | Target | Actual | Pass/Fail |
 |--------|--------|--------|-----------|
-| Target recall | ≥75% | {metrics['target_recall']:.1%} | {'PASS' if target_recall_pass else 'FAIL'} |
-| Citation count | ≥20 | {metrics['citation_count']} | {'PASS' if citation_count_pass else 'FAIL'} |
-| Citation validity | 100% | {metrics['citation_validity']:.1%} | {'PASS' if citation_validity_pass else 'FAIL'} |
-| Key paper coverage | ≥66% | {metrics['key_paper_coverage']:.1%} | {'PASS' if key_paper_coverage_pass else 'FAIL'} |
+{spec.metrics_table(metrics, actual)}
 
 ## Overall Assessment
-**{overall_assessment}:** {passed_metrics}/4 metrics passing
+**{overall_assessment}:** {assessment['passed']}/{assessment['required']} metrics passing
 
 ## Raw Outputs
 - Kosmos response: `output/task1_results/kosmos_raw_output.json`
 - Metrics: `output/task1_results/metrics.json`
-- Execution log: `logs/task1_execution.log`
+- Execution log: `{self.logger.path}`
 
 ## Notes
 """
@@ -289,8 +278,7 @@ What are the most promising targetable dependencies in KRAS-mutant pancreatic ca
 
         # Save report
         report_file = self.results_dir / "task1_report.md"
-        with open(report_file, "w") as f:
-            f.write(report)
+        write_text(report_file, report)
 
         self.log_execution(f"Report saved to {report_file}")
         print("\n" + report)
@@ -20,6 +20,10 @@ from pathlib import Path
 
 # Import working components from Phase 1
 from edison_wrapper import KosmosClient
+from execution_log import ExecutionLogger
+from artifacts import write_json, write_text
+from citations import extract_citations, unique_ids
+from scoring_engine import load_spec
 
 
 class Phase2Experiment:
@@ -27,6 +31,7 @@ class Phase2Experiment:
 
     def __init__(self, task_name):
         self.task_name = task_name
+        self.logger = ExecutionLogger(self.task_name)
         self.client = KosmosClient()
         self.setup_directories()
 
@@ -42,14 +47,9 @@ class Phase2Experiment:
             f.write(f"{timestamp} - {task_type}: {task_id}\n")
         print(f"Task ID saved: {task_id}")
 
-    def log_execution(self, message, level="INFO"):
-        """Log execution events"""
-        timestamp = datetime.now().isoformat()
-        log_entry = f"{timestamp} [{level}] {message}\n"
-
-        with open(f"logs/{self.task_name}_execution.log", "a") as f:
-            f.write(log_entry)
-
+    def log_execution(self, message, level="INFO", stage=None):
+        """Log execution events (buffered JSONL, see execution_log.py)"""
+        self.logger.log(message, level, stage=stage)
         print(message)
 
     def run_literature_experiment(self, query, ground_truth_file=None):
@@ -59,6 +59,7 @@ class Phase2Experiment:
         try:
             # Submit job
             task_id = self.client.submit_literature(query)
+            self.logger.task_id = task_id
             self.log_execution(f"Task submitted: {task_id}")
             self.save_task_id("LITERATURE", task_id)
 
@@ -74,6 +75,7 @@ class Phase2Experiment:
 
         try:
             task_id = self.client.submit_precedent(query)
+            self.logger.task_id = task_id
             self.log_execution(f"Task submitted: {task_id}")
             self.save_task_id("PRECEDENT", task_id)
 
@@ -94,6 +96,7 @@ class Phase2Experiment:
                     raise FileNotFoundError(f"Data file not found: {file_path}")
 
             task_id = self.client.submit_analysis(query, files=data_files)
+            self.logger.task_id = task_id
             self.log_execution(f"Task submitted with {len(data_files)} files: {task_id}")
             self.save_task_id("ANALYSIS", task_id)
 
@@ -109,6 +112,7 @@ class Phase2Experiment:
 
         try:
             task_id = self.client.submit_molecules(query)
+            self.logger.task_id = task_id
             self.log_execution(f"Task submitted: {task_id}")
             self.save_task_id("MOLECULES", task_id)
 
@@ -120,42 +124,43 @@ class Phase2Experiment:
 
     def monitor_task(self, task_id, timeout_minutes=60):
         """Monitor task completion"""
-        self.log_execution(f"Monitoring task {task_id}")
+        self.logger.task_id = task_id
+        with self.logger.stage_scope("monitor"):
+            self.log_execution(f"Monitoring task {task_id}")
 
-        start_time = time.time()
-        timeout_seconds = timeout_minutes * 60
+            start_time = time.time()
+            timeout_seconds = timeout_minutes * 60
 
-        while time.time() - start_time < timeout_seconds:
-            try:
-                task = self.client.get_task(task_id)
-                self.log_execution(f"Status: {task.status}")
+            while time.time() - start_time < timeout_seconds:
+                try:
+                    task = self.client.get_task(task_id)
+                    self.log_execution(f"Status: {task.status}")
 
-                if task.status in ["completed", "success"]:
-                    self.log_execution("Task completed successfully")
-                    return task
-                elif task.status in ["failed", "cancelled"]:
-                    self.log_execution(f"Task {task.status}", "ERROR")
-                    return task
+                    if task.status in ["completed", "success"]:
+                        self.log_execution("Task completed successfully")
+                        return task
+                    elif task.status in ["failed", "cancelled"]:
+                        self.log_execution(f"Task {task.status}", "ERROR")
+                        return task
 
-                time.sleep(30)  # Wait 30 seconds between checks
+                    time.sleep(30)  # Wait 30 seconds between checks
 
-            except Exception as e:
-                self.log_execution(f"Error checking task status: {e}", "ERROR")
-                time.sleep(30)
+                except Exception as e:
+                    self.log_execution(f"Error checking task status: {e}", "ERROR")
+                    time.sleep(30)
 
-        self.log_execution("Task monitoring timeout", "ERROR")
-        return None
+            self.log_execution("Task monitoring timeout", "ERROR")
+            return None
 
     def save_result(self, task, output_file="kosmos_raw_output.json"):
         """Save task result to JSON file"""
         if task and task.status in ["completed", "success"]:
             output_path = f"output/{output_file}"
-            with open(output_path, "w") as f:
-                if hasattr(task, 'result') and task.result:
-                    json.dump(task.result, f, indent=2)
-                else:
-                    # If result is directly in task
-                    json.dump({"result": str(task)}, f, indent=2)
+            if hasattr(task, 'result') and task.result:
+                write_json(output_path, task.result)
+            else:
+                # If result is directly in task
+                write_json(output_path, {"result": str(task)})
 
             self.log_execution(f"Result saved to {output_path}")
             return True
@@ -167,7 +172,7 @@ class Phase2Experiment:
 def extract_nct_ids(text_or_list):
     """Extract NCT IDs from Kosmos output"""
     if isinstance(text_or_list, str):
-        return re.findall(r'NCT\d{8}', text_or_list, re.IGNORECASE)
+        return unique_ids(extract_citations(text_or_list, schemes=("nct",)), "nct")
     elif isinstance(text_or_list, list):
         # If it's already a list, just return it
         return text_or_list
@@ -227,7 +232,8 @@ def check_outcome_completeness(kosmos_output, ground_truth):
     return has_outcomes
 
 
-def evaluate_results(kosmos_output_file, ground_truth_file):
+def evaluate_results(kosmos_output_file, ground_truth_file,
+                     log_path="logs/task2_immunology_execution.jsonl"):
     """Evaluate Kosmos results against ground truth"""
     print("\n" + "="*60)
     print("EVALUATING TASK 2 RESULTS")
@@ -280,19 +286,19 @@ def evaluate_results(kosmos_output_file, ground_truth_file):
     # Save metrics
     os.makedirs(os.path.dirname(kosmos_output_file), exist_ok=True)
     metrics_path = os.path.join(os.path.dirname(kosmos_output_file), "metrics.json")
-    with open(metrics_path, 'w') as f:
-        json.dump(metrics, f, indent=2)
+    write_json(metrics_path, metrics)
 
     print(f"\nMetrics saved to: {metrics_path}")
 
     # Generate report
-    generate_report(kosmos_output_file, ground_truth_file, metrics)
+    generate_report(kosmos_output_file, ground_truth_file, metrics, log_path)
 
     return metrics
 
 
-def generate_report(kosmos_output_file, ground_truth_file, metrics):
-    """Generate the Task 2 report"""
+def generate_report(kosmos_output_file, ground_truth_file, metrics,
+                    log_path="logs/task2_immunology_execution.jsonl"):
+    """Generate the Task 2 report (``log_path``: the runner's ExecutionLogger.path)"""
     timestamp = datetime.now().isoformat()
 
     # Load data for report
@@ -310,6 +316,12 @@ def generate_report(kosmos_output_file, ground_truth_file, metrics):
     kosmos_text = json.dumps(kosmos_output)
     identified_ncts = extract_nct_ids(kosmos_text)
 
+    # Pass/fail from input/task2_scoring.json
+    spec = load_spec("task2")
+    cited_key_papers = [doi for doi in ground_truth["key_papers"] if doi in kosmos_text]
+    values = {**metrics, "key_paper_coverage": len(cited_key_papers) / len(ground_truth["key_papers"])}
+    assessment = spec.assess(values)
+
     report = f"""# Task 2: Immunology - Results
 
 ## Execution Summary
@@ -353,13 +365,10 @@ Has anyone developed mRNA vaccines targeting solid tumor neoantigens using patie
 
 | Metric | Target | Actual | Pass/Fail |
 |--------|--------|--------|-----------|
-| Trial recall | ≥66% | {metrics['trial_recall']*100:.1f}% | {'PASS' if metrics['trial_recall'] >= 0.66 else 'FAIL'} |
-| Precedent accuracy | 100% | {metrics['precedent_accuracy']*100:.1f}% | {'PASS' if metrics['precedent_accuracy'] else 'FAIL'} |
-| Outcome completeness | True | {metrics['outcome_completeness']} | {'PASS' if metrics['outcome_completeness'] else 'FAIL'} |
-| Key paper coverage | ≥50% | 0% | {'PASS' if False else 'FAIL'} |
+{spec.metrics_table(values)}
 
 ## Overall Assessment
-**{'PASS' if all([metrics['trial_recall'] >= 0.66, metrics['precedent_accuracy'], metrics['outcome_completeness']]) else 'FAIL'}**
+**{'PASS' if assessment['overall_pass'] else 'FAIL'}**
 
 ## Research Gap Identification
 [Research gap analysis based on Kosmos output]
@@ -367,14 +376,13 @@ Has anyone developed mRNA vaccines targeting solid tumor neoantigens using patie
 ## Raw Outputs
 - Kosmos response: `kosmos_raw_output.json`
 - Metrics: `metrics.json`
-- Execution log: `../../logs/task2_execution.log`
+- Execution log: `{log_path}`
 
 ## Notes
 Kosmos identified the following NCT IDs: {', '.join(identified_ncts) if identified_ncts else 'None'}
 """
 
-    with open(report_path, 'w') as f:
-        f.write(report)
+    write_text(report_path, report)
 
     print(f"\nReport generated: {report_path}")
 
@@ -428,7 +436,7 @@ using patient-specific mutation profiles, and what were the clinical trial outco
 
             # Run evaluation
             evaluate_results("output/task2_results/kosmos_raw_output.json",
-                           "input/task2_ground_truth.json")
+                           "input/task2_ground_truth.json", experiment.logger.path)
 
         elif task:
             experiment.log_execution(f"Task ended with status: {task.status}", "ERROR")
@@ -7,11 +7,21 @@ This script calculates evaluation metrics for Task 3 results.
 
 import json
 import os
-import nbformat
-from nbconvert.preprocessors import ExecutePreprocessor
 import pandas as pd
 from pathlib import Path
 
+from answer_document import answer_fields
+from artifacts import write_json
+from de_engine import canonical_in_top, compare_degs, differential_expression
+from execution_cache import ExecutionCache
+from kernel_pool import KernelPool
+from notebook_figures import extract_figures
+from notebook_preflight import preflight
+from passage_index import PassageIndex
+from pathway_enrichment import (DEFAULT_GENE_SETS, GeneSetIndex, over_representation, rank_enrichment,
+                                verify_claims)
+from scoring_engine import load_spec
+
 
 def calculate_gene_recall(identified_degs, ground_truth):
     """% of canonical heat shock genes identified as DEGs"""
@@ -22,27 +32,90 @@ def calculate_gene_recall(identified_degs, ground_truth):
     return recall * 100, list(overlap)
 
 
-def test_notebook_execution(notebook_path):
-    """Can the generated notebook execute without errors?"""
-    if not os.path.exists(notebook_path):
+def calculate_reference_agreement(identified_degs, reference, ground_truth, top_k=50):
+    """Compare DEGs with a reference DE analysis of the input counts (see de_engine.py)
+
+    ``reference`` is the ``differential_expression`` result. Also reports
+    which canonical genes the reference ranks in its top ``top_k``, a check
+    that the data supports the canonical list at all.
+    """
+    comparison = compare_degs(identified_degs or [], reference, top_k=top_k)
+    comparison["canonical_in_reference_top"] = canonical_in_top(
+        comparison["reference_top"], ground_truth["canonical_upregulated_genes"])
+    return comparison
+
+
+def calculate_pathway_support(kosmos_output_file, reference, identified_degs, ground_truth,
+                              gene_sets=DEFAULT_GENE_SETS):
+    """Check the answer's pathway claims against enrichment of the input data
+
+    Gene sets are ranked by the reference moderated t (see
+    pathway_enrichment.py); Kosmos's own DEG list, if any, is also tested for
+    over-representation. Returns None when no local gene set files exist.
+    """
+    try:
+        index = GeneSetIndex.load(gene_sets)
+    except FileNotFoundError:  # missing path, or a directory without gene set files
+        return None
+    enrichment = rank_enrichment(index, reference["t_moderated"])
+    with open(kosmos_output_file) as f:
+        answer, formatted_answer = answer_fields(json.load(f))
+    support = verify_claims(index, formatted_answer or answer, enrichment,
+                            ground_truth.get("expected_pathways"))
+    if identified_degs:
+        degs_enrichment = over_representation(index, identified_degs, universe=reference.index)
+        support["deg_enriched"] = degs_enrichment["name"][degs_enrichment["fdr"] <= 0.05].tolist()
+    return support
+
+
+def test_notebook_execution(notebook_path, kernel_pool=None, cache=True):
+    """Can the generated notebook execute without errors?
+
+    ``notebook_path`` may also be a notebook embedded in the Kosmos output.
+    Pass a ``KernelPool`` to reuse warm kernels across notebooks; otherwise a
+    single kernel is started for this one. Unless ``cache`` is False, a
+    notebook whose cells and input files are unchanged since its last run is
+    not executed again (see execution_cache.py). The notebook is checked
+    statically first (see notebook_preflight.py): it runs on the kernel for
+    its language, and one that cannot run (no kernel for its language, a
+    missing package, a loop that never ends, ...) fails without being
+    executed.
+    """
+    if isinstance(notebook_path, (str, Path)) and not os.path.exists(notebook_path):
         return False, f"Notebook not found: {notebook_path}"
 
     try:
-        with open(notebook_path) as f:
-            nb = nbformat.read(f, as_version=4)
-
-        ep = ExecutePreprocessor(timeout=600, kernel_name='python3')
-        # Execute in the directory containing the notebook
-        nb_dir = os.path.dirname(os.path.abspath(notebook_path))
-        ep.preprocess(nb, {'metadata': {'path': nb_dir}})
-        return True, None
+        report = preflight(notebook_path, cell_timeout=600)
+        if not report.runnable:
+            return False, f"Pre-flight check failed: {report.summary()}"
+
+        # Execute in the directory containing the notebook (the pool's default)
+        if cache:
+            run = ExecutionCache().run(notebook_path, kernel_pool, kernel_name=report.kernel_name,
+                                       cell_timeout=600)
+        elif kernel_pool is None:
+            with KernelPool(size=1, kernel_name=report.kernel_name) as pool:
+                run = pool.run(notebook_path, cell_timeout=600)
+        else:
+            run = kernel_pool.run(notebook_path, kernel_name=report.kernel_name, cell_timeout=600)
+        return run.success, run.error
     except Exception as e:
         return False, str(e)
 
 
-def count_figures(output_dir):
-    """Count generated figures"""
+def count_figures(output_dir, notebook=None):
+    """Count generated figures
+
+    When a notebook is given, figures embedded in its outputs are decoded
+    into ``output_dir/figures`` first (see notebook_figures.py), since Kosmos
+    returns plots inline rather than as files.
+    """
     fig_dir = os.path.join(output_dir, "figures")
+    if notebook is not None:
+        report = extract_figures(notebook, fig_dir)
+        if report["figure_count"]:
+            return report["figure_count"]
+
     if not os.path.exists(fig_dir):
         # Also check for figures in output_dir directly
         if os.path.exists(output_dir):
@@ -64,15 +137,14 @@ def evaluate_hypotheses(hypotheses, ground_truth_mechanisms):
     score = 0
     evaluations = []
 
-    for i, hyp in enumerate(hypotheses, 1):
-        hyp_lower = hyp.lower()
-        matched_mechanism = None
+    # Index the mechanisms once; each hypothesis is a lookup of its terms
+    mechanism_index = PassageIndex(ground_truth_mechanisms)
 
-        for mechanism in ground_truth_mechanisms:
-            if any(word in hyp_lower for word in mechanism.lower().split()):
-                score += 1
-                matched_mechanism = mechanism
-                break
+    for hyp in hypotheses:
+        match = mechanism_index.best_match(hyp, min_terms=1)
+        matched_mechanism = ground_truth_mechanisms[match.passage] if match else None
+        if matched_mechanism:
+            score += 1
 
         evaluations.append({
             "hypothesis": hyp,
@@ -118,8 +190,15 @@ def parse_kosmos_output(output_file):
         return None, None, None, f"Error parsing output: {e}"
 
 
-def evaluate_task3(kosmos_output_file, ground_truth_file, output_dir="output/task3_results"):
-    """Comprehensive evaluation of Task 3 results"""
+def evaluate_task3(kosmos_output_file, ground_truth_file, output_dir="output/task3_results",
+                   kernel_pool=None, counts_file="input/task3_ecoli_heatshock.csv"):
+    """Comprehensive evaluation of Task 3 results
+
+    Sweeps evaluating many outputs should share one ``KernelPool``. When the
+    input ``counts_file`` exists, DEGs are also scored against a reference
+    differential expression analysis of it, and, given local gene set files,
+    the answer's pathway claims against enrichment of that analysis.
+    """
 
     # Load ground truth
     with open(ground_truth_file, 'r') as f:
@@ -143,17 +222,33 @@ def evaluate_task3(kosmos_output_file, ground_truth_file, output_dir="output/tas
         metrics["gene_recall"] = recall
         metrics["overlapping_genes"] = overlap_genes
 
+    # Score against a reference analysis of the data Kosmos was given
+    if counts_file and os.path.exists(counts_file):
+        reference = differential_expression(counts_file)
+        comparison = calculate_reference_agreement(identified_degs, reference, ground_truth)
+        metrics["reference_deg_recall"] = comparison["recall"]
+        metrics["reference_top50_recall"] = comparison["top_recall"] if identified_degs else 0
+        metrics["reference_comparison"] = comparison
+
+        if not parse_error:
+            support = calculate_pathway_support(kosmos_output_file, reference, identified_degs,
+                                                ground_truth)
+            if support is not None:
+                metrics["pathway_claim_precision"] = support["claim_precision"]
+                metrics["expected_pathway_recall"] = support.get("expected_recall")
+                metrics["pathway_support"] = support
+
     # Test notebook execution
     if notebook_path:
-        success, error = test_notebook_execution(notebook_path)
+        success, error = test_notebook_execution(notebook_path, kernel_pool)
         metrics["code_execution"] = success
         if not success:
             metrics["notebook_error"] = error
     else:
         metrics["notebook_error"] = "No notebook found in output"
 
-    # Count figures
-    metrics["figure_count"] = count_figures(output_dir)
+    # Count figures (embedded notebook outputs first, then files on disk)
+    metrics["figure_count"] = count_figures(output_dir, notebook=kosmos_output_file)
 
     # Evaluate hypotheses
     if hypotheses:
@@ -165,20 +260,11 @@ def evaluate_task3(kosmos_output_file, ground_truth_file, output_dir="output/tas
         metrics["hypothesis_error"] = "No hypotheses found in output"
         metrics["num_hypotheses"] = 0
 
-    # Determine pass/fail for each metric
-    metrics["gene_recall_pass"] = metrics["gene_recall"] >= 66
-    metrics["code_execution_pass"] = metrics["code_execution"] is True
-    metrics["figure_count_pass"] = metrics["figure_count"] >= 2
-    metrics["hypothesis_quality_pass"] = metrics["hypothesis_quality"] >= 50
-
-    # Overall pass if at least 3/4 metrics pass
-    passing_metrics = sum([
-        metrics["gene_recall_pass"],
-        metrics["code_execution_pass"],
-        metrics["figure_count_pass"],
-        metrics["hypothesis_quality_pass"]
-    ])
-    metrics["overall_pass"] = passing_metrics >= 3
+    # Determine pass/fail for each metric and overall (input/task3_scoring.json)
+    assessment = load_spec("task3").assess(metrics)
+    for name, passed in assessment["passes"].items():
+        metrics[f"{name}_pass"] = passed
+    metrics["overall_pass"] = assessment["overall_pass"]
 
     return metrics
 
@@ -193,15 +279,14 @@ def main():
     metrics = evaluate_task3(kosmos_output, ground_truth)
 
     # Save metrics
-    with open("output/task3_results/metrics.json", "w") as f:
-        json.dump(metrics, f, indent=2)
+    write_json("output/task3_results/metrics.json", metrics)
 
     # Print summary
     print("\n=== Task 3 Evaluation Results ===")
-    print(f"Gene Recall: {metrics['gene_recall']:.1f}% (Target: ≥66%) - {'PASS' if metrics['gene_recall_pass'] else 'FAIL'}")
-    print(f"Code Execution: {metrics['code_execution']} (Target: True) - {'PASS' if metrics['code_execution_pass'] else 'FAIL'}")
-    print(f"Figure Count: {metrics['figure_count']} (Target: ≥2) - {'PASS' if metrics['figure_count_pass'] else 'FAIL'}")
-    print(f"Hypothesis Quality: {metrics['hypothesis_quality']:.1f}% (Target: ≥50%) - {'PASS' if metrics['hypothesis_quality_pass'] else 'FAIL'}")
+    spec = load_spec("task3")
+    for name in ("gene_recall", "code_execution", "figure_count", "hypothesis_quality"):
+        print(f"{spec.metrics[name].label}: {spec.format(name, metrics[name])} "
+              f"(Target: {spec.target(name)}) - {'PASS' if metrics[f'{name}_pass'] else 'FAIL'}")
     print(f"\nOverall: {'PASS' if metrics['overall_pass'] else 'FAIL'}")
 
     if metrics.get("parse_error"):
@@ -9,13 +9,16 @@ as specified in tasks/task3_systems_bio.md
 import os
 import json
 import time
-import pandas as pd
-import numpy as np
 from datetime import datetime
 from pathlib import Path
 
 # Import working components from Phase 1
 from edison_wrapper import KosmosClient
+from execution_log import ExecutionLogger
+from artifacts import write_json, write_text
+from de_engine import canonical_in_top, compare_degs, differential_expression
+from rnaseq_simulator import CountSimulator
+from scoring_engine import load_spec
 
 
 class Task3SystemBiology:
@@ -23,6 +26,7 @@ class Task3SystemBiology:
 
     def __init__(self):
         self.task_name = "task3_systems_biology"
+        self.logger = ExecutionLogger(self.task_name)
         self.client = KosmosClient()
         self.setup_directories()
         self.start_time = datetime.now()
@@ -32,49 +36,30 @@ class Task3SystemBiology:
         for dir_name in ["output/task3_results", "input", "logs"]:
             Path(dir_name).mkdir(parents=True, exist_ok=True)
 
-    def log_execution(self, message, level="INFO"):
-        """Log execution events"""
-        timestamp = datetime.now().isoformat()
-        log_entry = f"{timestamp} [{level}] {message}\n"
-
-        with open(f"logs/{self.task_name}_execution.log", "a") as f:
-            f.write(log_entry)
-
+    def log_execution(self, message, level="INFO", stage=None):
+        """Log execution events (buffered JSONL, see execution_log.py)"""
+        self.logger.log(message, level, stage=stage)
         print(f"[{level}] {message}")
 
-    def generate_test_data(self):
-        """Generate simulated E. coli heat shock RNA-seq data"""
+    def generate_test_data(self, n_genes=500, groups=None, output_path="input/task3_ecoli_heatshock.csv"):
+        """Generate simulated E. coli heat shock RNA-seq data (negative binomial, see rnaseq_simulator.py)"""
         self.log_execution("Generating simulated E. coli heat shock data")
 
-        # Canonical heat shock genes with high fold-changes
+        # Canonical heat shock genes with high fold-changes; housekeeping genes stay stable
         heat_shock_genes = ["dnaK", "dnaJ", "groEL", "groES", "htpG", "clpB", "ibpA", "ibpB"]
-        housekeeping = ["rrsA", "gyrA", "recA"]  # Stable expression
-
-        # Generate mock counts
-        np.random.seed(42)
-        n_genes = 500
-        samples = ["control_1", "control_2", "heat_1", "heat_2", "heat_3"]
-
-        # Simulate data where heat shock genes are upregulated
-        data = {}
-        for gene in (heat_shock_genes + housekeeping + [f"gene_{i}" for i in range(n_genes - len(heat_shock_genes) - len(housekeeping))]):
-            if gene in heat_shock_genes:
-                # High expression in heat samples
-                base_counts = np.random.randint(80, 150, 2)  # Control
-                heat_counts = list(np.random.randint(800, 1200, 3))  # Heat shock
-                data[gene] = list(base_counts) + heat_counts
-            elif gene in housekeeping:
-                # Stable across conditions
-                data[gene] = list(np.random.randint(400, 600, 5))
-            else:
-                # Random low expression
-                data[gene] = list(np.random.randint(10, 300, 5))
-
-        df = pd.DataFrame(data, index=samples).T
-        output_path = "input/task3_ecoli_heatshock.csv"
-        df.to_csv(output_path)
-
-        self.log_execution(f"Generated test data: {output_path} ({df.shape[0]} genes × {df.shape[1]} samples)")
+        housekeeping = ["rrsA", "gyrA", "recA"]
+
+        simulator = CountSimulator(
+            n_genes=n_genes,
+            groups=groups or {"control": 2, "heat": 3},
+            de_genes={gene: 3.2 for gene in heat_shock_genes},
+            baseline={**{gene: 115 for gene in heat_shock_genes}, **{gene: 500 for gene in housekeeping}},
+            mean_log=4.6, sd_log=0.8, library_size_sd=0.1,
+            seed=42)
+        simulator.write(output_path)
+
+        n_genes, n_samples = simulator.shape
+        self.log_execution(f"Generated test data: {output_path} ({n_genes} genes × {n_samples} samples)")
         return output_path
 
     def create_ground_truth(self):
@@ -101,8 +86,7 @@ class Task3SystemBiology:
         }
 
         output_path = "input/task3_ground_truth.json"
-        with open(output_path, "w") as f:
-            json.dump(ground_truth, f, indent=2)
+        write_json(output_path, ground_truth, manifest=False)
 
         self.log_execution(f"Created ground truth file: {output_path}")
         return output_path
@@ -118,12 +102,14 @@ class Task3SystemBiology:
 
         try:
             task_id = self.client.submit_analysis(query, files=[data_file])
+            self.logger.task_id = task_id
             self.log_execution(f"Task submitted successfully: {task_id}")
 
             # Save task ID
-            with open("output/task3_results/task_id.txt", "w") as f:
-                f.write(f"{task_id}\n")
-                f.write(f"Submitted: {datetime.now().isoformat()}\n")
+            write_text(
+                "output/task3_results/task_id.txt",
+                f"{task_id}\nSubmitted: {datetime.now().isoformat()}\n"
+            )
 
             return task_id
 
@@ -133,31 +119,33 @@ class Task3SystemBiology:
 
     def monitor_task(self, task_id, timeout_minutes=60):
         """Monitor task completion"""
-        self.log_execution(f"Monitoring task {task_id} (timeout: {timeout_minutes} min)")
+        self.logger.task_id = task_id
+        with self.logger.stage_scope("monitor"):
+            self.log_execution(f"Monitoring task {task_id} (timeout: {timeout_minutes} min)")
 
-        start_time = time.time()
-        timeout_seconds = timeout_minutes * 60
+            start_time = time.time()
+            timeout_seconds = timeout_minutes * 60
 
-        while time.time() - start_time < timeout_seconds:
-            try:
-                task = self.client.get_task(task_id)
-                self.log_execution(f"Status: {task.status}")
+            while time.time() - start_time < timeout_seconds:
+                try:
+                    task = self.client.get_task(task_id)
+                    self.log_execution(f"Status: {task.status}")
 
-                if task.status == "completed":
-                    self.log_execution("✓ Task completed successfully")
-                    return task
-                elif task.status in ["failed", "cancelled"]:
-                    self.log_execution(f"✗ Task {task.status}", "ERROR")
-                    return task
+                    if task.status == "completed":
+                        self.log_execution("✓ Task completed successfully")
+                        return task
+                    elif task.status in ["failed", "cancelled"]:
+                        self.log_execution(f"✗ Task {task.status}", "ERROR")
+                        return task
 
-                time.sleep(30)  # Wait 30 seconds between checks
+                    time.sleep(30)  # Wait 30 seconds between checks
 
-            except Exception as e:
-                self.log_execution(f"Error checking task status: {e}", "ERROR")
-                time.sleep(30)
+                except Exception as e:
+                    self.log_execution(f"Error checking task status: {e}", "ERROR")
+                    time.sleep(30)
 
-        self.log_execution("Task monitoring timeout", "ERROR")
-        return None
+            self.log_execution("Task monitoring timeout", "ERROR")
+            return None
 
     def save_kosmos_results(self, task):
         """Save Kosmos output"""
@@ -166,11 +154,10 @@ class Task3SystemBiology:
 
             # Save raw output
             output_path = "output/task3_results/kosmos_raw_output.json"
-            with open(output_path, "w") as f:
-                if hasattr(task, 'result') and task.result:
-                    json.dump(task.result, f, indent=2)
-                else:
-                    json.dump({"result": str(task), "status": task.status}, f, indent=2)
+            if hasattr(task, 'result') and task.result:
+                write_json(output_path, task.result)
+            else:
+                write_json(output_path, {"result": str(task), "status": task.status})
 
             self.log_execution(f"Results saved to {output_path}")
             return True
@@ -178,7 +165,8 @@ class Task3SystemBiology:
             self.log_execution("No results to save (task not completed)", "ERROR")
             return False
 
-    def calculate_metrics(self, kosmos_output, ground_truth_path):
+    def calculate_metrics(self, kosmos_output, ground_truth_path,
+                          counts_path="input/task3_ecoli_heatshock.csv"):
         """Calculate evaluation metrics"""
         self.log_execution("Calculating evaluation metrics")
 
@@ -194,9 +182,17 @@ class Task3SystemBiology:
             "hypothesis_quality": 0
         }
 
-        # Extract DEGs from Kosmos output (this would need custom parsing based on actual output format)
-        # For now, using placeholder
-        identified_degs = []  # Extract from kosmos_output
+        # Extract DEGs from Kosmos output (structured outputs only)
+        identified_degs = []
+        if isinstance(kosmos_output, dict):
+            identified_degs = kosmos_output.get("differentially_expressed_genes") or []
+
+        # Reference DE analysis of the input counts (see de_engine.py)
+        reference = compare_degs(identified_degs, differential_expression(counts_path))
+        metrics["reference_degs"] = reference["reference_degs"]
+        metrics["reference_deg_recall"] = reference["recall"]
+        metrics["canonical_in_top50"] = canonical_in_top(reference["reference_top"],
+                                                         ground_truth["canonical_upregulated_genes"])
 
         # Calculate gene recall
         identified_set = set([g.lower() for g in identified_degs])
@@ -224,8 +220,7 @@ class Task3SystemBiology:
 
         # Save metrics
         metrics_path = "output/task3_results/metrics.json"
-        with open(metrics_path, "w") as f:
-            json.dump(metrics, f, indent=2)
+        write_json(metrics_path, metrics)
 
         self.log_execution(f"Metrics saved: {metrics}")
         return metrics
@@ -236,6 +231,7 @@ class Task3SystemBiology:
 
         end_time = datetime.now()
         duration = (end_time - self.start_time).total_seconds() / 60  # minutes
+        spec = load_spec("task3")
 
         report = f"""# Task 3: Systems Biology - Results
 
@@ -259,7 +255,7 @@ Analyze this E. coli RNA-seq dataset from a heat shock experiment. Identify diff
 **Gene Recall:** {metrics['gene_recall']:.1f}%
 
 **Genes Identified:** To be extracted from Kosmos output
-**Canonical genes in top 50:** To be determined
+**Canonical genes in top 50 (reference DE analysis):** {len(metrics.get('canonical_in_top50', []))} ({', '.join(metrics.get('canonical_in_top50', [])) or 'none'})
 
 ### Generated Hypotheses
 To be extracted from Kosmos output
@@ -271,7 +267,7 @@ To be extracted from Kosmos output
 - **Executed successfully:** {metrics['code_execution']}
 
 ### Figures Generated
-- **Count:** {metrics['figure_count']} (target: ≥2)
+- **Count:** {metrics['figure_count']} (target: {spec.target('figure_count')})
 - **Types:**
   - [ ] Heatmap
   - [ ] Volcano plot
@@ -282,13 +278,10 @@ To be extracted from Kosmos output
 
 | Metric | Target | Actual | Pass/Fail |
 |--------|--------|--------|-----------|
-| Gene recall | ≥66% | {metrics['gene_recall']:.1f}% | {'PASS' if metrics['gene_recall'] >= 66 else 'FAIL'} |
-| Code execution | True | {metrics['code_execution']} | {'PASS' if metrics['code_execution'] else 'FAIL'} |
-| Figure count | ≥2 | {metrics['figure_count']} | {'PASS' if metrics['figure_count'] >= 2 else 'FAIL'} |
-| Hypothesis quality | ≥50% | {metrics['hypothesis_quality']:.1f}% | {'PASS' if metrics['hypothesis_quality'] >= 50 else 'FAIL'} |
+{spec.metrics_table(metrics)}
 
 ## Overall Assessment
-**{'PASS' if sum([metrics['gene_recall'] >= 66, metrics['code_execution'], metrics['figure_count'] >= 2, metrics['hypothesis_quality'] >= 50]) >= 3 else 'FAIL'}**
+**{'PASS' if spec.assess(metrics)['overall_pass'] else 'FAIL'}**
 
 ## Qualitative Observations
 To be completed after reviewing Kosmos output
@@ -298,7 +291,7 @@ To be completed after reviewing Kosmos output
 - Analysis notebook: To be extracted
 - Figures: `figures/*.png` (to be extracted)
 - Metrics: `metrics.json`
-- Execution log: `../logs/task3_execution.log`
+- Execution log: `{self.logger.path}`
 
 ## Notes
 Simulated data generated with known heat shock response genes for validation.
@@ -306,8 +299,7 @@ Simulated data generated with known heat shock response genes for validation.
 
         # Save report
         report_path = "output/task3_results/task3_report.md"
-        with open(report_path, "w") as f:
-            f.write(report)
+        write_text(report_path, report)
 
         self.log_execution(f"Report generated: {report_path}")
         return report_path
@@ -7,7 +7,6 @@ with the file upload issue addressed.
 """
 
 import os
-import json
 import time
 import pandas as pd
 import numpy as np
@@ -16,6 +15,8 @@ from pathlib import Path
 
 # Import working components from Phase 1
 from edison_wrapper import KosmosClient
+from execution_log import ExecutionLogger
+from artifacts import write_json, write_text
 
 
 class Task3FixedSystemBiology:
@@ -23,6 +24,7 @@ class Task3FixedSystemBiology:
 
     def __init__(self):
         self.task_name = "task3_systems_biology_fixed"
+        self.logger = ExecutionLogger(self.task_name)
         self.client = KosmosClient()
         self.setup_directories()
         self.start_time = datetime.now()
@@ -32,14 +34,9 @@ class Task3FixedSystemBiology:
         for dir_name in ["output/task3_results", "input", "logs"]:
             Path(dir_name).mkdir(parents=True, exist_ok=True)
 
-    def log_execution(self, message, level="INFO"):
-        """Log execution events"""
-        timestamp = datetime.now().isoformat()
-        log_entry = f"{timestamp} [{level}] {message}\n"
-
-        with open(f"logs/{self.task_name}_execution.log", "a") as f:
-            f.write(log_entry)
-
+    def log_execution(self, message, level="INFO", stage=None):
+        """Log execution events (buffered JSONL, see execution_log.py)"""
+        self.logger.log(message, level, stage=stage)
         print(f"[{level}] {message}")
 
     def generate_inline_data(self):
@@ -133,13 +130,14 @@ Export the results including:
 
         try:
             task_id = self.client.submit_analysis(query)
+            self.logger.task_id = task_id
             self.log_execution(f"Task submitted successfully: {task_id}")
 
             # Save task ID and query
-            with open("output/task3_results/task_id_fixed.txt", "w") as f:
-                f.write(f"{task_id}\n")
-                f.write(f"Submitted: {datetime.now().isoformat()}\n")
-                f.write(f"\nQuery:\n{query}\n")
+            write_text(
+                "output/task3_results/task_id_fixed.txt",
+                f"{task_id}\nSubmitted: {datetime.now().isoformat()}\n\nQuery:\n{query}\n"
+            )
 
             return task_id
 
@@ -149,31 +147,33 @@ Export the results including:
 
     def monitor_task(self, task_id, timeout_minutes=60):
         """Monitor task completion"""
-        self.log_execution(f"Monitoring task {task_id} (timeout: {timeout_minutes} min)")
+        self.logger.task_id = task_id
+        with self.logger.stage_scope("monitor"):
+            self.log_execution(f"Monitoring task {task_id} (timeout: {timeout_minutes} min)")
 
-        start_time = time.time()
-        timeout_seconds = timeout_minutes * 60
+            start_time = time.time()
+            timeout_seconds = timeout_minutes * 60
 
-        while time.time() - start_time < timeout_seconds:
-            try:
-                task = client.get_task(task_id)
-                self.log_execution(f"Status: {task.status}")
+            while time.time() - start_time < timeout_seconds:
+                try:
+                    task = client.get_task(task_id)
+                    self.log_execution(f"Status: {task.status}")
 
-                if task.status == "completed" or task.status == "success":
-                    self.log_execution("✓ Task completed successfully")
-                    return task
-                elif task.status in ["failed", "cancelled", "fail"]:
-                    self.log_execution(f"✗ Task {task.status}", "ERROR")
-                    return task
+                    if task.status == "completed" or task.status == "success":
+                        self.log_execution("✓ Task completed successfully")
+                        return task
+                    elif task.status in ["failed", "cancelled", "fail"]:
+                        self.log_execution(f"✗ Task {task.status}", "ERROR")
+                        return task
 
-                time.sleep(30)  # Wait 30 seconds between checks
+                    time.sleep(30)  # Wait 30 seconds between checks
 
-            except Exception as e:
-                self.log_execution(f"Error checking task status: {e}", "ERROR")
-                time.sleep(30)
+                except Exception as e:
+                    self.log_execution(f"Error checking task status: {e}", "ERROR")
+                    time.sleep(30)
 
-        self.log_execution("Task monitoring timeout", "ERROR")
-        return None
+            self.log_execution("Task monitoring timeout", "ERROR")
+            return None
 
     def save_kosmos_results(self, task):
         """Save Kosmos output"""
@@ -182,17 +182,16 @@ Export the results including:
 
             # Save raw output
             output_path = "output/task3_results/kosmos_raw_output_fixed.json"
-            with open(output_path, "w") as f:
-                task_dict = {
-                    "task_id": str(task.task_id),
-                    "status": task.status,
-                    "query": task.query,
-                    "answer": task.answer if hasattr(task, 'answer') else None,
-                    "notebook": task.notebook if hasattr(task, 'notebook') else None,
-                    "created_at": str(task.created_at),
-                    "job_name": task.job_name
-                }
-                json.dump(task_dict, f, indent=2, default=str)
+            task_dict = {
+                "task_id": str(task.task_id),
+                "status": task.status,
+                "query": task.query,
+                "answer": task.answer if hasattr(task, 'answer') else None,
+                "notebook": task.notebook if hasattr(task, 'notebook') else None,
+                "created_at": str(task.created_at),
+                "job_name": task.job_name
+            }
+            write_json(output_path, task_dict, default=str)
 
             self.log_execution(f"Results saved to {output_path}")
             return True
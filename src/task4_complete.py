@@ -13,6 +13,7 @@ from pathlib import Path
 sys.path.append(str(Path(__file__).parent))
 
 from edison_wrapper import KosmosClient
+from scoring_engine import load_spec
 
 def run_complete_workflow():
     """Run the complete Task 4 workflow"""
@@ -148,13 +149,8 @@ def run_complete_workflow():
     print("- metrics.json: Evaluation metrics")
     print("- task4_report.md: Final report")
 
-    # Determine overall success
-    success = all([
-        metrics['chemical_validity_pct'] >= 100,
-        metrics['admet_completeness_pct'] >= 100,
-        metrics['property_improvement_pct'] >= 66,
-        metrics['synthesis_provided_pct'] >= 100
-    ])
+    # Determine overall success (thresholds in input/task4_scoring.json)
+    success = load_spec("task4").assess(metrics)["overall_pass"]
 
     print(f"\nOverall Result: {'✅ PASS' if success else '❌ FAIL'}")
 
@@ -10,22 +10,32 @@ import sys
 from datetime import datetime
 from pathlib import Path
 
-# Try to import RDKit for SMILES validation and QED calculation
-try:
-    from rdkit import Chem
-    from rdkit.Chem import QED, Descriptors, Lipinski
-    RDKIT_AVAILABLE = True
+from artifacts import write_json
+from answer_document import load_document
+from smiles_scanner import find_smiles_candidates
+# RDKit is optional - descriptors come from the persistent molecule cache
+from molecule_cache import RDKIT_AVAILABLE, MoleculeCache
+from fingerprint_index import FingerprintIndex, read_smiles_file
+from scoring_engine import load_spec
+
+if RDKIT_AVAILABLE:
     print("✅ RDKit is available for chemical analysis")
-except ImportError:
-    RDKIT_AVAILABLE = False
+else:
     print("⚠️ RDKit not available - using basic validation only")
 
+# Each SMILES string is parsed once, across runs
+molecule_cache = MoleculeCache(Path("cache/molecule_descriptors.json"))
+
 # Load ground truth
 with open("input/task4_ground_truth.json", "r") as f:
     ground_truth = json.load(f)
 
 baseline = ground_truth["nirmatrelvir"]
 
+# Optional local reference library (SMILES [ID] per line) for novelty checks
+REFERENCE_LIBRARY = Path("input/task4_reference_library.smi")
+REFERENCE_INDEX = Path("cache/task4_reference_library.npz")
+
 
 def validate_smiles(smiles_str):
     """Check if SMILES string is chemically valid."""
@@ -33,74 +43,31 @@ def validate_smiles(smiles_str):
         # Basic check for non-empty string
         return bool(smiles_str and len(smiles_str) > 5)
 
-    try:
-        mol = Chem.MolFromSmiles(smiles_str)
-        return mol is not None
-    except:
-        return False
+    return molecule_cache.is_valid(smiles_str)
 
 
 def calculate_qed(smiles_str):
     """Calculate QED score if RDKit available."""
-    if not RDKIT_AVAILABLE:
-        return None
-
-    try:
-        mol = Chem.MolFromSmiles(smiles_str)
-        if mol:
-            return QED.qed(mol)
-    except:
-        pass
-    return None
+    props = molecule_cache.descriptors(smiles_str)
+    return props["qed"] if props and props["valid"] else None
 
 
 def count_lipinski_violations(smiles_str):
     """Count Lipinski rule violations if RDKit available."""
-    if not RDKIT_AVAILABLE:
-        return None
-
-    try:
-        mol = Chem.MolFromSmiles(smiles_str)
-        if mol:
-            # Calculate Lipinski parameters
-            mw = Descriptors.MolWt(mol)
-            logp = Descriptors.MolLogP(mol)
-            hbd = Lipinski.NumHDonors(mol)
-            hba = Lipinski.NumHAcceptors(mol)
-
-            violations = 0
-            if mw > 500: violations += 1
-            if logp > 5: violations += 1
-            if hbd > 5: violations += 1
-            if hba > 10: violations += 1
-
-            return violations
-    except:
-        pass
-    return None
+    props = molecule_cache.descriptors(smiles_str)
+    return props["lipinski_violations"] if props and props["valid"] else None
 
 
 def extract_properties_from_text(text, molecule_name="Molecule"):
     """Extract properties from text response."""
     properties = {}
 
-    # Extract SMILES (look for patterns like "SMILES: ..." or "CC(C)...")
-    smiles_patterns = [
-        r"SMILES:\s*([^\s\n]+)",
-        r"smiles[:\s]*([^\s\n]+)",
-        r"([A-Za-z0-9@+\-\[\]\(\)\\\/%=#$]+)\s*\n",
-    ]
-
-    for pattern in smiles_patterns:
-        matches = re.findall(pattern, text)
-        if matches:
-            # Validate each potential SMILES
-            for match in matches:
-                if validate_smiles(match):
-                    properties["smiles"] = match
-                    break
-            if "smiles" in properties:
-                break
+    # Extract SMILES: lexically plausible candidates only, most explicit first
+    # (<smiles> tags, "SMILES:" labels, code spans, tables, bare text)
+    for candidate in find_smiles_candidates(text):
+        if validate_smiles(candidate.smiles):
+            properties["smiles"] = candidate.smiles
+            break
 
     # Extract numerical properties
     # Solubility (μg/mL)
@@ -216,6 +183,87 @@ def verify_admet_completeness(molecule):
     return has_required, has_optional
 
 
+def load_reference_index():
+    """Fingerprint index of the local reference library, rebuilt when the library changes."""
+    if not REFERENCE_LIBRARY.exists():
+        return None
+    if REFERENCE_INDEX.exists() and REFERENCE_INDEX.stat().st_mtime >= REFERENCE_LIBRARY.stat().st_mtime:
+        return FingerprintIndex.load(REFERENCE_INDEX)
+
+    smiles, ids = read_smiles_file(REFERENCE_LIBRARY)
+    index = FingerprintIndex.from_smiles(smiles, ids, processes=None)
+    REFERENCE_INDEX.parent.mkdir(parents=True, exist_ok=True)
+    index.save(REFERENCE_INDEX)
+    return index
+
+
+def score_similarity(molecules):
+    """Tanimoto similarity of each design to nirmatrelvir and its nearest reference compounds."""
+    designed = [mol["smiles"] for mol in molecules]
+    baseline_index = FingerprintIndex.from_smiles([baseline["smiles"]], ids=["nirmatrelvir"])
+    for mol, hits in zip(molecules, baseline_index.search(designed, k=1)):
+        if hits:
+            mol["tanimoto_to_baseline"] = hits[0].similarity
+
+    reference_index = load_reference_index()
+    if reference_index is not None:
+        for mol, hits in zip(molecules, reference_index.search(designed, k=5)):
+            mol["nearest_references"] = [
+                {"id": hit.id, "smiles": hit.smiles, "tanimoto": hit.similarity} for hit in hits
+            ]
+
+
+MAX_MOLECULES = 3  # the MOLECULES query asks for three designs
+
+
+def raw_result_text(kosmos_results):
+    """Fallback text to split when the answer has no headed molecule sections."""
+    if isinstance(kosmos_results, dict):
+        if "result" in kosmos_results:
+            return str(kosmos_results["result"])
+        if "molecules" in kosmos_results:
+            return json.dumps(kosmos_results["molecules"])
+        return json.dumps(kosmos_results)
+    return str(kosmos_results)
+
+
+def molecule_sections(doc, kosmos_results):
+    """Text of the first MAX_MOLECULES designed molecules in a Kosmos output."""
+    return split_molecule_sections(doc, raw_result_text(kosmos_results))[:MAX_MOLECULES]
+
+
+def split_molecule_sections(doc, result_text):
+    """Text of each designed molecule, in answer order."""
+    # Prefer the headed sections of the parsed answer
+    # ("Designed Molecule 1", "Molecule A", "Design 2", ...)
+    molecule_sections = [
+        doc.text[section["start"]:section["end"]]
+        for section in doc.sections_matching(r"^(?:Designed\s+)?(?:Molecule\s+(?:\d+|[A-C])|Design\s+\d+)\b")
+    ]
+
+    # Otherwise split the raw text by molecule indicators
+    patterns = [
+        r"Molecule\s+\d+[:\n]",
+        r"Molecule\s+[A-C][:\n]",
+        r"Design\s+\d+[:\n]",
+        r"\d+\.\s*[A-Za-z]",
+    ]
+
+    for pattern in patterns:
+        if molecule_sections:
+            break
+        matches = list(re.finditer(pattern, result_text, re.IGNORECASE))
+        for i, match in enumerate(matches):
+            start = match.start()
+            end = matches[i + 1].start() if i + 1 < len(matches) else len(result_text)
+            molecule_sections.append(result_text[start:end])
+
+    # If no clear sections, treat whole response as one molecule
+    if not molecule_sections:
+        molecule_sections = [result_text]
+    return molecule_sections
+
+
 def main():
     """Main evaluation function."""
     print("\n" + "="*60)
@@ -240,43 +288,11 @@ def main():
     # Parse molecules from results
     molecules = []
 
-    # Try different result formats
-    if isinstance(kosmos_results, dict):
-        if "result" in kosmos_results:
-            result_text = str(kosmos_results["result"])
-        elif "molecules" in kosmos_results:
-            result_text = json.dumps(kosmos_results["molecules"])
-        else:
-            result_text = json.dumps(kosmos_results)
-    else:
-        result_text = str(kosmos_results)
-
-    # Split into individual molecules (look for numbered items or "Molecule" labels)
-    molecule_sections = []
-
-    # Try to split by molecule indicators
-    patterns = [
-        r"Molecule\s+\d+[:\n]",
-        r"Molecule\s+[A-C][:\n]",
-        r"Design\s+\d+[:\n]",
-        r"\d+\.\s*[A-Za-z]",
-    ]
-
-    for pattern in patterns:
-        matches = list(re.finditer(pattern, result_text, re.IGNORECASE))
-        if matches:
-            for i, match in enumerate(matches):
-                start = match.start()
-                end = matches[i + 1].start() if i + 1 < len(matches) else len(result_text)
-                molecule_sections.append(result_text[start:end])
-            break
-
-    # If no clear sections, treat whole response as one molecule
-    if not molecule_sections:
-        molecule_sections = [result_text]
+    # Split into individual molecules
+    doc = load_document(results_file)
 
     # Parse each molecule
-    for i, section in enumerate(molecule_sections[:3]):  # Max 3 molecules
+    for i, section in enumerate(molecule_sections(doc, kosmos_results)):
         print(f"\nParsing Molecule {i+1}...")
         mol_props = extract_properties_from_text(section, f"Molecule {i+1}")
 
@@ -291,6 +307,8 @@ def main():
                 if lipinski_violations is not None:
                     mol_props["lipinski_violations"] = lipinski_violations
 
+                mol_props["descriptors"] = molecule_cache.descriptors(mol_props["smiles"])
+
             # Count synthesis steps
             mol_props["synthesis_steps"] = count_synthesis_steps(section)
 
@@ -322,6 +340,11 @@ def main():
     with_improvements = sum(1 for mol in molecules if mol.get("total_improvements", 0) >= 1)
     with_synthesis = sum(1 for mol in molecules if mol.get("synthesis_steps", 0) > 0)
 
+    # Similarity / novelty versus the baseline (and reference library, if any)
+    if RDKIT_AVAILABLE and molecules:
+        score_similarity(molecules)
+    baseline_similarities = [mol["tanimoto_to_baseline"] for mol in molecules if "tanimoto_to_baseline" in mol]
+
     metrics = {
         "chemical_validity_pct": (valid_smiles / total_molecules) * 100,
         "admet_completeness_pct": (complete_admet / total_molecules) * 100,
@@ -332,20 +355,21 @@ def main():
         "molecules_with_improvements": with_improvements,
         "molecules_with_synthesis": with_synthesis,
         "total_molecules": total_molecules,
+        "mean_tanimoto_to_baseline": (sum(baseline_similarities) / len(baseline_similarities)
+                                      if baseline_similarities else None),
         "evaluation_timestamp": datetime.now().isoformat()
     }
 
     # Save metrics
     metrics_file = Path("output/task4_results/metrics.json")
-    with open(metrics_file, "w") as f:
-        json.dump(metrics, f, indent=2)
+    write_json(metrics_file, metrics)
 
     print(f"\n✅ Metrics saved to: {metrics_file}")
 
     # Save parsed molecules
     molecules_file = Path("output/task4_results/parsed_molecules.json")
-    with open(molecules_file, "w") as f:
-        json.dump(molecules, f, indent=2)
+    write_json(molecules_file, molecules)
+    molecule_cache.save()
 
     print(f"✅ Parsed molecules saved to: {molecules_file}")
 
@@ -373,6 +397,8 @@ def main():
         print(f"  - CYP3A4 inhibitor: {mol.get('cyp3a4_inhibitor', 'N/A')}")
         print(f"  - Improvements: {mol.get('total_improvements', 0)}/4")
         print(f"  - Synthesis steps: {mol.get('synthesis_steps', 0)}")
+        if "tanimoto_to_baseline" in mol:
+            print(f"  - Tanimoto to nirmatrelvir: {mol['tanimoto_to_baseline']:.2f}")
 
     print(f"\nMetrics:")
     print(f"  - Chemical validity: {metrics['chemical_validity_pct']:.1f}% ({metrics['valid_molecules']}/{metrics['total_molecules']})")
@@ -380,25 +406,20 @@ def main():
     print(f"  - Property improvement: {metrics['property_improvement_pct']:.1f}% ({metrics['molecules_with_improvements']}/{metrics['total_molecules']})")
     print(f"  - Synthesis provided: {metrics['synthesis_provided_pct']:.1f}% ({metrics['molecules_with_synthesis']}/{metrics['total_molecules']})")
 
-    # Determine pass/fail
-    passes = [
-        metrics['chemical_validity_pct'] >= 100,
-        metrics['admet_completeness_pct'] >= 100,
-        metrics['property_improvement_pct'] >= 66,
-        metrics['synthesis_provided_pct'] >= 100
-    ]
-
-    overall_pass = all(passes)
+    # Determine pass/fail (thresholds in input/task4_scoring.json)
+    spec = load_spec("task4")
+    assessment = spec.assess(metrics)
+    overall_pass = assessment["overall_pass"]
     print(f"\nOverall Assessment: {'✅ PASS' if overall_pass else '❌ FAIL'}")
 
     if overall_pass:
         print("All targets met!")
     else:
         print("Targets not met:")
-        if not passes[0]: print("  - Chemical validity < 100%")
-        if not passes[1]: print("  - ADMET completeness < 100%")
-        if not passes[2]: print("  - Property improvement < 66%")
-        if not passes[3]: print("  - Synthesis provided < 100%")
+        for name, passed in assessment["passes"].items():
+            if not passed:
+                print(f"  - {spec.metrics[name].label}: {spec.format(name, metrics[name])} "
+                      f"(target {spec.target(name)})")
 
     return metrics, molecules
 
@@ -7,6 +7,9 @@ import json
 from datetime import datetime
 from pathlib import Path
 
+from artifacts import write_text
+from scoring_engine import load_spec
+
 # Load all data
 with open("input/task4_ground_truth.json", "r") as f:
     ground_truth = json.load(f)
@@ -25,6 +28,18 @@ with open("output/task4_results/parsed_molecules.json", "r") as f:
 
 baseline = ground_truth["nirmatrelvir"]
 
+# Pass/fail from input/task4_scoring.json
+spec = load_spec("task4")
+overall_pass = spec.assess(metrics)["overall_pass"]
+total = metrics['total_molecules']
+counts = {
+    "chemical_validity_pct": metrics['valid_molecules'],
+    "admet_completeness_pct": metrics['complete_admet_molecules'],
+    "property_improvement_pct": metrics['molecules_with_improvements'],
+    "synthesis_provided_pct": metrics['molecules_with_synthesis'],
+}
+actual = {name: f"{metrics[name]:.1f}% ({count}/{total})" for name, count in counts.items()}
+
 # Generate report
 report = f"""# Task 4: Structural Biology - Results
 
@@ -88,13 +103,10 @@ report += f"""
 
 | Metric | Target | Actual | Pass/Fail |
 |--------|--------|--------|-----------|
-| Chemical validity | 100% (3/3) | {metrics['chemical_validity_pct']:.1f}% ({metrics['valid_molecules']}/{metrics['total_molecules']}) | {'PASS' if metrics['chemical_validity_pct'] >= 100 else 'FAIL'} |
-| ADMET completeness | 100% | {metrics['admet_completeness_pct']:.1f}% ({metrics['complete_admet_molecules']}/{metrics['total_molecules']}) | {'PASS' if metrics['admet_completeness_pct'] >= 100 else 'FAIL'} |
-| Property improvement | ≥66% (2/3) | {metrics['property_improvement_pct']:.1f}% ({metrics['molecules_with_improvements']}/{metrics['total_molecules']}) | {'PASS' if metrics['property_improvement_pct'] >= 66 else 'FAIL'} |
-| Synthesis provided | 100% | {metrics['synthesis_provided_pct']:.1f}% ({metrics['molecules_with_synthesis']}/{metrics['total_molecules']}) | {'PASS' if metrics['synthesis_provided_pct'] >= 100 else 'FAIL'} |
+{spec.metrics_table(metrics, actual)}
 
 ## Overall Assessment
-**{'✅ PASS' if all([metrics['chemical_validity_pct'] >= 100, metrics['admet_completeness_pct'] >= 100, metrics['property_improvement_pct'] >= 66, metrics['synthesis_provided_pct'] >= 100]) else '❌ FAIL'}**
+**{'✅ PASS' if overall_pass else '❌ FAIL'}**
 
 """
 
@@ -159,8 +171,7 @@ for mol in molecules:
 
 # Save report
 report_file = Path("output/task4_results/task4_report.md")
-with open(report_file, "w") as f:
-    f.write(report)
+write_text(report_file, report)
 
 print(f"✅ Report generated: {report_file}")
-print(f"Overall Assessment: {'PASS' if all([metrics['chemical_validity_pct'] >= 100, metrics['admet_completeness_pct'] >= 100, metrics['property_improvement_pct'] >= 66, metrics['synthesis_provided_pct'] >= 100]) else 'FAIL'}")
\ No newline at end of file
+print(f"Overall Assessment: {'PASS' if overall_pass else 'FAIL'}")
\ No newline at end of file
@@ -6,6 +6,8 @@ Manual parsing of Task 4 results based on observed format
 import json
 from datetime import datetime
 
+from scoring_engine import load_spec
+
 # Load ground truth
 with open("input/task4_ground_truth.json", "r") as f:
     ground_truth = json.load(f)
@@ -171,22 +173,16 @@ print(f"  - ADMET completeness: {metrics['admet_completeness_pct']:.1f}% ({metri
 print(f"  - Property improvement: {metrics['property_improvement_pct']:.1f}% ({metrics['molecules_with_improvements']}/{metrics['total_molecules']})")
 print(f"  - Synthesis provided: {metrics['synthesis_provided_pct']:.1f}% ({metrics['molecules_with_synthesis']}/{metrics['total_molecules']})")
 
-# Determine pass/fail
-passes = [
-    metrics['chemical_validity_pct'] >= 100,
-    metrics['admet_completeness_pct'] >= 100,
-    metrics['property_improvement_pct'] >= 66,
-    metrics['synthesis_provided_pct'] >= 100
-]
-
-overall_pass = all(passes)
+# Determine pass/fail (thresholds in input/task4_scoring.json)
+spec = load_spec("task4")
+assessment = spec.assess(metrics)
+overall_pass = assessment["overall_pass"]
 print(f"\nOverall Assessment: {'✅ PASS' if overall_pass else '❌ FAIL'}")
 
 if overall_pass:
     print("\n🎉 All targets met!")
 else:
     print("\n⚠️ Targets not met:")
-    if not passes[0]: print("  - Chemical validity < 100%")
-    if not passes[1]: print("  - ADMET completeness < 100%")
-    if not passes[2]: print("  - Property improvement < 66%")
-    if not passes[3]: print("  - Synthesis provided < 100%")
\ No newline at end of file
+    for name, passed in assessment["passes"].items():
+        if not passed:
+            print(f"  - {spec.metrics[name].label} below {spec.target(name)}")
\ No newline at end of file
@@ -4,7 +4,6 @@ Task 4: Structural Biology - MOLECULES Experiment
 Design SARS-CoV-2 Mpro inhibitors with improved properties
 """
 
-import json
 import logging
 import os
 import sys
@@ -16,6 +15,7 @@ from pathlib import Path
 sys.path.append(str(Path(__file__).parent))
 
 from edison_wrapper import KosmosClient
+from artifacts import write_json
 
 # Set up logging
 log_dir = Path("../logs")
@@ -87,17 +87,16 @@ Compare each designed molecule's properties to nirmatrelvir baseline."""
         output_dir.mkdir(parents=True, exist_ok=True)
 
         output_file = output_dir / "kosmos_raw_output.json"
-        with open(output_file, 'w') as f:
-            # Convert result to dict if it's not serializable
-            try:
-                if hasattr(result, 'dict'):
-                    json.dump(result.dict(), f, indent=2)
-                elif hasattr(result, '__dict__'):
-                    json.dump(result.__dict__, f, indent=2)
-                else:
-                    json.dump(str(result), f, indent=2)
-            except:
-                json.dump({"result": str(result)}, f, indent=2)
+        # Convert result to dict if it's not serializable
+        try:
+            if hasattr(result, 'dict'):
+                write_json(output_file, result.dict())
+            elif hasattr(result, '__dict__'):
+                write_json(output_file, result.__dict__)
+            else:
+                write_json(output_file, str(result))
+        except:
+            write_json(output_file, {"result": str(result)})
 
         logger.info(f"Raw output saved to: {output_file}")
         return result
@@ -13,63 +13,38 @@ import re
 
 # Add src directory to path
 sys.path.insert(0, str(Path(__file__).parent))
-
-# For Kendall's tau correlation
-try:
-    from scipy.stats import kendalltau
-except ImportError:
-    print("Warning: scipy not installed, ranking correlation will be set to 0")
-    kendalltau = None
+from artifacts import write_json
+from passage_index import concept_recall
+from rank_metrics import compare_rankings
+from scoring_engine import load_spec
 
 
 def calculate_mechanism_recall(identified, ground_truth):
     """% of established mechanisms identified by Kosmos"""
-    identified_lower = [m.lower() for m in identified]
     gt_mechanisms = [m["name"].lower() for m in ground_truth["established_mechanisms"]]
 
-    overlap = 0
-    matched_mechanisms = []
-
-    for gt_mech in gt_mechanisms:
-        # Check if any identified mechanism contains key terms
-        key_terms = gt_mech.split()[:2]  # E.g., "alpha-synuclein propagation"
-
-        for id_mech in identified_lower:
-            if all(term in id_mech for term in key_terms):
-                overlap += 1
-                matched_mechanisms.append(gt_mech)
-                break
-
-    recall = overlap / len(gt_mechanisms) if gt_mechanisms else 0
+    # A mechanism counts if some identified sentence shares at least two of
+    # its key terms (e.g. "alpha-synuclein" + "vagus")
+    recall, matched_mechanisms, _ = concept_recall(gt_mechanisms, identified, min_terms=2)
     return recall, matched_mechanisms
 
 
 def evaluate_intervention_ranking(kosmos_ranking, expected_order):
     """Kendall's tau for ranking quality"""
-    if kendalltau is None:
-        return 0, 0, "scipy not available"
-
-    # Map intervention names to positions
-    kosmos_positions = {}
-    for i, item in enumerate(kosmos_ranking):
+    # Intervention names, in Kosmos' order
+    names = []
+    for item in kosmos_ranking:
         if isinstance(item, str):
-            kosmos_positions[item.lower()] = i
+            names.append(item)
         elif isinstance(item, dict) and "intervention" in item:
-            kosmos_positions[item["intervention"].lower()] = i
-
-    expected_positions = {intervention.lower(): i for i, intervention in enumerate(expected_order)}
+            names.append(item["intervention"])
 
-    # Get overlapping interventions
-    common = set(kosmos_positions.keys()) & set(expected_positions.keys())
+    # Scored on the interventions both rankings contain
+    result = compare_rankings(names, expected_order)
+    if result["kendall_tau"] is None:
+        return 0, result["n_common"], f"Only {result['n_common']} common interventions"
 
-    if len(common) < 2:
-        return 0, len(common), f"Only {len(common)} common interventions"
-
-    kosmos_ranks = [kosmos_positions[item] for item in common]
-    expected_ranks = [expected_positions[item] for item in common]
-
-    tau, p_value = kendalltau(kosmos_ranks, expected_ranks)
-    return tau, len(common), f"p={p_value:.3f}"
+    return result["kendall_tau"], result["n_common"], f"p={result['p_value']:.3f}, rbo={result['rbo']:.2f}"
 
 
 def count_primary_research_citations(citations):
@@ -213,29 +188,23 @@ def main():
             "coverage_percentage": (covered_count / len(key_coverage)) * 100 if key_coverage else 0
         }
 
-    # 5. Pass/Fail determination
-    targets = {
-        "mechanism_recall": 0.75,  # ≥75%
-        "intervention_ranking": 0.5,  # τ ≥ 0.5
-        "citation_count": 15,  # ≥15 citations
-        "primary_research_ratio": 0.6  # ≥60%
-    }
-
-    passes = {
-        "mechanism_recall": recall >= targets["mechanism_recall"],
-        "intervention_ranking": tau >= targets["intervention_ranking"],
-        "citation_count": total_count >= targets["citation_count"],
-        "primary_research_ratio": primary_ratio >= targets["primary_research_ratio"]
-    }
-
-    metrics["targets"] = targets
+    # 5. Pass/Fail determination (thresholds and pass rule in input/task5_scoring.json)
+    spec = load_spec("task5", input_dir)
+    assessment = spec.assess({
+        "mechanism_recall": recall,
+        "intervention_ranking": tau,
+        "citation_count": total_count,
+        "primary_research_ratio": primary_ratio
+    })
+    passes = assessment["passes"]
+
+    metrics["targets"] = {name: spec.metrics[name].condition[1] for name in passes}
     metrics["passes"] = passes
-    metrics["overall_pass"] = sum(passes.values()) >= 3  # ≥3/4 metrics passing
+    metrics["overall_pass"] = assessment["overall_pass"]
 
     # Save metrics
     metrics_file = output_dir / "metrics.json"
-    with open(metrics_file, "w") as f:
-        json.dump(metrics, f, indent=2)
+    write_json(metrics_file, metrics)
 
     # Print summary
     print("\n" + "=" * 60)
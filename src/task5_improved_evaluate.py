@@ -6,141 +6,72 @@ Improved Task 5 Evaluation Script with better matching
 import json
 import os
 import sys
-import re
 from pathlib import Path
 from datetime import datetime
 
 # Add src directory to path
 sys.path.insert(0, str(Path(__file__).parent))
-
-# For Kendall's tau correlation
-try:
-    from scipy.stats import kendalltau
-except ImportError:
-    print("Warning: scipy not installed, ranking correlation will be set to 0")
-    kendalltau = None
-
-
-def normalize_text(text):
-    """Normalize text for matching"""
-    import re
-    # Remove unicode chars, lowercase, remove extra spaces
-    text = text.lower()
-    text = re.sub(r'[^\w\s]', ' ', text)
-    text = ' '.join(text.split())
-    return text
+from artifacts import write_json
+from entity_matcher import EntityMatcher
+from passage_index import concept_recall
+from rank_metrics import compare_rankings
+from answer_document import load_document
+from scoring_engine import load_spec
 
 
 def calculate_mechanism_recall(identified, ground_truth):
-    """Improved mechanism matching with better normalization"""
-    identified_normalized = [normalize_text(m) for m in identified]
-    gt_mechanisms = ground_truth["established_mechanisms"]
-
-    overlap = 0
-    matched_mechanisms = []
-
-    for gt_mech in gt_mechanisms:
-        gt_name = gt_mech["name"].lower()
-        gt_norm = normalize_text(gt_name)
-
-        # Check for matches with multiple strategies
-        found = False
-        for id_norm in identified_normalized:
-            # Strategy 1: Check if ground truth name is contained
-            if gt_name in id_norm or id_norm in gt_name:
-                found = True
-                break
-
-            # Strategy 2: Check key terms
-            gt_terms = gt_norm.split()[:3]  # First 3 words
-            matches = sum(1 for term in gt_terms if term in id_norm)
-            if matches >= 2:  # At least 2 key terms match
-                found = True
-                break
-
-        if found:
-            overlap += 1
-            matched_mechanisms.append(gt_mech["name"])
-
-    recall = overlap / len(gt_mechanisms) if gt_mechanisms else 0
+    """Mechanism matching over a BM25 index of the identified mechanisms"""
+    gt_names = [m["name"] for m in ground_truth["established_mechanisms"]]
+
+    # At least 2 key terms (stemmed, stopwords dropped) must match
+    recall, matched_mechanisms, _ = concept_recall(gt_names, identified, min_terms=2)
     return recall, matched_mechanisms
 
 
-def extract_interventions_from_text(raw_answer):
-    """Extract interventions directly from raw answer text"""
+def extract_interventions_from_text(doc):
+    """Extract interventions from the ranking section of the parsed answer"""
     interventions = []
 
-    # Look for the ranking section
-    ranking_start = raw_answer.find("Ranking potential interventions by current feasibility")
-    if ranking_start == -1:
-        return interventions
-
-    # Get the ranking section
-    ranking_section = raw_answer[ranking_start:ranking_start+2000]
-
-    # Extract numbered interventions
-    lines = ranking_section.split('\n')
-    for line in lines:
-        line = line.strip()
-        # Look for numbered items
-        if re.match(r'^\d+\)', line):
-            # Extract the intervention name (first sentence)
-            if '.' in line:
-                first_sentence = line.split('.')[0] + '.'
-                # Remove the number
-                first_sentence = re.sub(r'^\d+\)\s*', '', first_sentence)
-                if len(first_sentence) > 10:
-                    interventions.append(first_sentence.strip())
+    for item in doc.items_in("Ranking potential interventions by current feasibility"):
+        # The intervention name is the item's first sentence
+        if '.' in item:
+            first_sentence = item.split('.')[0] + '.'
+            if len(first_sentence) > 10:
+                interventions.append(first_sentence.strip())
 
     return interventions
 
 
-def evaluate_intervention_ranking(raw_answer, expected_order):
+# Map expected interventions to their categories (substring match, as before)
+INTERVENTION_MATCHER = EntityMatcher({
+    "GLP-1 agonists": ["glp-1", "glp1"],
+    "Probiotic supplementation": ["probiotic"],
+    "Fecal microbiota transplant": ["fmt", "fecal"],
+    "Vagotomy": ["vagotomy"]
+}, word_boundaries=False)
+
+
+def evaluate_intervention_ranking(doc, expected_order):
     """Extract and evaluate intervention ranking"""
-    interventions = extract_interventions_from_text(raw_answer)
-
-    # Map expected interventions to their categories
-    mapping = {
-        "glp-1": "GLP-1 agonists",
-        "glp1": "GLP-1 agonists",
-        "probiotic": "Probiotic supplementation",
-        "fmt": "Fecal microbiota transplant",
-        "fecal": "Fecal microbiota transplant",
-        "vagotomy": "Vagotomy"
-    }
+    interventions = extract_interventions_from_text(doc)
 
     # Normalize extracted interventions
     normalized_interventions = []
     for intervention in interventions:
-        int_lower = intervention.lower()
-        for key, value in mapping.items():
-            if key in int_lower:
-                normalized_interventions.append(value)
-                break
+        category = INTERVENTION_MATCHER.first(intervention)
+        if category:
+            normalized_interventions.append(category)
         else:
             # Use first few words as name
             words = intervention.split()[:3]
             normalized_interventions.append(' '.join(words))
 
-    # Calculate ranking quality
-    if kendalltau is None:
-        return 0, normalized_interventions, "scipy not available"
-
-    # Map to positions
-    kosmos_positions = {intervention.lower(): i for i, intervention in enumerate(normalized_interventions)}
-    expected_positions = {intervention.lower(): i for i, intervention in enumerate(expected_order)}
+    # Ranking quality on the interventions both rankings contain
+    result = compare_rankings(normalized_interventions, expected_order)
+    if result["kendall_tau"] is None:
+        return 0, normalized_interventions, f"Only {result['n_common']} common interventions"
 
-    # Get overlapping interventions
-    common = set(kosmos_positions.keys()) & set(expected_positions.keys())
-
-    if len(common) < 2:
-        return 0, normalized_interventions, f"Only {len(common)} common interventions"
-
-    kosmos_ranks = [kosmos_positions[item] for item in common]
-    expected_ranks = [expected_positions[item] for item in common]
-
-    tau, p_value = kendalltau(kosmos_ranks, expected_ranks)
-    return tau, normalized_interventions, f"p={p_value:.3f}"
+    return result["kendall_tau"], normalized_interventions, f"p={result['p_value']:.3f}, rbo={result['rbo']:.2f}"
 
 
 def count_primary_research_citations(citations):
@@ -159,7 +90,6 @@ def count_primary_research_citations(citations):
 
 def main():
     """Main evaluation function"""
-    import re
     base_dir = Path(__file__).parent.parent
     output_dir = base_dir / "output" / "task5_results"
     input_dir = base_dir / "input"
@@ -174,20 +104,14 @@ def main():
     with open(results_file) as f:
         kosmos_data = json.load(f)
 
-    # Extract from raw answer
-    raw_answer = kosmos_data["results"]["answer"]
-
-    # Extract mechanisms directly
-    mechanisms = []
-    # Look for the mechanisms section
-    mech_start = raw_answer.find("Circuit\u2011level mechanisms linking dysbiosis to PD")
-    if mech_start != -1:
-        mech_section = raw_answer[mech_start:mech_start+2000]
-        # Extract numbered mechanisms
-        mech_patterns = re.findall(r'\d\)\s*([^\n]+)', mech_section)
-        for mech in mech_patterns[:10]:  # Top 10
-            if len(mech.strip()) > 20:
-                mechanisms.append(mech.strip())
+    # Parsed answer (cached beside the raw output)
+    doc = load_document(results_file)
+
+    # Numbered mechanisms
+    mechanisms = [
+        mech for mech in doc.items_in("Circuit-level mechanisms linking dysbiosis to PD")
+        if len(mech) > 20
+    ][:10]  # Top 10
 
     # Calculate metrics
     metrics = {
@@ -207,7 +131,7 @@ def main():
     }
 
     # 2. Intervention ranking
-    tau, extracted_interventions, details = evaluate_intervention_ranking(raw_answer, ground_truth["expected_ranking_order"])
+    tau, extracted_interventions, details = evaluate_intervention_ranking(doc, ground_truth["expected_ranking_order"])
     metrics["intervention_ranking"] = {
         "kendall_tau": tau,
         "extracted_interventions": extracted_interventions,
@@ -216,10 +140,7 @@ def main():
     }
 
     # 3. Citation metrics
-    citations = kosmos_data["results"]["formatted_answer"]
-    # Extract DOIs
-    doi_pattern = r'https://doi\.org/10\.\d+/[^\s,]+'
-    extracted_dois = re.findall(doi_pattern, citations)
+    extracted_dois = doc.citation_ids("doi")
     primary_ratio, primary_count, total_count = count_primary_research_citations(extracted_dois)
     metrics["citation_metrics"] = {
         "total_citations": total_count,
@@ -228,29 +149,23 @@ def main():
         "primary_research_percentage": primary_ratio * 100
     }
 
-    # 4. Targets and passes
-    targets = {
-        "mechanism_recall": 0.75,
-        "intervention_ranking": 0.5,
-        "citation_count": 15,
-        "primary_research_ratio": 0.6
-    }
-
-    passes = {
-        "mechanism_recall": recall >= targets["mechanism_recall"],
-        "intervention_ranking": tau >= targets["intervention_ranking"],
-        "citation_count": total_count >= targets["citation_count"],
-        "primary_research_ratio": primary_ratio >= targets["primary_research_ratio"]
-    }
-
-    metrics["targets"] = targets
+    # 4. Targets and passes (input/task5_scoring.json)
+    spec = load_spec("task5", input_dir)
+    assessment = spec.assess({
+        "mechanism_recall": recall,
+        "intervention_ranking": tau,
+        "citation_count": total_count,
+        "primary_research_ratio": primary_ratio
+    })
+    passes = assessment["passes"]
+
+    metrics["targets"] = {name: spec.metrics[name].condition[1] for name in passes}
     metrics["passes"] = passes
-    metrics["overall_pass"] = sum(passes.values()) >= 3
+    metrics["overall_pass"] = assessment["overall_pass"]
 
     # Save metrics
     metrics_file = output_dir / "metrics.json"
-    with open(metrics_file, "w") as f:
-        json.dump(metrics, f, indent=2, default=str)
+    write_json(metrics_file, metrics, default=str)
 
     # Print summary
     print("\n" + "=" * 60)
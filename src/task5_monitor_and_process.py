@@ -12,6 +12,8 @@ from pathlib import Path
 # Add src to path
 sys.path.insert(0, str(Path(__file__).parent))
 from edison_wrapper import KosmosClient
+from artifacts import write_json
+from answer_document import AnswerDocument, load_document
 
 
 def monitor_and_process():
@@ -67,16 +69,14 @@ def monitor_and_process():
                     "status": status
                 }
 
-                with open(output_dir / "kosmos_raw_output.json", "w") as f:
-                    json.dump(raw_output, f, indent=2, default=str)
+                write_json(output_dir / "kosmos_raw_output.json", raw_output, default=str)
 
                 print(f"Results saved to {output_dir / 'kosmos_raw_output.json'}")
 
                 # Parse results (simple extraction)
-                parsed = parse_results(results)
+                parsed = parse_results(output_dir / "kosmos_raw_output.json")
 
-                with open(output_dir / "parsed_results.json", "w") as f:
-                    json.dump(parsed, f, indent=2)
+                write_json(output_dir / "parsed_results.json", parsed)
 
                 print("Results parsed and saved")
 
@@ -108,8 +108,7 @@ def monitor_and_process():
                     "status": status,
                     "timestamp": datetime.now().isoformat()
                 }
-                with open("logs/task5_error.log", "w") as f:
-                    json.dump(error_info, f, indent=2)
+                write_json("logs/task5_error.log", error_info, manifest=False)
                 return False
 
             time.sleep(30)  # Check every 30 seconds
@@ -123,38 +122,35 @@ def monitor_and_process():
 
 
 def parse_results(results):
-    """Simple parsing of results to extract key information"""
+    """
+    Extract mechanism/intervention sentences and DOIs from a Kosmos answer.
+
+    Args:
+        results: Path to kosmos_raw_output.json (parsed once and cached) or
+            the raw results object
+    """
     parsed = {
         "identified_mechanisms": [],
         "ranked_interventions": [],
         "citations": []
     }
 
-    # Convert to string for text processing
-    text = str(results)
-
-    # Simple extraction using keyword matching
-    sentences = text.split(". ")
+    if isinstance(results, (dict, Path)):
+        doc = load_document(results)
+    else:
+        doc = AnswerDocument(str(results))  # answer string, list, ...
 
-    # Extract mechanisms
-    for sentence in sentences:
-        if any(keyword in sentence.lower()
-               for keyword in ["mechanism", "pathway", "link", "connection"]):
-            if len(sentence.strip()) > 20:
-                parsed["identified_mechanisms"].append(sentence.strip())
-
-    # Extract interventions
+    # Sentences mentioning mechanisms / interventions
+    mechanism_keywords = ["mechanism", "pathway", "link", "connection"]
+    parsed["identified_mechanisms"] = [
+        s["text"] for s in doc.sentences_with(mechanism_keywords, min_length=20)
+    ]
     intervention_keywords = ["intervention", "therapy", "treatment", "approach"]
-    for sentence in sentences:
-        if any(keyword in sentence.lower() for keyword in intervention_keywords):
-            if len(sentence.strip()) > 20:
-                parsed["ranked_interventions"].append(sentence.strip())
-
-    # Extract potential citations (look for DOIs or journal-like patterns)
-    import re
-    doi_pattern = r'10\.\d+/\w+'
-    citations = re.findall(doi_pattern, text)
-    parsed["citations"] = citations
+    parsed["ranked_interventions"] = [
+        s["text"] for s in doc.sentences_with(intervention_keywords, min_length=20)
+    ]
+
+    parsed["citations"] = doc.citation_ids("doi")
 
     # Limit to reasonable numbers
     parsed["identified_mechanisms"] = parsed["identified_mechanisms"][:10]
@@ -4,7 +4,6 @@ Task 5: Neuroscience - LITERATURE Job
 Tests Kosmos LITERATURE capability for cross-domain synthesis (microbiology + neuroscience)
 """
 
-import json
 import os
 import sys
 import time
@@ -14,6 +13,9 @@ from pathlib import Path
 # Add src directory to path for imports
 sys.path.insert(0, str(Path(__file__).parent))
 from edison_wrapper import KosmosClient
+from execution_log import ExecutionLogger
+from artifacts import write_json
+from answer_document import AnswerDocument, load_document
 
 
 class Task5Neuroscience:
@@ -31,15 +33,13 @@ class Task5Neuroscience:
         self.logs_dir.mkdir(parents=True, exist_ok=True)
 
         # Setup logging
-        self.log_file = self.logs_dir / "task5_execution.log"
+        self.logger = ExecutionLogger("task5", log_dir=self.logs_dir)
 
-    def log(self, message):
+    def log(self, message, level="INFO", stage=None):
         """Log message with timestamp"""
         timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        log_message = f"[{timestamp}] {message}"
-        print(log_message)
-        with open(self.log_file, "a") as f:
-            f.write(log_message + "\n")
+        print(f"[{timestamp}] {message}")
+        self.logger.log(message, level, stage=stage)
 
     def run_kosmos_query(self):
         """Run the Kosmos LITERATURE query"""
@@ -50,6 +50,7 @@ class Task5Neuroscience:
         try:
             # Submit LITERATURE job using working pattern
             task_id = self.client.submit_literature(query)
+            self.logger.task_id = task_id
             self.log(f"LITERATURE job submitted successfully: {task_id}")
 
             # Save task ID
@@ -60,8 +61,7 @@ class Task5Neuroscience:
                 "job_type": "LITERATURE"
             }
 
-            with open(self.output_dir / "task_id.json", "w") as f:
-                json.dump(task_info, f, indent=2)
+            write_json(self.output_dir / "task_id.json", task_info)
 
             return task_id
 
@@ -71,37 +71,39 @@ class Task5Neuroscience:
 
     def monitor_job(self, task_id):
         """Monitor job completion"""
-        self.log(f"Monitoring job {task_id}...")
-
-        # Poll for completion
-        max_wait_time = 20 * 60  # 20 minutes
-        start_time = time.time()
-
-        while time.time() - start_time < max_wait_time:
-            try:
-                task = self.client.get_task(task_id)
-                # Task object should have status attribute
-                status = getattr(task, 'status', None)
-                if not status and hasattr(task, 'task_status'):
-                    status = task.task_status
-
-                self.log(f"Job status: {status}")
-
-                if status and status.lower() in ["completed", "succeeded", "success"]:
-                    self.log("Job completed successfully!")
-                    return True
-                elif status and status.lower() in ["failed", "error"]:
-                    self.log(f"Job failed with status: {status}")
-                    return False
-
-                time.sleep(30)  # Wait 30 seconds between checks
-
-            except Exception as e:
-                self.log(f"Error checking job status: {str(e)}")
-                time.sleep(30)
-
-        self.log("Job monitoring timed out")
-        return False
+        self.logger.task_id = task_id
+        with self.logger.stage_scope("monitor"):
+            self.log(f"Monitoring job {task_id}...")
+
+            # Poll for completion
+            max_wait_time = 20 * 60  # 20 minutes
+            start_time = time.time()
+
+            while time.time() - start_time < max_wait_time:
+                try:
+                    task = self.client.get_task(task_id)
+                    # Task object should have status attribute
+                    status = getattr(task, 'status', None)
+                    if not status and hasattr(task, 'task_status'):
+                        status = task.task_status
+
+                    self.log(f"Job status: {status}")
+
+                    if status and status.lower() in ["completed", "succeeded", "success"]:
+                        self.log("Job completed successfully!")
+                        return True
+                    elif status and status.lower() in ["failed", "error"]:
+                        self.log(f"Job failed with status: {status}")
+                        return False
+
+                    time.sleep(30)  # Wait 30 seconds between checks
+
+                except Exception as e:
+                    self.log(f"Error checking job status: {str(e)}")
+                    time.sleep(30)
+
+            self.log("Job monitoring timed out")
+            return False
 
     def collect_results(self, task_id):
         """Collect and parse results from Kosmos"""
@@ -129,16 +131,14 @@ class Task5Neuroscience:
                 "results": results
             }
 
-            with open(self.output_dir / "kosmos_raw_output.json", "w") as f:
-                json.dump(raw_output, f, indent=2, default=str)
+            write_json(self.output_dir / "kosmos_raw_output.json", raw_output, default=str)
 
             self.log("Results saved to kosmos_raw_output.json")
 
             # Parse and structure results
-            parsed = self.parse_results(results)
+            parsed = self.parse_results(self.output_dir / "kosmos_raw_output.json")
 
-            with open(self.output_dir / "parsed_results.json", "w") as f:
-                json.dump(parsed, f, indent=2)
+            write_json(self.output_dir / "parsed_results.json", parsed)
 
             self.log("Results parsed and saved")
             return parsed
@@ -157,27 +157,19 @@ class Task5Neuroscience:
             "key_figures": []
         }
 
-        # Convert results to text if it's not already
-        if isinstance(results, dict):
+        if isinstance(results, dict) and "mechanisms" in results:
             # If it's already structured, extract key fields
             parsed["identified_mechanisms"] = results.get("mechanisms", [])
             parsed["ranked_interventions"] = results.get("interventions", [])
             parsed["citations"] = results.get("citations", [])
         else:
-            # If it's raw text, we'll need to parse it
-            # For now, save as text content for manual review
-            text_content = str(results)
-            parsed["text_content"] = text_content
-
-            # Simple extraction - in real implementation, use NLP
-            # This is a placeholder for proper text parsing
-            if "mechanism" in text_content.lower():
-                # Extract sentences containing "mechanism"
-                sentences = text_content.split(". ")
-                for sentence in sentences:
-                    if any(keyword in sentence.lower() for keyword in ["mechanism", "pathway", "circuit"]):
-                        if len(sentence) > 20:  # Avoid short fragments
-                            parsed["identified_mechanisms"].append(sentence.strip())
+            # Raw answer: use the cached parsed document; other objects are read as text
+            doc = load_document(results) if isinstance(results, (dict, Path)) else AnswerDocument(str(results))
+            parsed["text_content"] = doc.text
+            parsed["identified_mechanisms"] = [
+                s["text"] for s in doc.sentences_with(["mechanism", "pathway", "circuit"], min_length=20)
+            ]
+            parsed["citations"] = doc.citation_ids("doi")
 
         return parsed
 
@@ -227,8 +219,7 @@ class Task5Neuroscience:
                 "task": "Task 5 Neuroscience"
             }
 
-            with open(self.logs_dir / "task5_error.log", "w") as f:
-                json.dump(error_info, f, indent=2)
+            write_json(self.logs_dir / "task5_error.log", error_info, manifest=False)
 
             return False
 
@@ -7,6 +7,8 @@ import json
 import re
 from pathlib import Path
 
+from citations import extract_citations, unique_ids
+
 
 def parse_kosmos_response():
     """Parse the detailed Kosmos response"""
@@ -64,24 +66,9 @@ def parse_kosmos_response():
     # The DOIs are in the formatted_answer field
     formatted_answer = raw_data["results"]["formatted_answer"]
 
-    # Extract all DOI patterns
-    doi_patterns = [
-        r'https://doi\.org/10\.\d+/[^\s,\)]+',
-        r'10\.\d+/[a-zA-Z0-9\.\-_/]+'
-    ]
-
-    all_dois = set()
-    for pattern in doi_patterns:
-        matches = re.findall(pattern, formatted_answer)
-        all_dois.update(matches)
-
-    # Clean up DOIs
-    clean_dois = []
-    for doi in all_dois:
-        if doi.startswith('https://'):
-            clean_dois.append(doi)
-        elif '.' in doi and len(doi) > 10:  # Basic validation
-            clean_dois.append(f"https://doi.org/{doi}")
+    # Extract all DOIs
+    dois = unique_ids(extract_citations(formatted_answer, schemes=("doi",)), "doi")
+    clean_dois = [f"https://doi.org/{doi}" for doi in dois]
 
     parsed["citations"] = clean_dois[:50]  # Limit to 50 most recent
 
@@ -9,6 +9,9 @@ import os
 from datetime import datetime
 from pathlib import Path
 
+from artifacts import write_text
+from scoring_engine import load_spec
+
 
 def load_json(file_path):
     """Load JSON file safely"""
@@ -149,13 +152,14 @@ def generate_report():
 
     if metrics:
         passes = metrics.get("passes", {})
-        targets = metrics.get("targets", {})
+        spec = load_spec("task5", input_dir)
+        target = spec.target
 
         report += f"""
-| Mechanism recall | ≥75% | {recall_pct:.1f}% | {'PASS' if passes.get('mechanism_recall') else 'FAIL'} |
-| Ranking quality (τ) | ≥0.5 | {tau:.2f} | {'PASS' if passes.get('intervention_ranking') else 'FAIL'} |
-| Citation count | ≥15 | {metrics.get('citation_metrics', {}).get('total_citations', 0)} | {'PASS' if passes.get('citation_count') else 'FAIL'} |
-| Primary research ratio | ≥60% | {metrics.get('citation_metrics', {}).get('primary_research_percentage', 0):.0f}% | {'PASS' if passes.get('primary_research_ratio') else 'FAIL'} |"""
+| Mechanism recall | {target('mechanism_recall')} | {recall_pct:.1f}% | {'PASS' if passes.get('mechanism_recall') else 'FAIL'} |
+| Ranking quality (τ) | {target('intervention_ranking')} | {tau:.2f} | {'PASS' if passes.get('intervention_ranking') else 'FAIL'} |
+| Citation count | {target('citation_count')} | {metrics.get('citation_metrics', {}).get('total_citations', 0)} | {'PASS' if passes.get('citation_count') else 'FAIL'} |
+| Primary research ratio | {target('primary_research_ratio')} | {metrics.get('citation_metrics', {}).get('primary_research_percentage', 0):.0f}% | {'PASS' if passes.get('primary_research_ratio') else 'FAIL'} |"""
 
     pass_count = sum(1 for v in metrics.get('passes', {}).values() if str(v) == 'True')
     report += f"""
@@ -172,7 +176,7 @@ def generate_report():
 ## Raw Outputs
 - Kosmos response: `kosmos_raw_output.json`
 - Metrics: `metrics.json`
-- Execution log: `../logs/task5_execution.log`
+- Execution log: `logs/task5_execution.jsonl`
 
 ## Notes
 {generate_notes(parsed, metrics)}
@@ -180,8 +184,7 @@ def generate_report():
 
     # Save report
     report_file = output_dir / "task5_report.md"
-    with open(report_file, "w") as f:
-        f.write(report)
+    write_text(report_file, report)
 
     print(f"Report saved to: {report_file}")
     return report
@@ -0,0 +1,417 @@
+#!/usr/bin/env python3
+"""Repeated Kosmos trials per task, with bootstrap statistics across trials.
+
+The README's "22/28 successful" is one run per task, but Kosmos answers are
+sampled: the same query returns a different target list, citation count and
+ranking each time, so a single PASS or FAIL says little about how often a
+task passes. This module runs a task's job (the ``job`` block of its
+``input/taskN_scoring.json``) N times and keeps every trial under
+``output/trials/<task>/trial_NNN/``:
+
+- ``task_id.txt``: the Kosmos task ID, written at submission
+- ``kosmos_raw_output.json``: the result, once the task completes
+- ``external.json`` (optional): values of the spec's ``external`` metrics
+  for this trial (DOI validity, notebook execution, ...), written by
+  whoever computes them
+- ``metrics.json``: the scores from the spec (see scoring_engine.py)
+
+All trials are submitted before any is polled, so N trials take about as
+long as one. Trials are scored with ``ScoringSpec.score_batch`` and
+summarised per metric: mean, variance, standard deviation, a percentile
+bootstrap confidence interval of the mean, and the pass probability (share
+of trials meeting the threshold) with its own interval. The bootstrap is
+one matrix product: B resamples are drawn as multinomial weight vectors
+(B x trials) and multiplied by the trials x metrics matrix, so 10,000
+resamples of hundreds of trials take a fraction of a second. Missing values
+(an external metric nobody filled in) are left out of that metric's
+statistics but, as in ``assess``, fail the overall pass rule.
+
+With few trials the intervals are wide and a pass probability of 0 or 1
+gets a degenerate [0, 0] or [1, 1] interval; read them with ``n`` in mind.
+
+Rescoring is incremental: only metrics whose inputs (raw output, ground
+truth, matcher) changed are recomputed, only changed ``metrics.json`` files
+are rewritten, and the summary files are regenerated only when the trial
+metrics behind them changed. ``--full`` rescores everything.
+
+Kosmos jobs are billed per run, so trials are only submitted when
+``--trials`` is given, and pending trials are only polled with ``--trials``
+or ``--poll``; both need the Edison client and an API key. Without them the
+finished trials are rescored and summarised offline and any still-pending
+trials are reported.
+
+Usage:
+    from trial_runner import load_trials, trial_statistics
+
+    table = load_trials("task1")            # one row per completed trial
+    stats = trial_statistics(table, load_spec("task1"), n_boot=10_000)
+
+    python src/trial_runner.py task1 --trials 10          # submit, wait, score
+    python src/trial_runner.py task1 --poll               # wait for pending trials
+    python src/trial_runner.py task1                      # rescore offline
+    python src/trial_runner.py task1 --external citation_validity=1.0
+"""
+
+import hashlib
+import json
+import time
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from artifacts import write_json, write_text
+from execution_log import ExecutionLogger
+from scoring_engine import load_spec
+
+TRIALS_DIR = Path("output/trials")
+RAW_OUTPUT = "kosmos_raw_output.json"
+
+SUBMIT = {
+    "literature": "submit_literature",
+    "precedent": "submit_precedent",
+    "analysis": "submit_analysis",
+    "molecules": "submit_molecules",
+}
+# Runners saw both "completed" and "success", and task4 upper-case statuses
+DONE = {"completed", "success"}
+FAILED = {"failed", "cancelled", "error"}
+
+
+def _status(task):
+    status = getattr(task, "status", None)
+    return str(getattr(status, "value", status)).lower()
+
+
+def _result(task):
+    """The task's result as JSON-serializable data (the task5 raw-output layout)."""
+    for attr in ("model_dump", "dict"):
+        if hasattr(task, attr):
+            return getattr(task, attr)()
+    return task.__dict__ if hasattr(task, "__dict__") else str(task)
+
+
+def trial_dirs(task, trials_dir=TRIALS_DIR):
+    """Existing trial directories of ``task``, in order."""
+    return sorted((Path(trials_dir) / task).glob("trial_*"))
+
+
+def submit_trials(client, spec, n, task, trials_dir=TRIALS_DIR, logger=None):
+    """
+    Submit ``n`` new trials of the spec's job.
+
+    Returns:
+        List of (trial_dir, task_id)
+    """
+    job = spec.job
+    if not job:
+        raise ValueError(f"{task}: scoring spec has no 'job' block")
+    submit = getattr(client, SUBMIT[job["type"]])
+    existing = trial_dirs(task, trials_dir)
+    start = int(existing[-1].name.split("_")[1]) + 1 if existing else 1
+
+    submitted = []
+    for number in range(start, start + n):
+        trial_dir = Path(trials_dir) / task / f"trial_{number:03d}"
+        task_id = submit(job["query"], files=job["files"]) if job.get("files") else submit(job["query"])
+        write_text(trial_dir / "task_id.txt", f"{task_id}\nSubmitted: {datetime.now().isoformat()}\n",
+                   manifest=False)
+        if logger:
+            logger.log(f"Submitted {trial_dir.name}: {task_id}", stage="submit")
+        submitted.append((trial_dir, task_id))
+    return submitted
+
+
+def pending_trials(task, trials_dir=TRIALS_DIR):
+    """(trial_dir, task_id) of trials submitted but without a result yet."""
+    pending = []
+    for trial_dir in trial_dirs(task, trials_dir):
+        id_file = trial_dir / "task_id.txt"
+        if id_file.exists() and not (trial_dir / RAW_OUTPUT).exists() and not (trial_dir / "failed.txt").exists():
+            pending.append((trial_dir, id_file.read_text().split("\n", 1)[0].strip()))
+    return pending
+
+
+def wait_for_trials(client, trials, poll_seconds=30, timeout_minutes=90, logger=None):
+    """
+    Poll submitted trials until each completes or fails, saving results as they arrive.
+
+    Returns:
+        Dict trial name -> final status ("completed", "failed", "timeout", ...)
+    """
+    waiting = dict(trials)
+    statuses = {}
+    deadline = time.time() + timeout_minutes * 60
+    while waiting and time.time() < deadline:
+        for trial_dir, task_id in list(waiting.items()):
+            try:
+                task = client.get_task(task_id)
+            except Exception as e:
+                if logger:
+                    logger.log(f"{trial_dir.name}: error checking status: {e}", "ERROR", stage="monitor")
+                continue
+            status = _status(task)
+            if status in DONE:
+                write_json(trial_dir / RAW_OUTPUT, {
+                    "task_id": task_id,
+                    "collection_time": datetime.now().isoformat(),
+                    "status": status,
+                    "results": _result(task),
+                }, default=str)
+            elif status in FAILED:
+                write_text(trial_dir / "failed.txt", f"{status}\n", manifest=False)
+            else:
+                continue
+            statuses[trial_dir.name] = status
+            del waiting[trial_dir]
+            if logger:
+                logger.log(f"{trial_dir.name}: {status}", stage="monitor")
+        if waiting:
+            time.sleep(poll_seconds)
+    statuses.update({trial_dir.name: "timeout" for trial_dir in waiting})
+    return statuses
+
+
+def load_trials(task, trials_dir=TRIALS_DIR, external=None, spec=None, save=True, incremental=True):
+    """
+    Score every completed trial of ``task``.
+
+    Args:
+        external: Values of external metrics applied to every trial; a
+            trial's ``external.json`` takes precedence
+        save: Write each trial's ``metrics.json`` (only those that changed)
+        incremental: Rescore only metrics whose inputs changed (see
+            scoring_engine.py)
+
+    Returns:
+        ``ScoringSpec.score_batch`` table indexed by trial name
+    """
+    spec = spec or load_spec(task)
+    completed = [d for d in trial_dirs(task, trials_dir) if (d / RAW_OUTPUT).exists()]
+    external_metrics = [m.name for m in spec.metrics.values() if m.matcher.external]
+    per_trial = []
+    for trial_dir in completed:
+        values = {name: (external or {}).get(name) for name in external_metrics}
+        if (trial_dir / "external.json").exists():
+            with open(trial_dir / "external.json") as f:
+                values.update(json.load(f))
+        per_trial.append(values)
+
+    table = spec.score_batch([d / RAW_OUTPUT for d in completed],
+                             {name: [values.get(name) for values in per_trial] for name in external_metrics},
+                             incremental=incremental)
+    table.index = [d.name for d in completed]
+    if save:
+        rows = json.loads(table.to_json(orient="index"))
+        for trial_dir in completed:
+            metrics_file = trial_dir / "metrics.json"
+            if metrics_file.exists():
+                with open(metrics_file) as f:
+                    if json.load(f) == rows[trial_dir.name]:
+                        continue
+            write_json(metrics_file, rows[trial_dir.name], manifest=False)
+    return table
+
+
+def bootstrap_means(matrix, n_boot=10_000, seed=0):
+    """
+    Bootstrap distribution of the column means of a trials x metrics matrix.
+
+    Each resample is a multinomial weight vector over the trials, so all
+    ``n_boot`` resamples are a single (n_boot x trials) @ (trials x metrics)
+    product. NaN entries are skipped per column; a resample with no valid
+    trial in a column gives NaN there.
+
+    Returns:
+        (n_boot x metrics) array of resampled means
+    """
+    matrix = np.asarray(matrix, dtype=float)
+    n = matrix.shape[0]
+    weights = np.random.default_rng(seed).multinomial(n, np.full(n, 1.0 / n), size=n_boot).astype(float)
+    valid = ~np.isnan(matrix)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return (weights @ np.where(valid, matrix, 0.0)) / (weights @ valid)
+
+
+def _interval(samples, confidence):
+    tail = (1 - confidence) / 2 * 100
+    low, high = np.full(samples.shape[1], np.nan), np.full(samples.shape[1], np.nan)
+    finite = ~np.isnan(samples).all(axis=0)
+    if finite.any():
+        low[finite], high[finite] = np.nanpercentile(samples[:, finite], [tail, 100 - tail], axis=0)
+    return low, high
+
+
+def trial_statistics(table, spec, n_boot=10_000, confidence=0.95, seed=0):
+    """
+    Per-metric statistics across trials.
+
+    Args:
+        table: ``load_trials`` / ``score_batch`` table, one row per trial
+        spec: The task's ScoringSpec (for thresholds and labels)
+
+    Returns:
+        DataFrame indexed by metric (plus ``overall_pass``) with n, mean,
+        var, std, ci_low, ci_high, target, pass_rate, pass_ci_low, pass_ci_high
+    """
+    names = list(spec.metrics)
+    values = table[names].apply(pd.to_numeric, errors="coerce").astype(float).to_numpy()
+
+    # Pass indicators: NaN where the value is missing, overall_pass as assessed
+    passes = np.full((len(table), len(names) + 1), np.nan)
+    for j, name in enumerate(names):
+        if spec.metrics[name].condition is not None:
+            observed = ~np.isnan(values[:, j])
+            passes[observed, j] = table[f"{name}_pass"].to_numpy(dtype=float)[observed]
+    passes[:, -1] = table["overall_pass"].to_numpy(dtype=float)
+
+    if len(table):
+        value_low, value_high = _interval(bootstrap_means(values, n_boot, seed), confidence)
+        pass_low, pass_high = _interval(bootstrap_means(passes, n_boot, seed), confidence)
+    else:
+        value_low = value_high = np.full(len(names), np.nan)
+        pass_low = pass_high = np.full(len(names) + 1, np.nan)
+
+    counts = (~np.isnan(values)).sum(axis=0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        sums = np.nansum(values, axis=0)
+        means = np.where(counts > 0, sums / np.maximum(counts, 1), np.nan)
+        squares = np.nansum((values - means) ** 2, axis=0)
+        variances = np.where(counts > 1, squares / np.maximum(counts - 1, 1), np.nan)
+        pass_counts = (~np.isnan(passes)).sum(axis=0)
+        pass_rates = np.where(pass_counts > 0, np.nansum(passes, axis=0) / np.maximum(pass_counts, 1), np.nan)
+
+    stats = pd.DataFrame({
+        "label": [spec.metrics[name].label for name in names] + ["Overall pass"],
+        "n": list(counts) + [len(table)],
+        "mean": list(means) + [pass_rates[-1]],
+        "var": list(variances) + [np.nan],
+        "std": list(np.sqrt(variances)) + [np.nan],
+        "ci_low": list(value_low) + [pass_low[-1]],
+        "ci_high": list(value_high) + [pass_high[-1]],
+        "target": [spec.target(name) for name in names] + ["-"],
+        "pass_rate": pass_rates,
+        "pass_ci_low": pass_low,
+        "pass_ci_high": pass_high,
+    }, index=names + ["overall_pass"])
+    stats.loc[[n for n in names if spec.metrics[n].condition is None],
+              ["pass_rate", "pass_ci_low", "pass_ci_high"]] = np.nan
+    return stats
+
+
+def statistics_table(stats, spec, confidence=0.95):
+    """Markdown rows "| Metric | n | Mean [CI] | SD | Target | P(pass) [CI] |"."""
+    def shown(name, value):
+        if np.isnan(value):
+            return "N/A"
+        if name == "overall_pass":
+            return f"{value:.0%}"
+        if spec.metrics[name].unit in ("fraction", "percent"):
+            return spec.format(name, value)
+        return f"{value:.2f}"
+
+    rows = [f"| Metric | n | Mean [{confidence:.0%} CI] | SD | Target | P(pass) [{confidence:.0%} CI] |",
+            "|--------|---|------------|----|--------|--------------|"]
+    for name, row in stats.iterrows():
+        mean = shown(name, row["mean"])
+        if not np.isnan(row["ci_low"]):
+            mean += f" [{shown(name, row['ci_low'])}, {shown(name, row['ci_high'])}]"
+        sd = "-" if np.isnan(row["std"]) else shown(name, row["std"])
+        if np.isnan(row["pass_rate"]):
+            p_pass = "-"
+        else:
+            p_pass = f"{row['pass_rate']:.0%} [{row['pass_ci_low']:.0%}, {row['pass_ci_high']:.0%}]"
+        rows.append(f"| {row['label']} | {row['n']} | {mean} | {sd} | {row['target']} | {p_pass} |")
+    return "\n".join(rows)
+
+
+def summarize(task, trials_dir=TRIALS_DIR, external=None, n_boot=10_000, confidence=0.95, seed=0,
+              incremental=True):
+    """
+    Score all completed trials and write ``trials.csv``, ``statistics.csv`` and ``summary.json``.
+
+    With ``incremental``, the summary files record a hash of the trial
+    metrics and settings they were generated from and are left untouched
+    (statistics read back from ``statistics.csv``) while it still matches.
+    """
+    spec = load_spec(task)
+    table = load_trials(task, trials_dir, incremental=incremental, external=external, spec=spec)
+
+    out_dir = Path(trials_dir) / task
+    failed = [d.name for d in trial_dirs(task, trials_dir) if (d / "failed.txt").exists()]
+    pending = [d.name for d, _ in pending_trials(task, trials_dir)]
+    inputs_hash = hashlib.sha256(json.dumps([table.to_csv(), n_boot, confidence, seed, failed, pending])
+                                 .encode("utf-8")).hexdigest()
+    summary_file = out_dir / "summary.json"
+    if incremental and summary_file.exists() and (out_dir / "statistics.csv").exists():
+        with open(summary_file) as f:
+            if json.load(f).get("inputs_hash") == inputs_hash:
+                return table, pd.read_csv(out_dir / "statistics.csv", index_col=0, keep_default_na=False,
+                                          na_values=[""])
+
+    stats = trial_statistics(table, spec, n_boot, confidence, seed)
+    write_text(out_dir / "trials.csv", table.to_csv(), manifest=False)
+    write_text(out_dir / "statistics.csv", stats.to_csv(), manifest=False)
+    write_json(summary_file, {
+        "task": task,
+        "generated": datetime.now().isoformat(),
+        "inputs_hash": inputs_hash,
+        "completed_trials": len(table),
+        "failed_trials": failed,
+        "pending_trials": pending,
+        "n_boot": n_boot,
+        "confidence": confidence,
+        "metrics": json.loads(stats.to_json(orient="index")),
+    }, manifest=False)
+    return table, stats
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Run a task's Kosmos job repeatedly and summarise the trials")
+    parser.add_argument("task", help="task1..task5")
+    parser.add_argument("--trials", type=int, default=0,
+                        help="Submit this many new trials (billed) and wait for them")
+    parser.add_argument("--poll", action="store_true",
+                        help="Wait for pending trials (needs the Edison client and API key)")
+    parser.add_argument("--trials-dir", default=str(TRIALS_DIR))
+    parser.add_argument("--external", nargs="*", default=[], metavar="METRIC=VALUE",
+                        help="Values for external metrics, applied to trials without an external.json")
+    parser.add_argument("--n-boot", type=int, default=10_000)
+    parser.add_argument("--confidence", type=float, default=0.95)
+    parser.add_argument("--poll-seconds", type=int, default=30)
+    parser.add_argument("--timeout-minutes", type=int, default=90)
+    parser.add_argument("--full", action="store_true",
+                        help="Rescore every trial and rewrite the summary even if nothing changed")
+    args = parser.parse_args()
+
+    spec = load_spec(args.task)
+    external = {}
+    for item in args.external:
+        name, _, value = item.partition("=")
+        external[name] = json.loads(value.lower() if value.lower() in ("true", "false") else value)
+
+    pending = pending_trials(args.task, args.trials_dir)
+    if args.trials or args.poll:
+        try:
+            from edison_wrapper import KosmosClient
+
+            client = KosmosClient()
+        except (ImportError, ValueError) as e:
+            parser.error(f"cannot reach Kosmos ({e}); run without --trials/--poll to rescore offline")
+        logger = ExecutionLogger(f"{args.task}_trials")
+        if args.trials:
+            pending += submit_trials(client, spec, args.trials, args.task, args.trials_dir, logger)
+        print(f"Waiting for {len(pending)} trial(s)...")
+        statuses = wait_for_trials(client, pending, args.poll_seconds, args.timeout_minutes, logger)
+        for name, status in sorted(statuses.items()):
+            print(f"  {name}: {status}")
+    elif pending:
+        print(f"Warning: {len(pending)} trial(s) still pending; rerun with --poll to wait for them")
+
+    table, stats = summarize(args.task, args.trials_dir, external, args.n_boot, args.confidence,
+                             incremental=not args.full)
+    print(f"\n{args.task}: {len(table)} completed trial(s)\n")
+    print(statistics_table(stats, spec, args.confidence))
@@ -12,13 +12,14 @@ Usage:
 """
 
 import os
-import json
 import time
 from datetime import datetime
 from pathlib import Path
 
 # Import working components from Phase 1
 from edison_wrapper import KosmosClient
+from execution_log import ExecutionLogger
+from artifacts import write_json
 
 
 class Phase2Experiment:
@@ -26,6 +27,7 @@ class Phase2Experiment:
 
     def __init__(self, task_name):
         self.task_name = task_name
+        self.logger = ExecutionLogger(self.task_name)
         self.client = KosmosClient()
         self.setup_directories()
 
@@ -41,14 +43,9 @@ class Phase2Experiment:
             f.write(f"{timestamp} - {task_type}: {task_id}\n")
         print(f"Task ID saved: {task_id}")
 
-    def log_execution(self, message, level="INFO"):
-        """Log execution events"""
-        timestamp = datetime.now().isoformat()
-        log_entry = f"{timestamp} [{level}] {message}\n"
-
-        with open(f"logs/{self.task_name}_execution.log", "a") as f:
-            f.write(log_entry)
-
+    def log_execution(self, message, level="INFO", stage=None):
+        """Log execution events (buffered JSONL, see execution_log.py)"""
+        self.logger.log(message, level, stage=stage)
         print(message)
 
     def run_literature_experiment(self, query, ground_truth_file=None):
@@ -58,6 +55,7 @@ class Phase2Experiment:
         try:
             # Submit job
             task_id = self.client.submit_literature(query)
+            self.logger.task_id = task_id
             self.log_execution(f"Task submitted: {task_id}")
             self.save_task_id("LITERATURE", task_id)
 
@@ -73,6 +71,7 @@ class Phase2Experiment:
 
         try:
             task_id = self.client.submit_precedent(query)
+            self.logger.task_id = task_id
             self.log_execution(f"Task submitted: {task_id}")
             self.save_task_id("PRECEDENT", task_id)
 
@@ -93,6 +92,7 @@ class Phase2Experiment:
                     raise FileNotFoundError(f"Data file not found: {file_path}")
 
             task_id = self.client.submit_analysis(query, files=data_files)
+            self.logger.task_id = task_id
             self.log_execution(f"Task submitted with {len(data_files)} files: {task_id}")
             self.save_task_id("ANALYSIS", task_id)
 
@@ -108,6 +108,7 @@ class Phase2Experiment:
 
         try:
             task_id = self.client.submit_molecules(query)
+            self.logger.task_id = task_id
             self.log_execution(f"Task submitted: {task_id}")
             self.save_task_id("MOLECULES", task_id)
 
@@ -119,42 +120,43 @@ class Phase2Experiment:
 
     def monitor_task(self, task_id, timeout_minutes=60):
         """Monitor task completion"""
-        self.log_execution(f"Monitoring task {task_id}")
+        self.logger.task_id = task_id
+        with self.logger.stage_scope("monitor"):
+            self.log_execution(f"Monitoring task {task_id}")
 
-        start_time = time.time()
-        timeout_seconds = timeout_minutes * 60
+            start_time = time.time()
+            timeout_seconds = timeout_minutes * 60
 
-        while time.time() - start_time < timeout_seconds:
-            try:
-                task = self.client.get_task(task_id)
-                self.log_execution(f"Status: {task.status}")
+            while time.time() - start_time < timeout_seconds:
+                try:
+                    task = self.client.get_task(task_id)
+                    self.log_execution(f"Status: {task.status}")
 
-                if task.status == "completed":
-                    self.log_execution("Task completed successfully")
-                    return task
-                elif task.status in ["failed", "cancelled"]:
-                    self.log_execution(f"Task {task.status}", "ERROR")
-                    return task
+                    if task.status == "completed":
+                        self.log_execution("Task completed successfully")
+                        return task
+                    elif task.status in ["failed", "cancelled"]:
+                        self.log_execution(f"Task {task.status}", "ERROR")
+                        return task
 
-                time.sleep(30)  # Wait 30 seconds between checks
+                    time.sleep(30)  # Wait 30 seconds between checks
 
-            except Exception as e:
-                self.log_execution(f"Error checking task status: {e}", "ERROR")
-                time.sleep(30)
+                except Exception as e:
+                    self.log_execution(f"Error checking task status: {e}", "ERROR")
+                    time.sleep(30)
 
-        self.log_execution("Task monitoring timeout", "ERROR")
-        return None
+            self.log_execution("Task monitoring timeout", "ERROR")
+            return None
 
     def save_result(self, task, output_file="kosmos_raw_output.json"):
         """Save task result to JSON file"""
         if task and task.status == "completed":
             output_path = f"output/{output_file}"
-            with open(output_path, "w") as f:
-                if hasattr(task, 'result') and task.result:
-                    json.dump(task.result, f, indent=2)
-                else:
-                    # If result is directly in task
-                    json.dump({"result": str(task)}, f, indent=2)
+            if hasattr(task, 'result') and task.result:
+                write_json(output_path, task.result)
+            else:
+                # If result is directly in task
+                write_json(output_path, {"result": str(task)})
 
             self.log_execution(f"Result saved to {output_path}")
             return True